@@ -9,21 +9,57 @@ import argparse
 import csv
 import sys
 import os
+import io
 import math
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+import binary_log
+import compact_log
+
+# pandas wird erst bei Bedarf importiert (_pandas): --help und kleine Logs starten ohne den Import
 
 # ---------- Config (Default thresholds) ----------
 DEFAULT_LATENCY_SPIKE_MS = 20        # Ping > 20ms gilt als Spike (anpassbar)
 DEFAULT_LOSS_SPIKE_PCT   = 1.0       # >1% Verlust in Messfenster -> Incident
 MIN_BURST_SECONDS        = 60        # aggregiere Ereignisse zu Bursts ab 60s
+DEFAULT_ROUTER_SLOW_MS   = 1000      # TR-064-Aktionsgruppe > 1000ms -> Box reagiert träge
 TIME_FMT                 = "%Y-%m-%d %H:%M:%S"
 
+# Spalten von fritzlog_pull: Epoch-Millisekunden und Antwortzeit je Aktionsgruppe (lat_<gruppe>_ms)
+TS_MS_COL      = "ts_ms"
+LATENCY_PREFIX = "lat_"
+LATENCY_SUFFIX = "_ms"
+
+# Marker-Zeilen von fritzlog_pull (wan_connection_status), wenn die Box nicht abfragbar war
+FRITZ_POLL_ERROR  = "POLL_ERROR"
+FRITZ_RECONNECTED = "RECONNECTED"
+
+# Logs unter dieser Größe werden ohne pandas gelesen (Import kostet mehr als er spart)
+SMALL_LOG_BYTES = 256 * 1024
+
+# ---------- Lazy imports ----------
+def _pandas():
+    """pandas-Modul oder None (nicht installiert); importiert beim ersten Aufruf."""
+    if "pd" not in globals():
+        try:
+            import pandas
+        except ImportError:
+            pandas = None
+        globals()["pd"] = pandas
+    return globals()["pd"]
+
+def _is_frame(data):
+    """DataFrame-Prüfung, ohne pandas dafür zu importieren."""
+    pd = _pandas() if "pandas" in sys.modules else None
+    return pd is not None and isinstance(data, pd.DataFrame)
+
+def __getattr__(name):
+    # analyze_netlogs.pd bleibt von außen nutzbar (und patchbar)
+    if name == "pd":
+        return _pandas()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # ---------- Helpers ----------
 def parse_time(s):
     for fmt in (TIME_FMT, "%d.%m.%Y %H:%M:%S"):
@@ -37,6 +73,13 @@ def parse_time(s):
     except Exception:
         return None
 
+def ms_to_time(ms):
+    """Epoch-Millisekunden -> lokale (naive) datetime; eindeutig auch bei Zeitumstellung."""
+    try:
+        return datetime.fromtimestamp(int(float(ms)) / 1000)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
 def to_float(x):
     if x is None or x == "":
         return math.nan
@@ -56,122 +99,149 @@ def human_duration(delta: timedelta):
     return f"{hrs}h {m}m"
 
 # ---------- Detection ----------
-def detect_netwatch_incidents(df, lat_thresh, loss_thresh):
+class NetwatchIncidentDetector:
     """
-    Erwartete Spalten in netwatch_log.csv:
-      timestamp,adapter,media_status,ipv4,ipv6_enabled,gateway,dns_ok,dns_ms,
-      ping_<target>_avg_ms,ping_<target>_loss_pct, ...
+    Wendet die NetWatch-Regeln Zeile für Zeile an (hält nur die Vorwerte von adapter/media_status).
+    Gemeinsame Grundlage für detect_netwatch_incidents (Batch) und den Watchdog (fritz_watchdog).
+    Ziele (ping_<ziel>_avg_ms) werden aus `columns` bzw. den Spalten der ersten Zeile bestimmt;
+    `targets` beschränkt die Auswertung auf diese Ziele.
     """
-    incidents = []
-    
-    # Handle both pandas DataFrame and list of dicts
-    is_dataframe = pd is not None and isinstance(df, pd.DataFrame)
-    
-    if is_dataframe:
-        columns = df.columns
-        rows = list(df.iterrows())
-        get_row = lambda idx_row: idx_row[1]
-    else:
-        # List of dicts
-        columns = df[0].keys() if df else []
-        rows = list(enumerate(df))
-        get_row = lambda idx_row: idx_row[1]
-
-    # 1) DNS-Fehler
-    if "dns_ok" in columns:
-        for i, row_data in rows:
-            row = get_row((i, row_data))
-            if str(row.get("dns_ok", "1")) in ("0", "False", "false"):
-                incidents.append({
-                    "source": "PC",
-                    "type": "DNS_FAIL",
-                    "start": row["timestamp"], "end": row["timestamp"],
-                    "details": f"dns_ms={row.get('dns_ms', '')}"
-                })
 
-    # 2) Adapter/Media-Statuswechsel
-    for col in ("adapter", "media_status"):
-        if col in columns and len(df) > 1:
-            prev = None
-            for i, row_data in rows:
-                row = get_row((i, row_data))
-                cur = str(row[col])
+    def __init__(self, lat_thresh=DEFAULT_LATENCY_SPIKE_MS, loss_thresh=DEFAULT_LOSS_SPIKE_PCT, columns=None,
+                 targets=None):
+        self.lat_thresh = lat_thresh
+        self.loss_thresh = loss_thresh
+        self.only = set(targets) if targets else None
+        self.prev = {}
+        self.columns = None
+        self.targets = None
+        if columns is not None:
+            self._set_columns(columns)
+
+    def _set_columns(self, columns):
+        self.columns = set(columns)
+        self.targets = [c[len("ping_"):-len("_avg_ms")] for c in columns
+                        if c.startswith("ping_") and c.endswith("_avg_ms")]
+        if self.only is not None:
+            self.targets = [t for t in self.targets if t in self.only]
+
+    def feed(self, row):
+        """Neue Zeile auswerten; liefert ihre Incidents."""
+        if self.columns is None:
+            self._set_columns(list(row.keys()))
+        incidents = []
+        ts = row["timestamp"]
+
+        # 1) DNS-Fehler
+        if "dns_ok" in self.columns and str(row.get("dns_ok", "1")) in ("0", "False", "false"):
+            incidents.append({
+                "source": "PC",
+                "type": "DNS_FAIL",
+                "start": ts, "end": ts,
+                "details": f"dns_ms={row.get('dns_ms', '')}"
+            })
+
+        # 2) Adapter/Media-Statuswechsel
+        for col in ("adapter", "media_status"):
+            if col in self.columns:
+                cur = str(row.get(col))
+                prev = self.prev.get(col)
                 if prev is not None and cur != prev:
                     incidents.append({
                         "source": "PC",
                         "type": f"{col.upper()}_CHANGE",
-                        "start": row["timestamp"], "end": row["timestamp"],
+                        "start": ts, "end": ts,
                         "details": f"{col}: {prev} -> {cur}"
                     })
-                prev = cur
-
-    # 3) Ping/Verlust je Ziel
-    # Finde dynamisch alle Ziele
-    targets = []
-    for c in columns:
-        if c.startswith("ping_") and c.endswith("_avg_ms"):
-            t = c[len("ping_"):-len("_avg_ms")]
-            targets.append(t)
-
-    for t in targets:
-        avg_col = f"ping_{t}_avg_ms"
-        loss_col = f"ping_{t}_loss_pct"
-        if avg_col not in columns:
-            continue
+                self.prev[col] = cur
 
-        # Latency spikes
-        for i, row_data in rows:
-            row = get_row((i, row_data))
-            ts = row["timestamp"]
-            avg = to_float(row.get(avg_col))
-            if not math.isnan(avg) and avg > lat_thresh:
+        # 3) Ping/Verlust je Ziel
+        for t in self.targets:
+            avg = to_float(row.get(f"ping_{t}_avg_ms"))
+            if not math.isnan(avg) and avg > self.lat_thresh:
                 incidents.append({
                     "source": "PC",
                     "type": "LATENCY_SPIKE",
                     "start": ts, "end": ts,
                     "details": f"{t}: {avg}ms"
                 })
-
-        # Loss spikes
-        if loss_col in columns:
-            for i, row_data in rows:
-                row = get_row((i, row_data))
-                ts = row["timestamp"]
+            loss_col = f"ping_{t}_loss_pct"
+            if loss_col in self.columns:
                 loss = to_float(row.get(loss_col))
-                if not math.isnan(loss) and loss > loss_thresh:
+                if not math.isnan(loss) and loss > self.loss_thresh:
                     incidents.append({
                         "source": "PC",
                         "type": "LOSS_SPIKE",
                         "start": ts, "end": ts,
                         "details": f"{t}: {loss}%"
                     })
+        return incidents
 
-    return incidents
-
-def detect_fritz_incidents(df):
+def detect_netwatch_incidents(df, lat_thresh, loss_thresh):
     """
-    Erwartete Spalten in fritz_status_log.csv:
-      timestamp, wan_connection_status, wan_uptime_s, wan_external_ip,
-      wan_last_error, common_bytes_sent, common_bytes_recv, dsl_link_status
+    Erwartete Spalten in netwatch_log.csv:
+      timestamp,adapter,media_status,ipv4,ipv6_enabled,gateway,dns_ok,dns_ms,
+      ping_<target>_avg_ms,ping_<target>_loss_pct, ...
     """
-    incidents = []
-    
     # Handle both pandas DataFrame and list of dicts
-    is_dataframe = pd is not None and isinstance(df, pd.DataFrame)
-    
+    is_dataframe = _is_frame(df)
+
     if is_dataframe:
-        rows = list(df.iterrows())
-        get_row = lambda idx_row: idx_row[1]
+        columns = list(df.columns)
+        rows = (row for _, row in df.iterrows())
     else:
-        # List of dicts
-        rows = list(enumerate(df))
-        get_row = lambda idx_row: idx_row[1]
-    
-    # Uptime-Reset / Statuswechsel / IP-Wechsel
-    prev = None
-    for i, row_data in rows:
-        row = get_row((i, row_data))
+        # List of dicts: Spalten der ersten Zeile
+        columns = list(df[0].keys()) if df else []
+        rows = iter(df)
+
+    detector = NetwatchIncidentDetector(lat_thresh, loss_thresh, columns)
+    incidents = []
+    for row in rows:
+        incidents.extend(detector.feed(row))
+    return incidents
+
+class FritzIncidentDetector:
+    """
+    Wendet die FRITZ-Regeln Zeile für Zeile an (O(1) pro Zeile, hält nur Vorzeile + offenen Ausfall).
+    Gemeinsame Grundlage für detect_fritz_incidents (Batch) und die Live-Erkennung in fritzlog_pull.
+    """
+
+    def __init__(self, slow_ms=DEFAULT_ROUTER_SLOW_MS):
+        self.prev = None
+        self.gap = None  # laufender Abfrage-Ausfall (POLL_ERROR ... RECONNECTED)
+        self.slow_ms = slow_ms
+        self.slow = None  # laufende Phase mit langsamen TR-064-Antworten (ROUTER_SLOW)
+        self._slowest = 0.0
+
+    def feed(self, row):
+        """Neue Zeile auswerten; liefert die dabei abgeschlossenen Incidents."""
+        incidents = []
         ts = row["timestamp"]
+
+        # Marker-Zeilen: zu einem POLL_ERROR-Incident zusammenfassen, nicht mit prev vergleichen
+        status = str(row.get("wan_connection_status", ""))
+        if status == FRITZ_POLL_ERROR:
+            if self.gap is None:
+                err = row.get("wan_last_error", "")
+                self.gap = {
+                    "source": "FRITZ",
+                    "type": "POLL_ERROR",
+                    "start": ts, "end": ts,
+                    "details": err if isinstance(err, str) else ""
+                }
+            else:
+                self.gap["end"] = ts
+            return incidents
+        if self.gap is not None:
+            self.gap["end"] = ts
+            incidents.append(self.gap)
+            self.gap = None
+        if status == FRITZ_RECONNECTED:
+            return incidents
+
+        incidents.extend(self._check_slow(row, ts))
+
+        prev = self.prev
         if prev is not None:
             # Uptime rückwärts -> Reconnect
             u_now  = to_float(row.get("wan_uptime_s"))
@@ -216,7 +286,66 @@ def detect_fritz_incidents(df):
                 "details": f"dsl_link_status={ls}"
             })
 
-        prev = row
+        self.prev = row
+        return incidents
+
+    def _check_slow(self, row, ts):
+        """Antwortzeiten (lat_*_ms) über slow_ms -> eine ROUTER_SLOW-Phase bis zur ersten schnellen Zeile."""
+        group, worst = None, math.nan
+        for key, value in row.items():
+            if isinstance(key, str) and key.startswith(LATENCY_PREFIX) and key.endswith(LATENCY_SUFFIX):
+                ms = to_float(value)
+                if not math.isnan(ms) and not ms <= worst:
+                    group, worst = key[len(LATENCY_PREFIX):-len(LATENCY_SUFFIX)], ms
+        if group is None:
+            return []  # Log ohne Latenzspalten
+        if worst > self.slow_ms:
+            if self.slow is None:
+                self.slow = {"source": "FRITZ", "type": "ROUTER_SLOW", "start": ts, "end": ts}
+                self._slowest = 0.0
+            self.slow["end"] = ts
+            if worst > self._slowest:
+                self._slowest = worst
+                self.slow["details"] = f"max {group} {worst:.0f}ms"
+            return []
+        return self._close_slow()
+
+    def _close_slow(self):
+        incidents = [self.slow] if self.slow is not None else []
+        self.slow = None
+        return incidents
+
+    def finish(self):
+        """Offenen Ausfall bzw. offene ROUTER_SLOW-Phase am Ende des Logs melden."""
+        incidents = [self.gap] if self.gap is not None else []
+        self.gap = None
+        return incidents + self._close_slow()
+
+def detect_fritz_incidents(df, slow_ms=DEFAULT_ROUTER_SLOW_MS):
+    """
+    Erwartete Spalten in fritz_status_log.csv:
+      timestamp, wan_connection_status, wan_uptime_s, wan_external_ip,
+      wan_last_error, common_bytes_sent, common_bytes_recv, dsl_link_status
+    Marker-Zeilen (wan_connection_status = POLL_ERROR/RECONNECTED) werden zu einem
+    POLL_ERROR-Incident vom ersten Fehler bis zur nächsten gültigen Zeile zusammengefasst.
+    Optional lat_<gruppe>_ms: Zeilen mit einer Antwortzeit > slow_ms bilden ROUTER_SLOW-Phasen.
+    """
+    incidents = []
+    
+    # Handle both pandas DataFrame and list of dicts
+    is_dataframe = _is_frame(df)
+    
+    if is_dataframe:
+        rows = (row for _, row in df.iterrows())
+    else:
+        # List of dicts
+        rows = iter(df)
+    
+    # Uptime-Reset / Statuswechsel / IP-Wechsel / DSL-Link / Abfrage-Ausfälle
+    detector = FritzIncidentDetector(slow_ms)
+    for row in rows:
+        incidents.extend(detector.feed(row))
+    incidents.extend(detector.finish())
 
     return incidents
 
@@ -263,62 +392,189 @@ def aggregate_bursts(incidents, min_span_seconds=MIN_BURST_SECONDS):
 
     return sorted(aggregated, key=lambda x: x["start"])
 
+INCIDENT_HEADER = ["source", "type", "start", "end", "duration", "details"]
+
+def incident_row(ev):
+    """Eine Zeile im Schema von incidents.csv."""
+    return [
+        ev["source"], ev["type"],
+        ev["start"].strftime(TIME_FMT),
+        ev["end"].strftime(TIME_FMT),
+        human_duration(ev["end"] - ev["start"]), ev.get("details", "")
+    ]
+
 # ---------- Main ----------
-def load_csv(path, time_col="timestamp"):
+def _times_from_frame(df, time_col):
+    """Zeitspalte: aus ts_ms vektorisiert (lokale Zeit), nur Zeilen ohne ts_ms per parse_time."""
+    pd = _pandas()
+    # Binär-Logs liefern die Zeitspalte schon als datetime
+    parsed = pd.api.types.is_datetime64_any_dtype(df[time_col])
+    if TS_MS_COL not in df.columns:
+        return df[time_col] if parsed else df[time_col].apply(parse_time)
+    from dateutil.tz import tzlocal
+    ms = pd.to_numeric(df[TS_MS_COL], errors="coerce")
+    fast = ms.notna()
+    times = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    if fast.any():
+        local = pd.to_datetime(ms[fast], unit="ms", utc=True).dt.tz_convert(tzlocal()).dt.tz_localize(None)
+        times[fast] = local.astype("datetime64[ns]")
+    if not fast.all():
+        times[~fast] = df.loc[~fast, time_col] if parsed else pd.to_datetime(df.loc[~fast, time_col].apply(parse_time))
+    return times
+
+def sort_by_time(data, time_col="timestamp"):
+    """
+    Nach Zeit sortieren. Hat jede Zeile ts_ms, ist das der Schlüssel (Ganzzahl statt datetime,
+    eindeutig in der doppelten Stunde bei Zeitumstellung); sonst time_col.
+    """
+    if _is_frame(data):
+        pd = _pandas()
+        key = time_col
+        if TS_MS_COL in data.columns and pd.to_numeric(data[TS_MS_COL], errors="coerce").notna().all():
+            data = data.assign(**{TS_MS_COL: pd.to_numeric(data[TS_MS_COL])})
+            key = TS_MS_COL
+        return data.sort_values(key, kind="stable").reset_index(drop=True)
+    try:
+        return sorted(data, key=lambda r: int(r[TS_MS_COL]))
+    except (KeyError, TypeError, ValueError):
+        return sorted(data, key=lambda r: r.get(time_col))
+
+def load_csv(path, time_col="timestamp", use_pandas=None):
+    # Kompakt-Logs (fritzlog_pull --compact) werden transparent zu vollständigen Zeilen expandiert,
+    # Binär-Logs (binary_log) per numpy.memmap gelesen
+    # use_pandas=None: pandas, wenn installiert; False: immer der Fallback (Liste von dicts)
+    binary = binary_log.is_binary_file(path)
+    compact = not binary and compact_log.is_compact_file(path)
+    pd = _pandas() if use_pandas is not False else None
     if pd is None:
         # Fallback ohne pandas: sehr simple CSV-Reader (langsamer, aber ok)
         rows = []
-        with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        with open(path, newline="", encoding=compact_log.READ_ENCODING) as f:
+            if binary:
+                # Zeitspalten kommen schon als datetime
+                fieldnames, reader = binary_log.iter_rows(path, parse_times=True)
+            elif compact:
+                fieldnames, reader = compact_log.expand_rows(csv.reader(f), time_col)
+            else:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames
             for r in reader:
                 r = dict(r)
                 if time_col in r:
-                    r[time_col] = parse_time(r[time_col])
+                    # ts_ms (fritzlog_pull) ist schneller und eindeutiger als der Zeit-String
+                    t = ms_to_time(r[TS_MS_COL]) if r.get(TS_MS_COL) else None
+                    if t is not None or not isinstance(r[time_col], datetime):
+                        r[time_col] = t if t is not None else parse_time(r[time_col])
                 rows.append(r)
-            fieldnames = reader.fieldnames
         return rows, fieldnames
     else:
-        df = pd.read_csv(path, encoding="utf-8")
+        if binary:
+            # Spalten schon typisiert: kein Zerlegen, kein Typ-Raten
+            arrays, columns = binary_log.column_arrays(path)
+            df = pd.DataFrame(arrays, columns=columns)
+        elif compact:
+            # über einen CSV-Puffer, damit pandas dieselben dtypes ableitet wie beim Normal-Log
+            buf = io.StringIO()
+            with open(path, newline="", encoding=compact_log.READ_ENCODING) as f:
+                fieldnames, reader = compact_log.expand_rows(csv.reader(f), time_col)
+                w = csv.DictWriter(buf, fieldnames=fieldnames)
+                w.writeheader()
+                w.writerows(reader)
+            buf.seek(0)
+            df = pd.read_csv(buf)
+        else:
+            df = pd.read_csv(path, encoding="utf-8")
         if time_col in df.columns:
-            df[time_col] = df[time_col].apply(parse_time)
+            df[time_col] = _times_from_frame(df, time_col)
         # drop rows ohne Zeit
         df = df.dropna(subset=[time_col]).copy()
         return df, list(df.columns)
 
-def main():
+def latency_series(df):
+    """[(ziel, zeiten, ms-werte)] für jede ping_<ziel>_avg_ms-Spalte (DataFrame oder Liste von dicts)."""
+    if _is_frame(df):
+        columns = list(df.columns)
+    else:
+        columns = list(df[0].keys()) if df else []
+    series = []
+    for col in columns:
+        if not (col.startswith("ping_") and col.endswith("_avg_ms")):
+            continue
+        t = col[len("ping_"):-len("_avg_ms")]
+        if _is_frame(df):
+            times, values = list(df["timestamp"]), [to_float(v) for v in df[col]]
+        else:
+            times = [row["timestamp"] for row in df if col in row]
+            values = [to_float(row.get(col)) for row in df if col in row]
+        if times:
+            series.append((t, times, values))
+    return series
+
+def plot_latency(target, times, values, output_path):
+    """Latenzverlauf eines Ziels als PNG (läuft auch in einem Worker-Prozess)."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure()
+    plt.plot(times, values)
+    plt.title(f"Latency: {target}")
+    plt.xlabel("Zeit"); plt.ylabel("ms")
+    plt.tight_layout()
+    plt.savefig(output_path)
+    plt.close()
+
+def choose_engine(engine, paths):
+    """auto: pandas nur für Logs ab SMALL_LOG_BYTES (und nur, wenn installiert)."""
+    if engine == "python":
+        return False
+    if engine == "pandas":
+        return True
+    try:
+        return max(os.path.getsize(p) for p in paths) >= SMALL_LOG_BYTES and _pandas() is not None
+    except OSError:
+        return None
+
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Analyze NetWatch + FRITZ!Box CSV logs and detect incidents.")
     ap.add_argument("--netwatch", required=True, help="Pfad zu netwatch_log.csv")
     ap.add_argument("--fritz", required=True, help="Pfad zu fritz_status_log.csv")
     ap.add_argument("--out", default="incidents.csv", help="Ausgabe-CSV für Incidents")
     ap.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SPIKE_MS, help="Latency-Spike-Schwelle in ms (default 20)")
     ap.add_argument("--loss", type=float, default=DEFAULT_LOSS_SPIKE_PCT, help="Loss-Spike-Schwelle in %% (default 1.0)")
-    ap.add_argument("--plots", action="store_true", help="Einfache Plots erstellen (benötigt matplotlib+pandas)")
-    args = ap.parse_args()
+    ap.add_argument("--router-slow", type=float, default=DEFAULT_ROUTER_SLOW_MS,
+                    help="ROUTER_SLOW ab dieser Antwortzeit einer TR-064-Aktionsgruppe in ms (default 1000)")
+    ap.add_argument("--plots", action="store_true", help="Einfache Plots erstellen (benötigt matplotlib)")
+    ap.add_argument("--jobs", type=int, default=0,
+                    help="Prozesse für --plots: 0 = einer je Ziel, 1 = ohne Worker-Prozesse (default: 0)")
+    ap.add_argument("--engine", choices=("auto", "pandas", "python"), default="auto",
+                    help="CSV-Einlesen: auto = pandas erst ab %d KiB Loggröße (default: auto)" % (SMALL_LOG_BYTES // 1024))
+    ap.add_argument("--rtt", default=None,
+                    help="RTT-Binärlog von netwatch_probe.py --rtt-out: Perzentile, Jitter und Verlust je Ziel")
+    args = ap.parse_args(argv)
 
     # Laden
-    nw, _ = load_csv(args.netwatch)
-    fr, _ = load_csv(args.fritz)
+    use_pandas = choose_engine(args.engine, (args.netwatch, args.fritz))
+    nw, _ = load_csv(args.netwatch, use_pandas=use_pandas)
+    fr, _ = load_csv(args.fritz, use_pandas=use_pandas)
 
-    # in DataFrames konvertieren (wenn pandas vorhanden)
+    # in DataFrames konvertieren (wenn pandas verwendet wird)
+    pd = _pandas() if use_pandas is not False else None
     if pd is not None:
         df_nw = nw if isinstance(nw, pd.DataFrame) else pd.DataFrame(nw)
         df_fr = fr if isinstance(fr, pd.DataFrame) else pd.DataFrame(fr)
     else:
-        print("Hinweis: pandas nicht installiert - Fallback-Modus (langsamer)")
+        if use_pandas is not False:
+            print("Hinweis: pandas nicht installiert - Fallback-Modus (langsamer)")
         df_nw = nw
         df_fr = fr
 
     # Sortieren
-    if pd is not None:
-        df_nw = df_nw.sort_values("timestamp").reset_index(drop=True)
-        df_fr = df_fr.sort_values("timestamp").reset_index(drop=True)
-    else:
-        df_nw = sorted(df_nw, key=lambda r: r.get("timestamp"))
-        df_fr = sorted(df_fr, key=lambda r: r.get("timestamp"))
+    df_nw = sort_by_time(df_nw)
+    df_fr = sort_by_time(df_fr)
 
     # Detektion
     inc_nw = detect_netwatch_incidents(df_nw, args.latency, args.loss)
-    inc_fr = detect_fritz_incidents(df_fr)
+    inc_fr = detect_fritz_incidents(df_fr, args.router_slow)
     incidents = inc_nw + inc_fr
     # Bursts aggregieren
     incidents = aggregate_bursts(incidents)
@@ -326,15 +582,9 @@ def main():
     # Ausgabe CSV
     with open(args.out, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-        w.writerow(["source","type","start","end","duration","details"])
+        w.writerow(INCIDENT_HEADER)
         for ev in incidents:
-            dur = human_duration(ev["end"] - ev["start"])
-            w.writerow([
-                ev["source"], ev["type"],
-                ev["start"].strftime(TIME_FMT),
-                ev["end"].strftime(TIME_FMT),
-                dur, ev.get("details","")
-            ])
+            w.writerow(incident_row(ev))
 
     # Konsole: kurze Zusammenfassung
     print(f"\nIncidents geschrieben nach: {os.path.abspath(args.out)}")
@@ -345,41 +595,27 @@ def main():
         for ev in incidents:
             print(f"- [{ev['source']}/{ev['type']}] {ev['start'].strftime(TIME_FMT)} - {ev['end'].strftime(TIME_FMT)} ({human_duration(ev['end']-ev['start'])}) {(' | ' + ev['details']) if ev.get('details') else ''}")
 
-    # Optional Plots
-    if args.plots and pd is not None:
+    # Einzelwerte aus dem RTT-Nebenlog (per numpy.memmap, ohne CSV-Parsen)
+    if args.rtt:
+        import rtt_log
+        header, records = rtt_log.load_records(args.rtt)
+        print(f"\nAntwortzeiten je Ziel ({len(records)} Anfragen aus {args.rtt}):")
+        rtt_log.print_stats(rtt_log.target_stats(records, header["targets"]))
+
+    # Optional Plots: je Ziel ein eigener Prozess (visualize_incidents.render_figures), atomar geschrieben
+    if args.plots:
         try:
-            import matplotlib.pyplot as plt
-            # einfache Ping-Plot je Ziel
-            is_dataframe = isinstance(df_nw, pd.DataFrame)
-            if is_dataframe:
-                targets = [c[len("ping_"):-len("_avg_ms")] for c in df_nw.columns if c.startswith("ping_") and c.endswith("_avg_ms")]
-            else:
-                # For list of dicts, get columns from first row
-                targets = [c[len("ping_"):-len("_avg_ms")] for c in df_nw[0].keys() if c.startswith("ping_") and c.endswith("_avg_ms")] if df_nw else []
-            
-            for t in targets:
-                col = f"ping_{t}_avg_ms"
-                if is_dataframe:
-                    if col in df_nw.columns:
-                        plt.figure()
-                        plt.plot(df_nw["timestamp"], df_nw[col])
-                        plt.title(f"Latency: {t}")
-                        plt.xlabel("Zeit"); plt.ylabel("ms")
-                        plt.tight_layout()
-                        plt.savefig(f"latency_{t}.png")
-                        plt.close()
-                else:
-                    # For list of dicts, extract data manually
-                    timestamps = [row["timestamp"] for row in df_nw if col in row]
-                    values = [to_float(row.get(col)) for row in df_nw if col in row]
-                    if timestamps and values:
-                        plt.figure()
-                        plt.plot(timestamps, values)
-                        plt.title(f"Latency: {t}")
-                        plt.xlabel("Zeit"); plt.ylabel("ms")
-                        plt.tight_layout()
-                        plt.savefig(f"latency_{t}.png")
-                        plt.close()
+            import visualize_incidents
+            jobs = []
+            for t, times, values in latency_series(df_nw):
+                jobs.append((plot_latency, (t, times, values), os.path.abspath(f"latency_{t}.png")))
+            futures, executor = visualize_incidents.render_figures(jobs, args.jobs)
+            try:
+                for future in futures.values():
+                    future.result()
+            finally:
+                if executor is not None:
+                    executor.shutdown()
             print("[*] Plots gespeichert (latency_*.png).")
         except Exception as e:
             print(f"(Plots uebersprungen: {e})")
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# binary_log.py
+# Binäres Log-Format (feste Satzlänge, nur anhängen) für netwatch_log.csv und fritz_status_log.csv.
+# Der Analyzer liest die Sätze per numpy.memmap direkt als strukturiertes Array, ohne CSV zu
+# zerlegen, Zeitstempel zu parsen oder Typen zu raten. Beide Richtungen CSV <-> Binär sind
+# verlustfrei: jede Zelle kommt als derselbe Text zurück.
+#
+# Dateiformat (Grundlage record_log.py):
+#   Zeile 1: b"NWBIN1\n"
+#   Zeile 2: JSON-Kopf {"kind", "columns": [[name, typ], ...], "targets", "record"},
+#            mit Leerzeichen aufgefüllt, sodass die Sätze bei einem Vielfachen von 8 Byte beginnen
+#   danach Einträge gleicher Länge (mindestens 16 Byte); das erste Byte sagt, was drinsteht:
+#     0  Satz im Layout "record" (little endian, Felder auf ihre Größe ausgerichtet)
+#     1  Text: uint32 Länge in Byte ab Offset 4, UTF-8 ab Offset 8
+#     2  Fortsetzung eines Texts, der nicht in einen Eintrag passt (UTF-8 ab Offset 8)
+#   Texte bekommen in der Reihenfolge ihrer Einträge die Nummern 1, 2, ... und stehen immer vor
+#   dem ersten Satz, der sie benutzt; die Datei ist damit allein vollständig.
+#
+# Spaltentypen (leere Zelle in Klammern):
+#   time    int64, Sekunden der naiven Zeit "YYYY-MM-DD HH:MM:SS" ab 1970 (INT64_MIN)
+#   int     int64 (INT64_MIN)
+#   float   float64, Text wie repr() in Python, z. B. "12.0" (NaN)
+#   number  float64, ganze Werte ohne ".0", z. B. "12" oder "12.5" wie in NetWatch.ps1 (NaN)
+#   str     uint32, Nummer des Texts (0)
+#
+#   python3 binary_log.py to-binary netwatch_log.csv netwatch_log.bin
+#   python3 binary_log.py to-csv netwatch_log.bin netwatch_log.csv
+
+import argparse
+import csv
+import math
+import os
+import re
+import struct
+from datetime import datetime, timedelta
+
+import compact_log
+import record_log
+
+MAGIC = b"NWBIN1\n"
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+INT_EMPTY = -2**63
+# erstes Byte eines Eintrags
+SLOT_ROW, SLOT_TEXT, SLOT_MORE = 0, 1, 2
+TEXT_HEAD = struct.Struct("<B3xI")
+MIN_RECORD = 16
+
+# Typ -> (struct-Code, numpy-Typ)
+TYPES = {
+    "time": ("q", "<i8"),
+    "int": ("q", "<i8"),
+    "float": ("d", "<f8"),
+    "number": ("d", "<f8"),
+    "str": ("I", "<u4"),
+}
+# Reihenfolge beim Ableiten aus einer CSV: der erste passende Typ gewinnt
+INFER_ORDER = ("time", "int", "float", "number")
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+_NOT_ROW = re.compile(rb"[^\x00]")
+
+
+def layout(columns) -> tuple[str, list[int], int]:
+    """
+    (struct-Format, Offsets, Satzlänge): nach dem Kennbyte (im Format ein Füllbyte, also SLOT_ROW)
+    jedes Feld auf seine Größe ausgerichtet, Satz auf 8 Byte und mindestens MIN_RECORD.
+    """
+    fmt, offsets, pos = "<x", [], 1
+    for _, typ in columns:
+        code = TYPES[typ][0]
+        size = struct.calcsize("<" + code)
+        pad = -pos % size
+        fmt += f"{pad}x" * bool(pad) + code
+        offsets.append(pos + pad)
+        pos += pad + size
+    pad = -pos % 8 + max(MIN_RECORD - pos - -pos % 8, 0)
+    return fmt + f"{pad}x" * bool(pad), offsets, pos + pad
+
+
+# ---------- Zellen ----------
+def _strict(value: str, typ: str, encoded):
+    if decode_value(typ, encoded) != value:
+        raise ValueError(f"{value!r} ist kein verlustfreier {typ}-Wert")
+    return encoded
+
+
+def encode_value(typ: str, value):
+    """
+    Zelle -> Feldwert (ohne str: dafür vergibt der Writer Nummern). Text muss sich exakt
+    zurückverwandeln lassen, sonst ValueError; Python-Zahlen werden übernommen.
+    """
+    if value is None or value == "":
+        return INT_EMPTY if typ in ("time", "int") else math.nan
+    if typ == "time":
+        if isinstance(value, datetime):
+            return (value.replace(microsecond=0) - _EPOCH) // _SECOND
+        # fromisoformat ist viel schneller als strptime; _strict lehnt alles außer TIME_FMT ab
+        return _strict(value, typ, (datetime.fromisoformat(value) - _EPOCH) // _SECOND)
+    if typ == "int":
+        if isinstance(value, str):
+            n = int(value)
+            if n == INT_EMPTY or not -2**63 < n < 2**63:
+                raise ValueError(f"{value!r} passt nicht in int64")
+            return _strict(value, typ, n)
+        if isinstance(value, float) or not -2**63 < value < 2**63:
+            raise ValueError(f"{value!r} ist kein int64")
+        return int(value)
+    if isinstance(value, str):
+        return _strict(value, typ, float(value))
+    return float(value)
+
+
+def decode_value(typ: str, raw) -> str:
+    """Feldwert -> Text der CSV-Zelle."""
+    if typ in ("time", "int"):
+        if raw == INT_EMPTY:
+            return ""
+        return (_EPOCH + timedelta(seconds=raw)).isoformat(" ") if typ == "time" else str(raw)
+    if math.isnan(raw):
+        return ""
+    if typ == "number" and raw.is_integer() and abs(raw) < 2**53:
+        return str(int(raw))
+    return repr(raw)
+
+
+class TypeGuess:
+    """
+    Engt den Typ einer Spalte Wert für Wert ein: es bleiben die Typen aus INFER_ORDER, die alle bisher
+    gesehenen (nicht leeren) Werte verlustfrei speichern. Merkt sich nur den letzten Wert, nicht alle.
+    """
+
+    def __init__(self):
+        self.candidates = list(INFER_ORDER)
+        self.seen = False
+        self._last = None
+
+    def add(self, value) -> None:
+        if not value or value == self._last or not self.candidates:
+            return
+        self.seen = True
+        self._last = value
+        self.candidates = [typ for typ in self.candidates if _fits(typ, value)]
+
+    @property
+    def type(self) -> str:
+        """Erster verbliebener Typ; str, wenn keiner passt oder nur leere Werte kamen."""
+        return self.candidates[0] if self.seen and self.candidates else "str"
+
+
+def _fits(typ: str, value) -> bool:
+    try:
+        encode_value(typ, value)
+    except (ValueError, TypeError, OverflowError):
+        return False
+    return True
+
+
+def infer_type(values) -> str:
+    """Erster Typ aus INFER_ORDER, der alle (nicht leeren) Werte verlustfrei speichert; sonst str."""
+    guess = TypeGuess()
+    for value in values:
+        guess.add(value)
+    return guess.type
+
+
+# ---------- Texte ----------
+class TextTable:
+    """Texte eines Binär-Logs in der Reihenfolge ihrer Einträge; Index = Nummer im Satz (0 = leer)."""
+
+    def __init__(self):
+        self.strings = [""]
+        self.pending_slots = 0  # Einträge eines noch unvollständigen Texts (Abbruch beim Schreiben)
+        self._length = 0
+        self._data = bytearray()
+
+    def feed(self, slot: bytes) -> None:
+        """Einen Text-Eintrag (SLOT_TEXT oder SLOT_MORE) übernehmen."""
+        tag, length = TEXT_HEAD.unpack_from(slot)
+        if tag == SLOT_TEXT:
+            self._length, self._data, self.pending_slots = length, bytearray(), 0
+        elif not self.pending_slots:
+            return  # Fortsetzung ohne Anfang
+        self._data += slot[TEXT_HEAD.size:TEXT_HEAD.size + self._length - len(self._data)]
+        self.pending_slots += 1
+        if len(self._data) >= self._length:
+            self.strings.append(self._data.decode("utf-8"))
+            self.pending_slots = 0
+
+
+def text_slots(text: str, size: int) -> bytes:
+    """Einträge für einen Text: SLOT_TEXT, bei Bedarf gefolgt von SLOT_MORE; jeweils mit der Gesamtlänge."""
+    data = text.encode("utf-8")
+    room = size - TEXT_HEAD.size
+    slots = []
+    for pos in range(0, len(data), room):
+        part = data[pos:pos + room]
+        slots.append(TEXT_HEAD.pack(SLOT_MORE if pos else SLOT_TEXT, len(data)) + part + bytes(room - len(part)))
+    return b"".join(slots)
+
+
+def iter_values(chunk: bytes, record: struct.Struct, texts: TextTable):
+    """Werte der Sätze eines Blocks ganzer Einträge; Text-Einträge gehen unterwegs an texts."""
+    size = record.size
+    if not chunk[::size].strip(b"\0"):
+        yield from record.iter_unpack(chunk)  # nur Sätze
+        return
+    for pos in range(0, len(chunk), size):
+        if chunk[pos] == SLOT_ROW:
+            yield record.unpack_from(chunk, pos)
+        else:
+            texts.feed(chunk[pos:pos + size])
+
+
+def read_texts(path: str, end: int | None = None) -> TextTable:
+    """Alle Texte bis Byte end (Standard: Dateiende); liest dafür nur die Text-Einträge aus."""
+    header, offset = read_header(path)
+    size = struct.calcsize(header["record"])
+    texts = TextTable()
+    for chunk in record_log.iter_chunks(path, offset, size, end):
+        for m in _NOT_ROW.finditer(chunk[::size]):
+            pos = m.start() * size
+            texts.feed(chunk[pos:pos + size])
+    return texts
+
+
+def read_strings(path: str) -> list[str]:
+    """Texte des Logs; Index = Nummer im Satz (0 = leer)."""
+    return read_texts(path).strings
+
+
+# ---------- Schreiben ----------
+def read_header(path: str) -> tuple[dict, int]:
+    """(JSON-Kopf, Offset der Daten)."""
+    header, offset = record_log.read_header(path, MAGIC, "Binär-Log")
+    header["columns"] = [tuple(c) for c in header["columns"]]
+    if header["record"] != layout(header["columns"])[0]:
+        raise ValueError(f"{path}: Satzformat passt nicht zu den Spalten")
+    return header, offset
+
+
+def is_binary_file(path: str) -> bool:
+    """Prüft anhand der ersten Bytes, ob die Datei ein Binär-Log ist."""
+    return record_log.has_magic(path, MAGIC)
+
+
+def targets_of(columns) -> list[str]:
+    """Ping-Ziele aus den Spaltennamen (ping_<ziel>_avg_ms)."""
+    names = [c if isinstance(c, str) else c[0] for c in columns]
+    return [c[len("ping_"):-len("_avg_ms")] for c in names if c.startswith("ping_") and c.endswith("_avg_ms")]
+
+
+class BinaryLogWriter(record_log.RecordWriter):
+    """
+    Hängt Zeilen (dicts, Werte als Text oder Zahl) an ein Binär-Log an; beim Fortsetzen müssen
+    die Spalten zum Kopf passen. Ein neuer Text wird als eigener Eintrag vor den ersten Satz geschrieben,
+    der ihn benutzt.
+    """
+
+    def __init__(self, path: str, columns, kind: str = ""):
+        self.columns = [tuple(c) for c in columns]
+        self.record = struct.Struct(layout(self.columns)[0])
+        header = {"kind": kind, "columns": [list(c) for c in self.columns], "targets": targets_of(self.columns),
+                  "record": self.record.format}
+        super().__init__(path, MAGIC, header, self.record.size, read_header, self._mismatch, align=8)
+        end = self.file.tell()
+        texts = read_texts(path, end) if end > self.offset else TextTable()
+        if texts.pending_slots:
+            self.truncate(end - texts.pending_slots * self.size)  # angefangenen Text verwerfen
+        self._codes = {s: i for i, s in enumerate(texts.strings)}
+
+    def _mismatch(self, header: dict) -> str | None:
+        if header["columns"] != self.columns:
+            return f"Spalten {[c[0] for c in header['columns']]}"
+        return None
+
+    def _code(self, value, slots: list) -> int:
+        text = "" if value is None else str(value)
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = len(self._codes)
+            slots.append(text_slots(text, self.size))
+        return code
+
+    def encode(self, row: dict) -> bytes:
+        """Einträge für eine Zeile: neue Texte, dann der Satz."""
+        fields = []
+        for name, typ in self.columns:
+            value = row.get(name)
+            if typ == "str":
+                fields.append(value)
+                continue
+            try:
+                fields.append(encode_value(typ, value))
+            except (ValueError, TypeError, OverflowError) as e:
+                raise ValueError(f"Spalte {name}: {e}") from None
+        # Texte erst vergeben, wenn alle Zahlen passen: eine abgelehnte Zeile hinterlässt nichts
+        slots = []
+        fields = [self._code(v, slots) if typ == "str" else v for (_, typ), v in zip(self.columns, fields)]
+        return b"".join(slots) + self.record.pack(*fields)
+
+    def write(self, row: dict) -> None:
+        """Zeile puffern; flush() schreibt sie. ValueError, wenn ein Wert nicht zum Spaltentyp passt."""
+        self.file.write(self.encode(row))
+
+
+# ---------- Lesen ----------
+def record_dtype(columns):
+    import numpy as np
+    _, offsets, itemsize = layout(columns)
+    return np.dtype({"names": [name for name, _ in columns], "formats": [TYPES[typ][1] for _, typ in columns],
+                     "offsets": offsets, "itemsize": itemsize})
+
+
+def load_records(path: str):
+    """
+    (Kopf, Sätze, Texte); die Sätze liegen als numpy.memmap vor und werden nicht vorab gelesen.
+    Enthält die Datei Text-Einträge, sind die Sätze eine Auswahl daraus (eine Kopie).
+    """
+    import numpy as np
+    header, offset = read_header(path)
+    dtype = record_dtype(header["columns"])
+    records = record_log.load_memmap(path, offset, dtype)
+    slots = record_log.load_memmap(path, offset, np.dtype((np.uint8, dtype.itemsize)))
+    texts = TextTable()
+    is_text = slots[:, 0] != SLOT_ROW
+    if is_text.any():
+        for i in np.flatnonzero(is_text):
+            texts.feed(slots[i].tobytes())
+        records = records[~is_text]
+    return header, records, texts.strings
+
+
+def column_arrays(path: str) -> tuple[dict, list[str]]:
+    """
+    Spalten als numpy-Arrays mit den dtypes, die pandas.read_csv für die CSV ableiten würde:
+    time -> datetime64 (NaT), int -> int64 bzw. float64 mit NaN bei Lücken, str -> object (NaN = leer).
+    """
+    import numpy as np
+    header, records, strings = load_records(path)
+    table = np.array([np.nan] + strings[1:], dtype=object)
+    arrays = {}
+    for name, typ in header["columns"]:
+        raw = records[name]
+        if typ == "str":
+            arrays[name] = table[raw]
+        elif typ == "time":
+            times = raw.astype("datetime64[s]")
+            times[raw == INT_EMPTY] = np.datetime64("NaT")
+            arrays[name] = times
+        elif typ == "int":
+            empty = raw == INT_EMPTY
+            arrays[name] = np.where(empty, np.nan, raw) if empty.any() else np.array(raw)
+        else:
+            arrays[name] = np.array(raw)
+    return arrays, [name for name, _ in header["columns"]]
+
+
+def _decoder(typ: str, strings: list[str], parse_times: bool):
+    if typ == "str":
+        return strings.__getitem__
+    if typ == "time" and parse_times:
+        return lambda v: None if v == INT_EMPTY else _EPOCH + timedelta(seconds=v)
+    if typ == "int":
+        return lambda v: "" if v == INT_EMPTY else str(v)
+    if typ == "float":
+        return lambda v: "" if v != v else repr(v)
+    return lambda v: decode_value(typ, v)
+
+
+def iter_rows(path: str, parse_times: bool = False):
+    """
+    (Spalten, Zeilen als dicts mit Text wie csv.DictReader); ohne numpy.
+    parse_times: time-Spalten als datetime (None = leer) statt als Text.
+    """
+    header, offset = read_header(path)
+    columns = [name for name, _ in header["columns"]]
+    record = struct.Struct(header["record"])
+    texts = TextTable()
+    decoders = [_decoder(typ, texts.strings, parse_times) for _, typ in header["columns"]]
+
+    def _rows():
+        for chunk in record_log.iter_chunks(path, offset, record.size):
+            for values in iter_values(chunk, record, texts):
+                yield dict(zip(columns, [d(v) for d, v in zip(decoders, values)]))
+
+    return columns, _rows()
+
+
+# ---------- Umwandeln ----------
+def _csv_rows(path: str):
+    """(Kopf, Zeilen) einer normalen oder kompakten CSV (fritzlog_pull --compact)."""
+    f = open(path, newline="", encoding=compact_log.READ_ENCODING)
+    reader = csv.reader(f)
+    if compact_log.is_compact_file(path):
+        header, rows = compact_log.expand_rows(reader)
+    else:
+        header = next(reader, [])
+        rows = (dict(zip(header, r)) for r in reader)
+    return f, header, rows
+
+
+def csv_to_binary(csv_path: str, out_path: str, kind: str = "") -> int:
+    """
+    CSV -> Binär-Log in zwei Durchgängen: erst die Spaltentypen beim Lesen einengen (konstanter
+    Speicher), dann schreiben. Liefert die Anzahl Zeilen.
+    """
+    f, header, rows = _csv_rows(csv_path)
+    guesses = [TypeGuess() for _ in header]
+    with f:
+        for row in rows:
+            for name, guess in zip(header, guesses):
+                guess.add(row.get(name))
+    columns = [(name, guess.type) for name, guess in zip(header, guesses)]
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    writer = BinaryLogWriter(out_path, columns, kind)
+    n = 0
+    f, _, rows = _csv_rows(csv_path)
+    try:
+        with f:
+            for n, row in enumerate(rows, start=1):
+                writer.write(row)
+    finally:
+        writer.close()
+    return n
+
+
+def binary_to_csv(path: str, out_path: str) -> int:
+    """Binär-Log -> CSV. Liefert die Anzahl Zeilen."""
+    columns, rows = iter_rows(path)
+    n = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as out:
+        w = csv.writer(out)
+        w.writerow(columns)
+        for n, row in enumerate(rows, start=1):
+            w.writerow(row.values())
+    return n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="NetWatch-/FRITZ-Logs verlustfrei zwischen CSV und Binär-Format umwandeln")
+    sub = ap.add_subparsers(dest="direction", required=True)
+    to_bin = sub.add_parser("to-binary", help="CSV (auch Kompakt-Format) -> Binär-Log")
+    to_bin.add_argument("input", help="Pfad zur CSV")
+    to_bin.add_argument("output", help="Pfad zum Binär-Log")
+    to_bin.add_argument("--kind", default="", help="Art des Logs im Kopf, z. B. netwatch oder fritz")
+    to_csv = sub.add_parser("to-csv", help="Binär-Log -> CSV")
+    to_csv.add_argument("input", help="Pfad zum Binär-Log")
+    to_csv.add_argument("output", help="Pfad zur Ausgabe-CSV")
+    args = ap.parse_args(argv)
+    if args.direction == "to-binary":
+        n = csv_to_binary(args.input, args.output, args.kind)
+        types = ", ".join(f"{name}:{typ}" for name, typ in read_header(args.output)[0]["columns"])
+        print(f"✓ {n} Zeilen → {args.output} ({types})")
+    else:
+        n = binary_to_csv(args.input, args.output)
+        print(f"✓ {n} Zeilen → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
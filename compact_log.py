@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# compact_log.py
+# Kompaktes CSV-Format (Keyframes + Deltas) für hochfrequente Status-Logs.
+#
+# Aufbau: normale CSV-Datei, erste Spalte heißt "rec".
+#   K-Zeile: Keyframe, alle Werte im Klartext (wie im normalen Log).
+#   D-Zeile: Delta zur Vorzeile, pro Zelle:
+#       ""        -> Wert unverändert
+#       "~"       -> Wert ist leer
+#       "+N"/"-N" -> Vorwert + N (Ganzzahlen; bei Zeitstempeln Sekunden)
+#       "\..."    -> Literal (Escape für Werte, die mit + - ~ \ beginnen)
+#       sonst     -> Literal
+
+import argparse
+import csv
+from datetime import datetime, timedelta
+
+REC_COL = "rec"
+KEYFRAME = "K"
+DELTA = "D"
+EMPTY = "~"
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_KEYFRAME_EVERY = 300
+# Lesen: ein BOM (Excel, PowerShell) gehört nicht zur ersten Spalte; alle Leser von Kompakt-Logs nutzen das
+READ_ENCODING = "utf-8-sig"
+
+_ESCAPE_PREFIXES = ("+", "-", "~", "\\")
+
+
+def _as_int(value: str):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_time(value: str):
+    try:
+        return datetime.strptime(value, TIME_FMT)
+    except (TypeError, ValueError):
+        return None
+
+
+def _escape(value: str) -> str:
+    if value.startswith(_ESCAPE_PREFIXES):
+        return "\\" + value
+    return value
+
+
+def _signed(n: int) -> str:
+    return f"+{n}" if n >= 0 else str(n)
+
+
+class CompactEncoder:
+    """
+    Wandelt vollständige Zeilen in K/D-Zeilen um. Hält nur die Vorzeile im Speicher.
+    Alle `keyframe_every` Zeilen (und bei der ersten Zeile) wird ein Keyframe geschrieben,
+    damit Dateien nach Abbruch/Neustart wieder lesbar sind.
+    """
+
+    def __init__(self, header: list[str], time_col: str = "timestamp",
+                 keyframe_every: int = DEFAULT_KEYFRAME_EVERY):
+        self.header = list(header)
+        self.time_col = time_col
+        self.keyframe_every = max(1, keyframe_every)
+        self._prev = None
+        self._since_key = 0
+
+    def file_header(self) -> list[str]:
+        return [REC_COL] + self.header
+
+    def reset(self) -> None:
+        """Erzwingt einen Keyframe für die nächste Zeile."""
+        self._prev = None
+
+    def encode(self, row: dict) -> list[str]:
+        values = ["" if row.get(h) is None else str(row.get(h)) for h in self.header]
+        if self._prev is None or self._since_key >= self.keyframe_every:
+            self._prev = values
+            self._since_key = 1
+            return [KEYFRAME] + values
+
+        out = [DELTA]
+        for h, prev, cur in zip(self.header, self._prev, values):
+            out.append(self._encode_cell(h, prev, cur))
+        self._prev = values
+        self._since_key += 1
+        return out
+
+    def _encode_cell(self, col: str, prev: str, cur: str) -> str:
+        if cur == prev:
+            return ""
+        if cur == "":
+            return EMPTY
+        if col == self.time_col:
+            t_prev, t_cur = _as_time(prev), _as_time(cur)
+            if t_prev is not None and t_cur is not None:
+                secs = int((t_cur - t_prev).total_seconds())
+                if (t_prev + timedelta(seconds=secs)).strftime(TIME_FMT) == cur:
+                    return _signed(secs)
+            return _escape(cur)
+        i_prev, i_cur = _as_int(prev), _as_int(cur)
+        if i_prev is not None and i_cur is not None and str(i_cur) == cur:
+            return _signed(i_cur - i_prev)
+        return _escape(cur)
+
+
+def _decode_cell(col: str, prev: str, cell: str, time_col: str) -> str:
+    if cell == "":
+        return prev
+    if cell == EMPTY:
+        return ""
+    if cell[0] == "\\":
+        return cell[1:]
+    if cell[0] in "+-":
+        n = int(cell)
+        if col == time_col:
+            return (datetime.strptime(prev, TIME_FMT) + timedelta(seconds=n)).strftime(TIME_FMT)
+        return str(int(prev) + n)
+    return cell
+
+
+class CompactDecoder:
+    """Dekodiert K/D-Zeilen einzeln (z. B. beim Mitlesen eines wachsenden Logs). Hält nur die Vorzeile."""
+
+    def __init__(self, header: list[str], time_col: str = "timestamp"):
+        self.header = list(header)
+        self.time_col = time_col
+        self._prev = None
+
+    def decode(self, rec: list[str]) -> dict | None:
+        """Vollständige Zeile als dict; None für leere Zeilen und D-Zeilen vor dem ersten Keyframe."""
+        if not rec:
+            return None
+        kind, cells = rec[0], rec[1:] + [""] * (len(self.header) + 1 - len(rec))
+        if kind == KEYFRAME:
+            self._prev = cells[:len(self.header)]
+        elif kind == DELTA and self._prev is not None:
+            self._prev = [_decode_cell(h, p, c, self.time_col)
+                          for h, p, c in zip(self.header, self._prev, cells)]
+        else:
+            return None
+        return dict(zip(self.header, self._prev))
+
+
+def expand_rows(reader, time_col: str = "timestamp"):
+    """
+    Erwartet einen csv.reader, dessen erste Zeile der Kompakt-Header ist.
+    Liefert (header, Generator über vollständige dict-Zeilen).
+    D-Zeilen vor dem ersten Keyframe werden übersprungen.
+    """
+    file_header = next(reader)
+    if not file_header or file_header[0] != REC_COL:
+        raise ValueError("kein Kompakt-Log (erste Spalte muss 'rec' sein)")
+    header = file_header[1:]
+    decoder = CompactDecoder(header, time_col)
+
+    def _rows():
+        for rec in reader:
+            row = decoder.decode(rec)
+            if row is not None:
+                yield row
+
+    return header, _rows()
+
+
+def is_compact_file(path: str) -> bool:
+    """Prüft anhand der ersten Zeile, ob die Datei im Kompakt-Format vorliegt."""
+    with open(path, newline="", encoding=READ_ENCODING) as f:
+        first = f.readline()
+    return first.split(",", 1)[0].strip() == REC_COL
+
+
+def expand_file(path: str, out_path: str, time_col: str = "timestamp") -> int:
+    """Schreibt ein Kompakt-Log als normale CSV. Gibt die Anzahl Zeilen zurück."""
+    n = 0
+    with open(path, newline="", encoding=READ_ENCODING) as f_in, \
+            open(out_path, "w", newline="", encoding="utf-8") as f_out:
+        header, rows = expand_rows(csv.reader(f_in), time_col)
+        w = csv.writer(f_out)
+        w.writerow(header)
+        for row in rows:
+            w.writerow([row[h] for h in header])
+            n += 1
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Kompakt-Log (K/D-Zeilen) in normale CSV umwandeln")
+    ap.add_argument("input", help="Pfad zum Kompakt-Log")
+    ap.add_argument("output", help="Pfad zur Ausgabe-CSV")
+    args = ap.parse_args()
+    n = expand_file(args.input, args.output)
+    print(f"{n} Zeilen nach {args.output} geschrieben.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# fritz_fleet_restart.py
+# Rollierender Neustart vieler FRITZ!Boxen auf Basis von fritzbox_restart (reboot_fritzbox mit --wait).
+#
+# - Hostliste: eine Box pro Zeile, "host" oder "host:port" (TR-064-Port), '#' leitet Kommentare ein
+# - je Batch bis zu --concurrency Boxen gleichzeitig; jede Box wird neu gestartet und bis
+#   external_ip geprüft - der Batch ist fertig, wenn seine langsamste Box wieder online ist
+# - der nächste Batch startet erst danach; liegt die Fehlerquote eines Batches über
+#   --max-failure-rate, wird der Rollout abgebrochen (restliche Boxen bleiben unangetastet)
+# Laufzeit: Summe der langsamsten Box je Batch statt Summe aller Neustarts.
+#
+# Ergebnisse je Box landen im Restart-Journal von fritzbox_restart (--journal).
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import fritzbox_restart
+from fritzbox_restart import now
+
+
+def parse_port(port: str) -> int | None:
+    """TR-064-Port aus der Hostliste; ValueError, wenn er keine Zahl von 1 bis 65535 ist."""
+    if not port:
+        return None
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"ungültiger Port {port!r}")
+    return int(port)
+
+
+def read_hosts(path: str) -> list[tuple[str, int | None]]:
+    """
+    Hostliste lesen: [(host, port oder None)], Reihenfolge bleibt erhalten, Duplikate entfallen.
+    Eine fehlerhafte Zeile ist ein ValueError mit Datei und Zeilennummer - lieber gar nicht starten
+    als einen Rollout mit unvollständiger Liste.
+    """
+    hosts = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            host, _, port = line.rpartition(":") if line.count(":") == 1 else (line, "", "")
+            try:
+                if not host:
+                    raise ValueError("Host fehlt")
+                entry = (host, parse_port(port))
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}: {line}") from None
+            if entry not in seen:
+                seen.add(entry)
+                hosts.append(entry)
+    return hosts
+
+
+def batches(hosts: list, size: int) -> list[list]:
+    size = max(1, size)
+    return [hosts[i:i + size] for i in range(0, len(hosts), size)]
+
+
+def label(host: str, port: int | None) -> str:
+    return f"{host}:{port}" if port else host
+
+
+def restart_one(host: str, port: int | None, user: str | None, password: str, timeout: int = 10,
+                probe_interval: float = 0.5, wait_timeout: float = 600.0, http_port: int = 80,
+                journal: str | None = None) -> dict:
+    """
+    Eine Box über fritzbox_restart.reboot_fritzbox(wait=True) neu starten (ohne Ausgabe je Phase).
+    Liefert {"host", "port", "result", "seconds", "error", "phases"}; result wie im Journal
+    (recovered, timeout, no_outage) oder "error", wenn Verbindung/Reboot fehlschlug.
+    http_port=0: Webserver auf dem TR-064-Port (z. B. fritz_mock_server).
+    """
+    outcome = {"host": host, "port": port, "result": "error", "seconds": None, "error": "", "phases": {}}
+    recovery = {}
+    fritzbox_restart.reboot_fritzbox(host, user, password, timeout, port=port, wait=True,
+                                     journal=journal, probe_interval=probe_interval,
+                                     wait_timeout=wait_timeout, http_port=http_port or port or 80,
+                                     recovery=recovery, log=lambda *args, **kwargs: None)
+    if "phases" not in recovery:
+        # Verbindung oder Reboot-Befehl fehlgeschlagen
+        outcome["error"] = recovery.get("error", "")
+        return outcome
+    phases = recovery["phases"]
+    reached = [v for v in phases.values() if v is not None]
+    outcome.update(result=recovery["row"]["result"], phases=phases, seconds=max(reached) if reached else None)
+    return outcome
+
+
+def rollout(hosts: list[tuple[str, int | None]], restart, concurrency: int = 5,
+            max_failure_rate: float = 0.2, log=print) -> dict:
+    """
+    Startet die Boxen batchweise neu. `restart(host, port)` liefert ein Ergebnis wie restart_one.
+    Liefert {"outcomes": [...], "skipped": [(host, port)], "aborted": bool, "batches": [Sekunden je Batch]}.
+    """
+    summary = {"outcomes": [], "skipped": [], "aborted": False, "batches": []}
+    groups = batches(hosts, concurrency)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for n, group in enumerate(groups, start=1):
+            log(f"[{now()}] Batch {n}/{len(groups)}: {', '.join(label(h, p) for h, p in group)}")
+            started = time.monotonic()
+            outcomes = list(pool.map(lambda hp: restart(*hp), group))
+            summary["batches"].append(time.monotonic() - started)
+            summary["outcomes"].extend(outcomes)
+            failed = [o for o in outcomes if o["result"] != "recovered"]
+            for o in outcomes:
+                detail = f"{o['seconds']:.1f}s" if o["seconds"] is not None else o["error"]
+                log(f"  {label(o['host'], o['port']):24s} {o['result']:10s} {detail}")
+            rate = len(failed) / len(group)
+            if rate > max_failure_rate:
+                summary["aborted"] = True
+                summary["skipped"] = [hp for g in groups[n:] for hp in g]
+                log(f"[{now()}] Abbruch: Fehlerquote {rate:.0%} in Batch {n} über {max_failure_rate:.0%}, "
+                    f"{len(summary['skipped'])} Box(en) nicht neu gestartet")
+                break
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rollierender Neustart vieler FRITZ!Boxen mit Wiederanlauf-Prüfung")
+    ap.add_argument("--hosts", required=True, help="Datei mit einer Box pro Zeile (host oder host:port)")
+    ap.add_argument("--user", default=None, help="FRITZ!Box Benutzername (für alle Boxen)")
+    ap.add_argument("--password", required=True, help="FRITZ!Box Passwort (für alle Boxen)")
+    ap.add_argument("--concurrency", type=int, default=5, help="Boxen je Batch gleichzeitig (default: 5)")
+    ap.add_argument("--max-failure-rate", type=float, default=0.2,
+                    help="Rollout abbrechen, wenn mehr als dieser Anteil eines Batches scheitert (default: 0.2)")
+    ap.add_argument("--timeout", type=int, default=10, help="Verbindungs-Timeout in Sekunden (default: 10)")
+    ap.add_argument("--probe-interval", type=float, default=0.5,
+                    help="Sekunden zwischen Wiederanlauf-Prüfungen je Phase (default: 0.5)")
+    ap.add_argument("--wait-timeout", type=float, default=600.0,
+                    help="Box gilt als gescheitert, wenn sie nach N Sekunden nicht online ist (default: 600)")
+    ap.add_argument("--http-port", type=int, default=80,
+                    help="Webserver-Port für die Erreichbarkeit; 0 = TR-064-Port (default: 80)")
+    ap.add_argument("--journal", default=fritzbox_restart.DEFAULT_JOURNAL,
+                    help=f"Restart-Journal (default: {fritzbox_restart.DEFAULT_JOURNAL})")
+    ap.add_argument("--dry-run", action="store_true", help="Nur die Batches anzeigen, nichts neu starten")
+    ap.add_argument("--yes", action="store_true", help="Ohne Rückfrage starten")
+    args = ap.parse_args(argv)
+
+    try:
+        hosts = read_hosts(args.hosts)
+    except ValueError as e:
+        raise SystemExit(f"FEHLER: {e}")
+    if not hosts:
+        raise SystemExit(f"Keine Hosts in {args.hosts}")
+    groups = batches(hosts, args.concurrency)
+    if args.dry_run:
+        for n, group in enumerate(groups, start=1):
+            print(f"Batch {n}: {', '.join(label(h, p) for h, p in group)}")
+        sys.exit(0)
+
+    if not args.yes:
+        print(f"\n{'='*60}")
+        print(f"WARNING: You are about to restart {len(hosts)} FRITZ!Boxes in {len(groups)} batch(es)!")
+        print(f"{'='*60}\n")
+        try:
+            response = input("Are you sure you want to continue? (yes/no): ").strip().lower()
+        except (KeyboardInterrupt, EOFError):
+            response = ""
+        if response not in ["yes", "y"]:
+            print("Restart cancelled.")
+            sys.exit(0)
+
+    restart = partial(restart_one, user=args.user, password=args.password, timeout=args.timeout,
+                      probe_interval=args.probe_interval, wait_timeout=args.wait_timeout,
+                      http_port=args.http_port, journal=args.journal)
+    started = time.monotonic()
+    summary = rollout(hosts, restart, args.concurrency, args.max_failure_rate)
+    ok = sum(o["result"] == "recovered" for o in summary["outcomes"])
+    print(f"[{now()}] {ok}/{len(hosts)} Box(en) wieder online in {time.monotonic() - started:.1f}s "
+          f"({len(summary['batches'])} Batch(es))")
+    sys.exit(0 if ok == len(hosts) else 1)
+
+
+if __name__ == "__main__":
+    main()
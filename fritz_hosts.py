@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# fritz_hosts.py
+# LAN-Hostliste der FRITZ!Box in einem Abruf (Hosts1 X_AVM-DE_GetHostListPath) statt
+# GetGenericHostEntry pro Index. Die Liste wird beim Download mit iterparse gelesen,
+# geloggt werden nur Änderungen gegenüber dem vorherigen Stand.
+#
+# Ereignisse (Spalte "event"):
+#   PRESENT  - Stand beim Start (erster Abruf)
+#   NEW/GONE - Gerät taucht in der Liste auf / verschwindet
+#   ONLINE/OFFLINE - Active wechselt
+#   CHANGED  - IP, Name, Schnittstelle, Port oder Geschwindigkeit geändert (Details: alt -> neu)
+
+import ssl
+import urllib.request
+from xml.etree.ElementTree import iterparse
+
+# (Element in der Hostliste, Spalte im Log)
+HOST_FIELDS = (
+    ("IPAddress", "ip"),
+    ("HostName", "hostname"),
+    ("InterfaceType", "interface"),
+    ("Active", "active"),
+    ("X_AVM-DE_Port", "port"),
+    ("X_AVM-DE_Speed", "speed_mbps"),
+    ("X_AVM-DE_Guest", "guest"),
+)
+HOSTS_HEADER = ["timestamp", "event", "mac"] + [col for _, col in HOST_FIELDS] + ["details"]
+
+PRESENT = "PRESENT"
+NEW = "NEW"
+GONE = "GONE"
+ONLINE = "ONLINE"
+OFFLINE = "OFFLINE"
+CHANGED = "CHANGED"
+
+
+def host_list_url(fc) -> str:
+    """URL der Hostliste; der Pfad enthält eine Session-ID und gilt nur kurz."""
+    path = fc.call_action("Hosts1", "X_AVM-DE_GetHostListPath")["NewX_AVM-DE_HostListPath"]
+    return f"{fc.address}:{fc.port}{path}"
+
+
+def iter_hosts(stream):
+    """Liest <Item>-Einträge aus einer Hostliste (Datei/Response) und liefert sie als dict."""
+    cols = dict(HOST_FIELDS)
+    host = {}
+    for _, elem in iterparse(stream, events=("end",)):
+        tag = elem.tag
+        if tag == "Item":
+            if host:
+                yield host
+            host = {}
+            elem.clear()
+        elif tag == "MACAddress":
+            host["mac"] = (elem.text or "").upper()
+        elif tag in cols:
+            host[cols[tag]] = (elem.text or "").strip()
+
+
+def fetch_hosts(fc, timeout: float = 10) -> dict:
+    """Aktuelle Hostliste als {MAC (sonst IP): host}."""
+    url = host_list_url(fc)
+    context = ssl._create_unverified_context() if url.startswith("https") else None
+    with urllib.request.urlopen(url, timeout=timeout, context=context) as response:
+        return {h.get("mac") or h.get("ip", ""): h for h in iter_hosts(response)}
+
+
+def diff_hosts(prev: dict | None, cur: dict) -> list[tuple[str, dict, str]]:
+    """Änderungen zwischen zwei Ständen als (event, host, details)."""
+    if prev is None:
+        return [(PRESENT, host, "") for host in cur.values()]
+    events = []
+    for key, host in cur.items():
+        old = prev.get(key)
+        if old is None:
+            events.append((NEW, host, ""))
+            continue
+        if old.get("active") != host.get("active"):
+            events.append((ONLINE if host.get("active") == "1" else OFFLINE, host, ""))
+        changed = [f"{col}: {old.get(col, '')} -> {host.get(col, '')}"
+                   for _, col in HOST_FIELDS if col != "active" and old.get(col) != host.get(col)]
+        if changed:
+            events.append((CHANGED, host, "; ".join(changed)))
+    for key, old in prev.items():
+        if key not in cur:
+            events.append((GONE, old, ""))
+    return events
+
+
+class HostTracker:
+    """Hält den letzten Stand der Hostliste; poll() liefert nur die Änderungszeilen (HOSTS_HEADER)."""
+
+    def __init__(self):
+        self.snapshot = None
+
+    def poll(self, fc, timestamp: str, timeout: float = 10) -> list[dict]:
+        cur = fetch_hosts(fc, timeout)
+        rows = []
+        for event, host, details in diff_hosts(self.snapshot, cur):
+            row = {col: host.get(col, "") for _, col in HOST_FIELDS}
+            row.update(timestamp=timestamp, event=event, mac=host.get("mac", ""), details=details)
+            rows.append(row)
+        self.snapshot = cur
+        return rows
@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+# fritz_mock_server.py
+# Lokaler TR-064-Ersatz für Last- und Latenztests von fritzlog_pull.py und fritzbox_restart.py.
+# Liefert tr64desc.xml/igddesc.xml + SCPDs und beantwortet die Aktionen aus collect_once
+# sowie DeviceConfig:1 Reboot. Konfigurierbar: Latenz, Fehlerinjektion (401, 500, 606),
+# Skript für Zählerverlauf/Reconnects/Reboots, Digest-Auth.
+#
+# Viele Boxen: jede Box bekommt eine eigene Loopback-Adresse (127.0.0.1, 127.0.0.2, ...) auf
+# Port 49000 - unter Linux ist das ganze 127.0.0.0/8 ohne Konfiguration erreichbar, die Poller
+# laufen dann unverändert mit --host 127.0.0.N. Alternativ: --spread port.
+
+import argparse
+import hashlib
+import ipaddress
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+DEFAULT_PORT = 49000
+DEFAULT_MODEL = "FRITZ!Box 7590"
+DEFAULT_FIRMWARE = "154.07.57"
+DIGEST_REALM = "F!Box SOAP-Auth"
+
+# (dataType pro Out-Argument) - fritzconnection konvertiert anhand der SCPD-Typen
+ACTIONS = {
+    "GetStatusInfo": [("NewConnectionStatus", "string"), ("NewLastConnectionError", "string"),
+                      ("NewUptime", "ui4")],
+    "GetExternalIPAddress": [("NewExternalIPAddress", "string")],
+    "GetAddonInfos": [("NewByteSendRate", "ui4"), ("NewByteReceiveRate", "ui4"),
+                      ("NewTotalBytesSent", "ui4"), ("NewTotalBytesReceived", "ui4")],
+    "GetCommonLinkProperties": [("NewWANAccessType", "string"), ("NewLayer1UpstreamMaxBitRate", "ui4"),
+                                ("NewLayer1DownstreamMaxBitRate", "ui4"), ("NewPhysicalLinkStatus", "string")],
+    "GetDSLLinkInfo": [("NewLinkType", "string"), ("NewLinkStatus", "string")],
+    "GetInfo": [("NewEnable", "boolean"), ("NewStatus", "string"),
+                ("NewUpstreamCurrRate", "ui4"), ("NewDownstreamCurrRate", "ui4")],
+    "GetStatisticsTotal": [("NewFECErrors", "ui4"), ("NewCRCErrors", "ui4"), ("NewHECErrors", "ui4"),
+                           ("NewErroredSecs", "ui4"), ("NewSeverelyErroredSecs", "ui4"),
+                           ("NewLinkRetrain", "ui4"), ("NewInitErrors", "ui4"), ("NewInitTimeouts", "ui4"),
+                           ("NewATUC_FECErrors", "ui4"), ("NewATUC_CRCErrors", "ui4"),
+                           ("NewATUC_HECErrors", "ui4")],
+    "Reboot": [],
+    "X_AVM-DE_GetUserList": [("NewX_AVM-DE_UserList", "string")],
+    "X_AVM-DE_GetHostListPath": [("NewX_AVM-DE_HostListPath", "string")],
+    "X_AVM-DE_GetOnlineMonitor": [("NewTotalNumberSyncGroups", "ui4"), ("NewSyncGroupName", "string"),
+                                  ("NewSyncGroupMode", "string"), ("Newmax_ds", "ui4"), ("Newmax_us", "ui4"),
+                                  ("Newds_current_bps", "string"), ("Newmc_current_bps", "string"),
+                                  ("Newus_current_bps", "string")],
+}
+
+# (Beschreibung, serviceType, serviceId-Name, Pfad-Kürzel, Aktionen) - wie auf echten Boxen verteilt
+SERVICES = [
+    ("tr64desc.xml", "urn:dslforum-org:service:DeviceConfig:1", "DeviceConfig1", "deviceconfig",
+     ["Reboot"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:LANConfigSecurity:1", "LANConfigSecurity1", "lanconfigsecurity",
+     ["X_AVM-DE_GetUserList"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:Hosts:1", "Hosts1", "hosts",
+     ["X_AVM-DE_GetHostListPath"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:WANCommonInterfaceConfig:1", "WANCommonInterfaceConfig1",
+     "wancommonifconfig1", ["GetAddonInfos", "GetCommonLinkProperties", "X_AVM-DE_GetOnlineMonitor"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:WANDSLInterfaceConfig:1", "WANDSLInterfaceConfig1",
+     "wandslifconfig1", ["GetInfo", "GetStatisticsTotal"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:WANDSLLinkConfig:1", "WANDSLLinkConfig1", "wandsllinkconfig1",
+     ["GetDSLLinkInfo"]),
+    ("tr64desc.xml", "urn:dslforum-org:service:WANIPConnection:1", "WANIPConnection1", "wanipconnection1",
+     ["GetStatusInfo", "GetExternalIPAddress"]),
+    ("igddesc.xml", "urn:schemas-upnp-org:service:WANCommonInterfaceConfig:1", "WANCommonIFC1",
+     "igd_wancommonifc1", ["GetAddonInfos", "GetCommonLinkProperties"]),
+    ("igddesc.xml", "urn:schemas-upnp-org:service:WANDSLLinkConfig:1", "WANDSLLinkC1", "igd_wandsllinkc1",
+     ["GetDSLLinkInfo"]),
+    ("igddesc.xml", "urn:schemas-upnp-org:service:WANIPConnection:1", "WANIPConn1", "igd_wanipconn1",
+     ["GetStatusInfo", "GetExternalIPAddress"]),
+]
+
+HOST_LIST_PATH = "/devicehostlist.lua"
+MONITOR_SAMPLES = 20  # Online-Monitor: Werte pro Aufruf, neuester zuerst
+HOST_INTERFACES = ("Ethernet", "802.11", "802.11", "Ethernet", "802.11")
+
+FAULTS = {
+    500: (501, "Action Failed"),
+    606: (606, "Action Not Authorized"),
+}
+
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def description_xml(name: str, model: str, firmware: str, udn: str) -> str:
+    """tr64desc.xml bzw. igddesc.xml mit den Services aus SERVICES."""
+    services = "".join(
+        "<service>\n"
+        f"<serviceType>{stype}</serviceType>\n"
+        f"<serviceId>urn:mock-com:serviceId:{sid}</serviceId>\n"
+        f"<controlURL>/upnp/control/{path}</controlURL>\n"
+        f"<eventSubURL>/upnp/control/{path}</eventSubURL>\n"
+        f"<SCPDURL>/{path}SCPD.xml</SCPDURL>\n"
+        "</service>\n"
+        for desc, stype, sid, path, _ in SERVICES if desc == name
+    )
+    system = ""
+    if name == "tr64desc.xml":
+        hw, minor, patch = firmware.split(".")
+        system = (f"<systemVersion>\n<HW>{hw}</HW>\n<Major>{hw}</Major>\n<Minor>{int(minor)}</Minor>\n"
+                  f"<Patch>{int(patch)}</Patch>\n<Buildnumber>100000</Buildnumber>\n"
+                  f"<Display>{firmware}</Display>\n</systemVersion>\n")
+    return ('<?xml version="1.0"?>\n<root xmlns="urn:dslforum-org:device-1-0">\n'
+            "<specVersion>\n<major>1</major>\n<minor>0</minor>\n</specVersion>\n"
+            f"{system}<device>\n"
+            "<deviceType>urn:dslforum-org:device:InternetGatewayDevice:1</deviceType>\n"
+            f"<friendlyName>{escape(model)} (mock)</friendlyName>\n"
+            "<manufacturer>AVM</manufacturer>\n"
+            f"<modelName>{escape(model)}</modelName>\n"
+            f"<UDN>uuid:{udn}</UDN>\n"
+            f"<serviceList>\n{services}</serviceList>\n"
+            "</device>\n</root>\n")
+
+
+def scpd_xml(actions: list[str]) -> str:
+    """SCPD mit Out-Argumenten und zugehörigen State-Variablen."""
+    action_xml, variables = [], {}
+    for action in actions:
+        args = "".join(
+            f"<argument>\n<name>{arg}</name>\n<direction>out</direction>\n"
+            f"<relatedStateVariable>{arg[3:]}</relatedStateVariable>\n</argument>\n"
+            for arg, _ in ACTIONS[action]
+        )
+        action_xml.append(f"<action>\n<name>{action}</name>\n<argumentList>\n{args}</argumentList>\n</action>\n")
+        for arg, dtype in ACTIONS[action]:
+            variables[arg[3:]] = dtype
+    state = "".join(
+        f'<stateVariable sendEvents="no">\n<name>{name}</name>\n<dataType>{dtype}</dataType>\n</stateVariable>\n'
+        for name, dtype in variables.items()
+    )
+    return ('<?xml version="1.0"?>\n<scpd xmlns="urn:dslforum-org:service-1-0">\n'
+            "<specVersion>\n<major>1</major>\n<minor>0</minor>\n</specVersion>\n"
+            f"<actionList>\n{''.join(action_xml)}</actionList>\n"
+            f"<serviceStateTable>\n{state}</serviceStateTable>\n</scpd>\n")
+
+
+def soap_response(service_type: str, action: str, values: dict) -> str:
+    args = "".join(f"<{k}>{escape(str(v))}</{k}>\n" for k, v in values.items())
+    return ('<?xml version="1.0"?>\n'
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+            's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n<s:Body>\n'
+            f'<u:{action}Response xmlns:u="{service_type}">\n{args}</u:{action}Response>\n'
+            "</s:Body>\n</s:Envelope>\n")
+
+
+def soap_fault(code: int, description: str) -> str:
+    return ('<?xml version="1.0"?>\n'
+            '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+            's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n<s:Body>\n<s:Fault>\n'
+            "<faultcode>s:Client</faultcode>\n<faultstring>UPnPError</faultstring>\n<detail>\n"
+            '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">\n'
+            f"<errorCode>{code}</errorCode>\n<errorDescription>{description}</errorDescription>\n"
+            "</UPnPError>\n</detail>\n</s:Fault>\n</s:Body>\n</s:Envelope>\n")
+
+
+class BoxState:
+    """
+    Simulierter Zustand einer Box. Werte werden bei jeder Abfrage aus der verstrichenen Zeit berechnet.
+    `script`: Liste von Ereignissen {"at": Sekunden seit Start, "event": ..., ...}:
+      reconnect  (duration)   - WAN kurz "Connecting", danach neue Uptime + neue IP
+      link_down  (duration)   - DSL/WAN down, danach Retrain, neue Uptime + neue IP
+      dsl_errors (crc, hec, errored_secs, severely_errored_secs, fec) - Fehlerzähler erhöhen
+      reboot     (duration)   - Box nicht erreichbar, danach alle Zähler zurückgesetzt; anschließend
+                                TR-064 noch `tr064_delay` s stumm, DSL-Training `dsl_train` s,
+                                WAN-Einwahl `ppp_delay` s (jeweils default 0)
+      host_offline / host_online (index) - LAN-Gerät im Heimnetz ab-/anmelden
+      host_move  (index, interface) - LAN-Gerät wechselt die Schnittstelle (z. B. WLAN -> Ethernet)
+    `hosts`: Anzahl simulierter LAN-Geräte in der Hostliste (X_AVM-DE_GetHostListPath).
+    `monitor_step`: Abstand der Online-Monitor-Werte in Sekunden (X_AVM-DE_GetOnlineMonitor).
+    """
+
+    def __init__(self, script=(), reboot_seconds: float = 60.0, send_rate: int = 40000,
+                 recv_rate: int = 250000, fec_rate: float = 2.0, seed=None, clock=time.monotonic,
+                 hosts: int = 5, monitor_step: float = 5.0, tr064_delay: float = 0.0, dsl_train: float = 0.0,
+                 ppp_delay: float = 0.0):
+        self.clock = clock
+        self.monitor_step = monitor_step
+        self.reboot_seconds = reboot_seconds
+        self.tr064_delay = tr064_delay
+        self.dsl_train = dsl_train
+        self.ppp_delay = ppp_delay
+        self.send_rate = send_rate
+        self.recv_rate = recv_rate
+        self.fec_rate = fec_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.t0 = clock()
+        self.script = sorted(script, key=lambda ev: ev.get("at", 0))
+        self._next_event = 0
+        self.down_until = 0.0
+        self.soap_down_until = 0.0
+        self.hosts = [{
+            "IPAddress": f"192.168.178.{20 + i}",
+            "MACAddress": ":".join(f"{b:02X}" for b in (0x02, 0, 0, 0, i // 256, i % 256)),
+            "HostName": f"host-{i:03d}",
+            "InterfaceType": HOST_INTERFACES[i % len(HOST_INTERFACES)],
+            "Active": 1,
+        } for i in range(hosts)]
+        self._boot(self.t0)
+
+    def _new_ip(self) -> str:
+        return f"100.{self.rng.randint(64, 127)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}"
+
+    def _boot(self, t: float) -> None:
+        self.booted_at = t
+        self.wan_up_since = t
+        self.connecting_until = 0.0
+        self.link_down_until = 0.0
+        self.external_ip = self._new_ip()
+        self.errors = {"crc": 0, "hec": 0, "errored_secs": 0, "severely_errored_secs": 0,
+                       "fec": 0, "link_retrain": 0, "init_errors": 0}
+
+    def apply(self, event: dict, t: float) -> None:
+        kind = event.get("event")
+        duration = float(event.get("duration", 0))
+        if kind == "reconnect":
+            self.connecting_until = t + (duration or 5)
+            self.wan_up_since = self.connecting_until
+            self.external_ip = self._new_ip()
+        elif kind == "link_down":
+            self.link_down_until = t + (duration or 30)
+            self.wan_up_since = self.link_down_until
+            self.errors["link_retrain"] += 1
+            self.external_ip = self._new_ip()
+        elif kind == "dsl_errors":
+            for key in self.errors:
+                self.errors[key] += int(event.get(key, 0))
+        elif kind == "reboot":
+            self.down_until = t + (duration or self.reboot_seconds)
+            self._boot(self.down_until)
+            # Hochlauf: Webserver zuerst, TR-064 danach, dann DSL-Sync und Einwahl
+            self.soap_down_until = self.down_until + self.tr064_delay
+            if self.dsl_train:
+                self.link_down_until = self.soap_down_until + self.dsl_train
+            if self.ppp_delay:
+                self.connecting_until = max(self.soap_down_until, self.link_down_until) + self.ppp_delay
+            self.wan_up_since = max(self.down_until, self.link_down_until, self.connecting_until)
+        elif kind in ("host_offline", "host_online"):
+            self.hosts[int(event.get("index", 0))]["Active"] = int(kind == "host_online")
+        elif kind == "host_move":
+            self.hosts[int(event.get("index", 0))]["InterfaceType"] = event.get("interface", "Ethernet")
+
+    def _advance(self, t: float) -> None:
+        while self._next_event < len(self.script) and self.t0 + self.script[self._next_event].get("at", 0) <= t:
+            ev = self.script[self._next_event]
+            self.apply(ev, self.t0 + ev.get("at", 0))
+            self._next_event += 1
+
+    def is_down(self, soap: bool = False) -> bool:
+        """Box nicht erreichbar; soap=True: auch noch in der Hochlaufphase ohne TR-064."""
+        with self.lock:
+            t = self.clock()
+            self._advance(t)
+            return t < (max(self.down_until, self.soap_down_until) if soap else self.down_until)
+
+    def reboot(self) -> None:
+        with self.lock:
+            self.apply({"event": "reboot"}, self.clock())
+
+    def values(self, action: str, user: str = "admin") -> dict:
+        with self.lock:
+            t = self.clock()
+            self._advance(t)
+            link_down = t < self.link_down_until
+            connecting = t < self.connecting_until
+            if link_down:
+                status = "Disconnected"
+            elif connecting:
+                status = "Connecting"
+            else:
+                status = "Connected"
+            up = status == "Connected"
+            alive = max(0.0, t - self.booted_at)
+            fec = int(alive * self.fec_rate) + self.errors["fec"]
+
+            data = {
+                "GetStatusInfo": {
+                    "NewConnectionStatus": status,
+                    "NewLastConnectionError": "ERROR_NONE" if up else "ERROR_NO_CARRIER",
+                    "NewUptime": int(t - self.wan_up_since) if up else 0,
+                },
+                "GetExternalIPAddress": {"NewExternalIPAddress": self.external_ip if up else "0.0.0.0"},
+                "GetAddonInfos": {
+                    "NewByteSendRate": self.send_rate if up else 0,
+                    "NewByteReceiveRate": self.recv_rate if up else 0,
+                    "NewTotalBytesSent": int(alive * self.send_rate) % 2 ** 32,
+                    "NewTotalBytesReceived": int(alive * self.recv_rate) % 2 ** 32,
+                },
+                "GetCommonLinkProperties": {
+                    "NewWANAccessType": "DSL",
+                    "NewLayer1UpstreamMaxBitRate": 46720000,
+                    "NewLayer1DownstreamMaxBitRate": 292630000,
+                    "NewPhysicalLinkStatus": "Down" if link_down else "Up",
+                },
+                "GetDSLLinkInfo": {"NewLinkType": "PPPoE", "NewLinkStatus": "Down" if link_down else "Up"},
+                "GetInfo": {
+                    "NewEnable": 1,
+                    "NewStatus": "NoSignal" if link_down else "Up",
+                    "NewUpstreamCurrRate": 0 if link_down else 40000,
+                    "NewDownstreamCurrRate": 0 if link_down else 250000,
+                },
+                "GetStatisticsTotal": {
+                    "NewFECErrors": fec,
+                    "NewCRCErrors": self.errors["crc"],
+                    "NewHECErrors": self.errors["hec"],
+                    "NewErroredSecs": self.errors["errored_secs"],
+                    "NewSeverelyErroredSecs": self.errors["severely_errored_secs"],
+                    "NewLinkRetrain": self.errors["link_retrain"],
+                    "NewInitErrors": self.errors["init_errors"],
+                    "NewInitTimeouts": 0,
+                    "NewATUC_FECErrors": fec // 4,
+                    "NewATUC_CRCErrors": self.errors["crc"] // 2,
+                    "NewATUC_HECErrors": 0,
+                },
+                "Reboot": {},
+                "X_AVM-DE_GetUserList": {
+                    "NewX_AVM-DE_UserList": f'<List><Username last_user="1">{escape(user)}</Username></List>',
+                },
+                "X_AVM-DE_GetOnlineMonitor": self._monitor(t, up),
+                "X_AVM-DE_GetHostListPath": {
+                    "NewX_AVM-DE_HostListPath": f"{HOST_LIST_PATH}?sid={self.rng.getrandbits(64):016x}",
+                },
+            }
+            return data[action]
+
+    def _monitor_rate(self, slot: int, base: int) -> int:
+        # pro Zeitschlitz fest, damit sich überlappende Fenster gleichen
+        return int(base * random.Random(slot * 7919 + base).uniform(0.2, 1.8))
+
+    def _monitor(self, t: float, up: bool) -> dict:
+        last = int(t // self.monitor_step)
+        slots = range(last, last - MONITOR_SAMPLES, -1)
+        rates = {name: ",".join(str(self._monitor_rate(slot, base) if up else 0) for slot in slots)
+                 for name, base in (("ds", self.recv_rate), ("mc", 0), ("us", self.send_rate))}
+        return {
+            "NewTotalNumberSyncGroups": 1, "NewSyncGroupName": "sync_dsl", "NewSyncGroupMode": "VDSL",
+            "Newmax_ds": self.recv_rate * 2, "Newmax_us": self.send_rate * 2,
+            "Newds_current_bps": rates["ds"], "Newmc_current_bps": rates["mc"],
+            "Newus_current_bps": rates["us"],
+        }
+
+    def host_list_xml(self) -> str:
+        """Hostliste im Format der Box (X_AVM-DE_GetHostListPath)."""
+        with self.lock:
+            self._advance(self.clock())
+            items = []
+            for i, host in enumerate(self.hosts, 1):
+                wired = host["InterfaceType"] == "Ethernet"
+                items.append(
+                    f"<Item>\n<Index>{i}</Index>\n<IPAddress>{host['IPAddress']}</IPAddress>\n"
+                    f"<MACAddress>{host['MACAddress']}</MACAddress>\n<Active>{host['Active']}</Active>\n"
+                    f"<HostName>{escape(host['HostName'])}</HostName>\n"
+                    f"<InterfaceType>{host['InterfaceType']}</InterfaceType>\n"
+                    f"<X_AVM-DE_Port>{1 + i % 4 if wired else 0}</X_AVM-DE_Port>\n"
+                    f"<X_AVM-DE_Speed>{1000 if wired else 0}</X_AVM-DE_Speed>\n"
+                    f"<X_AVM-DE_Guest>0</X_AVM-DE_Guest>\n</Item>\n")
+            return ('<?xml version="1.0" encoding="utf-8"?>\n<List>\n' + "".join(items)
+                    + f"<ItemCount>{len(self.hosts)}</ItemCount>\n</List>\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # HTTPServer.server_bind löst den Namen per getfqdn() auf - bei hunderten Boxen zu langsam
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = self.server_address[:2]
+
+
+class MockFritzBox:
+    """Eine simulierte Box: HTTP-Server in eigenem Thread plus BoxState."""
+
+    def __init__(self, address: str = "127.0.0.1", port: int = DEFAULT_PORT, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, error_codes=(500,), user: str | None = None,
+                 password: str | None = None, model: str = DEFAULT_MODEL, firmware: str = DEFAULT_FIRMWARE,
+                 state: BoxState | None = None, seed=None):
+        self.address = address
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.user = user
+        self.password = password
+        self.model = model
+        self.firmware = firmware
+        self.state = state or BoxState(seed=seed)
+        self.rng = random.Random(seed)
+        self.requests = 0
+        udn = _md5(f"{address}:{port}:{seed}")
+        self.files = {
+            f"/{name}": description_xml(name, model, firmware, udn) for name in ("tr64desc.xml", "igddesc.xml")
+        }
+        self.controls = {}
+        for _, stype, _, path, actions in SERVICES:
+            self.files[f"/{path}SCPD.xml"] = scpd_xml(actions)
+            self.controls[f"/upnp/control/{path}"] = (stype, actions)
+        hw, minor, patch = firmware.split(".")
+        self.files["/jason_boxinfo.xml"] = (
+            '<?xml version="1.0"?>\n<j:BoxInfo xmlns:j="http://jason.avm.de/updatecheck/">\n'
+            f"<j:Name>{escape(model)}</j:Name>\n<j:HW>{hw}</j:HW>\n<j:Version>{firmware}</j:Version>\n"
+            "</j:BoxInfo>\n")
+
+        handler = type("BoundHandler", (_Handler,), {"box": self})
+        self.server = _Server((address, port), handler)
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}:{self.port}"
+
+    def start(self) -> "MockFritzBox":
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+
+    def delay(self) -> None:
+        ms = self.latency_ms + (self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+
+    def injected_error(self):
+        if self.error_rate and self.error_codes and self.rng.random() < self.error_rate:
+            return self.rng.choice(self.error_codes)
+        return None
+
+    def check_auth(self, method: str, header: str | None) -> str | None:
+        """Prüft einen Digest-Authorization-Header. Liefert den Benutzernamen oder None."""
+        if not self.password:
+            return self.user or "admin"
+        if not header or not header.lower().startswith("digest "):
+            return None
+        fields = dict(re.findall(r'(\w+)="?([^",]*)"?', header[7:]))
+        user = fields.get("username", "")
+        if self.user and user != self.user:
+            return None
+        ha1 = _md5(f"{user}:{fields.get('realm', '')}:{self.password}")
+        ha2 = _md5(f"{method}:{fields.get('uri', '')}")
+        if fields.get("qop"):
+            expected = _md5(f"{ha1}:{fields.get('nonce')}:{fields.get('nc')}:{fields.get('cnonce')}:"
+                            f"{fields.get('qop')}:{ha2}")
+        else:
+            expected = _md5(f"{ha1}:{fields.get('nonce')}:{ha2}")
+        return user if fields.get("response") == expected else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Header + Body gepuffert in einem Stück senden (sonst Nagle + Delayed ACK: ~40 ms pro Antwort)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    box: MockFritzBox = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code: int, body: str, content_type: str = 'text/xml; charset="utf-8"', headers=None):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _unreachable(self, soap: bool = True) -> bool:
+        if self.box.state.is_down(soap):
+            # Box "rebootet": Verbindung ohne Antwort schließen
+            self.close_connection = True
+            return True
+        return False
+
+    def do_GET(self):
+        self.box.requests += 1
+        self.box.delay()
+        path = self.path.split("?")[0]
+        # Beschreibungen/Hostliste gehören zu TR-064; andere Pfade beantwortet der Webserver schon früher
+        if self._unreachable(soap=path in self.box.files or path == HOST_LIST_PATH):
+            return
+        body = self.box.files.get(path)
+        if path == HOST_LIST_PATH:
+            body = self.box.state.host_list_xml()
+        if body is None:
+            self._send(404, "<HTML><BODY>404 Not Found</BODY></HTML>", "text/html")
+        else:
+            self._send(200, body)
+
+    def do_POST(self):
+        self.box.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.box.delay()
+        if self._unreachable():
+            return
+
+        control = self.box.controls.get(self.path)
+        soapaction = self.headers.get("soapaction", "").strip('"')
+        action = soapaction.rsplit("#", 1)[-1]
+        if control is None or action not in control[1]:
+            self._send(500, soap_fault(401, "Invalid Action"))
+            return
+
+        user = self.box.check_auth("POST", self.headers.get("Authorization"))
+        if user is None:
+            nonce = _md5(f"{time.time()}:{self.box.rng.random()}")[:16].upper()
+            self._send(401, "<HTML><HEAD><TITLE>401 Unauthorized</TITLE></HEAD>"
+                            "<BODY><H1>401 Unauthorized</H1>ERR_ACCESS_DENIED</BODY></HTML>", "text/html",
+                       {"WWW-Authenticate": f'Digest realm="{DIGEST_REALM}", nonce="{nonce}", '
+                                           'algorithm=MD5, qop="auth"'})
+            return
+
+        code = self.box.injected_error()
+        if code == 401:
+            self._send(401, "<HTML><HEAD><TITLE>401 Unauthorized</TITLE></HEAD>"
+                            "<BODY><H1>401 Unauthorized</H1>ERR_ACCESS_DENIED</BODY></HTML>", "text/html")
+            return
+        if code in FAULTS:
+            self._send(500, soap_fault(*FAULTS[code]))
+            return
+
+        self._send(200, soap_response(control[0], action, self.box.state.values(action, user)))
+        if action == "Reboot":
+            self.close_connection = True
+            self.box.state.reboot()
+
+
+class MockFleet:
+    """
+    Viele Boxen auf einer Maschine. spread="address": 127.0.0.1, 127.0.0.2, ... jeweils auf `port`;
+    spread="port": eine Adresse, fortlaufende Ports (port=0: freie Ports vom System).
+    `stagger`: Skript-Ereignisse je Box um i * stagger Sekunden verschieben.
+    `boot`: Hochlaufphasen nach Reboot für BoxState (tr064_delay, dsl_train, ppp_delay).
+    """
+
+    def __init__(self, count: int, address: str = "127.0.0.1", port: int = DEFAULT_PORT, spread: str = "address",
+                 script=(), stagger: float = 0.0, reboot_seconds: float = 60.0, seed: int = 0, hosts: int = 5,
+                 boot=None, **box_kwargs):
+        self.boxes = []
+        base = ipaddress.ip_address(address)
+        try:
+            for i in range(count):
+                addr = str(base + i) if spread == "address" else address
+                box_port = port if spread == "address" or port == 0 else port + i
+                shifted = [dict(ev, at=ev.get("at", 0) + i * stagger) for ev in script]
+                state = BoxState(script=shifted, reboot_seconds=reboot_seconds, seed=seed + i, hosts=hosts,
+                                 **(boot or {}))
+                self.boxes.append(MockFritzBox(addr, box_port, state=state, seed=seed + i, **box_kwargs))
+        except Exception:
+            self.stop()
+            raise
+
+    def start(self) -> "MockFleet":
+        for box in self.boxes:
+            box.start()
+        return self
+
+    def stop(self) -> None:
+        # parallel beenden, shutdown() wartet je Box auf das Poll-Intervall
+        threads = [threading.Thread(target=box.stop) for box in self.boxes]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    @property
+    def endpoints(self) -> list[tuple[str, int]]:
+        return [(box.address, box.port) for box in self.boxes]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Lokaler TR-064-Mock (eine oder viele simulierte FRITZ!Boxen)")
+    ap.add_argument("--address", default="127.0.0.1", help="(Erste) Adresse (default: 127.0.0.1)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"(Erster) Port (default: {DEFAULT_PORT})")
+    ap.add_argument("--count", type=int, default=1, help="Anzahl simulierter Boxen (default: 1)")
+    ap.add_argument("--spread", choices=("address", "port"), default="address",
+                    help="Boxen über Loopback-Adressen oder Ports verteilen (default: address)")
+    ap.add_argument("--latency", type=float, default=0.0, help="Antwortlatenz in ms (default: 0)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="Zusätzliche zufällige Latenz 0..N ms (default: 0)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlerhafter SOAP-Antworten 0..1")
+    ap.add_argument("--errors", default="500", help="Fehlerarten, kommagetrennt aus 401,500,606 (default: 500)")
+    ap.add_argument("--script", default=None, help="JSON-Datei mit Ereignissen (reconnect, link_down, ...)")
+    ap.add_argument("--stagger", type=float, default=0.0, help="Skript je Box um i*N Sekunden verschieben")
+    ap.add_argument("--reboot-time", type=float, default=60.0, help="Dauer eines Reboots in Sekunden (default: 60)")
+    ap.add_argument("--tr064-delay", type=float, default=0.0,
+                    help="Nach Reboot: Sekunden, bis TR-064 nach dem Webserver antwortet (default: 0)")
+    ap.add_argument("--dsl-train", type=float, default=0.0, help="Nach Reboot: Dauer des DSL-Trainings (default: 0)")
+    ap.add_argument("--ppp-delay", type=float, default=0.0, help="Nach Reboot: Dauer der WAN-Einwahl (default: 0)")
+    ap.add_argument("--hosts", type=int, default=5, help="LAN-Geräte in der Hostliste je Box (default: 5)")
+    ap.add_argument("--user", default=None, help="Erwarteter Benutzername (default: beliebig)")
+    ap.add_argument("--password", default=None, help="Digest-Auth aktivieren mit diesem Passwort")
+    ap.add_argument("--model", default=DEFAULT_MODEL, help=f"Modellname (default: {DEFAULT_MODEL})")
+    ap.add_argument("--firmware", default=DEFAULT_FIRMWARE, help=f"Firmware (default: {DEFAULT_FIRMWARE})")
+    args = ap.parse_args()
+
+    script = []
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    codes = [int(c) for c in args.errors.split(",") if c.strip()]
+
+    fleet = MockFleet(args.count, args.address, args.port, args.spread, script=script, stagger=args.stagger,
+                      reboot_seconds=args.reboot_time, hosts=args.hosts, latency_ms=args.latency,
+                      boot={"tr064_delay": args.tr064_delay, "dsl_train": args.dsl_train, "ppp_delay": args.ppp_delay},
+                      jitter_ms=args.jitter, error_rate=args.error_rate, error_codes=codes, user=args.user,
+                      password=args.password, model=args.model, firmware=args.firmware).start()
+    first, last = fleet.endpoints[0], fleet.endpoints[-1]
+    print(f"{len(fleet.boxes)} Mock-Box(en) aktiv: {first[0]}:{first[1]} .. {last[0]}:{last[1]}. Abbruch mit STRG+C.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fleet.stop()
+
+
+if __name__ == "__main__":
+    main()
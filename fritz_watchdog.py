@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# fritz_watchdog.py
+# Closed-Loop-Watchdog: liest netwatch_log.csv und fritz_status_log.csv live mit, wendet dieselben
+# Regeln wie analyze_netlogs an (NetwatchIncidentDetector / FritzIncidentDetector) und startet die
+# FRITZ!Box über fritzbox_restart.reboot_fritzbox neu, wenn eine Policy im Zeitfenster anschlägt.
+#
+# Policies (Gleitfenster über die Datenzeit der Logs, nicht die Wanduhr):
+# - degraded: Anteil der NetWatch-Messungen mit LOSS_SPIKE/DNS_FAIL >= --degraded-share
+#             über --loss-minutes (Verlust über --loss-pct), erst wenn das Fenster voll beobachtet ist
+# - flapping: mindestens --fritz-incidents Störungsepisoden (WAN_RECONNECT/WAN_STATUS_CHANGE/
+#             DSL_LINK_ABNORMAL) in --fritz-minutes; aufeinanderfolgende gestörte Zeilen zählen als eine
+#             Episode, damit die Abtastrate (--adaptive) nicht mitzählt
+# Schutz: --cooldown nach jeder Aktion, höchstens --max-restarts in --rate-window Stunden,
+# --dry-run protokolliert nur. --replay spielt vorhandene Logs ab (immer dry-run) zum Einstellen.
+#
+# Aktionen (restart, dry_run, suppressed_cooldown, suppressed_rate_limit) -> --actions-out CSV.
+# Die Logs dürfen normale CSV, Kompakt-Logs (--compact) oder Binär-Logs (--binary) sein.
+
+import argparse
+import csv
+import heapq
+import os
+import struct
+import sys
+import time
+from collections import deque
+from functools import partial
+
+import binary_log
+import compact_log
+import fritzbox_restart
+from analyze_netlogs import (DEFAULT_LATENCY_SPIKE_MS, DEFAULT_ROUTER_SLOW_MS, TIME_FMT, TS_MS_COL,
+                             FritzIncidentDetector, NetwatchIncidentDetector, ms_to_time, parse_time)
+
+LOG_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Ping", "Log")
+DEFAULT_NETWATCH = os.path.join(LOG_DIR, "netwatch_log.csv")
+DEFAULT_FRITZ = os.path.join(LOG_DIR, "fritz_status_log.csv")
+
+DEGRADED_TYPES = ("LOSS_SPIKE", "DNS_FAIL")
+FLAPPING_TYPES = ("WAN_RECONNECT", "WAN_STATUS_CHANGE", "DSL_LINK_ABNORMAL")
+
+ACTIONS_HEADER = ["timestamp", "policy", "action", "details", "result"]
+
+TAIL_BYTES = 65536  # beim Start am Dateiende: so weit zurück nach dem letzten Zeilenende suchen
+
+
+def now():
+    return time.strftime(TIME_FMT)
+
+
+class CsvFollower:
+    """
+    Liest ein wachsendes Log (normale CSV, Kompakt-Log oder Binär-Log) inkrementell: poll() liefert
+    nur neue, vollständige Zeilen als dict mit datetime in "timestamp" (aus ts_ms, sonst geparst).
+    Abgeschnittene oder ersetzte Dateien (Rotation) werden von vorn gelesen.
+    """
+
+    def __init__(self, path: str, from_start: bool = False, time_col: str = "timestamp"):
+        self.path = path
+        self.from_start = from_start
+        self.time_col = time_col
+        self._reset()
+
+    def _reset(self):
+        self.offset = None
+        self.inode = None
+        self.buf = b""
+        self.header = None
+        self.decoder = None
+        self.binary = None  # Binär-Log: (Satz-Struct, Spaltentypen, binary_log.TextTable)
+
+    def _open_at_end(self, f, size):
+        """Kopfzeile lesen und hinter dem letzten vollständigen Zeilenende weitermachen."""
+        self._set_header(f.readline())
+        data_start = f.tell()
+        start = max(data_start, size - TAIL_BYTES)
+        f.seek(start)
+        tail = f.read(size - start)
+        cut = tail.rfind(b"\n")
+        offset = start + cut + 1 if cut >= 0 else start
+        if self.decoder is not None:
+            self._prime_decoder(f, data_start, offset)
+        return offset
+
+    def _prime_decoder(self, f, data_start, end):
+        """Kompakt-Log: ab dem letzten Keyframe vor `end` dekodieren, sonst fehlt den D-Zeilen die Vorzeile."""
+        marker = b"\n" + compact_log.KEYFRAME.encode() + b","
+        pos = end
+        while True:
+            start = max(data_start, pos - TAIL_BYTES)
+            f.seek(start - 1 if start > 0 else 0)
+            chunk = (b"\n" if start == 0 else b"") + f.read(min(pos + len(marker), end) - start + 1)
+            found = chunk.rfind(marker)
+            if found >= 0:
+                key = start + found  # chunk beginnt ein Byte vor start
+                break
+            if start == data_start:
+                return  # noch kein Keyframe
+            pos = start
+        f.seek(key)
+        for line in f.read(end - key).split(b"\n"):
+            if line.strip():
+                self.decoder.decode(next(csv.reader([line.decode("utf-8", errors="replace").rstrip("\r")]), []))
+
+    def _open_binary(self, size):
+        """Kopf eines Binär-Logs lesen; beim Start am Dateiende hinter dem letzten vollständigen Eintrag weitermachen."""
+        header, offset = binary_log.read_header(self.path)
+        record = struct.Struct(header["record"])
+        if not self.from_start:
+            offset = size - (size - offset) % record.size
+        texts = binary_log.read_texts(self.path, offset) if not self.from_start else binary_log.TextTable()
+        self.header = [name for name, _ in header["columns"]]
+        self.binary = (record, [typ for _, typ in header["columns"]], texts)
+        return offset
+
+    def _binary_rows(self, data: bytes) -> list[dict]:
+        record, types, texts = self.binary
+        data = self.buf + data
+        usable = len(data) - len(data) % record.size
+        self.buf = data[usable:]
+        rows = []
+        for values in binary_log.iter_values(data[:usable], record, texts):
+            row = self._row([texts.strings[v] if typ == "str" else binary_log.decode_value(typ, v)
+                             for typ, v in zip(types, values)])
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _set_header(self, line: bytes):
+        header = next(csv.reader([line.decode("utf-8", errors="replace").rstrip("\r\n")]), [])
+        if header:
+            header[0] = header[0].lstrip("\ufeff")
+        if header and header[0] == compact_log.REC_COL:
+            self.header = header[1:]
+            self.decoder = compact_log.CompactDecoder(self.header, self.time_col)
+        else:
+            self.header = header or None
+
+    def poll(self) -> list[dict]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return []
+        if self.inode is not None and (st.st_ino != self.inode or st.st_size < self.offset):
+            self._reset()
+            self.from_start = True  # neue Datei: nichts auslassen
+        if self.offset is None and st.st_size == 0:
+            self.from_start = True  # leere Datei: Ende = Anfang, Format erst mit dem ersten Inhalt bestimmen
+            return []
+        rows = []
+        with open(self.path, "rb") as f:
+            if self.offset is None:
+                self.inode = st.st_ino
+                if f.read(len(binary_log.MAGIC)) == binary_log.MAGIC:
+                    self.offset = self._open_binary(st.st_size)
+                else:
+                    f.seek(0)
+                    self.offset = 0 if self.from_start else self._open_at_end(f, st.st_size)
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        if self.binary:
+            return self._binary_rows(data)
+        lines = (self.buf + data).split(b"\n")
+        self.buf = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            if self.header is None:
+                self._set_header(line)
+                continue
+            row = self._row(next(csv.reader([line.decode("utf-8", errors="replace").rstrip("\r")]), []))
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _row(self, rec: list[str]) -> dict | None:
+        if self.decoder is not None:
+            row = self.decoder.decode(rec)
+        else:
+            row = dict(zip(self.header, rec)) if rec else None
+        if row is None:
+            return None
+        t = ms_to_time(row[TS_MS_COL]) if row.get(TS_MS_COL) else None
+        row[self.time_col] = t if t is not None else parse_time(row.get(self.time_col) or "")
+        return row if row[self.time_col] is not None else None
+
+
+class RatePolicy:
+    """
+    Gleitfenster über die Incidents einer Quelle ("netwatch" oder "fritz").
+    min_share: Anteil der Messungen mit passendem Incident (braucht ein voll beobachtetes Fenster
+               und min_samples Messungen) - "anhaltend gestört".
+    min_count: Anzahl Episoden im Fenster - "Box flattert". Eine Episode beginnt mit einer Messung mit
+               passendem Incident nach einer ohne; ein langer Ausfall zählt so einmal, egal wie oft abgetastet.
+    """
+
+    def __init__(self, name: str, source: str, types, window_s: float, min_share: float | None = None,
+                 min_count: int | None = None, min_samples: int = 3):
+        self.name = name
+        self.source = source
+        self.types = set(types)
+        self.window_s = window_s
+        self.min_share = min_share
+        self.min_count = min_count
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        self.samples = deque()  # (epoch_s, gestört, Beginn einer Episode)
+        self.since = None
+        self.bad = 0
+        self.episodes = 0
+
+    def observe(self, ts: float, incidents: list[dict]) -> bool:
+        """Eine Messung mit ihren Incidents eintragen; True, wenn die Policy jetzt anschlägt."""
+        hit = any(ev["type"] in self.types for ev in incidents)
+        if self.samples and ts - self.samples[-1][0] > self.window_s:
+            self.reset()  # Messlücke (Rechner aus, Logger gestoppt): Fenster neu beginnen
+        if self.since is None:
+            self.since = ts
+        episode = hit and not (self.samples and self.samples[-1][1])
+        self.samples.append((ts, hit, episode))
+        self.bad += hit
+        self.episodes += episode
+        while self.samples[0][0] <= ts - self.window_s:
+            _, old_hit, old_episode = self.samples.popleft()
+            self.bad -= old_hit
+            self.episodes -= old_episode
+        return self.triggered(ts)
+
+    def triggered(self, ts: float) -> bool:
+        if self.min_count is not None and self.episodes >= self.min_count:
+            return True
+        if self.min_share is None or ts - self.since < self.window_s or len(self.samples) < self.min_samples:
+            return False
+        return self.bad / len(self.samples) >= self.min_share
+
+    def describe(self) -> str:
+        if self.min_count is not None and self.episodes >= self.min_count:
+            return f"{self.episodes} Episoden in {self.window_s / 60:.0f} min"
+        return f"{self.bad}/{len(self.samples)} Messungen gestört in {self.window_s / 60:.0f} min"
+
+
+def default_policies(loss_minutes: float = 5, degraded_share: float = 0.8, fritz_minutes: float = 30,
+                     fritz_incidents: int = 4) -> list[RatePolicy]:
+    return [
+        RatePolicy("degraded", "netwatch", DEGRADED_TYPES, loss_minutes * 60, min_share=degraded_share),
+        RatePolicy("flapping", "fritz", FLAPPING_TYPES, fritz_minutes * 60, min_count=fritz_incidents),
+    ]
+
+
+class Watchdog:
+    """
+    Verbindet Detektoren, Policies und Neustart. `restart()` liefert (ok, meldung) wie reboot_fritzbox.
+    Entscheidungen fallen in Datenzeit, damit --replay dasselbe tut wie der Live-Betrieb.
+    """
+
+    def __init__(self, policies, restart, cooldown_s: float = 1800, max_restarts: int = 3,
+                 rate_window_s: float = 86400, dry_run: bool = False, netwatch=None, fritz=None,
+                 actions_out: str | None = None, log=print):
+        self.policies = list(policies)
+        self.restart = restart
+        self.cooldown_s = cooldown_s
+        self.max_restarts = max_restarts
+        self.rate_window_s = rate_window_s
+        self.dry_run = dry_run
+        self.detectors = {"netwatch": netwatch or NetwatchIncidentDetector(),
+                          "fritz": fritz or FritzIncidentDetector()}
+        self.actions_out = actions_out
+        self.log = log
+        self.last_action = None
+        self.restarts = deque()  # Datenzeit ausgelöster Neustarts (auch dry-run) für das Ratenlimit
+        self.actions = []
+
+    def feed(self, source: str, row: dict) -> list[dict]:
+        """Zeile einer Quelle auswerten; liefert die dabei ausgelösten Aktionen."""
+        incidents = self.detectors[source].feed(row)
+        ts = row["timestamp"].timestamp()
+        actions = []
+        for policy in self.policies:
+            if policy.source == source and policy.observe(ts, incidents):
+                actions.append(self._act(policy, row["timestamp"], ts))
+        return actions
+
+    def _act(self, policy: RatePolicy, when, ts: float) -> dict:
+        action = {"timestamp": when.strftime(TIME_FMT), "policy": policy.name, "action": "",
+                  "details": policy.describe(), "result": ""}
+        policy.reset()
+        while self.restarts and self.restarts[0] <= ts - self.rate_window_s:
+            self.restarts.popleft()
+        if self.last_action is not None and ts - self.last_action < self.cooldown_s:
+            action["action"] = "suppressed_cooldown"
+        elif len(self.restarts) >= self.max_restarts:
+            action["action"] = "suppressed_rate_limit"
+        else:
+            self.last_action = ts
+            self.restarts.append(ts)
+            for p in self.policies:
+                p.reset()  # Daten vor dem Neustart sollen keinen zweiten auslösen
+            if self.dry_run:
+                action["action"] = "dry_run"
+            else:
+                action["action"] = "restart"
+                ok, message = self.restart()
+                action["result"] = ("ok: " if ok else "failed: ") + message.strip()
+        self.log(f"[{now()}] {policy.name}: {action['details']} -> {action['action']}"
+                 + (f" ({action['result']})" if action["result"] else ""))
+        self.actions.append(action)
+        if self.actions_out:
+            append_action(self.actions_out, action)
+        return action
+
+
+def append_action(path: str, action: dict) -> None:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=ACTIONS_HEADER)
+        if new:
+            w.writeheader()
+        w.writerow(action)
+
+
+def merged(batches: dict) -> list[tuple[str, dict]]:
+    """{quelle: [zeilen]} -> [(quelle, zeile)] nach Zeit; je Quelle bleibt die Dateireihenfolge."""
+    streams = [[(row["timestamp"], source, row) for row in rows] for source, rows in batches.items()]
+    return [(source, row) for _, source, row in heapq.merge(*streams, key=lambda e: e[0])]
+
+
+def run(watchdog: Watchdog, followers: dict, poll_s: float, iterations: int | None = None):
+    """Live-Schleife: alle poll_s Sekunden neue Zeilen beider Logs zeitlich gemischt auswerten."""
+    n = 0
+    while iterations is None or n < iterations:
+        for source, row in merged({s: f.poll() for s, f in followers.items()}):
+            watchdog.feed(source, row)
+        n += 1
+        if iterations is None or n < iterations:
+            time.sleep(poll_s)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Watchdog: FRITZ!Box bei anhaltenden Störungen automatisch neu starten")
+    ap.add_argument("--netwatch", default=DEFAULT_NETWATCH, help=f"NetWatch-Log (default: {DEFAULT_NETWATCH})")
+    ap.add_argument("--fritz", default=DEFAULT_FRITZ, help=f"fritzlog_pull-Log (default: {DEFAULT_FRITZ})")
+    ap.add_argument("--host", default="192.168.178.1", help="FRITZ!Box IP/Host (default: 192.168.178.1)")
+    ap.add_argument("--user", default=None, help="FRITZ!Box Benutzername")
+    ap.add_argument("--password", default=None, help="FRITZ!Box Passwort (nicht nötig mit --dry-run/--replay)")
+    ap.add_argument("--loss-pct", type=float, default=10.0,
+                    help="Messung gilt als gestört ab diesem Paketverlust in %% (default: 10)")
+    ap.add_argument("--loss-minutes", type=float, default=5.0,
+                    help="Fenster der degraded-Policy in Minuten (default: 5)")
+    ap.add_argument("--degraded-share", type=float, default=0.8,
+                    help="Anteil gestörter Messungen im Fenster, ab dem neu gestartet wird (default: 0.8)")
+    ap.add_argument("--targets", default=None,
+                    help="Nur diese Ping-Ziele werten, kommagetrennt (default: alle)")
+    ap.add_argument("--fritz-incidents", type=int, default=4,
+                    help="Episoden mit Reconnects/Statuswechseln/DSL-Fehlern im Fenster für die flapping-Policy "
+                         "(default: 4)")
+    ap.add_argument("--fritz-minutes", type=float, default=30.0,
+                    help="Fenster der flapping-Policy in Minuten (default: 30)")
+    ap.add_argument("--cooldown", type=float, default=30.0,
+                    help="Minuten nach einem Neustart ohne weitere Aktion (default: 30)")
+    ap.add_argument("--max-restarts", type=int, default=3,
+                    help="Höchstens so viele Neustarts je --rate-window (default: 3)")
+    ap.add_argument("--rate-window", type=float, default=24.0, help="Ratenlimit-Fenster in Stunden (default: 24)")
+    ap.add_argument("--poll", type=float, default=5.0, help="Sekunden zwischen Log-Abfragen (default: 5)")
+    ap.add_argument("--journal", default=fritzbox_restart.DEFAULT_JOURNAL,
+                    help=f"Restart-Journal (default: {fritzbox_restart.DEFAULT_JOURNAL})")
+    ap.add_argument("--actions-out", default=None, help="CSV für Watchdog-Aktionen (default: keine)")
+    ap.add_argument("--dry-run", action="store_true", help="Nur protokollieren, nicht neu starten")
+    ap.add_argument("--replay", action="store_true",
+                    help="Vorhandene Logs von Anfang an auswerten und beenden (immer dry-run)")
+    args = ap.parse_args(argv)
+
+    dry_run = args.dry_run or args.replay
+    if not dry_run and not args.password:
+        ap.error("--password ist ohne --dry-run/--replay erforderlich")
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()] if args.targets else None
+    followers = {"netwatch": CsvFollower(args.netwatch, from_start=args.replay),
+                 "fritz": CsvFollower(args.fritz, from_start=args.replay)}
+    restart = partial(fritzbox_restart.reboot_fritzbox, args.host, args.user, args.password,
+                      wait=True, journal=args.journal)
+    watchdog = Watchdog(default_policies(args.loss_minutes, args.degraded_share, args.fritz_minutes,
+                                         args.fritz_incidents),
+                        restart, cooldown_s=args.cooldown * 60, max_restarts=args.max_restarts,
+                        rate_window_s=args.rate_window * 3600, dry_run=dry_run,
+                        netwatch=NetwatchIncidentDetector(DEFAULT_LATENCY_SPIKE_MS, args.loss_pct,
+                                                          targets=targets),
+                        fritz=FritzIncidentDetector(DEFAULT_ROUTER_SLOW_MS), actions_out=args.actions_out)
+
+    if args.replay:
+        run(watchdog, followers, 0, iterations=1)
+        print(f"[{now()}] Replay: {len(watchdog.actions)} Aktion(en)")
+        sys.exit(0)
+
+    print(f"[{now()}] Watchdog aktiv{' (dry-run)' if dry_run else ''}: {args.netwatch}, {args.fritz}")
+    try:
+        run(watchdog, followers, args.poll)
+    except KeyboardInterrupt:
+        print(f"\n[{now()}] Beendet.")
+
+
+if __name__ == "__main__":
+    main()
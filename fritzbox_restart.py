@@ -2,16 +2,52 @@
 # fritzbox_restart.py
 # Send a restart command to FRITZ!Box via TR-064 API
 # Requires: TR-064 enabled, `pip install fritzconnection`
+#
+# --wait: Wiederanlauf parallel und engmaschig prüfen (je Phase ein Thread) und die Ausfallzeiten
+# pro Phase ausgeben sowie an ein Restart-Journal (CSV) anhängen:
+#   went_down     - Box antwortet nicht mehr (Beginn des Ausfalls)
+#   reachable     - Webserver antwortet wieder (HTTP GET /, beliebiger Status)
+#   tr064         - TR-064-Aktionen werden beantwortet
+#   dsl_sync      - DSL synchron (WANDSLInterfaceConfig GetInfo: Up)
+#   wan_connected - WAN verbunden (GetStatusInfo: Connected)
+#   external_ip   - externe IP zugewiesen
+# Alle Zeiten in Sekunden ab Annahme des Reboot-Befehls.
 
 import argparse
+import csv
+import http.client
+import os
 import sys
+import threading
+import time
 from datetime import datetime
 
-# Import-Pfad je nach fritzconnection-Version
-try:
-    from fritzconnection import FritzConnection
-except ImportError:
-    from fritzconnection.core.fritzconnection import FritzConnection  # fallback
+from tr064_cache import CachedFritzConnection
+from tr064_fast import FastTR064Client
+
+# (Phase, Beschreibung) in der erwarteten Reihenfolge des Hochlaufs
+PHASES = (
+    ("reachable", "Box erreichbar (HTTP)"),
+    ("tr064", "TR-064 antwortet"),
+    ("dsl_sync", "DSL synchron"),
+    ("wan_connected", "WAN verbunden"),
+    ("external_ip", "Externe IP zugewiesen"),
+)
+# Phase -> Kandidaten (Dienst, Aktion) und Bedingung; erreicht, sobald ein vorhandener Kandidat sie erfüllt
+TR064_PROBES = {
+    "tr064": ([("WANCommonInterfaceConfig1", "GetCommonLinkProperties"), ("DeviceInfo1", "GetInfo")],
+              lambda r: True),
+    "dsl_sync": ([("WANDSLInterfaceConfig1", "GetInfo")],
+                 lambda r: str(r.get("NewStatus", "")).lower() == "up"),
+    "wan_connected": ([("WANIPConnection1", "GetStatusInfo"), ("WANPPPConnection1", "GetStatusInfo")],
+                      lambda r: r.get("NewConnectionStatus") == "Connected"),
+    "external_ip": ([("WANIPConnection1", "GetExternalIPAddress"), ("WANPPPConnection1", "GetExternalIPAddress")],
+                    lambda r: r.get("NewExternalIPAddress", "") not in ("", "0.0.0.0")),
+}
+JOURNAL_HEADER = ["timestamp", "host", "model", "firmware", "result", "went_down_s"] + \
+    [f"{phase}_s" for phase, _ in PHASES]
+DEFAULT_JOURNAL = os.path.join(os.path.expanduser("~"), "Documents", "Ping", "Log", "fritz_restart_journal.csv")
+_journal_lock = threading.Lock()
 
 
 def now() -> str:
@@ -19,7 +55,183 @@ def now() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-def reboot_fritzbox(host: str, user: str | None, password: str, timeout: int = 10) -> tuple[bool, str]:
+def probe_http(host: str, port: int, timeout: float) -> bool:
+    """Webserver der Box antwortet (Statuscode egal)."""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request("GET", "/")
+        conn.getresponse().read()
+        return True
+    finally:
+        conn.close()
+
+
+class RecoveryMonitor:
+    """
+    Prüft den Wiederanlauf nach einem Reboot: ein Thread je Phase, alle `interval` Sekunden.
+    went_down ist der erste Fehlschlag irgendeiner Phase. Eine Phase gilt als erreicht, wenn ihre
+    Prüfung gelingt, nachdem sie selbst fehlgeschlagen ist (antwortet z. B. HTTP noch, während
+    TR-064 schon weg ist, zählt erst die Rückkehr nach dem eigenen Ausfall).
+    prepare() muss vor dem Reboot laufen (Beschreibungen und Envelopes der Prüfaktionen vorladen).
+    clock/sleep: Zeitquelle und Warten zwischen den Prüfungen (default: time.monotonic und ein Warten,
+    das run() beim Ende vorzeitig beendet); Tests setzen eine virtuelle Uhr ein.
+    """
+
+    def __init__(self, fc, host: str, http_port: int = 80, interval: float = 0.5, probe_timeout: float = 2.0,
+                 clock=time.monotonic, sleep=None):
+        self.fc = fc
+        self.host = host
+        self.http_port = http_port
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.candidates = {}
+        self.results = {}
+        self.checked = {}  # Phase -> Zeitpunkt ihrer letzten Prüfung (Sekunden ab Reboot)
+        self.went_down = None
+        self._down = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.sleep = sleep or self._stop.wait
+
+    def prepare(self) -> None:
+        client = FastTR064Client(self.fc, timeout=self.probe_timeout)
+        for phase, (candidates, _) in TR064_PROBES.items():
+            available = []
+            for service, action in candidates:
+                try:
+                    client._prepare(self.fc.normalize_name(service), action)
+                    available.append((service, action))
+                except Exception:
+                    pass  # Dienst gibt es auf dieser Box nicht (z. B. kein DSL)
+            self.candidates[phase] = available
+        client.close()
+
+    def _check_tr064(self, client, phase: str) -> bool:
+        _, condition = TR064_PROBES[phase]
+        return any(condition(client.call_action(service, action)) for service, action in self.candidates[phase])
+
+    def _mark_down(self, t: float) -> None:
+        # frühester Fehlschlag, auch wenn ein anderer Thread ihn später meldet
+        with self._lock:
+            if self.went_down is None or t < self.went_down:
+                self.went_down = t
+                self._down.set()
+
+    def _probe(self, phase: str, started: float, deadline: float) -> None:
+        client = None if phase == "reachable" else FastTR064Client(self.fc, timeout=self.probe_timeout)
+        down = False  # eigene Prüfung dieser Phase schon fehlgeschlagen
+        try:
+            while not self._stop.is_set() and self.clock() < deadline:
+                try:
+                    if client is None:
+                        ok = probe_http(self.host, self.http_port, self.probe_timeout)
+                    else:
+                        ok = self._check_tr064(client, phase)
+                except Exception:
+                    ok = False
+                    if client is not None:
+                        client.close()
+                t = self.clock() - started
+                self.checked[phase] = t
+                if not ok:
+                    down = True
+                    self._mark_down(t)
+                elif down:
+                    with self._lock:
+                        self.results[phase] = t
+                    return
+                self.sleep(self.interval)
+        finally:
+            if client is not None:
+                client.close()
+
+    def run(self, started: float, wait_timeout: float = 600.0, down_timeout: float = 120.0) -> dict:
+        """
+        Wartet auf alle Phasen (oder Zeitlimit). `started`: clock()-Zeitpunkt des Reboot-Befehls.
+        Liefert {"went_down": s, <phase>: s, ...}; fehlende Phasen fehlen im dict,
+        Phasen ohne passenden Dienst haben den Wert None.
+        """
+        deadline = started + wait_timeout
+        phases = [p for p, _ in PHASES if p == "reachable" or self.candidates.get(p)]
+        threads = [threading.Thread(target=self._probe, args=(p, started, deadline), daemon=True) for p in phases]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            # an der Zeit der Prüfungen gemessen, nicht an der eigenen Uhr: jede Phase muss down_timeout erreicht haben
+            if not self._down.is_set() and all(self.checked.get(p, 0) > down_timeout for p in phases):
+                break  # Box ist gar nicht ausgefallen
+            time.sleep(0.05)
+        self._stop.set()
+        for t in threads:
+            t.join()
+        results = {"went_down": self.went_down, **self.results}
+        for phase, _ in PHASES:
+            if phase not in phases:
+                results[phase] = None
+        return results
+
+
+def format_breakdown(results: dict) -> list[str]:
+    """Ausfallzeiten je Phase als Textzeilen (Zeit ab Reboot, Abstand zur vorigen Phase)."""
+    lines = []
+    prev = results.get("went_down")
+    if prev is None:
+        return ["Box ist nach dem Reboot-Befehl nicht ausgefallen."]
+    lines.append(f"  {'Box offline':24s} {prev:7.1f} s")
+    for phase, label in PHASES:
+        if phase in results and results[phase] is None:
+            lines.append(f"  {label:24s}       -   (nicht verfügbar)")
+        elif phase not in results:
+            lines.append(f"  {label:24s}       -   (nicht erreicht)")
+        else:
+            t = results[phase]
+            lines.append(f"  {label:24s} {t:7.1f} s  (+{max(0.0, t - prev):.1f} s)")
+            prev = max(prev, t)
+    return lines
+
+
+def recovered(results: dict) -> bool:
+    return results.get("went_down") is not None and all(phase in results for phase, _ in PHASES)
+
+
+def append_journal(path: str, row: dict) -> None:
+    """
+    Zeile ans Restart-Journal anhängen; Datei und Kopfzeile bei Bedarf anlegen.
+    Threadsicher: parallele Neustarts (fritz_fleet_restart) schreiben den Kopf nur einmal.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with _journal_lock:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=JOURNAL_HEADER)
+            if new:
+                w.writeheader()
+            w.writerow(row)
+
+
+def journal_row(host: str, fc, results: dict, timestamp: str) -> dict:
+    def attr(name):
+        try:
+            return getattr(fc, name) or ""
+        except Exception:
+            return ""
+
+    row = {"timestamp": timestamp, "host": host, "model": attr("modelname"), "firmware": attr("system_version"),
+           "result": "recovered" if recovered(results) else ("no_outage" if results.get("went_down") is None
+                                                             else "timeout")}
+    for key in ["went_down"] + [phase for phase, _ in PHASES]:
+        value = results.get(key)
+        row[f"{key}_s"] = "" if value is None else f"{value:.2f}"
+    return row
+
+
+def reboot_fritzbox(host: str, user: str | None, password: str, timeout: int = 10, port: int | None = None,
+                    wait: bool = False, journal: str | None = None, probe_interval: float = 0.5,
+                    wait_timeout: float = 600.0, http_port: int = 80, recovery: dict | None = None,
+                    log=None) -> tuple[bool, str]:
     """
     Send reboot command to FRITZ!Box.
     
@@ -28,35 +240,76 @@ def reboot_fritzbox(host: str, user: str | None, password: str, timeout: int = 1
         user: Username (optional, can be None)
         password: Password for authentication
         timeout: Connection timeout in seconds
+        port: TR-064 port (None: fritzconnection default)
+        wait: Measure the recovery phases after the reboot (RecoveryMonitor)
+        journal: With wait, append the breakdown to this CSV (None: no journal)
+        probe_interval: Seconds between recovery probes per phase
+        wait_timeout: Give up waiting for recovery after this many seconds
+        http_port: Port of the web server used for the "reachable" probe
+        recovery: With wait, filled with the measured phases ("phases") and the journal row ("row");
+            if connecting or the reboot command fails, with the error text ("error")
+        log: Output function (default: print), e.g. a no-op when many boxes restart in parallel
     
     Returns:
-        Tuple of (success: bool, message: str)
+        Tuple of (success: bool, message: str); with wait, success means fully recovered
     """
+    log = log or print
     try:
-        print(f"[{now()}] Verbinde zur FritzBox ({host})...")
-        fc = FritzConnection(
+        log(f"[{now()}] Verbinde zur FritzBox ({host})...")
+        # API-Beschreibung aus dem gemeinsamen Cache (nur DeviceConfig1 wird geladen)
+        connect = {"port": port} if port is not None else {}
+        fc = CachedFritzConnection(
             address=host,
             user=user,
             password=password,
             timeout=timeout,
-            use_cache=False  # Don't cache for admin operations
+            **connect
         )
+
+        monitor = None
+        if wait:
+            monitor = RecoveryMonitor(fc, host, http_port=http_port, interval=probe_interval)
+            monitor.prepare()
         
-        print(f"[{now()}] Sende Neustart-Befehl...")
+        log(f"[{now()}] Sende Neustart-Befehl...")
+        timestamp = now()
+        started = time.monotonic()
         fc.call_action("DeviceConfig:1", "Reboot")
         
         message = f"[{now()}] Neustart-Befehl erfolgreich gesendet [OK]"
-        print(message)
-        print(f"[{now()}] Die FRITZ!Box wird jetzt neu gestartet. Dies kann 1-2 Minuten dauern.")
-        return True, message
+        log(message)
+        if monitor is None:
+            log(f"[{now()}] Die FRITZ!Box wird jetzt neu gestartet. Dies kann 1-2 Minuten dauern.")
+            return True, message
+
+        log(f"[{now()}] Warte auf Wiederanlauf (max. {wait_timeout:.0f}s)...")
+        results = monitor.run(started, wait_timeout)
+        # mit abweichendem TR-064-Port (mehrere Boxen hinter einer Adresse) steht er mit im Journal
+        row = journal_row(f"{host}:{port}" if port is not None else host, fc, results, timestamp)
+        if recovery is not None:
+            recovery.update(phases=results, row=row)
+        log(f"[{now()}] Ausfall nach Phasen (Sekunden ab Reboot-Befehl):")
+        for line in format_breakdown(results):
+            log(line)
+        if journal:
+            append_journal(journal, row)
+            log(f"[{now()}] Journal: {journal}")
+        if recovered(results):
+            total = max(v for v in results.values() if v is not None)
+            return True, f"[{now()}] FRITZ!Box nach {total:.1f}s vollständig wieder online [OK]"
+        error_msg = f"[{now()}] FRITZ!Box nicht vollständig wieder online"
+        log(error_msg, file=sys.stderr)
+        return False, error_msg
         
     except Exception as e:
+        if recovery is not None:
+            recovery["error"] = str(e) or type(e).__name__
         error_msg = f"[{now()}] Fehler beim Senden des Neustartbefehls: {e}"
-        print(error_msg, file=sys.stderr)
+        log(error_msg, file=sys.stderr)
         return False, error_msg
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Send reboot command to FRITZ!Box via TR-064 API"
     )
@@ -81,13 +334,47 @@ def main():
         default=10,
         help="Connection timeout in seconds (default: 10)"
     )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=None,
+        help="TR-064 port (default: fritzconnection default 49000)"
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Measure recovery (reachable, TR-064, DSL sync, WAN, external IP) and append it to the journal"
+    )
+    parser.add_argument(
+        "--journal",
+        default=DEFAULT_JOURNAL,
+        help=f"Restart journal CSV for --wait (default: {DEFAULT_JOURNAL})"
+    )
+    parser.add_argument(
+        "--probe-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between recovery probes per phase (default: 0.5)"
+    )
+    parser.add_argument(
+        "--wait-timeout",
+        type=float,
+        default=600.0,
+        help="Give up waiting for recovery after N seconds (default: 600)"
+    )
+    parser.add_argument(
+        "--http-port",
+        type=int,
+        default=80,
+        help="Web server port for the reachability probe (default: 80)"
+    )
     parser.add_argument(
         "--yes",
         action="store_true",
         help="Skip confirmation prompt"
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Confirmation prompt unless --yes flag is used
     if not args.yes:
@@ -106,7 +393,12 @@ def main():
             print("\nRestart cancelled.")
             sys.exit(0)
     
-    success, message = reboot_fritzbox(args.host, args.user, args.password, args.timeout)
+    if args.wait:
+        success, message = reboot_fritzbox(args.host, args.user, args.password, args.timeout, port=args.port,
+                                           wait=True, journal=args.journal, probe_interval=args.probe_interval,
+                                           wait_timeout=args.wait_timeout, http_port=args.http_port)
+    else:
+        success, message = reboot_fritzbox(args.host, args.user, args.password, args.timeout, port=args.port)
     
     if success:
         sys.exit(0)
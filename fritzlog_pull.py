@@ -8,6 +8,17 @@ import time
 import argparse
 import datetime
 import os
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Formate und Verbindung braucht jeder Lauf; die Module der Zusatzausgaben (Incidents, Hostliste,
+# Online-Monitor, schneller SOAP-Pfad) werden erst geladen, wenn ihre Option gesetzt ist
+import binary_log
+import compact_log
+from tr064_cache import CachedFritzConnection
 
 # Import-Pfad je nach fritzconnection-Version
 try:
@@ -16,10 +27,48 @@ except ImportError:
     from fritzconnection.core.fritzconnection import FritzConnection  # fallback
 
 
+# Marker in wan_connection_status für Abfrage-Ausfälle (werden von analyze_netlogs ausgewertet)
+POLL_ERROR = "POLL_ERROR"
+RECONNECTED = "RECONNECTED"
+
+# Aktionsgruppen in collect_once; schlagen alle fehl, gilt die Verbindung als verloren
+ACTION_GROUPS = ("wan", "ext_ip", "common", "link_props", "dsl_link", "dsl_info", "dsl_stats")
+# Epoch-Millisekunden (eindeutig auch bei Zeitumstellung) und Antwortzeit je Aktionsgruppe
+TS_MS_COL = "ts_ms"
+LATENCY_COLS = tuple(f"lat_{group}_ms" for group in ACTION_GROUPS)
+# Textspalten im Binär-Log (--binary); timestamp ist time, lat_*_ms float, alle übrigen int (TR-064 ui4)
+BINARY_STR_COLS = ("wan_connection_status", "wan_external_ip", "wan_last_error", "access_type",
+                   "phys_link_status", "dsl_link_status", "sample_mode")
+# Spalten des Status-Logs (mit --adaptive zusätzlich sample_mode)
+LOG_HEADER = (
+    "timestamp",
+    "wan_connection_status", "wan_uptime_s", "wan_external_ip", "wan_last_error",
+    "common_bytes_sent", "common_bytes_recv", "common_rate_send_bps", "common_rate_recv_bps",
+    "access_type", "phys_link_status", "l1_up_max_bps", "l1_down_max_bps",
+    "dsl_link_status", "dsl_curr_up_bps", "dsl_curr_down_bps",
+    "dsl_fec_errors", "dsl_crc_errors", "dsl_hec_errors",
+    "dsl_errored_secs", "dsl_severely_errored_secs",
+    "dsl_link_retrain", "dsl_init_errors", "dsl_init_timeouts",
+    "dsl_atuc_fec_errors", "dsl_atuc_crc_errors", "dsl_atuc_hec_errors",
+    TS_MS_COL, *LATENCY_COLS,
+)
+# Log-Formate (log_format) für Fehlermeldungen
+FORMAT_NAMES = {"plain": "normales CSV-Log", "compact": "Kompakt-Log (--compact)", "binary": "Binär-Log (--binary)"}
+
+
 def now() -> str:
     return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def format_ms(ts_ms: int) -> str:
+    """Epoch-Millisekunden als lokale Zeit im Log-Format."""
+    return datetime.datetime.fromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+
 def get_safe(fc: FritzConnection, service: str, action: str) -> dict:
     """TR-064 Action robust aufrufen. Liefert dict oder {'__error__': '...'}."""
     try:
@@ -37,8 +86,14 @@ def first_ok(fc: FritzConnection, candidates: list[tuple[str, str]]) -> dict:
     return {"__error__": "no candidate succeeded"}
 
 
-def open_fc(address: str, user: str | None, password: str, timeout: int = 5) -> FritzConnection:
-    return FritzConnection(address=address, user=user, password=password, timeout=timeout, use_cache=True)
+def open_fc(address: str, user: str | None, password: str, timeout: int = 5,
+            fast: bool = False) -> FritzConnection:
+    fc = CachedFritzConnection(address=address, user=user, password=password, timeout=timeout)
+    if not fast:
+        return fc
+    # fast: Aktionen ohne Argumente über den schlanken SOAP-Pfad (tr064_fast), Rest über fritzconnection
+    from tr064_fast import FastTR064Client
+    return FastTR064Client(fc)
 
 
 def ensure_header(path: str, header: list[str]) -> None:
@@ -49,34 +104,68 @@ def ensure_header(path: str, header: list[str]) -> None:
         pass
 
 
+def binary_columns(header: list[str]) -> list[tuple[str, str]]:
+    """Spaltentypen für das Binär-Log (binary_log)."""
+    def typ(col):
+        if col == "timestamp":
+            return "time"
+        if col in LATENCY_COLS:
+            return "float"
+        return "str" if col in BINARY_STR_COLS else "int"
+    return [(col, typ(col)) for col in header]
+
+
+def file_header(path: str) -> list[str]:
+    """Kopfzeile einer vorhandenen CSV (leer, wenn Datei leer)."""
+    with open(path, newline="", encoding=compact_log.READ_ENCODING) as f:
+        return next(csv.reader(f), [])
+
+
+def log_format(path: str) -> str | None:
+    """Format einer vorhandenen Log-Datei ("binary", "compact" oder "plain"); None, wenn sie fehlt oder leer ist."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    if binary_log.is_binary_file(path):
+        return "binary"
+    return "compact" if compact_log.is_compact_file(path) else "plain"
+
+
 def collect_once(fc: FritzConnection) -> dict:
     """
     Holt eine Status-Sonde von der Box. Unterstützt unterschiedliche Service-Bezeichner.
+    Misst die Antwortzeit jeder Aktionsgruppe (lat_<gruppe>_ms, inkl. fehlgeschlagener Kandidaten).
     """
+    latency = {}
+
+    def timed(group: str, candidates: list[tuple[str, str]]) -> dict:
+        started = time.perf_counter()
+        res = first_ok(fc, candidates)
+        latency[f"lat_{group}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return res
 
     # --- WAN Status / External IP ---
-    wan = first_ok(fc, [
+    wan = timed("wan", [
         ("WANIPConnection1", "GetStatusInfo"),
         ("WANPPPConnection1", "GetStatusInfo"),
         ("WANIPConn1", "GetStatusInfo"),
         ("WANPPPConn1", "GetStatusInfo"),
     ])
 
-    ext_ip = first_ok(fc, [
+    ext_ip = timed("ext_ip", [
         ("WANIPConnection1", "GetExternalIPAddress"),
         ("WANIPConn1", "GetExternalIPAddress"),
     ])
     external_ip = "" if "__error__" in ext_ip else ext_ip.get("NewExternalIPAddress", "")
 
     # --- WAN Common: Traffic & Raten ---
-    common = first_ok(fc, [
+    common = timed("common", [
         ("WANCommonIFC1", "GetAddonInfos"),
         ("WANCommonInterfaceConfig1", "GetAddonInfos"),
     ])
     # enthält: NewTotalBytesSent, NewTotalBytesReceived, NewByteSendRate, NewByteReceiveRate
 
     # --- CommonLinkProperties (L1/Access/Physical Link) ---
-    link_props = first_ok(fc, [
+    link_props = timed("link_props", [
         ("WANCommonIFC1", "GetCommonLinkProperties"),
         ("WANCommonInterfaceConfig1", "GetCommonLinkProperties"),
     ])
@@ -84,7 +173,7 @@ def collect_once(fc: FritzConnection) -> dict:
     #          NewPhysicalLinkStatus
 
     # --- DSL Link Status ---
-    dsl_link = first_ok(fc, [
+    dsl_link = timed("dsl_link", [
         ("WANDSLLinkC1", "GetDSLLinkInfo"),
         ("WANDSLLinkConfig1", "GetDSLLinkInfo"),
         ("WANDSLLinkConfig", "GetDSLLinkInfo"),
@@ -92,22 +181,27 @@ def collect_once(fc: FritzConnection) -> dict:
     # enthält: NewLinkStatus
 
     # --- DSL Info (aktuelle Raten) ---
-    dsl_info = first_ok(fc, [
+    dsl_info = timed("dsl_info", [
         ("WANDSLInterfaceConfig1", "GetInfo"),
         ("WANDSLInterfaceConfig", "GetInfo"),
     ])
     # typ. enthält: NewUpstreamCurrRate, NewDownstreamCurrRate
 
     # --- DSL Fehlerzähler (Total) ---
-    dsl_stats = first_ok(fc, [
+    dsl_stats = timed("dsl_stats", [
         ("WANDSLInterfaceConfig1", "GetStatisticsTotal"),
         ("WANDSLInterfaceConfig", "GetStatisticsTotal"),
     ])
     # typ. enthält: NewFECErrors, NewCRCErrors, NewHECErrors, NewErroredSecs, NewSeverelyErroredSecs,
     #               NewLinkRetrain, NewInitErrors, NewInitTimeouts, sowie ATUC_*-Varianten
 
+    results = (wan, ext_ip, common, link_props, dsl_link, dsl_info, dsl_stats)
+    failed = [name for name, res in zip(ACTION_GROUPS, results) if "__error__" in res]
+
+    ts_ms = now_ms()
     data = {
-        "timestamp": now(),
+        "timestamp": format_ms(ts_ms),
+        TS_MS_COL: ts_ms,
 
         # WAN core
         "wan_connection_status": "" if "__error__" in wan else wan.get("NewConnectionStatus", ""),
@@ -146,11 +240,364 @@ def collect_once(fc: FritzConnection) -> dict:
         "dsl_atuc_fec_errors": "" if "__error__" in dsl_stats else dsl_stats.get("NewATUC_FECErrors", ""),
         "dsl_atuc_crc_errors": "" if "__error__" in dsl_stats else dsl_stats.get("NewATUC_CRCErrors", ""),
         "dsl_atuc_hec_errors": "" if "__error__" in dsl_stats else dsl_stats.get("NewATUC_HECErrors", ""),
+
+        # nicht im CSV: fehlgeschlagene Aktionsgruppen (für FritzSession)
+        "__failed__": failed,
     }
+    data.update(latency)
     return data
 
 
-def main():
+def marker_row(marker: str, message: str) -> dict:
+    """Zeile für POLL_ERROR/RECONNECTED; Meldung steht in wan_last_error."""
+    ts_ms = now_ms()
+    return {"timestamp": format_ms(ts_ms), TS_MS_COL: ts_ms,
+            "wan_connection_status": marker, "wan_last_error": message}
+
+
+class FritzSession:
+    """
+    Hält die FritzConnection und baut sie nach Ausfällen neu auf, statt die Logging-Schleife zu beenden.
+    Wartezeit zwischen Versuchen: exponentielles Backoff mit Jitter (retry_min .. retry_max Sekunden).
+    Der Neuaufbau läuft über open_fc, nutzt also die gecachten Service-Beschreibungen (tr064_cache).
+    Teilweise Fehler (einzelne Aktionsgruppen) gelten nicht als Ausfall - die Zeile wird normal geschrieben.
+    """
+
+    def __init__(self, address: str, user: str | None, password: str, timeout: int = 5,
+                 retry_min: float = 2.0, retry_max: float = 300.0, fc: FritzConnection | None = None,
+                 fast: bool = False):
+        self.address = address
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.fc = fc
+        self.fast = fast
+        self.failures = 0
+        self.down_since = None
+
+    def poll(self) -> list[dict]:
+        """Eine Abfrage; liefert die zu schreibenden Zeilen (Messung, POLL_ERROR oder RECONNECTED + Messung)."""
+        error = None
+        try:
+            if self.fc is None:
+                self.fc = open_fc(self.address, self.user, self.password, self.timeout, fast=self.fast)
+            row = collect_once(self.fc)
+            if len(row.get("__failed__", ())) >= len(ACTION_GROUPS):
+                error = "keine TR-064-Aktion erfolgreich"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        if error:
+            self.fc = None
+            self.failures += 1
+            if self.down_since is None:
+                self.down_since = time.monotonic()
+            return [marker_row(POLL_ERROR, error)]
+
+        rows = []
+        if self.failures:
+            down = int(time.monotonic() - self.down_since)
+            rows.append(marker_row(RECONNECTED, f"nach {self.failures} Fehlversuchen, {down}s ohne Daten"))
+            self.failures = 0
+            self.down_since = None
+        rows.append(row)
+        return rows
+
+    def next_delay(self, interval: float) -> float:
+        """Normales Intervall, nach Fehlern Backoff mit Jitter (50-100 % der Stufe)."""
+        if not self.failures:
+            return interval
+        step = min(self.retry_max, self.retry_min * 2 ** (self.failures - 1))
+        return step * random.uniform(0.5, 1.0)
+
+
+class AdaptiveSampler:
+    """
+    Adaptive Abtastrate: normal `interval`, bei Auffälligkeiten `burst_interval` für `burst_duration`
+    Sekunden, danach schrittweises Verdoppeln zurück auf `interval` ("decay").
+    Auslöser: Statuswechsel, Uptime-Reset oder Anstieg der DSL-Fehlerzähler um >= `error_jump`.
+    """
+
+    NORMAL = "normal"
+    BURST = "burst"
+    DECAY = "decay"
+
+    ERROR_COUNTERS = ("dsl_crc_errors", "dsl_hec_errors", "dsl_errored_secs",
+                      "dsl_severely_errored_secs", "dsl_link_retrain", "dsl_init_errors")
+
+    def __init__(self, interval: float, burst_interval: float = 1.0, burst_duration: float = 120.0,
+                 error_jump: int = 10, clock=time.monotonic):
+        self.interval = interval
+        self.burst_interval = min(burst_interval, interval)
+        self.burst_duration = burst_duration
+        self.error_jump = error_jump
+        self.clock = clock
+        self.mode = self.NORMAL
+        self.reason = ""
+        self._current = interval
+        self._burst_until = 0.0
+        self._prev_status = None
+        self._prev_uptime = None
+        self._prev_errors = None
+
+    @staticmethod
+    def _int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _trigger(self, row: dict) -> str:
+        """Prüft eine Messung gegen die vorherige; liefert den Auslösegrund oder ''."""
+        reason = ""
+        status = row.get("wan_connection_status", "")
+        if self._prev_status is not None and status != self._prev_status:
+            reason = f"status {self._prev_status} -> {status}"
+
+        uptime = self._int(row.get("wan_uptime_s"))
+        if not reason and uptime is not None and self._prev_uptime is not None and uptime < self._prev_uptime:
+            reason = f"uptime {self._prev_uptime}s -> {uptime}s"
+
+        counts = [self._int(row.get(c)) for c in self.ERROR_COUNTERS]
+        errors = sum(c for c in counts if c is not None) if any(c is not None for c in counts) else None
+        if not reason and errors is not None and self._prev_errors is not None \
+                and errors - self._prev_errors >= self.error_jump:
+            reason = f"dsl errors +{errors - self._prev_errors}"
+
+        self._prev_status = status
+        if uptime is not None:
+            self._prev_uptime = uptime
+        if errors is not None:
+            self._prev_errors = errors
+        return reason
+
+    def observe(self, row: dict) -> None:
+        """Messung auswerten und ggf. in den Burst-Modus wechseln."""
+        reason = self._trigger(row)
+        if reason:
+            self.mode = self.BURST
+            self.reason = reason
+            self._current = self.burst_interval
+            self._burst_until = self.clock() + self.burst_duration
+
+    def next_interval(self) -> float:
+        """Wartezeit bis zur nächsten Messung; aktualisiert den Modus für die nächste Zeile."""
+        if self.mode == self.BURST and self.clock() < self._burst_until:
+            return self._current
+        if self.mode in (self.BURST, self.DECAY):
+            self._current = min(self.interval, self._current * 2)
+            self.mode = self.DECAY if self._current < self.interval else self.NORMAL
+        return self._current
+
+
+class SampleRing:
+    """Ringpuffer fester Größe (vorab angelegt) für die letzten `capacity` Zeilen; threadsicher."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items = [None] * self.capacity
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, item) -> None:
+        with self._lock:
+            self._items[self._next] = item
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, n: int | None = None) -> list:
+        """Die letzten n Einträge, älteste zuerst."""
+        with self._lock:
+            n = self._count if n is None else max(0, min(n, self._count))
+            start = self._next - n
+            return [self._items[(start + i) % self.capacity] for i in range(n)]
+
+
+class LatencyHistogram:
+    """Kumulatives Histogramm (Prometheus-Stil) mit festen Bucket-Grenzen in Sekunden."""
+
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+def _om_number(value):
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(int(f)) if f.is_integer() else repr(f)
+
+
+def _om_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class LiveStats:
+    """
+    Live-Daten des Loggers ohne Plattenzugriff: Ringpuffer der letzten Zeilen plus
+    Abfragedauer-Histogramm. Wird vom Metrics-Server als OpenMetrics bzw. JSON ausgeliefert.
+    """
+
+    # (Spalte, Metrikname)
+    GAUGES = [
+        ("wan_uptime_s", "fritz_wan_uptime_seconds"),
+        ("common_rate_send_bps", "fritz_wan_send_rate_bytes"),
+        ("common_rate_recv_bps", "fritz_wan_receive_rate_bytes"),
+        ("l1_up_max_bps", "fritz_l1_upstream_max_bits"),
+        ("l1_down_max_bps", "fritz_l1_downstream_max_bits"),
+        ("dsl_curr_up_bps", "fritz_dsl_upstream_rate_bits"),
+        ("dsl_curr_down_bps", "fritz_dsl_downstream_rate_bits"),
+    ]
+    COUNTERS = [
+        ("common_bytes_sent", "fritz_wan_sent_bytes"),
+        ("common_bytes_recv", "fritz_wan_received_bytes"),
+    ]
+    DSL_ERRORS = [
+        ("dsl_fec_errors", "fec"), ("dsl_crc_errors", "crc"), ("dsl_hec_errors", "hec"),
+        ("dsl_errored_secs", "errored_secs"), ("dsl_severely_errored_secs", "severely_errored_secs"),
+        ("dsl_link_retrain", "link_retrain"), ("dsl_init_errors", "init_errors"),
+        ("dsl_init_timeouts", "init_timeouts"),
+        ("dsl_atuc_fec_errors", "atuc_fec"), ("dsl_atuc_crc_errors", "atuc_crc"),
+        ("dsl_atuc_hec_errors", "atuc_hec"),
+    ]
+
+    def __init__(self, capacity: int = 3600):
+        self.ring = SampleRing(capacity)
+        self.poll_latency = LatencyHistogram()
+        self.samples = 0
+        self.poll_errors = 0
+        self.last = None
+        self.last_time = None
+        self._lock = threading.Lock()
+
+    def record(self, rows: list[dict], poll_seconds: float) -> None:
+        with self._lock:
+            self.poll_latency.observe(poll_seconds)
+            for row in rows:
+                status = row.get("wan_connection_status")
+                if status == POLL_ERROR:
+                    self.poll_errors += 1
+                elif status != RECONNECTED:
+                    self.samples += 1
+                    self.last = row
+                    self.last_time = time.time()
+        for row in rows:
+            self.ring.append({k: v for k, v in row.items() if k != "__failed__"})
+
+    def recent(self, n: int | None = None) -> list[dict]:
+        return self.ring.latest(n)
+
+    def openmetrics(self) -> str:
+        with self._lock:
+            last = dict(self.last or {})
+            last_time = self.last_time
+            hist = self.poll_latency
+            lines = []
+
+            def family(name, mtype, help_text, samples):
+                lines.append(f"# TYPE {name} {mtype}")
+                lines.append(f"# HELP {name} {help_text}")
+                lines.extend(samples)
+
+            family("fritz_poll_duration_seconds", "histogram", "Dauer einer TR-064-Abfragerunde.",
+                   [f'fritz_poll_duration_seconds_bucket{{le="{b}"}} {c}' for b, c in zip(hist.bounds, hist.counts)]
+                   + [f'fritz_poll_duration_seconds_bucket{{le="+Inf"}} {hist.count}',
+                      f"fritz_poll_duration_seconds_count {hist.count}",
+                      f"fritz_poll_duration_seconds_sum {hist.sum!r}"])
+            family("fritz_samples", "counter", "Erfolgreiche Messungen seit Start.",
+                   [f"fritz_samples_total {self.samples}"])
+            family("fritz_poll_errors", "counter", "POLL_ERROR-Ereignisse seit Start.",
+                   [f"fritz_poll_errors_total {self.poll_errors}"])
+            if last_time is not None:
+                family("fritz_last_sample_timestamp_seconds", "gauge", "Unix-Zeit der letzten Messung.",
+                       [f"fritz_last_sample_timestamp_seconds {last_time!r}"])
+
+        if last:
+            labels = ",".join(f'{key}="{_om_label(last.get(col, ""))}"' for key, col in (
+                ("status", "wan_connection_status"), ("external_ip", "wan_external_ip"),
+                ("access_type", "access_type"), ("dsl_link_status", "dsl_link_status")))
+            family("fritz_wan", "info", "WAN-Status der letzten Messung.", [f"fritz_wan_info{{{labels}}} 1"])
+            family("fritz_wan_connected", "gauge", "1 wenn WAN-Status Connected.",
+                   [f"fritz_wan_connected {int(last.get('wan_connection_status') == 'Connected')}"])
+            for col, name in self.GAUGES:
+                value = _om_number(last.get(col))
+                if value is not None:
+                    family(name, "gauge", f"Letzter Wert von {col}.", [f"{name} {value}"])
+            for col, name in self.COUNTERS:
+                value = _om_number(last.get(col))
+                if value is not None:
+                    family(name, "counter", f"Letzter Wert von {col}.", [f"{name}_total {value}"])
+            errors = [(kind, _om_number(last.get(col))) for col, kind in self.DSL_ERRORS]
+            errors = [f'fritz_dsl_errors_total{{kind="{kind}"}} {v}' for kind, v in errors if v is not None]
+            if errors:
+                family("fritz_dsl_errors", "counter", "DSL-Fehlerzähler der Box.", errors)
+            latency = [(group, _om_number(last.get(f"lat_{group}_ms"))) for group in ACTION_GROUPS]
+            latency = [f'fritz_action_latency_seconds{{group="{group}"}} {float(v) / 1000!r}'
+                       for group, v in latency if v is not None]
+            if latency:
+                family("fritz_action_latency_seconds", "gauge", "Antwortzeit je Aktionsgruppe der letzten Messung.",
+                       latency)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    stats: LiveStats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code: int, body: str, content_type: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send(200, self.stats.openmetrics(),
+                       "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        elif url.path == "/recent":
+            try:
+                n = int(parse_qs(url.query).get("n", ["100"])[0])
+            except ValueError:
+                n = 100
+            self._send(200, json.dumps(self.stats.recent(n), default=str), "application/json")
+        else:
+            self._send(404, "not found\n", "text/plain")
+
+
+def start_metrics_server(stats: LiveStats, address: str, port: int) -> ThreadingHTTPServer:
+    """Startet /metrics und /recent in einem Hintergrund-Thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"stats": stats})
+    server = ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(description="FRITZ!Box WAN/DSL Extended Logger (TR-064)")
     ap.add_argument("--host", default="192.168.178.1", help="FRITZ!Box IP/Host (default: 192.168.178.1)")
     ap.add_argument("--user", default=None, help="FRITZ!Box Benutzername")
@@ -158,40 +605,235 @@ def main():
     ap.add_argument("--interval", type=int, default=30, help="Intervall in Sekunden (default: 30)")
     default_out = os.path.join(os.path.expanduser("~"), "Documents", "Ping", "Log", "fritz_status_log.csv")
     ap.add_argument("--out", default=default_out, help=f"Pfad zur CSV (default: {default_out})")
+    ap.add_argument("--retry-min", type=float, default=2.0,
+                    help="Erste Wartezeit nach Verbindungsfehler in Sekunden (default: 2)")
+    ap.add_argument("--retry-max", type=float, default=300.0,
+                    help="Maximale Wartezeit zwischen Reconnect-Versuchen in Sekunden (default: 300)")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="Adaptive Abtastung: bei Auffälligkeiten schneller messen (Spalte sample_mode)")
+    ap.add_argument("--burst-interval", type=float, default=1.0,
+                    help="Intervall im Burst-Modus in Sekunden (default: 1)")
+    ap.add_argument("--burst-duration", type=float, default=120.0,
+                    help="Dauer des Burst-Modus nach dem letzten Auslöser in Sekunden (default: 120)")
+    ap.add_argument("--burst-error-jump", type=int, default=10,
+                    help="Anstieg der DSL-Fehlerzähler pro Messung, der einen Burst auslöst (default: 10)")
+    ap.add_argument("--metrics-port", type=int, default=None,
+                    help="HTTP-Port für /metrics (OpenMetrics) und /recent (JSON); default: aus")
+    ap.add_argument("--metrics-address", default="127.0.0.1",
+                    help="Bind-Adresse für den Metrics-Server (default: 127.0.0.1)")
+    ap.add_argument("--ring-size", type=int, default=3600,
+                    help="Anzahl Messungen im Speicher für /recent (default: 3600)")
+    ap.add_argument("--compact", action="store_true",
+                    help="Kompakt-Format: Keyframes + Deltas/geänderte Felder (liest analyze_netlogs transparent)")
+    ap.add_argument("--binary", action="store_true",
+                    help="Binär-Format (binary_log.py): feste Sätze, liest analyze_netlogs per numpy.memmap")
+    ap.add_argument("--keyframe-every", type=int, default=compact_log.DEFAULT_KEYFRAME_EVERY,
+                    help=f"Im Kompakt-Format alle N Zeilen ein Keyframe (default: {compact_log.DEFAULT_KEYFRAME_EVERY})")
+    ap.add_argument("--incidents-out", default=None,
+                    help="Live-Incidents (Schema wie incidents.csv von analyze_netlogs) laufend anhängen; default: aus")
+    ap.add_argument("--hosts-out", default=None,
+                    help="Änderungen der LAN-Hostliste (ein Abruf per X_AVM-DE_GetHostListPath) in diese CSV; default: aus")
+    ap.add_argument("--hosts-interval", type=float, default=60.0,
+                    help="Abstand der Hostlisten-Abrufe in Sekunden (default: 60)")
+    ap.add_argument("--monitor-out", default=None,
+                    help="Durchsatz-Verlauf (X_AVM-DE_GetOnlineMonitor, ein Aufruf pro Poll) binär in diese Datei; "
+                         "default: aus")
+    ap.add_argument("--monitor-step", type=int, default=None,
+                    help="Abstand der Online-Monitor-Werte der Box in Sekunden (default: wie online_monitor.py)")
+    ap.add_argument("--fast-soap", action="store_true",
+                    help="Schneller SOAP-Pfad: vorgerenderte Envelopes, Keep-Alive, gemerkte Digest-Challenge")
+    return ap
+
+
+class StatusLog:
+    """
+    Das Status-Log in einem der Formate aus FORMAT_NAMES. Eine bestehende Datei muss das angeforderte
+    Format haben (sonst SystemExit); hat sie einen älteren CSV-Kopf, wird in dessen Spalten weitergeschrieben.
+    """
 
-    args = ap.parse_args()
-
-    header = [
-        "timestamp",
-        "wan_connection_status", "wan_uptime_s", "wan_external_ip", "wan_last_error",
-        "common_bytes_sent", "common_bytes_recv", "common_rate_send_bps", "common_rate_recv_bps",
-        "access_type", "phys_link_status", "l1_up_max_bps", "l1_down_max_bps",
-        "dsl_link_status", "dsl_curr_up_bps", "dsl_curr_down_bps",
-        "dsl_fec_errors", "dsl_crc_errors", "dsl_hec_errors",
-        "dsl_errored_secs", "dsl_severely_errored_secs",
-        "dsl_link_retrain", "dsl_init_errors", "dsl_init_timeouts",
-        "dsl_atuc_fec_errors", "dsl_atuc_crc_errors", "dsl_atuc_hec_errors",
-    ]
-    ensure_header(args.out, header)
+    def __init__(self, path: str, header: list[str], fmt: str,
+                 keyframe_every: int = compact_log.DEFAULT_KEYFRAME_EVERY):
+        # K/D-Zeilen unter einem normalen Kopf, CSV-Text in einem Binär-Log usw. wären beim Lesen unbrauchbar
+        existing_format = log_format(path)
+        if existing_format and existing_format != fmt:
+            raise SystemExit(f"FEHLER: {path} ist ein {FORMAT_NAMES[existing_format]}, angefordert ist ein "
+                             f"{FORMAT_NAMES[fmt]} - passende Option verwenden oder andere --out-Datei wählen")
+        self.header = header
+        self.binary = self.encoder = None
+        if fmt == "binary":
+            try:
+                self.binary = binary_log.BinaryLogWriter(path, binary_columns(header), "fritz")
+            except ValueError as e:
+                raise SystemExit(f"FEHLER: {e}")
+            return
+        if fmt == "compact":
+            self.encoder = compact_log.CompactEncoder(header, keyframe_every=keyframe_every)
+        wanted = self.encoder.file_header() if self.encoder else header
+        ensure_header(path, wanted)
+        # bestehende Datei mit älterem Kopf (z. B. ohne ts_ms/lat_*): in deren Spalten weiterschreiben
+        existing = file_header(path)
+        if existing and existing != wanted:
+            print(f"Hinweis: {path} hat einen anderen Kopf, neue Spalten werden dort nicht geschrieben.")
+            if self.encoder:
+                self.encoder = compact_log.CompactEncoder(existing[1:], keyframe_every=keyframe_every)
+            else:
+                self.header = existing
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+
+    def write(self, row: dict) -> None:
+        if self.binary:
+            try:
+                self.binary.write(row)
+            except ValueError as e:
+                print(f"[{row['timestamp']}] Zeile nicht im Binär-Log speicherbar: {e}")
+        elif self.encoder:
+            self.writer.writerow(self.encoder.encode(row))
+        else:
+            self.writer.writerow([row.get(h, "") for h in self.header])
+
+    def flush(self) -> None:
+        (self.binary or self.file).flush()
+
+    def close(self) -> None:
+        (self.binary or self.file).close()
+
+
+class SampleOutputs:
+    """
+    Zusatzausgaben neben dem Status-Log: Live-Incidents (--incidents-out), Hostliste (--hosts-out),
+    Online-Monitor (--monitor-out) und /metrics (--metrics-port). Ohne die Option bleibt das Modul ungeladen.
+    """
 
+    def __init__(self, args):
+        self.detector = self.incidents = None
+        self.hosts = None
+        self.hosts_interval = args.hosts_interval
+        self.hosts_due = 0.0
+        self.monitor = None
+        self.stats = None
+        if args.metrics_port is not None:
+            self.stats = LiveStats(args.ring_size)
+            server = start_metrics_server(self.stats, args.metrics_address, args.metrics_port)
+            print(f"[{now()}] Metrics: http://{args.metrics_address}:{server.server_address[1]}/metrics")
+        if args.incidents_out:
+            import analyze_netlogs
+            self.analyze = analyze_netlogs
+            self.detector = analyze_netlogs.FritzIncidentDetector()
+            ensure_header(args.incidents_out, analyze_netlogs.INCIDENT_HEADER)
+            self.incidents = open(args.incidents_out, "a", encoding="utf-8", newline="")
+            self.incidents_w = csv.writer(self.incidents)
+        if args.hosts_out:
+            import fritz_hosts
+            self.hosts = fritz_hosts.HostTracker()
+            ensure_header(args.hosts_out, fritz_hosts.HOSTS_HEADER)
+            self.hosts_file = open(args.hosts_out, "a", encoding="utf-8", newline="")
+            self.hosts_w = csv.DictWriter(self.hosts_file, fieldnames=fritz_hosts.HOSTS_HEADER)
+        if args.monitor_out:
+            import online_monitor
+            step = online_monitor.DEFAULT_STEP if args.monitor_step is None else args.monitor_step
+            self.monitor = online_monitor.OnlineMonitorLogger(args.monitor_out, step)
+
+    def _write_incidents(self, incidents: list[dict]) -> None:
+        for ev in incidents:
+            self.incidents_w.writerow(self.analyze.incident_row(ev))
+            print(f"[{now()}] Incident {ev['type']}: {ev.get('details', '')}")
+        if incidents:
+            self.incidents.flush()
+
+    def feed(self, row: dict) -> None:
+        """Eine geschriebene Zeile (Messung oder Marker)."""
+        if self.detector:
+            ts = self.analyze.parse_time(row["timestamp"])
+            self._write_incidents(self.detector.feed(dict(row, timestamp=ts)))
+
+    def after_poll(self, rows: list[dict], fc, poll_seconds: float) -> None:
+        """Nach jeder Abfrage; fc ist None, solange die Box nicht erreichbar ist."""
+        if self.hosts and fc is not None and time.monotonic() >= self.hosts_due:
+            self.hosts_due = time.monotonic() + self.hosts_interval
+            try:
+                self.hosts_w.writerows(self.hosts.poll(fc, now()))
+                self.hosts_file.flush()
+            except Exception as e:
+                # Hostliste ist Zusatz: Fehler nicht als Abfrage-Ausfall werten
+                print(f"[{now()}] Hostliste nicht abrufbar: {e}")
+        if self.monitor and fc is not None:
+            try:
+                self.monitor.poll(fc, time.time())
+            except Exception as e:
+                print(f"[{now()}] Online-Monitor nicht abrufbar: {e}")
+        if self.stats:
+            self.stats.record(rows, poll_seconds)
+
+    def close(self) -> None:
+        if self.detector:
+            self._write_incidents(self.detector.finish())
+            self.incidents.close()
+        if self.hosts:
+            self.hosts_file.close()
+        if self.monitor:
+            self.monitor.close()
+
+
+def open_session(args) -> FritzSession:
     try:
-        fc = open_fc(args.host, args.user, args.password)
+        fc = open_fc(args.host, args.user, args.password, fast=args.fast_soap)
     except Exception as e:
-        raise SystemExit(f"Verbindung zur FRITZ!Box fehlgeschlagen: {e}")
+        # z. B. Box startet gerade neu: nicht beenden, FritzSession baut die Verbindung mit Backoff auf
+        print(f"[{now()}] Verbindung zur FRITZ!Box fehlgeschlagen: {e} - neuer Versuch mit Backoff")
+        fc = None
+    return FritzSession(args.host, args.user, args.password,
+                        retry_min=args.retry_min, retry_max=args.retry_max, fc=fc, fast=args.fast_soap)
+
+
+def record_sample(rows: list[dict], log: StatusLog, sampler: AdaptiveSampler | None, outputs: SampleOutputs) -> None:
+    """Zeilen einer Abfrage melden, mit sample_mode versehen, ins Log schreiben und an outputs geben."""
+    for row in rows:
+        if row.get("wan_connection_status") in (POLL_ERROR, RECONNECTED):
+            print(f"[{row['timestamp']}] {row['wan_connection_status']}: {row['wan_last_error']}")
+        elif sampler:
+            row["sample_mode"] = sampler.mode
+            was_burst = sampler.mode == AdaptiveSampler.BURST
+            sampler.observe(row)
+            if sampler.mode == AdaptiveSampler.BURST and not was_burst:
+                print(f"[{row['timestamp']}] Burst-Modus ({sampler.reason})")
+        log.write(row)
+        outputs.feed(row)
+    log.flush()
+
+
+def main(argv=None):
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.binary and args.compact:
+        ap.error("--binary und --compact schließen sich aus")
+
+    header = list(LOG_HEADER)
+    sampler = None
+    if args.adaptive:
+        sampler = AdaptiveSampler(args.interval, args.burst_interval, args.burst_duration, args.burst_error_jump)
+        header.append("sample_mode")
+    fmt = "binary" if args.binary else "compact" if args.compact else "plain"
+    log = StatusLog(args.out, header, fmt, args.keyframe_every)
+    session = open_session(args)
+    outputs = SampleOutputs(args)
 
     print(f"[{now()}] Logging → {args.out} (Intervall {args.interval}s). Abbruch mit STRG+C.")
-    with open(args.out, "a", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        try:
-            while True:
-                row = collect_once(fc)
-                w.writerow([row.get(h, "") for h in header])
-                f.flush()
-                time.sleep(args.interval)
-        except KeyboardInterrupt:
-            print(f"\n[{now()}] Beendet.")
-        except Exception as e:
-            print(f"\n[{now()}] Fehler: {e}")
+    try:
+        while True:
+            started = time.perf_counter()
+            rows = session.poll()
+            poll_seconds = time.perf_counter() - started
+            record_sample(rows, log, sampler, outputs)
+            outputs.after_poll(rows, session.fc, poll_seconds)
+            time.sleep(session.next_delay(sampler.next_interval() if sampler else args.interval))
+    except KeyboardInterrupt:
+        print(f"\n[{now()}] Beendet.")
+    except Exception as e:
+        print(f"\n[{now()}] Fehler: {e}")
+    finally:
+        outputs.close()
+        log.close()
 
 
 if __name__ == "__main__":
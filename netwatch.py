@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# netwatch.py
+# Gemeinsamer Einstieg für alle Python-Werkzeuge:
+#   python3 netwatch.py analyze|visualize|pull|restart|fleet-restart|watchdog|probe|convert [Optionen des Werkzeugs]
+#   python3 netwatch.py bench [--runs N]   (Startzeit-Benchmark)
+#
+# Der Dispatcher importiert nur das Modul des gewählten Befehls; schwere Abhängigkeiten
+# (pandas, matplotlib) laden die Module selbst erst, wenn sie gebraucht werden.
+# Damit bleiben --help und kleine Logs schnell, auch wenn NetWatchUI.ps1 je Aktion einen
+# neuen Interpreter startet.
+
+import argparse
+import csv
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Befehl -> (Modul, Kurzbeschreibung); Module werden erst beim Aufruf importiert
+COMMANDS = {
+    "analyze": ("analyze_netlogs", "NetWatch- und FRITZ!Box-Logs auswerten, Incidents erkennen"),
+    "visualize": ("visualize_incidents", "Diagramme und HTML-Report aus incidents.csv"),
+    "pull": ("fritzlog_pull", "FRITZ!Box-Status per TR-064 protokollieren"),
+    "restart": ("fritzbox_restart", "FRITZ!Box neu starten (optional mit Wiederanlauf-Messung)"),
+    "fleet-restart": ("fritz_fleet_restart", "Viele Boxen rollierend neu starten"),
+    "watchdog": ("fritz_watchdog", "Box bei anhaltenden Störungen automatisch neu starten"),
+    "probe": ("netwatch_probe", "NetWatch-Messung unter Linux (asyncio, alle Ziele gleichzeitig)"),
+    "convert": ("binary_log", "Logs verlustfrei zwischen CSV und Binär-Format umwandeln"),
+}
+
+SCRIPT = os.path.abspath(__file__)
+
+
+def run_command(name: str, argv: list[str]):
+    """Modul des Befehls importieren und dessen main() mit den restlichen Argumenten aufrufen."""
+    module = importlib.import_module(COMMANDS[name][0])
+    prog, sys.argv[0] = sys.argv[0], f"netwatch {name}"  # Programmname in --help und Fehlermeldungen
+    try:
+        return module.main(argv)
+    finally:
+        sys.argv[0] = prog
+
+
+# ---------- Startzeit-Benchmark ----------
+def write_sample_logs(folder: str, rows: int = 60) -> dict:
+    """Kleine Beispiel-Logs (eine Stunde, je Minute eine Zeile) für die Benchmark-Läufe."""
+    netwatch = os.path.join(folder, "netwatch_log.csv")
+    fritz = os.path.join(folder, "fritz_status_log.csv")
+    incidents = os.path.join(folder, "incidents.csv")
+    start = time.mktime((2025, 10, 21, 12, 0, 0, 0, 0, -1))
+    stamps = [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + 60 * i)) for i in range(rows)]
+    with open(netwatch, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["timestamp", "adapter", "media_status", "dns_ok", "dns_ms",
+                    "ping_8.8.8.8_avg_ms", "ping_8.8.8.8_loss_pct"])
+        for i, ts in enumerate(stamps):
+            w.writerow([ts, "Ethernet", "Up", "0" if i % 20 == 7 else "1", "12", 35 if i % 9 == 0 else 11, 0])
+    with open(fritz, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["timestamp", "wan_connection_status", "wan_uptime_s", "wan_external_ip", "dsl_link_status"])
+        for i, ts in enumerate(stamps):
+            w.writerow([ts, "Connected", 60 * (i if i < 30 else i - 30), "1.2.3.4", "Up"])
+    with open(incidents, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["source", "type", "start", "end", "duration", "details"])
+        for ts in stamps[::10]:
+            w.writerow(["PC", "LATENCY_SPIKE", ts, ts, "0s", "8.8.8.8: 35.0ms"])
+    return {"netwatch": netwatch, "fritz": fritz, "incidents": incidents}
+
+
+def startup_cases(files: dict, folder: str) -> list[tuple[str, list[str]]]:
+    return [
+        ("--help", ["--help"]),
+        ("analyze --help", ["analyze", "--help"]),
+        ("visualize --help", ["visualize", "--help"]),
+        ("pull --help", ["pull", "--help"]),
+        ("restart --help", ["restart", "--help"]),
+        ("analyze (kleine Logs)", ["analyze", "--netwatch", files["netwatch"], "--fritz", files["fritz"],
+                                   "--out", os.path.join(folder, "out.csv")]),
+        ("visualize --html (nur Report)", ["visualize", "--input", files["incidents"], "--output-dir", folder,
+                                           "--html", "--no-timeline", "--no-summary"]),
+    ]
+
+
+def time_command(args: list[str], runs: int) -> list[float]:
+    """Wanduhrzeit je Lauf eines neuen Interpreters mit `netwatch.py <args>`."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=False)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def benchmark_startup(runs: int = 5) -> list[dict]:
+    """Startzeit je Fall: [{"case", "min_ms", "median_ms"}]."""
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        files = write_sample_logs(folder)
+        for name, args in startup_cases(files, folder):
+            times = time_command(args, runs)
+            results.append({"case": name, "min_ms": min(times) * 1000, "median_ms": statistics.median(times) * 1000})
+    return results
+
+
+def bench(argv=None):
+    ap = argparse.ArgumentParser(prog="netwatch bench", description="Startzeit-Benchmark der netwatch-Befehle")
+    ap.add_argument("--runs", type=int, default=5, help="Läufe je Fall (default: 5)")
+    args = ap.parse_args(argv)
+    print(f"{'Fall':32s} {'min':>9s} {'median':>9s}")
+    for r in benchmark_startup(max(1, args.runs)):
+        print(f"{r['case']:32s} {r['min_ms']:7.0f}ms {r['median_ms']:7.0f}ms")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        return run_command(argv[0], argv[1:])
+    if argv and argv[0] == "bench":
+        return bench(argv[1:])
+
+    commands = "\n".join(f"  {name:14s} {desc}" for name, (_, desc) in COMMANDS.items())
+    ap = argparse.ArgumentParser(
+        prog="netwatch",
+        description="NetWatch-Werkzeuge: ein Einstieg, Abhängigkeiten werden erst bei Bedarf geladen.",
+        epilog=f"Befehle:\n{commands}\n  {'bench':14s} Startzeit-Benchmark\n\n"
+               "Optionen eines Befehls: netwatch <befehl> --help",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=[*COMMANDS, "bench"], help="auszuführender Befehl")
+    ap.parse_args(argv[:1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# netwatch_probe.py
+# Linux-Gegenstück zu NetWatch.ps1: misst Adapter, DNS und Ping zu allen Zielen und schreibt
+# dieselbe netwatch_log.csv (timestamp,adapter,media_status,ipv4,ipv6_enabled,gateway,dns_ok,dns_ms,
+# ping_<ziel>_avg_ms,ping_<ziel>_loss_pct,...). analyze_netlogs.py liest beide Quellen gleich.
+# Zahlen stehen wie bei PowerShell in der CSV (avg auf 0,1 ms gerundet, "12" statt "12.0"; loss als
+# ganze Prozent). Einziger Unterschied: NetWatch.ps1 kennt nur 0 oder 100 % Verlust, hier zählt
+# jeder verlorene Ping (bei --count 5 also 0, 20, 40, ... 100).
+#
+# Alle Ziele und der DNS-Test laufen gleichzeitig (asyncio): ein Zyklus dauert so lange wie das
+# langsamste Ziel, nicht die Summe aller Ziele. Ein unerreichbares Ziel kostet höchstens
+# (count - 1) * ping_interval + timeout Sekunden.
+#
+# ICMP: ein Socket für alle Ziele. Zuerst ein unprivilegierter ICMP-Datagram-Socket
+# (sysctl net.ipv4.ping_group_range muss die Gruppe erlauben), sonst ein Raw-Socket
+# (root oder CAP_NET_RAW). Nur IPv4, wie die Standardziele von NetWatch.ps1.
+#
+# --rtt-out schreibt zusätzlich jede einzelne Anfrage (Zeit, Ziel, Sequenznummer, Antwortzeit,
+# Status) in ein Binär-Nebenlog, siehe rtt_log.py. --binary schreibt das Log selbst im
+# Binär-Format (binary_log.py) statt als CSV.
+#
+#   python3 netwatch_probe.py --interval 30 --targets 8.8.8.8 1.1.1.1 192.168.178.1 www.riotgames.com
+
+import argparse
+import asyncio
+import csv
+import datetime
+import fcntl
+import ipaddress
+import itertools
+import os
+import socket
+import struct
+import time
+
+import binary_log
+import rtt_log
+
+DEFAULT_TARGETS = ("8.8.8.8", "1.1.1.1", "192.168.178.1", "www.riotgames.com")
+DNS_NAME = "www.google.com"
+BASE_HEADER = ["timestamp", "adapter", "media_status", "ipv4", "ipv6_enabled", "gateway", "dns_ok", "dns_ms"]
+
+PROC_ROUTE = "/proc/net/route"
+SYS_NET = "/sys/class/net"
+PROC_IPV6_CONF = "/proc/sys/net/ipv6/conf"
+SIOCGIFADDR = 0x8915
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+PAYLOAD = b"netwatch-probe".ljust(32, b".")
+
+
+def now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def csv_header(targets) -> list[str]:
+    """Kopfzeile wie New-CsvHeader in NetWatch.ps1."""
+    return BASE_HEADER + [col for t in targets for col in (f"ping_{t}_avg_ms", f"ping_{t}_loss_pct")]
+
+
+def binary_columns(targets) -> list[tuple[str, str]]:
+    """Spaltentypen für das Binär-Log (binary_log), Reihenfolge wie csv_header."""
+    types = {"timestamp": "time", "ipv6_enabled": "int", "dns_ok": "int", "dns_ms": "int"}
+    columns = [(name, types.get(name, "str")) for name in BASE_HEADER]
+    return columns + [col for t in targets for col in ((f"ping_{t}_avg_ms", "float"), (f"ping_{t}_loss_pct", "int"))]
+
+
+def ps_number(value):
+    """Zahl so, wie PowerShell sie in NetWatch.ps1 ausgibt: 12.0 -> "12", 12.3 -> "12.3"; Rest unverändert."""
+    if isinstance(value, float):
+        return f"{value:.1f}".removesuffix(".0")
+    return value
+
+
+def error_row(ts: str, message: str, columns: int) -> list[str]:
+    """Fehlerzeile wie New-ErrorRow in NetWatch.ps1: timestamp, "ERROR", Meldung, Rest leer."""
+    return [ts, "ERROR", message] + [""] * (columns - 3)
+
+
+# ---------- Adapter (Linux: /proc und /sys) ----------
+def default_route(route_file: str = PROC_ROUTE) -> tuple[str, str] | None:
+    """(Interface, Gateway) der Default-Route mit der kleinsten Metrik, sonst None."""
+    best = None
+    try:
+        with open(route_file, encoding="ascii") as f:
+            next(f, None)
+            for line in f:
+                fields = line.split()
+                if len(fields) < 7 or fields[1] != "00000000":
+                    continue
+                metric = int(fields[6])
+                if best is None or metric < best[0]:
+                    gateway = socket.inet_ntoa(struct.pack("<I", int(fields[2], 16)))
+                    best = (metric, fields[0], gateway)
+    except OSError:
+        return None
+    return (best[1], best[2]) if best else None
+
+
+def interface_ipv4(name: str) -> str:
+    """Erste IPv4-Adresse des Interface (SIOCGIFADDR), "" wenn keine."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            data = fcntl.ioctl(s.fileno(), SIOCGIFADDR, struct.pack("256s", name.encode()[:15]))
+        except OSError:
+            return ""
+    return socket.inet_ntoa(data[20:24])
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def interface_info(route_file: str = PROC_ROUTE, sys_net: str = SYS_NET, ipv6_conf: str = PROC_IPV6_CONF) -> dict:
+    """adapter, media_status, ipv4, ipv6_enabled und gateway des Interface der Default-Route."""
+    route = default_route(route_file)
+    if route is None:
+        return {"adapter": "", "media_status": "Disconnected", "ipv4": "", "ipv6_enabled": "", "gateway": ""}
+    name, gateway = route
+    # Werte wie MediaConnectionState unter Windows
+    media = "Connected" if _read(os.path.join(sys_net, name, "operstate")) in ("up", "unknown") else "Disconnected"
+    disabled = _read(os.path.join(ipv6_conf, name, "disable_ipv6"))
+    return {"adapter": name, "media_status": media, "ipv4": interface_ipv4(name),
+            "ipv6_enabled": "" if disabled == "" else int(disabled == "0"), "gateway": gateway}
+
+
+# ---------- ICMP ----------
+def checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def echo_request(ident: int, seq: int, payload: bytes = PAYLOAD) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum(header + payload), ident, seq) + payload
+
+
+def open_icmp_socket() -> tuple[socket.socket, bool]:
+    """(Socket, raw): unprivilegierter Datagram-Socket, sonst Raw-Socket."""
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except PermissionError:
+        pass
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+    except PermissionError:
+        raise PermissionError("ICMP nicht erlaubt: als root starten, CAP_NET_RAW setzen oder "
+                              "sysctl net.ipv4.ping_group_range passend setzen") from None
+
+
+class IcmpPinger:
+    """
+    ICMP-Echo zu beliebig vielen Zielen gleichzeitig über einen Socket. Antworten werden über
+    die Sequenznummer ihrer Anfrage zugeordnet (und Ident/Absender geprüft); jede Anfrage wartet
+    unabhängig von den anderen höchstens `timeout` Sekunden.
+    """
+
+    def __init__(self, sock: socket.socket | None = None, raw: bool | None = None):
+        if sock is None:
+            sock, raw = open_icmp_socket()
+        self.sock = sock
+        self.raw = bool(raw)
+        self.sock.setblocking(False)
+        # Datagram-Sockets: der Kernel setzt Ident (= Port) und filtert die Antworten selbst
+        self.ident = os.getpid() & 0xFFFF
+        self._seq = itertools.count(1)
+        self._pending = {}  # seq -> (Adresse, Future)
+        self._loop = None
+
+    def _attach(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                self._loop.remove_reader(self.sock.fileno())
+            loop.add_reader(self.sock.fileno(), self._on_readable)
+            self._loop = loop
+
+    def close(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self.sock.fileno())
+        self._loop = None
+        self.sock.close()
+
+    def _next_seq(self) -> int:
+        while True:
+            seq = next(self._seq) & 0xFFFF
+            if seq and seq not in self._pending:
+                return seq
+
+    def _on_readable(self):
+        received = time.perf_counter()
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            if self.raw:
+                data = data[(data[0] & 0x0F) * 4:]  # IP-Kopf
+            if len(data) < 8 or data[0] != ICMP_ECHO_REPLY:
+                continue  # z. B. eigene Anfragen auf Loopback (Raw-Socket)
+            ident, seq = struct.unpack_from("!HH", data, 4)
+            if self.raw and ident != self.ident:
+                continue
+            pending = self._pending.get(seq)
+            if pending and pending[0] == addr[0] and not pending[1].done():
+                pending[1].set_result(received)
+
+    async def echo(self, address: str, timeout: float = 1.0) -> rtt_log.RttSample:
+        """Eine Anfrage; RttSample mit Antwortzeit in ms (None bei Timeout/Sendefehler)."""
+        self._attach()
+        seq = self._next_seq()
+        future = self._loop.create_future()
+        self._pending[seq] = (address, future)
+        epoch_ms = time.time_ns() // 1_000_000
+        try:
+            sent = time.perf_counter()
+            self.sock.sendto(echo_request(self.ident, seq), (address, 0))
+            received = await asyncio.wait_for(future, timeout)
+            return rtt_log.RttSample(epoch_ms, seq, (received - sent) * 1000, rtt_log.OK)
+        except OSError:
+            return rtt_log.RttSample(epoch_ms, seq, None, rtt_log.SEND_ERROR)
+        except asyncio.TimeoutError:
+            return rtt_log.RttSample(epoch_ms, seq, None, rtt_log.TIMEOUT)
+        finally:
+            self._pending.pop(seq, None)
+
+    async def samples(self, address: str, count: int = 5, interval: float = 0.5, timeout: float = 1.0) -> list:
+        """count Anfragen im Abstand interval; Liste der RttSample in Sendereihenfolge."""
+        tasks = []
+        for i in range(count):
+            if i:
+                await asyncio.sleep(interval)
+            tasks.append(asyncio.ensure_future(self.echo(address, timeout)))
+        return list(await asyncio.gather(*tasks))
+
+    async def ping(self, address: str, count: int = 5, interval: float = 0.5, timeout: float = 1.0) -> list:
+        """Wie samples(), aber nur die Antwortzeiten (ms, None = verloren)."""
+        return [s.rtt_ms for s in await self.samples(address, count, interval, timeout)]
+
+
+# ---------- Messung ----------
+async def resolve(target: str, timeout: float = 2.0) -> str | None:
+    """IPv4-Adresse eines Ziels (IP oder Hostname), None wenn nicht auflösbar."""
+    try:
+        return str(ipaddress.IPv4Address(target))
+    except ValueError:
+        pass
+    try:
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(target, None, family=socket.AF_INET, type=socket.SOCK_DGRAM),
+            timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    return infos[0][4][0] if infos else None
+
+
+async def check_dns(name: str = DNS_NAME, timeout: float = 2.0) -> tuple[int, int | str]:
+    """DNS-Test wie Resolve-DnsName in NetWatch.ps1: (dns_ok, dns_ms), dns_ms "" bei Fehler."""
+    started = time.perf_counter()
+    try:
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(name, None, family=socket.AF_INET, type=socket.SOCK_DGRAM),
+            timeout)
+    except (OSError, asyncio.TimeoutError):
+        return 0, ""
+    if not infos:
+        return 0, ""
+    return 1, round((time.perf_counter() - started) * 1000)
+
+
+async def probe_target(pinger: IcmpPinger, target: str, count: int = 5, interval: float = 0.5,
+                       timeout: float = 1.0, rtt_writer=None) -> tuple[float | str, int]:
+    """
+    (avg_ms, loss_pct) eines Ziels; nicht auflösbar = ("", 100) wie ein Fehlschlag in NetWatch.ps1.
+    Mit rtt_writer (rtt_log.RttLogWriter) wird zusätzlich jede einzelne Anfrage protokolliert.
+    """
+    address = await resolve(target, timeout=max(timeout, 2.0))
+    if address is None:
+        if rtt_writer is not None:
+            epoch_ms = time.time_ns() // 1_000_000
+            rtt_writer.write(target, [rtt_log.RttSample(epoch_ms, 0, None, rtt_log.UNRESOLVED)] * count)
+        return "", 100
+    samples = await pinger.samples(address, count, interval, timeout)
+    if rtt_writer is not None:
+        rtt_writer.write(target, samples)
+    rtts = [s.rtt_ms for s in samples if s.rtt_ms is not None]
+    loss = round(100 * (count - len(rtts)) / count)
+    return (round(sum(rtts) / len(rtts), 1) if rtts else ""), loss
+
+
+async def probe_once(pinger: IcmpPinger, targets, dns_name: str = DNS_NAME, count: int = 5,
+                     interval: float = 0.5, timeout: float = 1.0, info=None, rtt_writer=None) -> dict:
+    """Eine Messung: Zeile (dict nach csv_header); DNS und alle Ziele laufen gleichzeitig."""
+    row = {"timestamp": now(), **(info or interface_info)()}
+    results = await asyncio.gather(check_dns(dns_name, max(timeout, 2.0)),
+                                   *(probe_target(pinger, t, count, interval, timeout, rtt_writer) for t in targets))
+    row["dns_ok"], row["dns_ms"] = results[0]
+    for t, (avg, loss) in zip(targets, results[1:]):
+        row[f"ping_{t}_avg_ms"] = avg
+        row[f"ping_{t}_loss_pct"] = loss
+    return row
+
+
+def append_row(path: str, header: list[str], values: list):
+    """Zeile anhängen; neue Datei (und Ordner) bekommt zuerst den Kopf."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new:
+            w.writerow(header)
+        w.writerow(values)
+
+
+async def run(path: str, targets, interval_s: float = 30, iterations: int | None = None, pinger=None,
+              log=print, rtt_path: str | None = None, binary: bool = False, **options) -> int:
+    """
+    Messschleife: alle interval_s Sekunden (ab Start gezählt, nicht ab Ende der Messung) eine
+    Zeile. options gehen an probe_once (dns_name, count, interval, timeout, info); mit rtt_path
+    landen zusätzlich alle Einzelwerte im Binär-Nebenlog (rtt_log). binary: path ist ein
+    Binär-Log (binary_log) statt einer CSV.
+    Liefert die Anzahl geschriebener Zeilen.
+    """
+    header = csv_header(targets)
+    writer = binary_log.BinaryLogWriter(path, binary_columns(targets), "netwatch") if binary else None
+    rtt_writer = rtt_log.RttLogWriter(rtt_path, targets) if rtt_path else None
+    own = pinger is None
+    pinger = pinger or IcmpPinger()
+    loop = asyncio.get_running_loop()
+    next_start = loop.time()
+    written = 0
+    try:
+        while iterations is None or written < iterations:
+            started = loop.time()
+            try:
+                row = await probe_once(pinger, targets, rtt_writer=rtt_writer, **options)
+                values = [row.get(c, "") for c in header]
+            except Exception as e:
+                values = error_row(now(), str(e), len(header))
+            if writer is not None:
+                writer.write(dict(zip(header, values)))
+                writer.flush()
+            else:
+                append_row(path, header, [ps_number(v) for v in values])
+            if rtt_writer is not None:
+                rtt_writer.flush()
+            written += 1
+            elapsed = loop.time() - started
+            next_start += interval_s
+            if next_start < loop.time():
+                log(f"Warnung: Messung dauerte {elapsed:.1f}s, länger als das Intervall ({interval_s:g}s)")
+                next_start = loop.time()
+            if iterations is None or written < iterations:
+                await asyncio.sleep(next_start - loop.time())
+    finally:
+        if own:
+            pinger.close()
+        if rtt_writer is not None:
+            rtt_writer.close()
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="NetWatch-Messung unter Linux (asyncio, alle Ziele gleichzeitig)")
+    ap.add_argument("--interval", type=float, default=30, help="Intervall in Sekunden (default: 30)")
+    default_out = os.path.join(os.path.expanduser("~"), "Documents", "Ping", "Log", "netwatch_log.csv")
+    ap.add_argument("--out", default=default_out, help=f"Pfad zur CSV (default: {default_out})")
+    ap.add_argument("--targets", nargs="+", default=list(DEFAULT_TARGETS),
+                    help=f"Ping-Ziele (default: {' '.join(DEFAULT_TARGETS)})")
+    ap.add_argument("--dns-name", default=DNS_NAME, help=f"Name für den DNS-Test (default: {DNS_NAME})")
+    ap.add_argument("--count", type=int, default=5, help="Pings je Ziel und Messung (default: 5)")
+    ap.add_argument("--ping-interval", type=float, default=0.5,
+                    help="Abstand der Pings eines Ziels in Sekunden (default: 0.5)")
+    ap.add_argument("--timeout", type=float, default=1.0, help="Wartezeit je Ping in Sekunden (default: 1)")
+    ap.add_argument("--iterations", type=int, default=0, help="Nach N Messungen beenden; 0 = endlos (default: 0)")
+    ap.add_argument("--binary", action="store_true",
+                    help="--out als Binär-Log schreiben (binary_log.py; liest analyze_netlogs transparent)")
+    ap.add_argument("--rtt-out", default=None,
+                    help="Jede einzelne Antwortzeit zusätzlich in dieses Binär-Log schreiben (rtt_log.py)")
+    return ap
+
+
+def check_existing_logs(args) -> None:
+    """Vorhandene --out/--rtt-out-Dateien müssen zu Format und Zielen passen, sonst SystemExit."""
+    if args.rtt_out and os.path.exists(args.rtt_out) and os.path.getsize(args.rtt_out) > 0:
+        try:
+            targets = rtt_log.read_header(args.rtt_out)[0]["targets"]
+        except (ValueError, OSError) as e:
+            raise SystemExit(f"FEHLER: {e}")
+        if targets != args.targets:
+            raise SystemExit(f"FEHLER: {args.rtt_out} wurde für andere Ziele angelegt ({' '.join(targets)})")
+    if not args.binary and os.path.exists(args.out) and binary_log.is_binary_file(args.out):
+        # CSV-Text hinter den Sätzen würde alle folgenden Sätze verschieben
+        raise SystemExit(f"FEHLER: {args.out} ist ein Binär-Log - mit --binary fortsetzen oder andere --out-Datei wählen")
+    if args.binary and os.path.exists(args.out) and os.path.getsize(args.out) > 0:
+        try:
+            columns = binary_log.read_header(args.out)[0]["columns"]
+        except (ValueError, OSError) as e:
+            raise SystemExit(f"FEHLER: {e}")
+        if columns != binary_columns(args.targets):
+            raise SystemExit(f"FEHLER: {args.out} wurde für andere Ziele angelegt "
+                             f"({' '.join(binary_log.targets_of(columns))})")
+
+
+def main(argv=None):
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if args.count < 1:
+        ap.error("--count muss mindestens 1 sein")
+    check_existing_logs(args)
+
+    try:
+        pinger = IcmpPinger()
+    except PermissionError as e:
+        raise SystemExit(f"FEHLER: {e}")
+    print(f"Messe {', '.join(args.targets)} alle {args.interval:g}s -> {args.out}")
+    try:
+        asyncio.run(run(args.out, args.targets, args.interval, args.iterations or None, pinger=pinger,
+                        dns_name=args.dns_name, count=args.count, interval=args.ping_interval,
+                        timeout=args.timeout, rtt_path=args.rtt_out, binary=args.binary))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pinger.close()
+
+
+if __name__ == "__main__":
+    main()
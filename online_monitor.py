@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# online_monitor.py
+# Durchsatz-Verlauf der FRITZ!Box über WANCommonInterfaceConfig1 X_AVM-DE_GetOnlineMonitor.
+# Ein Aufruf liefert pro Kanal ein Fenster der letzten Werte (kommagetrennt, neuester zuerst),
+# aufeinanderfolgende Aufrufe überlappen. OnlineMonitorSeries fügt die Fenster ohne Doppelte
+# zusammen, MonitorWriter speichert sie als feste Binärsätze (16 Byte je Zeitpunkt).
+#
+# Auflösung: Abstand der Werte gibt die Box vor (FRITZ!OS: 5 s, 20 Werte je Fenster).
+# Damit nichts fehlt, muss das Poll-Intervall kürzer als das Fenster sein (Standard 30 s < 100 s).
+#
+# Dateiformat (Grundlage record_log.py):
+#   Zeile 1: b"FMON1\n"
+#   Zeile 2: JSON-Kopf {"step": 5, "channels": ["ds_bps", "us_bps", "mc_bps"]} + "\n"
+#   danach Sätze "<I" + "I" je Kanal: Epoch-Sekunden, Bytes/s je Kanal (uint32, little endian)
+#
+# CSV-Export:
+#   python3 online_monitor.py monitor.bin --csv monitor.csv
+
+import argparse
+import csv
+import struct
+import sys
+
+import record_log
+
+MAGIC = b"FMON1\n"
+DEFAULT_STEP = 5
+# (Spalte, Rückgabewert von X_AVM-DE_GetOnlineMonitor)
+MONITOR_CHANNELS = (
+    ("ds_bps", "Newds_current_bps"),
+    ("us_bps", "Newus_current_bps"),
+    ("mc_bps", "Newmc_current_bps"),
+)
+_UINT32_MAX = 2**32 - 1
+# so viele Werte darf eine am Inhalt erkannte Überlappung von der aus der Zeit erwarteten abweichen
+OVERLAP_TOLERANCE = 2
+
+
+def parse_values(text) -> list[int]:
+    """Kommagetrennte Werte (neuester zuerst) als Liste, ältester zuerst."""
+    values = []
+    for part in str(text or "").split(","):
+        part = part.strip()
+        if part:
+            try:
+                values.append(int(part))
+            except ValueError:
+                values.append(0)
+    values.reverse()
+    return values
+
+
+def collect_monitor(fc, sync_group: int = 0) -> list[tuple[int, ...]]:
+    """Aktuelles Fenster als Liste von Werte-Tupeln (Reihenfolge MONITOR_CHANNELS), ältester zuerst."""
+    result = fc.call_action("WANCommonInterfaceConfig1", "X_AVM-DE_GetOnlineMonitor",
+                            NewSyncGroupIndex=sync_group)
+    columns = [parse_values(result.get(key)) for _, key in MONITOR_CHANNELS]
+    length = min((len(c) for c in columns if c), default=0)
+    # ungleich lange Kanäle (z. B. mc leer) am alten Ende abschneiden bzw. mit 0 auffüllen
+    columns = [c[-length:] if c else [0] * length for c in columns]
+    return list(zip(*columns))
+
+
+class OnlineMonitorSeries:
+    """
+    Fügt überlappende Fenster zu einer Zeitreihe zusammen.
+    merge() liefert nur die neuen Zeitpunkte als (epoch_s, werte); die Überlappung wird am Inhalt
+    erkannt (Ende des letzten Fensters == Anfang des neuen), bei mehreren Kandidaten (z. B. Nullen
+    bei Leerlauf) gewinnt der, der am besten zur verstrichenen Zeit passt. Passt kein Kandidat
+    zur Zeit (nach einer Lücke kann es keine Überlappung geben), zählt der lokale Takt.
+    """
+
+    def __init__(self, step: float = DEFAULT_STEP, last_ts: int | None = None):
+        self.step = step
+        self.last_ts = last_ts
+        self.tail = []
+
+    def _overlap(self, window: list, expected: int) -> int | None:
+        if expected <= 0:
+            return None  # seit dem letzten Fenster ist mehr als ein ganzes Fenster vergangen
+        best = None
+        for k in range(min(len(self.tail), len(window)), 0, -1):
+            if abs(k - expected) > OVERLAP_TOLERANCE:
+                continue  # gleiche Werte (Leerlauf, Wiederholung), aber zeitlich unmöglich
+            if self.tail[-k:] == window[:k]:
+                if best is None or abs(k - expected) < abs(best - expected):
+                    best = k
+        return best
+
+    def merge(self, t_call: float, window: list[tuple[int, ...]]) -> list[tuple[int, tuple[int, ...]]]:
+        if not window:
+            return []
+        new = []
+        overlap = None
+        if self.tail and self.last_ts is not None:
+            expected = len(window) - round((t_call - self.last_ts) / self.step)
+            overlap = self._overlap(window, expected)
+        if overlap is not None:
+            for i, values in enumerate(window[overlap:], start=1):
+                new.append((int(self.last_ts + i * self.step), values))
+        else:
+            # erster Aufruf oder Lücke (Fenster verpasst, Box neu gestartet): Zeit vom lokalen Takt
+            newest = int(t_call)
+            for i, values in enumerate(window):
+                ts = int(newest - (len(window) - 1 - i) * self.step)
+                if self.last_ts is None or ts > self.last_ts:
+                    new.append((ts, values))
+        if new:
+            self.last_ts = new[-1][0]
+        self.tail = list(window)
+        return new
+
+
+def _clamp(value: int) -> int:
+    return min(max(int(value), 0), _UINT32_MAX)
+
+
+class MonitorWriter(record_log.RecordWriter):
+    """Hängt Sätze an eine Binärdatei an; beim Fortsetzen muss der Kopf passen."""
+
+    def __init__(self, path: str, step: int = DEFAULT_STEP, channels=None):
+        self.step = step
+        self.channels = list(channels or [name for name, _ in MONITOR_CHANNELS])
+        self.record = struct.Struct("<I" + "I" * len(self.channels))
+        self.last_ts = None
+        super().__init__(path, MAGIC, {"step": step, "channels": self.channels}, self.record.size,
+                         _header_and_offset, self._mismatch)
+        last = self.last_record()
+        if last is not None:
+            self.last_ts = self.record.unpack(last)[0]
+
+    def _mismatch(self, header: dict) -> str | None:
+        if header["channels"] != self.channels or header["step"] != self.step:
+            return f"step={header['step']}, channels={header['channels']}"
+        return None
+
+    def write(self, samples: list[tuple[int, tuple[int, ...]]]) -> None:
+        for ts, values in samples:
+            self.file.write(self.record.pack(ts, *(_clamp(v) for v in values)))
+        if samples:
+            self.last_ts = samples[-1][0]
+        self.file.flush()
+
+
+class OnlineMonitorLogger:
+    """Ein Aufruf pro Poll: Fenster holen, zusammenführen, neue Zeitpunkte schreiben."""
+
+    def __init__(self, path: str, step: int = DEFAULT_STEP, sync_group: int = 0):
+        self.writer = MonitorWriter(path, step)
+        self.series = OnlineMonitorSeries(step, last_ts=self.writer.last_ts)
+        self.sync_group = sync_group
+
+    def poll(self, fc, t_call: float) -> int:
+        samples = self.series.merge(t_call, collect_monitor(fc, self.sync_group))
+        self.writer.write(samples)
+        return len(samples)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def read_header(path: str) -> tuple[dict, struct.Struct, int]:
+    """(JSON-Kopf, Satz-Struct, Offset der Daten)."""
+    header, offset = record_log.read_header(path, MAGIC, "Online-Monitor-Log")
+    return header, struct.Struct("<I" + "I" * len(header["channels"])), offset
+
+
+def _header_and_offset(path: str) -> tuple[dict, int]:
+    header, _, offset = read_header(path)
+    return header, offset
+
+
+def iter_records(path: str):
+    """Liefert (epoch_s, wert, ...) je Satz; ein unvollständiger letzter Satz wird ignoriert."""
+    _, record, offset = read_header(path)
+    yield from record_log.iter_records(path, offset, record)
+
+
+def to_csv(path: str, out) -> int:
+    header, _, _ = read_header(path)
+    w = csv.writer(out)
+    w.writerow(["epoch_s"] + header["channels"])
+    n = 0
+    for n, rec in enumerate(iter_records(path), start=1):
+        w.writerow(rec)
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Online-Monitor-Log (Binär) als CSV ausgeben")
+    ap.add_argument("path", help="Datei von fritzlog_pull.py --monitor-out")
+    ap.add_argument("--csv", default=None, help="Ziel-CSV (default: stdout)")
+    args = ap.parse_args()
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as out:
+            n = to_csv(args.path, out)
+        print(f"✓ {n} Zeitpunkte → {args.csv}")
+    else:
+        to_csv(args.path, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# record_log.py
+# Gemeinsame Grundlage der Binär-Logs mit fester Satzlänge: binary_log.py (NWBIN1),
+# rtt_log.py (NWRTT1) und online_monitor.py (FMON1).
+#
+# Dateiformat:
+#   Zeile 1: Magic, z. B. b"NWRTT1\n"
+#   Zeile 2: JSON-Kopf + "\n" (bei Bedarf mit Leerzeichen aufgefüllt, damit die Sätze ausgerichtet beginnen)
+#   danach nur angehängte Sätze gleicher Länge
+#
+# Bricht ein Schreiber mitten in einem Satz ab, bleibt ein unvollständiger letzter Satz stehen. Leser
+# ignorieren ihn, RecordWriter schneidet ihn beim Fortsetzen ab, sonst verrutschen alle folgenden.
+
+import json
+import os
+
+CHUNK_RECORDS = 4096
+
+
+def header_bytes(magic: bytes, header: dict, align: int = 1) -> bytes:
+    """Magic-Zeile und JSON-Kopf; aufgefüllt, sodass die Sätze bei einem Vielfachen von align beginnen."""
+    text = json.dumps(header).encode("utf-8")
+    pad = -(len(magic) + len(text) + 1) % align
+    return magic + text + b" " * pad + b"\n"
+
+
+def read_header(path: str, magic: bytes, name: str) -> tuple[dict, int]:
+    """(JSON-Kopf, Offset der Daten); ValueError, wenn die Datei nicht mit magic beginnt."""
+    with open(path, "rb") as f:
+        if f.readline() != magic:
+            raise ValueError(f"{path}: kein {name}")
+        header = json.loads(f.readline())
+        return header, f.tell()
+
+
+def has_magic(path: str, magic: bytes) -> bool:
+    """Prüft anhand der ersten Bytes, ob die Datei mit magic beginnt."""
+    with open(path, "rb") as f:
+        return f.read(len(magic)) == magic
+
+
+def record_count(path: str, offset: int, size: int) -> int:
+    """Anzahl vollständiger Sätze."""
+    return max(os.path.getsize(path) - offset, 0) // size
+
+
+def iter_chunks(path: str, offset: int, size: int, end: int | None = None):
+    """Liefert die vollständigen Sätze (bis Byte end) blockweise als bytes (Länge ein Vielfaches von size)."""
+    chunk_size = size * CHUNK_RECORDS
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(chunk_size if end is None else max(min(chunk_size, end - f.tell()), 0))
+            usable = len(chunk) - len(chunk) % size
+            if usable:
+                yield chunk[:usable] if usable < len(chunk) else chunk
+            if len(chunk) < chunk_size:
+                return
+
+
+def iter_records(path: str, offset: int, record):
+    """Liefert die Sätze als Tupel (record: struct.Struct); ein unvollständiger letzter Satz wird ignoriert."""
+    for chunk in iter_chunks(path, offset, record.size):
+        yield from record.iter_unpack(chunk)
+
+
+def load_memmap(path: str, offset: int, dtype):
+    """Sätze als numpy.memmap mit dtype; liest nichts vorab in den Speicher."""
+    import numpy as np
+    count = record_count(path, offset, dtype.itemsize)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+class RecordWriter:
+    """
+    Hängt Sätze der Länge size an. Eine neue Datei bekommt magic und header; eine bestehende wird mit
+    read_header(path) gelesen, check(kopf) liefert None oder eine Beschreibung, was nicht passt
+    (dann ValueError), und ein unvollständiger letzter Satz wird abgeschnitten.
+    """
+
+    def __init__(self, path: str, magic: bytes, header: dict, size: int, read_header, check, align: int = 1):
+        self.path = path
+        self.size = size
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.header, self.offset = read_header(path)
+            problem = check(self.header)
+            if problem:
+                raise ValueError(f"{path}: Kopf passt nicht ({problem})")
+            self.file = open(path, "r+b")
+            end = self.file.seek(0, os.SEEK_END)
+            self.truncate(end - (end - self.offset) % size)
+        else:
+            data = header_bytes(magic, header, align)
+            self.file = open(path, "wb")
+            self.file.write(data)
+            self.file.flush()
+            self.header, self.offset = header, len(data)
+
+    def last_record(self) -> bytes | None:
+        """Letzter vollständiger Satz oder None; liest nur diesen."""
+        end = self.file.seek(0, os.SEEK_END)
+        if end - self.offset < self.size:
+            return None
+        self.file.seek(end - self.size)
+        data = self.file.read(self.size)
+        self.file.seek(0, os.SEEK_END)
+        return data
+
+    def truncate(self, end: int) -> None:
+        """Datei auf end Bytes kürzen und dort weiterschreiben."""
+        self.file.truncate(end)
+        self.file.seek(0, os.SEEK_END)
+
+    def write(self, data: bytes) -> None:
+        """Sätze puffern; flush() schreibt sie."""
+        self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
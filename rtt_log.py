@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# rtt_log.py
+# Einzelne Ping-Antwortzeiten von netwatch_probe.py als Binär-Nebenlog (--rtt-out). Die CSV enthält
+# je Ziel und Messung nur Mittelwert und Verlust; hier steht jede einzelne Anfrage, damit
+# Perzentile, Jitter und echter Teilverlust berechnet werden können, ohne die CSV aufzublähen.
+#
+# Dateiformat (nur anhängen, feste Satzlänge, little endian; Grundlage record_log.py):
+#   Zeile 1: b"NWRTT1\n"
+#   Zeile 2: JSON-Kopf {"record": "<qHHIB3x", "fields": [...], "status": [...], "targets": [...]} + "\n"
+#   danach Sätze zu 20 Byte: epoch_ms (int64), target (uint16, Index in "targets"), seq (uint16,
+#   ICMP-Sequenznummer), rtt_us (uint32, 0 wenn keine Antwort), status (uint8, Index in "status")
+#
+# Die Sätze lassen sich direkt per numpy.memmap lesen (load_records), z. B. vom Analyzer:
+#   python3 analyze_netlogs.py --netwatch netwatch_log.csv --fritz fritz_status_log.csv --rtt netwatch_rtt.bin
+#   python3 rtt_log.py netwatch_rtt.bin            (Kennzahlen je Ziel)
+#   python3 rtt_log.py netwatch_rtt.bin --csv rtt.csv
+
+import argparse
+import collections
+import csv
+import struct
+import sys
+
+import record_log
+
+MAGIC = b"NWRTT1\n"
+RECORD = struct.Struct("<qHHIB3x")
+FIELDS = ("epoch_ms", "target", "seq", "rtt_us", "status")
+# Status je Anfrage; der Index steht im Satz
+STATUS = ("OK", "TIMEOUT", "SEND_ERROR", "UNRESOLVED")
+OK, TIMEOUT, SEND_ERROR, UNRESOLVED = range(len(STATUS))
+_UINT32_MAX = 2**32 - 1
+
+# Eine Anfrage: Sendezeit (Epoch-ms), ICMP-Sequenznummer, Antwortzeit in ms (None = keine), Status
+RttSample = collections.namedtuple("RttSample", "epoch_ms seq rtt_ms status")
+
+STATS_HEADER = ["target", "sent", "received", "loss_pct", "min_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                "mean_ms", "jitter_ms"]
+
+
+def read_header(path: str) -> tuple[dict, int]:
+    """(JSON-Kopf, Offset der Daten)."""
+    header, offset = record_log.read_header(path, MAGIC, "RTT-Log")
+    if header.get("record") != RECORD.format:
+        raise ValueError(f"{path}: unbekanntes Satzformat {header.get('record')!r}")
+    return header, offset
+
+
+class RttLogWriter(record_log.RecordWriter):
+    """Hängt Sätze an; beim Fortsetzen müssen die Ziele zum Kopf passen."""
+
+    def __init__(self, path: str, targets):
+        self.targets = list(targets)
+        self._ids = {t: i for i, t in enumerate(self.targets)}
+        header = {"record": RECORD.format, "fields": list(FIELDS), "status": list(STATUS), "targets": self.targets}
+        super().__init__(path, MAGIC, header, RECORD.size, read_header,
+                         lambda h: None if h["targets"] == self.targets else f"targets={h['targets']}")
+
+    def write(self, target: str, samples) -> None:
+        """Sätze eines Ziels puffern; flush() schreibt sie."""
+        tid = self._ids[target]
+        for s in samples:
+            rtt_us = 0 if s.rtt_ms is None else min(max(round(s.rtt_ms * 1000), 0), _UINT32_MAX)
+            self.file.write(RECORD.pack(s.epoch_ms, tid, s.seq & 0xFFFF, rtt_us, s.status))
+
+
+def iter_records(path: str):
+    """Liefert (epoch_ms, target, seq, rtt_us, status) je Satz; ein unvollständiger letzter Satz wird ignoriert."""
+    _, offset = read_header(path)
+    yield from record_log.iter_records(path, offset, RECORD)
+
+
+def record_dtype():
+    import numpy as np
+    return np.dtype({"names": list(FIELDS), "formats": ["<i8", "<u2", "<u2", "<u4", "u1"],
+                     "offsets": [0, 8, 10, 12, 16], "itemsize": RECORD.size})
+
+
+def load_records(path: str):
+    """(Kopf, Sätze als numpy.memmap mit record_dtype()); liest nichts vorab in den Speicher."""
+    header, offset = read_header(path)
+    return header, record_log.load_memmap(path, offset, record_dtype())
+
+
+def target_stats(records, targets) -> list[dict]:
+    """
+    Kennzahlen je Ziel: gesendet, beantwortet, Verlust in %, Perzentile und Jitter (mittlere
+    Differenz aufeinanderfolgender Antwortzeiten, wie RFC 3550 ohne Glättung) in ms.
+    """
+    import numpy as np
+    stats = []
+    for tid, name in enumerate(targets):
+        rec = records[records["target"] == tid]
+        if not len(rec):
+            continue
+        rec = rec[np.argsort(rec["epoch_ms"], kind="stable")]
+        rtts = rec["rtt_us"][rec["status"] == OK].astype(float) / 1000
+        row = {"target": name, "sent": len(rec), "received": len(rtts),
+               "loss_pct": round(100 * (len(rec) - len(rtts)) / len(rec), 2)}
+        if len(rtts):
+            p50, p95, p99 = np.percentile(rtts, (50, 95, 99))
+            row.update(min_ms=rtts.min(), p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=rtts.max(), mean_ms=rtts.mean(),
+                       jitter_ms=float(np.abs(np.diff(rtts)).mean()) if len(rtts) > 1 else 0.0)
+            row.update({k: round(float(row[k]), 3) for k in STATS_HEADER[4:]})
+        else:
+            row.update({k: "" for k in STATS_HEADER[4:]})
+        stats.append(row)
+    return stats
+
+
+def print_stats(stats) -> None:
+    print(f"{'Ziel':20s} {'gesendet':>9s} {'Verlust':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'Jitter':>9s}")
+    for s in stats:
+        cells = [f"{s[k]:7.1f}ms" if s[k] != "" else f"{'-':>9s}" for k in ("p50_ms", "p95_ms", "p99_ms", "jitter_ms")]
+        print(f"{s['target']:20s} {s['sent']:9d} {s['loss_pct']:7.1f}% " + " ".join(cells))
+
+
+def to_csv(path: str, out) -> int:
+    header, _ = read_header(path)
+    targets, status = header["targets"], header["status"]
+    w = csv.writer(out)
+    w.writerow(["epoch_ms", "target", "seq", "rtt_ms", "status"])
+    n = 0
+    for n, (epoch_ms, tid, seq, rtt_us, st) in enumerate(iter_records(path), start=1):
+        w.writerow([epoch_ms, targets[tid], seq, rtt_us / 1000 if st == OK else "", status[st]])
+    return n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RTT-Log (Binär) auswerten oder als CSV ausgeben")
+    ap.add_argument("path", help="Datei von netwatch_probe.py --rtt-out")
+    ap.add_argument("--csv", default=None, help="Einzelwerte als CSV schreiben ('-' = stdout) statt Kennzahlen")
+    args = ap.parse_args(argv)
+    if args.csv == "-":
+        to_csv(args.path, sys.stdout)
+    elif args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as out:
+            n = to_csv(args.path, out)
+        print(f"✓ {n} Anfragen → {args.csv}")
+    else:
+        header, records = load_records(args.path)
+        print_stats(target_stats(records, header["targets"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -303,6 +303,108 @@ class TestDetectFritzIncidents:
         
         assert len(incidents) == 0
 
+    def test_poll_error_markers_become_single_incident(self):
+        """Verify POLL_ERROR..RECONNECTED rows fold into one POLL_ERROR incident"""
+        data = [
+            {"timestamp": datetime(2025, 10, 21, 12, 0, 0), "wan_connection_status": "Connected", "wan_uptime_s": "1000"},
+            {"timestamp": datetime(2025, 10, 21, 12, 0, 30), "wan_connection_status": "POLL_ERROR",
+             "wan_last_error": "timeout", "wan_uptime_s": ""},
+            {"timestamp": datetime(2025, 10, 21, 12, 2, 0), "wan_connection_status": "POLL_ERROR",
+             "wan_last_error": "refused", "wan_uptime_s": ""},
+            {"timestamp": datetime(2025, 10, 21, 12, 3, 0), "wan_connection_status": "RECONNECTED",
+             "wan_last_error": "nach 2 Fehlversuchen", "wan_uptime_s": ""},
+            {"timestamp": datetime(2025, 10, 21, 12, 3, 0), "wan_connection_status": "Connected", "wan_uptime_s": "40"},
+        ]
+        incidents = analyze_netlogs.detect_fritz_incidents(data)
+
+        types = sorted(i["type"] for i in incidents)
+        # Marker-Zeilen erzeugen keinen WAN_STATUS_CHANGE, der Reboot wird über die Uptime erkannt
+        assert types == ["POLL_ERROR", "WAN_RECONNECT"]
+        gap = [i for i in incidents if i["type"] == "POLL_ERROR"][0]
+        assert gap["start"] == datetime(2025, 10, 21, 12, 0, 30)
+        assert gap["end"] == datetime(2025, 10, 21, 12, 3, 0)
+        assert gap["details"] == "timeout"
+
+    def test_trailing_poll_error_is_reported(self):
+        """Verify an unfinished poll outage at the end of the log is still reported"""
+        data = [
+            {"timestamp": datetime(2025, 10, 21, 12, 0, 0), "wan_connection_status": "Connected"},
+            {"timestamp": datetime(2025, 10, 21, 12, 0, 30), "wan_connection_status": "POLL_ERROR", "wan_last_error": "x"},
+        ]
+        incidents = analyze_netlogs.detect_fritz_incidents(data)
+
+        assert [i["type"] for i in incidents] == ["POLL_ERROR"]
+
+
+class TestFritzIncidentDetector:
+    """Test the streaming FritzIncidentDetector class"""
+
+    def test_feed_reports_incidents_immediately(self):
+        """Verify each rule fires on the row that triggers it"""
+        det = analyze_netlogs.FritzIncidentDetector()
+        t0 = datetime(2025, 10, 21, 12, 0, 0)
+
+        assert det.feed({"timestamp": t0, "wan_connection_status": "Connected",
+                         "wan_uptime_s": "1000", "wan_external_ip": "1.2.3.4"}) == []
+        out = det.feed({"timestamp": t0 + timedelta(seconds=30), "wan_connection_status": "Connected",
+                        "wan_uptime_s": "5", "wan_external_ip": "5.6.7.8"})
+
+        assert [i["type"] for i in out] == ["WAN_RECONNECT", "EXTERNAL_IP_CHANGE"]
+
+    def test_matches_batch_detection(self):
+        """Verify feeding rows one by one gives the same result as detect_fritz_incidents"""
+        t0 = datetime(2025, 10, 21, 12, 0, 0)
+        data = [
+            {"timestamp": t0, "wan_connection_status": "Connected", "wan_uptime_s": "100"},
+            {"timestamp": t0 + timedelta(seconds=30), "wan_connection_status": "POLL_ERROR", "wan_last_error": "x"},
+            {"timestamp": t0 + timedelta(seconds=60), "wan_connection_status": "Connecting",
+             "wan_uptime_s": "0", "dsl_link_status": "Down"},
+        ]
+        det = analyze_netlogs.FritzIncidentDetector()
+        live = [ev for row in data for ev in det.feed(row)] + det.finish()
+
+        assert live == analyze_netlogs.detect_fritz_incidents(data)
+
+    def test_router_slow_phase(self):
+        """Verify consecutive slow rows form one ROUTER_SLOW incident with the slowest group"""
+        det = analyze_netlogs.FritzIncidentDetector(slow_ms=1000)
+        t0 = datetime(2025, 10, 21, 12, 0, 0)
+        rows = [
+            {"timestamp": t0, "wan_connection_status": "Connected", "lat_wan_ms": 30.0, "lat_dsl_stats_ms": 40.0},
+            {"timestamp": t0 + timedelta(seconds=30), "wan_connection_status": "Connected",
+             "lat_wan_ms": 1200.0, "lat_dsl_stats_ms": 40.0},
+            {"timestamp": t0 + timedelta(seconds=60), "wan_connection_status": "Connected",
+             "lat_wan_ms": 900.0, "lat_dsl_stats_ms": 2500.0},
+            {"timestamp": t0 + timedelta(seconds=90), "wan_connection_status": "Connected",
+             "lat_wan_ms": 30.0, "lat_dsl_stats_ms": ""},
+        ]
+
+        out = [ev for row in rows for ev in det.feed(row)] + det.finish()
+
+        assert len(out) == 1
+        assert out[0]["type"] == "ROUTER_SLOW"
+        assert (out[0]["start"], out[0]["end"]) == (rows[1]["timestamp"], rows[2]["timestamp"])
+        assert out[0]["details"] == "max dsl_stats 2500ms"
+
+    def test_router_slow_open_at_end(self):
+        """Verify a slow phase running until the end of the log is reported by finish()"""
+        det = analyze_netlogs.FritzIncidentDetector(slow_ms=100)
+        t0 = datetime(2025, 10, 21, 12, 0, 0)
+
+        assert det.feed({"timestamp": t0, "lat_wan_ms": "150.5"}) == []
+        assert [i["type"] for i in det.finish()] == ["ROUTER_SLOW"]
+
+    def test_incident_row_schema(self):
+        """Verify incident_row() formats events like incidents.csv"""
+        ev = {"source": "FRITZ", "type": "POLL_ERROR", "details": "x",
+              "start": datetime(2025, 10, 21, 12, 0, 0), "end": datetime(2025, 10, 21, 12, 1, 30)}
+
+        row = analyze_netlogs.incident_row(ev)
+
+        assert len(row) == len(analyze_netlogs.INCIDENT_HEADER)
+        assert row[:4] == ["FRITZ", "POLL_ERROR", "2025-10-21 12:00:00", "2025-10-21 12:01:30"]
+        assert row[5] == "x"
+
 
 class TestAggregateBursts:
     """Test the aggregate_bursts() function"""
@@ -412,6 +514,90 @@ class TestLoadCsv:
         finally:
             os.unlink(csv_path)
     
+    def test_load_csv_expands_compact_log(self):
+        """Verify load_csv transparently expands compact (K/D) fritz logs"""
+        import compact_log
+        header = ['timestamp', 'wan_connection_status', 'wan_uptime_s']
+        enc = compact_log.CompactEncoder(header)
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(enc.file_header())
+            for i, status in enumerate(['Connected', 'Connected', 'Disconnected']):
+                writer.writerow(enc.encode({
+                    'timestamp': f'2025-10-21 12:00:{i:02d}',
+                    'wan_connection_status': status,
+                    'wan_uptime_s': str(100 + i),
+                }))
+            csv_path = f.name
+
+        try:
+            data, columns = analyze_netlogs.load_csv(csv_path)
+            assert columns == header
+            rows = data if isinstance(data, list) else data.to_dict('records')
+            assert len(rows) == 3
+            assert rows[2]['timestamp'] == datetime(2025, 10, 21, 12, 0, 2)
+            assert rows[2]['wan_connection_status'] == 'Disconnected'
+            assert int(rows[1]['wan_uptime_s']) == 101
+        finally:
+            os.unlink(csv_path)
+
+    def test_load_csv_expands_compact_log_without_pandas(self):
+        """Verify the pandas-free fallback also expands compact logs"""
+        import compact_log
+        enc = compact_log.CompactEncoder(['timestamp', 'value'])
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(enc.file_header())
+            writer.writerow(enc.encode({'timestamp': '2025-10-21 12:00:00', 'value': '5'}))
+            writer.writerow(enc.encode({'timestamp': '2025-10-21 12:00:30', 'value': '9'}))
+            csv_path = f.name
+
+        try:
+            with patch('analyze_netlogs.pd', None):
+                data, columns = analyze_netlogs.load_csv(csv_path)
+            assert columns == ['timestamp', 'value']
+            assert data[1] == {'timestamp': datetime(2025, 10, 21, 12, 0, 30), 'value': '9'}
+        finally:
+            os.unlink(csv_path)
+
+    def test_load_csv_prefers_epoch_ms(self):
+        """Verify ts_ms is used for the time column and rows without it fall back to the string"""
+        ms = int(datetime(2025, 10, 21, 12, 0, 5).timestamp() * 1000)
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, newline='', encoding='utf-8') as f:
+            f.write("timestamp,ts_ms,lat_wan_ms\n")
+            f.write(f"garbage,{ms},12.5\n")
+            f.write("2025-10-21 12:00:00,,\n")
+            csv_path = f.name
+
+        try:
+            for pandas_module in (analyze_netlogs.pd, None):
+                with patch('analyze_netlogs.pd', pandas_module):
+                    data, _ = analyze_netlogs.load_csv(csv_path)
+                rows = data if isinstance(data, list) else data.to_dict('records')
+                assert rows[0]['timestamp'] == datetime(2025, 10, 21, 12, 0, 5)
+                assert rows[1]['timestamp'] == datetime(2025, 10, 21, 12, 0, 0)
+        finally:
+            os.unlink(csv_path)
+
+    def test_sort_by_epoch_ms_across_dst(self):
+        """Verify ts_ms orders the repeated hour at the DST change, the string does not"""
+        # gleiche Ortszeit, eine Stunde auseinander (Ende der Sommerzeit)
+        rows = [{"timestamp": datetime(2025, 10, 26, 2, 30), "ts_ms": "1761442200000"},
+                {"timestamp": datetime(2025, 10, 26, 2, 15), "ts_ms": "1761441300000"},
+                {"timestamp": datetime(2025, 10, 26, 2, 10), "ts_ms": "1761438600000"}]
+
+        listed = analyze_netlogs.sort_by_time(rows)
+        framed = analyze_netlogs.sort_by_time(analyze_netlogs.pd.DataFrame(rows))
+
+        assert [r["ts_ms"] for r in listed] == ["1761438600000", "1761441300000", "1761442200000"]
+        assert list(framed["ts_ms"]) == [1761438600000, 1761441300000, 1761442200000]
+
+    def test_sort_without_epoch_ms_uses_timestamp(self):
+        """Verify logs without ts_ms are sorted by the time column"""
+        rows = [{"timestamp": datetime(2025, 10, 21, 12, 1)}, {"timestamp": datetime(2025, 10, 21, 12, 0)}]
+
+        assert analyze_netlogs.sort_by_time(rows)[0]["timestamp"].minute == 0
+
     def test_load_csv_handles_missing_file(self):
         """Verify load_csv handles missing file gracefully"""
         with pytest.raises(FileNotFoundError):
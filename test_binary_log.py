@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Unit tests for binary_log.py
+
+Run with: pytest test_binary_log.py -v
+or: python3 -m pytest test_binary_log.py -v
+"""
+
+import pytest
+import csv
+import math
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+import analyze_netlogs
+import binary_log
+import compact_log
+import netwatch
+
+COLUMNS = [("timestamp", "time"), ("adapter", "str"), ("dns_ok", "int"), ("ping_8.8.8.8_avg_ms", "float"),
+           ("ping_8.8.8.8_loss_pct", "number")]
+
+
+def write_csv(path, rows, lineterminator="\r\n"):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator=lineterminator)
+        w.writerows(rows)
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestLayout:
+    """Test the record layout"""
+
+    def test_fields_are_aligned(self):
+        """Verify every field after the entry byte starts at a multiple of its size and records are 8-byte aligned"""
+        fmt, offsets, size = binary_log.layout([("a", "str"), ("b", "int"), ("c", "str")])
+
+        assert offsets == [4, 8, 16]
+        assert size == 24
+        assert fmt == "<x3xIqI4x"
+
+    def test_records_leave_room_for_texts(self):
+        """Verify even a one-column record is large enough to carry text"""
+        assert binary_log.layout([("a", "str")])[2] == binary_log.MIN_RECORD
+
+    def test_dtype_matches_struct(self):
+        """Verify the numpy dtype has the same size as the struct layout"""
+        np = pytest.importorskip("numpy")
+        dtype = binary_log.record_dtype(COLUMNS)
+
+        assert isinstance(dtype, np.dtype)
+        assert dtype.itemsize == binary_log.layout(COLUMNS)[2]
+
+    def test_records_start_aligned(self):
+        """Verify the header is padded so records begin at a multiple of 8 bytes"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            binary_log.BinaryLogWriter(path, COLUMNS, "netwatch").close()
+
+            header, offset = binary_log.read_header(path)
+
+        assert offset % 8 == 0
+        assert header["kind"] == "netwatch"
+        assert header["targets"] == ["8.8.8.8"]
+        assert header["columns"] == COLUMNS
+
+
+class TestValues:
+    """Test lossless encoding of single cells"""
+
+    @pytest.mark.parametrize("typ,text", [("time", "2025-10-21 12:00:00"), ("int", "-42"), ("float", "12.0"),
+                                          ("float", "0.1"), ("number", "12"), ("number", "12.5"), ("int", "")])
+    def test_round_trip(self, typ, text):
+        """Verify canonical text comes back unchanged"""
+        assert binary_log.decode_value(typ, binary_log.encode_value(typ, text)) == text
+
+    @pytest.mark.parametrize("typ,text", [("time", "2025-10-21T12:00:00"), ("time", "21.10.2025 12:00:00"),
+                                          ("int", "007"), ("int", "1.0"), ("float", "12"), ("float", "1e-05x"),
+                                          ("number", "12.0"), ("float", "nan")])
+    def test_non_canonical_text_is_rejected(self, typ, text):
+        """Verify text that would come back differently is rejected"""
+        with pytest.raises(ValueError):
+            binary_log.encode_value(typ, text)
+
+    def test_python_values(self):
+        """Verify collectors can pass numbers and datetimes directly"""
+        assert binary_log.encode_value("int", 5) == 5
+        assert binary_log.encode_value("float", 3) == 3.0
+        assert binary_log.encode_value("time", datetime(1970, 1, 1, 0, 1)) == 60
+        assert math.isnan(binary_log.encode_value("float", None))
+
+    @pytest.mark.parametrize("values,typ", [(["2025-10-21 12:00:00", ""], "time"), (["1", "0", ""], "int"),
+                                            (["12.5", "3.0"], "float"), (["12", "12.5"], "number"),
+                                            (["Ethernet", "1"], "str"), (["", ""], "str"), (["1.0", "2"], "str")])
+    def test_infer_type(self, values, typ):
+        """Verify the first type that stores all values losslessly is chosen"""
+        assert binary_log.infer_type(values) == typ
+
+    def test_type_guess_narrows_while_streaming(self):
+        """Verify the column type is narrowed value by value without keeping the values"""
+        guess = binary_log.TypeGuess()
+        steps = []
+        for value in ("", "1", "1", "2.5", "", "x"):
+            guess.add(value)
+            steps.append(guess.type)
+
+        assert steps == ["str", "int", "int", "number", "number", "str"]
+        assert vars(guess).keys() == {"candidates", "seen", "_last"}
+
+
+class TestWriter:
+    """Test appending records"""
+
+    def test_strings_are_stored_in_the_log(self):
+        """Verify each distinct text is stored once, in the log itself, before the first record using it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            for adapter in ("eth0", "eth0", "wlan0", ""):
+                writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": adapter})
+            writer.close()
+            copy = os.path.join(tmpdir, "copy", "log.bin")
+            os.makedirs(os.path.dirname(copy))
+            with open(copy, "wb") as f:
+                f.write(read_bytes(path))
+
+            assert sorted(os.listdir(tmpdir)) == ["copy", "log.bin"]  # no side file
+            assert binary_log.read_strings(copy) == ["", "eth0", "wlan0"]
+            assert [r["adapter"] for r in binary_log.iter_rows(copy)[1]] == ["eth0", "eth0", "wlan0", ""]
+            assert os.path.getsize(path) - binary_log.read_header(path)[1] == 6 * 48
+
+    def test_long_text_spans_several_entries(self):
+        """Verify a text longer than one entry is split and read back whole"""
+        text = "Fehler: " + "ä" * 100 + " Ende"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": text})
+            writer.write({"timestamp": "2025-10-21 12:00:30", "adapter": "eth0"})
+            writer.close()
+
+            assert [r["adapter"] for r in binary_log.iter_rows(path)[1]] == [text, "eth0"]
+            assert binary_log.read_strings(path) == ["", text, "eth0"]
+
+    def test_resume_appends_and_reuses_strings(self):
+        """Verify a second writer continues the records and the string table"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            for adapter in ("eth0", "wlan0", "eth0"):
+                writer = binary_log.BinaryLogWriter(path, COLUMNS)
+                writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": adapter})
+                writer.close()
+
+            _, rows = binary_log.iter_rows(path)
+
+            assert [r["adapter"] for r in rows] == ["eth0", "wlan0", "eth0"]
+            assert binary_log.read_strings(path) == ["", "eth0", "wlan0"]
+
+    @pytest.mark.parametrize("torn", [2, 48 + 3, 48 * 2])
+    def test_partial_writes_are_cut(self, torn):
+        """Verify a half-written record or text is dropped before appending"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": "eth0"})
+            writer.close()
+            size = os.path.getsize(path)
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            writer.write({"timestamp": "2025-10-21 12:00:15", "adapter": "x" * 200})  # text over 5 entries
+            writer.close()
+            with open(path, "r+b") as f:
+                f.truncate(size + torn)  # writer stopped inside the long text
+
+            assert [r["adapter"] for r in binary_log.iter_rows(path)[1]] == ["eth0"]
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            writer.write({"timestamp": "2025-10-21 12:00:30", "adapter": "wlan0"})
+            writer.close()
+            _, rows = binary_log.iter_rows(path)
+
+            assert [(r["timestamp"], r["adapter"]) for r in rows] == [("2025-10-21 12:00:00", "eth0"),
+                                                                      ("2025-10-21 12:00:30", "wlan0")]
+            assert binary_log.read_strings(path) == ["", "eth0", "wlan0"]
+
+    def test_rejected_row_leaves_nothing(self):
+        """Verify a row with a value that does not fit is rejected as a whole"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            with pytest.raises(ValueError, match="dns_ok"):
+                writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": "neu", "dns_ok": "ja"})
+            writer.close()
+
+            assert binary_log.read_strings(path) == [""]
+            assert list(binary_log.iter_rows(path)[1]) == []
+
+    def test_other_columns_are_rejected(self):
+        """Verify a log is only continued with the columns it was created for"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            binary_log.BinaryLogWriter(path, COLUMNS).close()
+
+            with pytest.raises(ValueError, match="Kopf passt nicht"):
+                binary_log.BinaryLogWriter(path, COLUMNS[:2])
+
+
+class TestConversion:
+    """Test the lossless CSV <-> binary converter"""
+
+    def round_trip(self, tmpdir, rows, lineterminator="\r\n"):
+        src = os.path.join(tmpdir, "in.csv")
+        write_csv(src, rows, lineterminator)
+        binary_log.csv_to_binary(src, os.path.join(tmpdir, "log.bin"))
+        binary_log.binary_to_csv(os.path.join(tmpdir, "log.bin"), os.path.join(tmpdir, "out.csv"))
+        return src, os.path.join(tmpdir, "out.csv")
+
+    def test_sample_logs_round_trip_byte_for_byte(self):
+        """Verify the sample netwatch and fritz logs come back byte for byte"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = netwatch.write_sample_logs(tmpdir)
+            for name in ("netwatch", "fritz"):
+                out = os.path.join(tmpdir, f"{name}.bin")
+                back = os.path.join(tmpdir, f"{name}.back.csv")
+                binary_log.csv_to_binary(files[name], out, name)
+                binary_log.binary_to_csv(out, back)
+
+                assert read_bytes(back) == read_bytes(files[name])
+
+    def test_netwatch_ps1_rows_round_trip(self):
+        """Verify PowerShell-style numbers, ERROR rows and quoted text survive the round trip"""
+        rows = [["timestamp", "adapter", "media_status", "dns_ok", "dns_ms", "ping_8.8.8.8_avg_ms",
+                 "ping_8.8.8.8_loss_pct"],
+                ["2025-10-21 12:00:00", "Ethernet", "Connected", "1", "12", "11", "0"],
+                ["2025-10-21 12:00:30", "Ethernet", "Connected", "1", "13", "11.5", "0"],
+                ["2025-10-21 12:01:00", "ERROR", 'Fehler, "kein" Adapter\nZeile 2', "", "", "", ""]]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src, out = self.round_trip(tmpdir, rows)
+            columns = dict(binary_log.read_header(os.path.join(tmpdir, "log.bin"))[0]["columns"])
+
+            assert read_bytes(out) == read_bytes(src)
+
+        assert columns["ping_8.8.8.8_avg_ms"] == "number"
+        assert columns["dns_ok"] == "int"
+        assert columns["media_status"] == "str"
+
+    def test_compact_log_is_expanded(self):
+        """Verify a compact log converts to the same rows as its expanded form"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            header = ["timestamp", "wan_connection_status", "wan_uptime_s"]
+            encoder = compact_log.CompactEncoder(header)
+            rows = [{"timestamp": f"2025-10-21 12:00:0{i}", "wan_connection_status": "Connected",
+                     "wan_uptime_s": str(10 + i)} for i in range(3)]
+            write_csv(os.path.join(tmpdir, "compact.csv"), [encoder.file_header()] + [encoder.encode(r) for r in rows])
+            binary_log.csv_to_binary(os.path.join(tmpdir, "compact.csv"), os.path.join(tmpdir, "log.bin"))
+            _, back = binary_log.iter_rows(os.path.join(tmpdir, "log.bin"))
+
+            assert list(back) == rows
+
+    def test_compact_log_with_byte_order_mark(self):
+        """Verify a compact log with a UTF-8 BOM is recognized as compact and expanded"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            encoder = compact_log.CompactEncoder(["timestamp", "wan_uptime_s"])
+            rows = [{"timestamp": f"2025-10-21 12:00:0{i}", "wan_uptime_s": str(10 + i)} for i in range(3)]
+            src = os.path.join(tmpdir, "compact.csv")
+            with open(src, "w", newline="", encoding="utf-8-sig") as f:
+                csv.writer(f).writerows([encoder.file_header()] + [encoder.encode(r) for r in rows])
+            binary_log.csv_to_binary(src, os.path.join(tmpdir, "log.bin"))
+            header, _ = binary_log.read_header(os.path.join(tmpdir, "log.bin"))
+            _, back = binary_log.iter_rows(os.path.join(tmpdir, "log.bin"))
+
+            assert [name for name, _ in header["columns"]] == ["timestamp", "wan_uptime_s"]
+            assert list(back) == rows
+
+    def test_main_both_directions(self, capsys):
+        """Verify the command line converts in both directions"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = netwatch.write_sample_logs(tmpdir)
+            out = os.path.join(tmpdir, "nw.bin")
+            back = os.path.join(tmpdir, "nw.csv")
+            binary_log.main(["to-binary", files["netwatch"], out, "--kind", "netwatch"])
+            binary_log.main(["to-csv", out, back])
+
+            assert read_bytes(back) == read_bytes(files["netwatch"])
+
+        assert "timestamp:time" in capsys.readouterr().out
+
+    def test_dispatcher_knows_convert(self):
+        """Verify netwatch convert routes to binary_log.main"""
+        with patch("binary_log.main") as mock_main:
+            netwatch.main(["convert", "to-csv", "a.bin", "a.csv"])
+
+        mock_main.assert_called_once_with(["to-csv", "a.bin", "a.csv"])
+
+
+class TestAnalyzer:
+    """Test that the analyzer reads binary logs like the CSV"""
+
+    def convert(self, tmpdir):
+        files = netwatch.write_sample_logs(tmpdir)
+        converted = {}
+        for name in ("netwatch", "fritz"):
+            converted[name] = os.path.join(tmpdir, f"{name}.bin")
+            binary_log.csv_to_binary(files[name], converted[name], name)
+        return files, converted
+
+    @pytest.mark.parametrize("engine", ["python", "pandas"])
+    def test_same_incidents_as_csv(self, engine):
+        """Verify both engines find the same incidents in the binary and the CSV logs"""
+        if engine == "pandas":
+            pytest.importorskip("pandas")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files, converted = self.convert(tmpdir)
+            outputs = []
+            for source in (files, converted):
+                out = os.path.join(tmpdir, "incidents.csv")
+                with patch('builtins.print'):
+                    analyze_netlogs.main(["--netwatch", source["netwatch"], "--fritz", source["fritz"],
+                                          "--out", out, "--engine", engine])
+                outputs.append(read_bytes(out))
+
+        assert outputs[0] == outputs[1]
+        assert b"WAN_RECONNECT" in outputs[0]
+
+    def test_load_records_skips_text_entries(self):
+        """Verify the memory-mapped records hold only rows and the texts come from their entries"""
+        np = pytest.importorskip("numpy")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, [("timestamp", "time"), ("dns_ok", "int")])
+            writer.write({"timestamp": "2025-10-21 12:00:00", "dns_ok": 1})
+            writer.close()
+            _, plain, _ = binary_log.load_records(path)
+            path = os.path.join(tmpdir, "texts.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            for adapter in ("eth0", "wlan0", "eth0"):
+                writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": adapter, "dns_ok": 1})
+            writer.close()
+            _, records, strings = binary_log.load_records(path)
+
+        assert isinstance(plain, np.memmap)
+        assert strings == ["", "eth0", "wlan0"]
+        assert [strings[i] for i in records["adapter"]] == ["eth0", "wlan0", "eth0"]
+        assert records["dns_ok"].tolist() == [1, 1, 1]
+
+    def test_pandas_frame_types(self):
+        """Verify the binary frame has typed columns and NaN for empty cells"""
+        pd = pytest.importorskip("pandas")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = binary_log.BinaryLogWriter(path, COLUMNS)
+            writer.write({"timestamp": "2025-10-21 12:00:00", "adapter": "eth0", "dns_ok": 1,
+                          "ping_8.8.8.8_avg_ms": 11.5})
+            writer.write({"timestamp": "2025-10-21 12:00:30", "adapter": "", "dns_ok": "",
+                          "ping_8.8.8.8_avg_ms": ""})
+            writer.close()
+            df, columns = analyze_netlogs.load_csv(path, use_pandas=True)
+
+        assert columns == [name for name, _ in COLUMNS]
+        assert pd.api.types.is_datetime64_any_dtype(df["timestamp"])
+        assert df["timestamp"].iloc[1] == pd.Timestamp("2025-10-21 12:00:30")
+        assert df["dns_ok"].isna().tolist() == [False, True]
+        assert df["adapter"].iloc[0] == "eth0"
+        assert pd.isna(df["adapter"].iloc[1])
+        assert df["ping_8.8.8.8_avg_ms"].iloc[0] == 11.5
+
+    def test_fritz_ts_ms_is_used(self):
+        """Verify rows with ts_ms get their time from it in both engines"""
+        pytest.importorskip("pandas")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "fritz.bin")
+            writer = binary_log.BinaryLogWriter(path, [("timestamp", "time"), ("ts_ms", "int")])
+            writer.write({"timestamp": "2025-10-21 12:00:00", "ts_ms": ""})
+            writer.write({"timestamp": "2025-10-21 12:00:30", "ts_ms": 1761048030000})
+            writer.close()
+            expected = [datetime(2025, 10, 21, 12, 0), analyze_netlogs.ms_to_time(1761048030000)]
+            rows, _ = analyze_netlogs.load_csv(path, use_pandas=False)
+            df, _ = analyze_netlogs.load_csv(path, use_pandas=True)
+
+        assert [r["timestamp"] for r in rows] == expected
+        assert [t.to_pydatetime() for t in df["timestamp"]] == expected
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_binary_log.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compact_log.py
+
+Run with: pytest test_compact_log.py -v
+or: python3 -m pytest test_compact_log.py -v
+"""
+
+import pytest
+import os
+import csv
+import io
+import tempfile
+
+import compact_log
+
+
+HEADER = ["timestamp", "wan_connection_status", "wan_uptime_s", "wan_external_ip", "common_bytes_sent"]
+
+
+def make_rows(n=5):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "timestamp": f"2025-10-21 12:00:{i:02d}",
+            "wan_connection_status": "Connected",
+            "wan_uptime_s": str(1000 + i),
+            "wan_external_ip": "1.2.3.4",
+            "common_bytes_sent": str(50000 + i * 1234),
+        })
+    return rows
+
+
+def roundtrip(rows, header=HEADER, keyframe_every=300):
+    enc = compact_log.CompactEncoder(header, keyframe_every=keyframe_every)
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(enc.file_header())
+    for r in rows:
+        w.writerow(enc.encode(r))
+    buf.seek(0)
+    _, expanded = compact_log.expand_rows(csv.reader(buf))
+    return buf.getvalue(), list(expanded)
+
+
+class TestCompactEncoder:
+    """Test the CompactEncoder class"""
+
+    def test_first_row_is_keyframe(self):
+        """Verify the first encoded row is a full keyframe"""
+        enc = compact_log.CompactEncoder(HEADER)
+        out = enc.encode(make_rows(1)[0])
+        assert out[0] == "K"
+        assert out[1:] == ["2025-10-21 12:00:00", "Connected", "1000", "1.2.3.4", "50000"]
+
+    def test_delta_row_encodes_only_changes(self):
+        """Verify unchanged fields are empty and counters are deltas"""
+        enc = compact_log.CompactEncoder(HEADER)
+        rows = make_rows(2)
+        enc.encode(rows[0])
+        out = enc.encode(rows[1])
+        assert out == ["D", "+1", "", "+1", "", "+1234"]
+
+    def test_keyframe_interval(self):
+        """Verify a keyframe is written every keyframe_every rows"""
+        enc = compact_log.CompactEncoder(HEADER, keyframe_every=2)
+        kinds = [enc.encode(r)[0] for r in make_rows(5)]
+        assert kinds == ["K", "D", "K", "D", "K"]
+
+    def test_reset_forces_keyframe(self):
+        """Verify reset() makes the next row a keyframe"""
+        enc = compact_log.CompactEncoder(HEADER)
+        rows = make_rows(2)
+        enc.encode(rows[0])
+        enc.reset()
+        assert enc.encode(rows[1])[0] == "K"
+
+
+class TestRoundtrip:
+    """Test lossless encode/decode"""
+
+    def test_roundtrip_regular_rows(self):
+        """Verify regular rows survive encode/decode unchanged"""
+        rows = make_rows(20)
+        _, expanded = roundtrip(rows)
+        assert expanded == rows
+
+    def test_roundtrip_special_values(self):
+        """Verify empty values, counter resets and escape-worthy literals are lossless"""
+        rows = make_rows(3)
+        rows[1]["wan_external_ip"] = ""
+        rows[1]["wan_connection_status"] = "-weird"
+        rows[2]["wan_uptime_s"] = "3"          # Uptime-Reset (negatives Delta)
+        rows[2]["wan_connection_status"] = "~"
+        rows[2]["common_bytes_sent"] = "007"   # nicht-kanonische Zahl bleibt Literal
+        _, expanded = roundtrip(rows)
+        assert expanded == rows
+
+    def test_roundtrip_unparseable_timestamp(self):
+        """Verify timestamps that cannot be parsed are stored literally"""
+        rows = make_rows(2)
+        rows[1]["timestamp"] = "kaputt"
+        _, expanded = roundtrip(rows)
+        assert expanded == rows
+
+    def test_compact_output_is_smaller(self):
+        """Verify steady-state rows shrink substantially"""
+        rows = make_rows(50)
+        text, _ = roundtrip(rows)
+        full = io.StringIO()
+        w = csv.writer(full)
+        w.writerow(HEADER)
+        for r in rows:
+            w.writerow([r[h] for h in HEADER])
+        assert len(text) * 2 < len(full.getvalue())
+
+    def test_expand_rows_rejects_regular_csv(self):
+        """Verify expand_rows raises for non-compact files"""
+        with pytest.raises(ValueError):
+            compact_log.expand_rows(csv.reader(io.StringIO("timestamp,a\n")))
+
+
+class TestCompactDecoder:
+    """Test row-by-row decoding"""
+
+    def test_decode_matches_expand_rows(self):
+        """Verify decoding records one at a time gives the same rows as expand_rows"""
+        rows = make_rows(10)
+        encoder = compact_log.CompactEncoder(list(rows[0].keys()), keyframe_every=4)
+        decoder = compact_log.CompactDecoder(list(rows[0].keys()))
+
+        assert [decoder.decode(encoder.encode(r)) for r in rows] == rows
+
+    def test_delta_before_keyframe_is_skipped(self):
+        """Verify a reader starting mid-file waits for the next keyframe"""
+        rows = make_rows(3)
+        encoder = compact_log.CompactEncoder(list(rows[0].keys()))
+        records = [encoder.encode(r) for r in rows]
+        decoder = compact_log.CompactDecoder(list(rows[0].keys()))
+
+        assert decoder.decode(records[1]) is None
+        assert decoder.decode([]) is None
+
+
+class TestFileHelpers:
+    """Test is_compact_file() and expand_file()"""
+
+    def test_is_compact_file_and_expand_file(self):
+        """Verify compact files are detected and expanded to regular CSV"""
+        rows = make_rows(4)
+        text, _ = roundtrip(rows)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, "compact.csv")
+            dst = os.path.join(tmpdir, "full.csv")
+            with open(src, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+
+            assert compact_log.is_compact_file(src)
+            assert compact_log.expand_file(src, dst) == 4
+            assert not compact_log.is_compact_file(dst)
+
+            with open(dst, newline="", encoding="utf-8") as f:
+                assert list(csv.DictReader(f)) == rows
+
+    def test_byte_order_mark_is_ignored(self):
+        """Verify a compact file saved with a UTF-8 BOM is still detected and expanded"""
+        rows = make_rows(3)
+        text, _ = roundtrip(rows)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, "compact.csv")
+            dst = os.path.join(tmpdir, "full.csv")
+            with open(src, "w", encoding="utf-8-sig", newline="") as f:
+                f.write(text)
+
+            assert compact_log.is_compact_file(src)
+            assert compact_log.expand_file(src, dst) == 3
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_compact_log.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fritz_fleet_restart.py
+
+Run with: pytest test_fritz_fleet_restart.py -v
+or: python3 -m pytest test_fritz_fleet_restart.py -v
+"""
+
+import pytest
+import csv
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import fritz_fleet_restart
+import fritz_mock_server
+
+
+def outcome(host, port=None, result="recovered", seconds=1.0):
+    return {"host": host, "port": port, "result": result, "seconds": seconds, "error": "", "phases": {}}
+
+
+class TestHostList:
+    """Test reading the host list and splitting it into batches"""
+
+    def test_read_hosts(self):
+        """Verify comments, ports and duplicates are handled"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# Filialen\n192.168.10.1\n\nbox2.example:49443  # TLS\n192.168.10.1\nfd00::1\n")
+
+            hosts = fritz_fleet_restart.read_hosts(path)
+
+        assert hosts == [("192.168.10.1", None), ("box2.example", 49443), ("fd00::1", None)]
+
+    @pytest.mark.parametrize("line", ["box:http", "box:70000", ":49000"])
+    def test_malformed_line_names_file_and_line(self, line):
+        """Verify a bad port or missing host is reported with its line instead of a bare int() error"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"a\n{line}\n")
+
+            with pytest.raises(ValueError) as exc_info:
+                fritz_fleet_restart.read_hosts(path)
+
+        assert str(exc_info.value).startswith(f"{path}:2: ")
+        assert str(exc_info.value).endswith(line)
+
+    def test_malformed_host_list_stops_before_restarting(self):
+        """Verify main exits with the file line and restarts nothing"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\nb:port\n")
+            with patch('fritz_fleet_restart.rollout') as mock_rollout:
+                with pytest.raises(SystemExit) as exc_info:
+                    fritz_fleet_restart.main(['--hosts', path, '--password', 'x', '--yes'])
+
+        assert f"{path}:2: ungültiger Port 'port'" in str(exc_info.value.code)
+        assert not mock_rollout.called
+
+    def test_batches(self):
+        """Verify hosts are split into batches of the concurrency limit"""
+        assert fritz_fleet_restart.batches([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+        assert fritz_fleet_restart.batches([1], 0) == [[1]]
+
+
+class TestRollout:
+    """Test batch gating and the failure-rate abort"""
+
+    def test_batches_run_concurrently_and_in_order(self):
+        """Verify boxes in a batch run in parallel and the next batch waits for the previous one"""
+        active = []
+        peak = [0]
+        lock = threading.Lock()
+        order = []
+
+        def restart(host, port):
+            with lock:
+                active.append(host)
+                peak[0] = max(peak[0], len(active))
+                order.append(host)
+            time.sleep(0.1)
+            with lock:
+                active.remove(host)
+            return outcome(host, port)
+
+        hosts = [(f"10.0.0.{i}", None) for i in range(1, 7)]
+        started = time.monotonic()
+        summary = fritz_fleet_restart.rollout(hosts, restart, concurrency=3, log=lambda *a: None)
+        elapsed = time.monotonic() - started
+
+        assert peak[0] == 3
+        assert set(order[:3]) == {"10.0.0.1", "10.0.0.2", "10.0.0.3"}
+        assert len(summary["batches"]) == 2
+        assert elapsed < 0.5  # zwei Batches à 0,1 s statt sechs Neustarts nacheinander
+        assert not summary["aborted"]
+
+    def test_abort_when_failure_rate_exceeded(self):
+        """Verify later batches are skipped after a batch fails too often"""
+        def restart(host, port):
+            return outcome(host, port, result="timeout" if host in ("b", "c") else "recovered")
+
+        hosts = [(h, None) for h in "abcdef"]
+        summary = fritz_fleet_restart.rollout(hosts, restart, concurrency=4, max_failure_rate=0.25,
+                                              log=lambda *a: None)
+
+        assert summary["aborted"] is True
+        assert [o["host"] for o in summary["outcomes"]] == ["a", "b", "c", "d"]
+        assert summary["skipped"] == [("e", None), ("f", None)]
+
+    def test_failure_rate_at_threshold_continues(self):
+        """Verify a failure rate equal to the threshold does not abort"""
+        def restart(host, port):
+            return outcome(host, port, result="error" if host == "a" else "recovered")
+
+        summary = fritz_fleet_restart.rollout([(h, None) for h in "abcd"], restart, concurrency=2,
+                                              max_failure_rate=0.5, log=lambda *a: None)
+
+        assert not summary["aborted"]
+        assert len(summary["outcomes"]) == 4
+
+
+class TestAgainstMockFleet:
+    """Test a real rollout against local mock boxes"""
+
+    @patch('builtins.print')
+    def test_rollout_restarts_all_boxes(self, mock_print):
+        """Verify every box is rebooted, measured and journaled"""
+        fleet = fritz_mock_server.MockFleet(4, port=0, spread="port", reboot_seconds=0.3, password="secret",
+                                            boot={"dsl_train": 0.2}).start()
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                journal = os.path.join(tmpdir, "journal.csv")
+                hosts = fleet.endpoints
+
+                def restart(host, port):
+                    return fritz_fleet_restart.restart_one(host, port, None, "secret", probe_interval=0.02,
+                                                           wait_timeout=10, http_port=0, journal=journal)
+
+                summary = fritz_fleet_restart.rollout(hosts, restart, concurrency=2)
+                with open(journal, newline="", encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f))
+        finally:
+            fleet.stop()
+
+        assert [o["result"] for o in summary["outcomes"]] == ["recovered"] * 4
+        assert len(rows) == 4
+        assert all(float(r["dsl_sync_s"]) > float(r["tr064_s"]) for r in rows)
+
+    @patch('fritzbox_restart.reboot_fritzbox')
+    def test_restart_one_uses_reboot_fritzbox(self, mock_reboot):
+        """Verify restart_one goes through reboot_fritzbox with wait and takes its measured phases"""
+        def reboot(*args, recovery, **kwargs):
+            recovery.update(phases={"went_down": 1.0, "reachable": 30.0, "external_ip": 80.5},
+                            row={"result": "timeout"})
+            return False, "[t] FRITZ!Box nicht vollständig wieder online"
+        mock_reboot.side_effect = reboot
+
+        result = fritz_fleet_restart.restart_one("10.0.0.1", 49000, "admin", "pw", journal="j.csv", http_port=0)
+
+        kwargs = mock_reboot.call_args.kwargs
+        assert mock_reboot.call_args.args == ("10.0.0.1", "admin", "pw", 10)
+        assert (kwargs["wait"], kwargs["port"], kwargs["http_port"], kwargs["journal"]) == (True, 49000, 49000, "j.csv")
+        assert (result["result"], result["seconds"]) == ("timeout", 80.5)
+
+    def test_unreachable_box_is_an_error(self):
+        """Verify a connection failure is reported instead of raised"""
+        result = fritz_fleet_restart.restart_one("127.0.0.1", 9, None, "x", timeout=1)
+
+        assert result["result"] == "error"
+        assert result["error"]
+        assert not result["error"].startswith("[")  # der Fehlertext, keine formatierte Meldung
+
+    @patch('fritzbox_restart.CachedFritzConnection')
+    def test_error_text_comes_from_reboot_fritzbox(self, mock_fc):
+        """Verify the exception text is passed as data, not parsed out of the log message"""
+        mock_fc.side_effect = RuntimeError("401 Unauthorized] retry")
+
+        result = fritz_fleet_restart.restart_one("10.0.0.1", None, "admin", "pw")
+
+        assert result["error"] == "401 Unauthorized] retry"
+
+
+class TestMain:
+    """Test the CLI"""
+
+    def test_dry_run_lists_batches(self, capsys):
+        """Verify --dry-run prints the batches without restarting"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\nb\nc\n")
+            with patch('sys.argv', ['fritz_fleet_restart.py', '--hosts', path, '--password', 'x',
+                                    '--concurrency', '2', '--dry-run']), \
+                    patch('fritz_fleet_restart.rollout') as mock_rollout:
+                with pytest.raises(SystemExit) as exc_info:
+                    fritz_fleet_restart.main()
+
+        assert exc_info.value.code == 0
+        assert not mock_rollout.called
+        assert capsys.readouterr().out.splitlines() == ["Batch 1: a, b", "Batch 2: c"]
+
+    @patch('fritz_fleet_restart.rollout')
+    @patch('builtins.input')
+    def test_declined_confirmation(self, mock_input, mock_rollout):
+        """Verify nothing is restarted when the prompt is declined"""
+        mock_input.return_value = "no"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\n")
+            with patch('sys.argv', ['fritz_fleet_restart.py', '--hosts', path, '--password', 'x']):
+                with pytest.raises(SystemExit):
+                    fritz_fleet_restart.main()
+
+        assert not mock_rollout.called
+
+    @patch('fritz_fleet_restart.rollout')
+    def test_exit_code_reflects_failures(self, mock_rollout):
+        """Verify the exit code is 1 when a box did not recover"""
+        mock_rollout.return_value = {"outcomes": [outcome("a"), outcome("b", result="timeout")],
+                                     "skipped": [], "aborted": False, "batches": [1.0]}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "hosts.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("a\nb\n")
+            with patch('sys.argv', ['fritz_fleet_restart.py', '--hosts', path, '--password', 'x', '--yes']):
+                with pytest.raises(SystemExit) as exc_info:
+                    fritz_fleet_restart.main()
+
+        assert exc_info.value.code == 1
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_fritz_fleet_restart.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fritz_hosts.py
+
+Run with: pytest test_fritz_hosts.py -v
+or: python3 -m pytest test_fritz_hosts.py -v
+"""
+
+import pytest
+import io
+from unittest.mock import Mock
+
+from fritzconnection import FritzConnection
+
+import fritz_hosts
+import fritz_mock_server
+
+
+HOST_LIST = b"""<?xml version="1.0" encoding="utf-8"?>
+<List>
+<Item>
+<Index>1</Index>
+<IPAddress>192.168.178.20</IPAddress>
+<MACAddress>aa:bb:cc:00:00:01</MACAddress>
+<Active>1</Active>
+<HostName>laptop</HostName>
+<InterfaceType>802.11</InterfaceType>
+<X_AVM-DE_Port>0</X_AVM-DE_Port>
+<X_AVM-DE_Speed>0</X_AVM-DE_Speed>
+<X_AVM-DE_Guest>0</X_AVM-DE_Guest>
+<X_AVM-DE_Model></X_AVM-DE_Model>
+</Item>
+<Item>
+<Index>2</Index>
+<IPAddress>192.168.178.21</IPAddress>
+<MACAddress>AA:BB:CC:00:00:02</MACAddress>
+<Active>0</Active>
+<HostName>nas</HostName>
+<InterfaceType>Ethernet</InterfaceType>
+<X_AVM-DE_Port>1</X_AVM-DE_Port>
+<X_AVM-DE_Speed>1000</X_AVM-DE_Speed>
+<X_AVM-DE_Guest>0</X_AVM-DE_Guest>
+</Item>
+<ItemCount>2</ItemCount>
+</List>
+"""
+
+
+def snapshot():
+    return {h["mac"]: h for h in fritz_hosts.iter_hosts(io.BytesIO(HOST_LIST))}
+
+
+class TestIterHosts:
+    """Test the streaming host list parser"""
+
+    def test_parses_items(self):
+        """Verify every <Item> becomes one host dict with the logged columns"""
+        hosts = list(fritz_hosts.iter_hosts(io.BytesIO(HOST_LIST)))
+
+        assert len(hosts) == 2
+        assert hosts[0] == {"ip": "192.168.178.20", "mac": "AA:BB:CC:00:00:01", "active": "1",
+                            "hostname": "laptop", "interface": "802.11", "port": "0",
+                            "speed_mbps": "0", "guest": "0"}
+        assert hosts[1]["interface"] == "Ethernet"
+
+
+class TestDiffHosts:
+    """Test the diff_hosts() function"""
+
+    def test_first_snapshot_is_present(self):
+        """Verify the first snapshot logs every host as PRESENT"""
+        events = fritz_hosts.diff_hosts(None, snapshot())
+        assert [e for e, _, _ in events] == ["PRESENT", "PRESENT"]
+
+    def test_unchanged_snapshot_logs_nothing(self):
+        """Verify identical snapshots produce no rows"""
+        assert fritz_hosts.diff_hosts(snapshot(), snapshot()) == []
+
+    def test_detects_changes(self):
+        """Verify NEW, GONE, ONLINE/OFFLINE and CHANGED events"""
+        prev = snapshot()
+        cur = snapshot()
+        cur["AA:BB:CC:00:00:01"].update(active="0", interface="Ethernet")
+        cur["AA:BB:CC:00:00:03"] = {"mac": "AA:BB:CC:00:00:03", "ip": "192.168.178.22", "active": "1"}
+        del cur["AA:BB:CC:00:00:02"]
+
+        events = {(e, h["mac"]): d for e, h, d in fritz_hosts.diff_hosts(prev, cur)}
+
+        assert ("OFFLINE", "AA:BB:CC:00:00:01") in events
+        assert events[("CHANGED", "AA:BB:CC:00:00:01")] == "interface: 802.11 -> Ethernet"
+        assert ("NEW", "AA:BB:CC:00:00:03") in events
+        assert ("GONE", "AA:BB:CC:00:00:02") in events
+
+
+class TestHostTracker:
+    """Test HostTracker against the local mock box"""
+
+    def test_poll_logs_only_changes(self):
+        """Verify one bulk download per poll and rows only for changed hosts"""
+        clock = Mock(return_value=1000.0)
+        state = fritz_mock_server.BoxState(script=[{"at": 10, "event": "host_offline", "index": 1},
+                                                   {"at": 10, "event": "host_move", "index": 2,
+                                                    "interface": "Ethernet"}],
+                                           clock=clock, seed=1, hosts=50)
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, state=state, seed=1).start()
+        try:
+            fc = FritzConnection(address="127.0.0.1", port=box.port, password="x", timeout=5, use_cache=False)
+            tracker = fritz_hosts.HostTracker()
+
+            first = tracker.poll(fc, "2025-10-21 12:00:00")
+            before = box.requests
+            unchanged = tracker.poll(fc, "2025-10-21 12:00:30")
+            requests_per_poll = box.requests - before
+            clock.return_value = 1011.0
+            changed = tracker.poll(fc, "2025-10-21 12:01:00")
+        finally:
+            box.stop()
+
+        assert len(first) == 50 and first[0]["event"] == "PRESENT"
+        assert unchanged == []
+        assert requests_per_poll == 2  # SOAP-Aufruf + Download der Liste
+        assert [(r["event"], r["hostname"]) for r in changed] == [("OFFLINE", "host-001"), ("CHANGED", "host-002")]
+        assert changed[1]["details"] == "interface: 802.11 -> Ethernet; port: 0 -> 4; speed_mbps: 0 -> 1000"
+        assert changed[0]["timestamp"] == "2025-10-21 12:01:00"
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_fritz_hosts.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fritz_mock_server.py
+
+Run with: pytest test_fritz_mock_server.py -v
+or: python3 -m pytest test_fritz_mock_server.py -v
+"""
+
+import pytest
+
+from fritzconnection import FritzConnection
+from fritzconnection.core.exceptions import FritzConnectionException
+
+import fritz_mock_server
+import fritzlog_pull
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def box():
+    box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, seed=1).start()
+    yield box
+    box.stop()
+
+
+def connect(box, password="secret", user=None):
+    return FritzConnection(address="127.0.0.1", port=box.port, user=user, password=password,
+                           timeout=5, use_cache=False)
+
+
+class TestBoxState:
+    """Test the scripted BoxState simulation"""
+
+    def test_counters_evolve_with_time(self):
+        """Verify uptime and byte counters grow with the clock"""
+        clock = FakeClock()
+        state = fritz_mock_server.BoxState(clock=clock, seed=1)
+        clock.t += 100
+
+        status = state.values("GetStatusInfo")
+        addon = state.values("GetAddonInfos")
+
+        assert status["NewConnectionStatus"] == "Connected"
+        assert status["NewUptime"] == 100
+        assert addon["NewTotalBytesSent"] == 100 * state.send_rate
+
+    def test_scripted_reconnect_resets_uptime_and_ip(self):
+        """Verify a scripted reconnect shows Connecting, then a new uptime and IP"""
+        clock = FakeClock()
+        state = fritz_mock_server.BoxState(script=[{"at": 50, "event": "reconnect", "duration": 5}],
+                                           clock=clock, seed=1)
+        ip_before = state.values("GetExternalIPAddress")["NewExternalIPAddress"]
+
+        clock.t += 52
+        assert state.values("GetStatusInfo")["NewConnectionStatus"] == "Connecting"
+
+        clock.t += 10
+        status = state.values("GetStatusInfo")
+        assert status["NewConnectionStatus"] == "Connected"
+        assert status["NewUptime"] == 7
+        assert state.values("GetExternalIPAddress")["NewExternalIPAddress"] != ip_before
+
+    def test_scripted_link_down_and_dsl_errors(self):
+        """Verify link_down and dsl_errors events change link status and counters"""
+        clock = FakeClock()
+        state = fritz_mock_server.BoxState(script=[
+            {"at": 10, "event": "dsl_errors", "crc": 40, "errored_secs": 3},
+            {"at": 20, "event": "link_down", "duration": 30},
+        ], clock=clock, seed=1)
+
+        clock.t += 25
+        assert state.values("GetDSLLinkInfo")["NewLinkStatus"] == "Down"
+        stats = state.values("GetStatisticsTotal")
+        assert stats["NewCRCErrors"] == 40
+        assert stats["NewErroredSecs"] == 3
+        assert stats["NewLinkRetrain"] == 1
+
+        clock.t += 30
+        assert state.values("GetDSLLinkInfo")["NewLinkStatus"] == "Up"
+
+    def test_reboot_makes_box_unreachable_then_resets(self):
+        """Verify a reboot takes the box down for reboot_seconds and resets counters"""
+        clock = FakeClock()
+        state = fritz_mock_server.BoxState(reboot_seconds=60, clock=clock, seed=1)
+        state.apply({"event": "dsl_errors", "crc": 5}, clock.t)
+        state.reboot()
+
+        clock.t += 30
+        assert state.is_down()
+        clock.t += 31
+        assert not state.is_down()
+        assert state.values("GetStatisticsTotal")["NewCRCErrors"] == 0
+
+
+class TestMockFritzBox:
+    """Test the HTTP/SOAP side against the real fritzconnection client"""
+
+    def test_collect_once_against_mock(self, box):
+        """Verify fritzconnection loads the descriptions and collect_once gets every group"""
+        fc = connect(box)
+        assert fc.modelname == fritz_mock_server.DEFAULT_MODEL
+
+        row = fritzlog_pull.collect_once(fc)
+
+        assert row["__failed__"] == []
+        assert row["wan_connection_status"] == "Connected"
+        assert row["dsl_link_status"] == "Up"
+        assert row["access_type"] == "DSL"
+
+    def test_reboot_action(self, box):
+        """Verify DeviceConfig:1 Reboot is accepted and the box then stops answering"""
+        fc = connect(box)
+        fc.call_action("DeviceConfig:1", "Reboot")
+
+        result = fritzlog_pull.get_safe(fc, "WANIPConnection1", "GetStatusInfo")
+
+        assert "__error__" in result
+
+    @pytest.mark.parametrize("code,text", [(606, "606"), (500, "501"), (401, "401")])
+    def test_error_injection(self, code, text):
+        """Verify injected 401/500/606 errors reach the client as fritzconnection errors"""
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, error_rate=1.0, error_codes=[code], seed=1).start()
+        try:
+            fc = connect(box, user="admin")
+            result = fritzlog_pull.get_safe(fc, "WANIPConnection1", "GetStatusInfo")
+        finally:
+            box.stop()
+
+        assert text in result["__error__"]
+
+    def test_digest_auth(self):
+        """Verify digest auth accepts the right password and rejects a wrong one"""
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, password="secret", seed=1).start()
+        try:
+            good = connect(box, password="secret")
+            assert good.call_action("WANIPConnection1", "GetStatusInfo")["NewConnectionStatus"] == "Connected"
+
+            bad = connect(box, password="wrong", user="admin")
+            with pytest.raises(FritzConnectionException):
+                bad.call_action("WANIPConnection1", "GetStatusInfo")
+        finally:
+            box.stop()
+
+
+class TestMockFleet:
+    """Test running many simulated boxes"""
+
+    def test_fleet_on_ports(self):
+        """Verify a fleet starts independent boxes that all answer"""
+        fleet = fritz_mock_server.MockFleet(5, "127.0.0.1", 0, spread="port").start()
+        try:
+            ports = {port for _, port in fleet.endpoints}
+            assert len(ports) == 5
+            for box in fleet.boxes[:2]:
+                fc = connect(box)
+                assert fc.call_action("WANIPConn1", "GetStatusInfo")["NewConnectionStatus"] == "Connected"
+        finally:
+            fleet.stop()
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_fritz_mock_server.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fritz_watchdog.py
+
+Run with: pytest test_fritz_watchdog.py -v
+or: python3 -m pytest test_fritz_watchdog.py -v
+"""
+
+import pytest
+import csv
+import os
+import tempfile
+from datetime import datetime, timedelta
+from functools import partial
+from unittest.mock import Mock, patch
+
+import binary_log
+import compact_log
+import fritz_mock_server
+import fritz_watchdog
+import fritzbox_restart
+
+T0 = datetime(2025, 10, 21, 12, 0, 0)
+NETWATCH_HEADER = ["timestamp", "adapter", "media_status", "dns_ok", "dns_ms",
+                   "ping_8.8.8.8_avg_ms", "ping_8.8.8.8_loss_pct", "ping_1.1.1.1_avg_ms", "ping_1.1.1.1_loss_pct"]
+
+
+def netwatch_row(minute, loss=0.0, other_loss=0.0, dns_ok="1"):
+    return {"timestamp": T0 + timedelta(minutes=minute), "adapter": "Ethernet", "media_status": "Up",
+            "dns_ok": dns_ok, "dns_ms": "12", "ping_8.8.8.8_avg_ms": "10", "ping_8.8.8.8_loss_pct": str(loss),
+            "ping_1.1.1.1_avg_ms": "10", "ping_1.1.1.1_loss_pct": str(other_loss)}
+
+
+def fritz_row(minute, uptime):
+    return {"timestamp": T0 + timedelta(minutes=minute), "wan_connection_status": "Connected",
+            "wan_uptime_s": str(uptime), "wan_external_ip": "1.2.3.4", "dsl_link_status": "Up"}
+
+
+def watchdog(restart=None, **kwargs):
+    kwargs.setdefault("netwatch", fritz_watchdog.NetwatchIncidentDetector(loss_thresh=10.0))
+    return fritz_watchdog.Watchdog(fritz_watchdog.default_policies(), restart or Mock(return_value=(True, "ok")),
+                                   log=lambda *a: None, **kwargs)
+
+
+def write_csv(path, header, rows, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if header:
+            w.writerow(header)
+        w.writerows(rows)
+
+
+class TestRatePolicy:
+    """Test the sliding-window policies"""
+
+    def test_share_needs_a_fully_observed_window(self):
+        """Verify a sustained problem only triggers once the whole window has been seen"""
+        policy = fritz_watchdog.RatePolicy("p", "netwatch", ["LOSS_SPIKE"], window_s=300, min_share=0.8)
+        bad = [{"type": "LOSS_SPIKE"}]
+
+        fired = [policy.observe(t, bad) for t in range(0, 301, 60)]
+
+        assert fired == [False] * 5 + [True]
+
+    def test_share_below_threshold(self):
+        """Verify intermittent loss does not trigger"""
+        policy = fritz_watchdog.RatePolicy("p", "netwatch", ["LOSS_SPIKE"], window_s=300, min_share=0.8)
+
+        fired = [policy.observe(t, [{"type": "LOSS_SPIKE"}] if t % 120 else []) for t in range(0, 1201, 60)]
+
+        assert not any(fired)
+
+    def test_count_within_window(self):
+        """Verify the count policy only counts episodes inside the window"""
+        policy = fritz_watchdog.RatePolicy("p", "fritz", ["WAN_RECONNECT"], window_s=600, min_count=3)
+        ev = [{"type": "WAN_RECONNECT"}]
+
+        assert not policy.observe(0, ev)
+        assert not policy.observe(150, [])
+        assert not policy.observe(300, ev + [{"type": "EXTERNAL_IP_CHANGE"}])
+        assert not policy.observe(500, [])
+        assert not policy.observe(700, ev)  # erstes Ereignis ist aus dem Fenster gefallen
+        assert not policy.observe(750, [])
+        assert policy.observe(800, ev)
+
+    def test_consecutive_abnormal_rows_are_one_episode(self):
+        """Verify one long outage counts once, however often it is sampled"""
+        policy = fritz_watchdog.RatePolicy("p", "fritz", ["DSL_LINK_ABNORMAL"], window_s=1800, min_count=4)
+        abnormal = [{"type": "DSL_LINK_ABNORMAL"}]
+
+        fired = [policy.observe(t, abnormal) for t in range(0, 120, 4)]
+
+        assert not any(fired)
+        assert policy.episodes == 1
+
+    def test_gap_restarts_window(self):
+        """Verify a measurement gap longer than the window does not count as sustained"""
+        policy = fritz_watchdog.RatePolicy("p", "netwatch", ["DNS_FAIL"], window_s=300, min_share=0.5)
+        bad = [{"type": "DNS_FAIL"}]
+        for t in (0, 60, 120):
+            policy.observe(t, bad)
+
+        assert not policy.observe(5000, bad)
+        assert policy.since == 5000
+
+
+class TestWatchdog:
+    """Test cooldown, rate limit and dry-run around the restart call"""
+
+    def test_sustained_loss_restarts_once(self):
+        """Verify sustained loss calls restart once and the cooldown suppresses the next trigger"""
+        restart = Mock(return_value=(True, "ok"))
+        wd = watchdog(restart, cooldown_s=1800)
+
+        actions = [a for m in range(0, 16) for a in wd.feed("netwatch", netwatch_row(m, loss=50))]
+
+        assert [a["action"] for a in actions] == ["restart", "suppressed_cooldown"]
+        assert restart.call_count == 1
+        assert actions[0]["timestamp"] == "2025-10-21 12:05:00"
+        assert actions[0]["result"] == "ok: ok"
+
+    def test_loss_below_threshold_is_ignored(self):
+        """Verify loss under --loss-pct never triggers"""
+        wd = watchdog()
+
+        actions = [a for m in range(0, 30) for a in wd.feed("netwatch", netwatch_row(m, loss=5))]
+
+        assert actions == []
+
+    def test_rate_limit(self):
+        """Verify no more than max_restarts restarts happen in the rate window"""
+        restart = Mock(return_value=(True, "ok"))
+        wd = watchdog(restart, cooldown_s=0, max_restarts=2)
+
+        actions = [a["action"] for m in range(0, 40) for a in wd.feed("netwatch", netwatch_row(m, dns_ok="0"))]
+
+        assert actions[:2] == ["restart", "restart"]
+        assert set(actions[2:]) == {"suppressed_rate_limit"}
+        assert restart.call_count == 2
+
+    def test_dry_run_counts_towards_limits(self):
+        """Verify dry-run never restarts but behaves like the real watchdog"""
+        restart = Mock()
+        wd = watchdog(restart, dry_run=True)
+
+        actions = [a["action"] for m in range(0, 16) for a in wd.feed("netwatch", netwatch_row(m, loss=50))]
+
+        assert actions == ["dry_run", "suppressed_cooldown"]
+        assert not restart.called
+
+    def test_fritz_flapping(self):
+        """Verify repeated WAN reconnects from the FRITZ log trigger the flapping policy"""
+        wd = watchdog(dry_run=True)
+        rows = [fritz_row(m, uptime=100 if m % 2 else 5000) for m in range(0, 9)]
+
+        actions = [a for row in rows for a in wd.feed("fritz", row)]
+
+        assert [(a["policy"], a["action"]) for a in actions] == [("flapping", "dry_run")]
+        assert actions[0]["details"] == "4 Episoden in 30 min"
+
+    def test_dsl_outage_in_burst_mode_is_not_flapping(self):
+        """Verify a 2 minute DSL outage sampled every 4 seconds does not restart a retraining box"""
+        wd = watchdog(dry_run=True)
+        rows = [fritz_row(0, uptime=5000)]
+        for i in range(30):
+            row = fritz_row(0, uptime=5000 + 4 * (i + 1))
+            row["timestamp"] += timedelta(seconds=4 * (i + 1))
+            row["dsl_link_status"] = "Training"
+            rows.append(row)
+
+        actions = [a for row in rows for a in wd.feed("fritz", row)]
+
+        assert actions == []
+
+    def test_targets_filter(self):
+        """Verify --targets ignores loss on other ping targets"""
+        wd = watchdog(dry_run=True, netwatch=fritz_watchdog.NetwatchIncidentDetector(
+            loss_thresh=10.0, targets=["8.8.8.8"]))
+
+        actions = [a for m in range(0, 16) for a in wd.feed("netwatch", netwatch_row(m, other_loss=80))]
+
+        assert actions == []
+
+    def test_actions_csv(self):
+        """Verify actions are appended to the actions CSV with a header"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "sub", "actions.csv")
+            wd = watchdog(dry_run=True, actions_out=path)
+            for m in range(0, 6):
+                wd.feed("netwatch", netwatch_row(m, loss=50))
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+
+        assert [r["action"] for r in rows] == ["dry_run"]
+        assert rows[0]["policy"] == "degraded"
+
+
+class TestCsvFollower:
+    """Test incremental reading of growing logs"""
+
+    def test_only_new_complete_lines(self):
+        """Verify rows written after start are returned once and partial lines wait"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            write_csv(path, ["timestamp", "dns_ok"], [["2025-10-21 11:00:00", "1"]])
+            follower = fritz_watchdog.CsvFollower(path)
+
+            assert follower.poll() == []
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                f.write("2025-10-21 12:00:00,0\n2025-10-21 12:01:")
+            first = follower.poll()
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                f.write("00,1\n")
+            second = follower.poll()
+
+        assert first == [{"timestamp": datetime(2025, 10, 21, 12, 0), "dns_ok": "0"}]
+        assert second == [{"timestamp": datetime(2025, 10, 21, 12, 1), "dns_ok": "1"}]
+
+    def test_truncated_file_is_read_from_start(self):
+        """Verify a rotated log is followed from its first row"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.csv")
+            write_csv(path, ["timestamp", "x"], [["2025-10-21 11:00:00", str(i)] for i in range(50)])
+            follower = fritz_watchdog.CsvFollower(path)
+            follower.poll()
+            write_csv(path, ["timestamp", "x"], [["2025-10-21 12:00:00", "new"]])
+
+            rows = follower.poll()
+
+        assert [r["x"] for r in rows] == ["new"]
+
+    def test_compact_log_and_ts_ms(self):
+        """Verify compact fritzlog_pull logs are expanded and ts_ms is preferred for the time"""
+        header = ["timestamp", "ts_ms", "wan_uptime_s"]
+        ms = int(datetime(2025, 10, 21, 12, 0).timestamp() * 1000)
+        encoder = compact_log.CompactEncoder(header)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "fritz.csv")
+            write_csv(path, encoder.file_header(), [encoder.encode({"timestamp": "2025-10-21 12:00:00",
+                                                                    "ts_ms": str(ms), "wan_uptime_s": "10"})])
+            follower = fritz_watchdog.CsvFollower(path, from_start=True)
+            follower.poll()
+            write_csv(path, None, [encoder.encode({"timestamp": "2025-10-21 12:00:30",
+                                                   "ts_ms": str(ms + 30500), "wan_uptime_s": "40"})], mode="a")
+
+            rows = follower.poll()
+
+        assert rows[0]["wan_uptime_s"] == "40"
+        assert rows[0]["timestamp"] == datetime(2025, 10, 21, 12, 0, 30, 500000)
+
+    @pytest.mark.parametrize("rows_before", [10, 12000])
+    def test_compact_log_from_end_uses_last_keyframe(self, rows_before):
+        """Verify delta rows after the start offset are decoded from the last keyframe before it"""
+        header = ["timestamp", "wan_connection_status", "wan_uptime_s", "wan_last_error"]
+        encoder = compact_log.CompactEncoder(header, keyframe_every=20000)
+
+        def row(i, status="Connected"):
+            t = T0 + timedelta(seconds=30 * i)
+            return encoder.encode({"timestamp": t.strftime("%Y-%m-%d %H:%M:%S"), "wan_connection_status": status,
+                                   "wan_uptime_s": str(i), "wan_last_error": f"ERROR_{i}"})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "fritz.csv")
+            write_csv(path, encoder.file_header(), [row(i) for i in range(rows_before)])
+            if rows_before > 100:
+                assert os.path.getsize(path) > 2 * fritz_watchdog.TAIL_BYTES
+            follower = fritz_watchdog.CsvFollower(path)
+
+            assert follower.poll() == []
+            write_csv(path, None, [row(rows_before), row(rows_before + 1, "Disconnected")], mode="a")
+            rows = follower.poll()
+
+        assert [(r["wan_connection_status"], r["wan_uptime_s"]) for r in rows] == [
+            ("Connected", str(rows_before)), ("Disconnected", str(rows_before + 1))]
+        assert rows[1]["timestamp"] == T0 + timedelta(seconds=30 * (rows_before + 1))
+
+    def test_binary_log(self):
+        """Verify binary logs are followed record by record with the texts stored in the log itself"""
+        columns = [("timestamp", "time"), ("wan_connection_status", "str"), ("wan_uptime_s", "int")]
+        long_status = "Disconnected " * 5  # needs more than one entry
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "fritz.bin")
+            writer = binary_log.BinaryLogWriter(path, columns, "fritz")
+            writer.write({"timestamp": "2025-10-21 11:59:30", "wan_connection_status": "Connected",
+                          "wan_uptime_s": "10"})
+            writer.flush()
+            follower = fritz_watchdog.CsvFollower(path)
+
+            assert follower.poll() == []
+            writer.write({"timestamp": "2025-10-21 12:00:00", "wan_connection_status": long_status,
+                          "wan_uptime_s": ""})
+            writer.write({"timestamp": "2025-10-21 12:00:30", "wan_connection_status": "Connected",
+                          "wan_uptime_s": "1"})
+            writer.close()
+            with open(path, "ab") as f:
+                f.write(b"\0" * 5)  # record not completely written yet
+            rows = follower.poll()
+            replayed = fritz_watchdog.CsvFollower(path, from_start=True).poll()
+
+        assert rows == [{"timestamp": datetime(2025, 10, 21, 12, 0), "wan_connection_status": long_status,
+                         "wan_uptime_s": ""},
+                        {"timestamp": datetime(2025, 10, 21, 12, 0, 30), "wan_connection_status": "Connected",
+                         "wan_uptime_s": "1"}]
+        assert [r["wan_uptime_s"] for r in replayed] == ["10", "", "1"]
+
+
+class TestMain:
+    """Test the CLI"""
+
+    def test_replay_is_always_dry_run(self, capsys):
+        """Verify --replay evaluates existing logs from the start without restarting"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            netwatch = os.path.join(tmpdir, "netwatch.csv")
+            fritz = os.path.join(tmpdir, "fritz.csv")
+            actions = os.path.join(tmpdir, "actions.csv")
+            rows = [netwatch_row(m, loss=50) for m in range(0, 10)]
+            write_csv(netwatch, NETWATCH_HEADER,
+                      [[r["timestamp"].strftime("%Y-%m-%d %H:%M:%S")] + [r[c] for c in NETWATCH_HEADER[1:]]
+                       for r in rows])
+            write_csv(fritz, ["timestamp", "wan_connection_status", "wan_uptime_s"],
+                      [["2025-10-21 12:00:00", "Connected", "100"]])
+            with patch('sys.argv', ['fritz_watchdog.py', '--netwatch', netwatch, '--fritz', fritz, '--replay',
+                                    '--actions-out', actions]), \
+                    patch('fritzbox_restart.reboot_fritzbox') as mock_reboot:
+                with pytest.raises(SystemExit) as exc_info:
+                    fritz_watchdog.main()
+            with open(actions, newline="", encoding="utf-8") as f:
+                logged = list(csv.DictReader(f))
+
+        assert exc_info.value.code == 0
+        assert not mock_reboot.called
+        assert [r["action"] for r in logged] == ["dry_run"]
+        assert "Replay: 1 Aktion(en)" in capsys.readouterr().out
+
+    def test_password_required_for_live_restarts(self):
+        """Verify the watchdog refuses to run live without a password"""
+        with patch('sys.argv', ['fritz_watchdog.py']):
+            with pytest.raises(SystemExit) as exc_info:
+                fritz_watchdog.main()
+
+        assert exc_info.value.code == 2
+
+
+class TestAgainstMockBox:
+    """Test the closed loop against the local mock box"""
+
+    @patch('builtins.print')
+    def test_degraded_service_reboots_box(self, mock_print):
+        """Verify a sustained outage in the NetWatch log reboots the box and journals its recovery"""
+        state = fritz_mock_server.BoxState(seed=1, reboot_seconds=0.3)
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, state=state, password="secret", seed=1).start()
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                journal = os.path.join(tmpdir, "journal.csv")
+                restart = partial(fritzbox_restart.reboot_fritzbox, "127.0.0.1", None, "secret", port=box.port,
+                                  wait=True, journal=journal, probe_interval=0.02, wait_timeout=10,
+                                  http_port=box.port)
+                wd = watchdog(restart)
+                actions = [a for m in range(0, 6) for a in wd.feed("netwatch", netwatch_row(m, loss=100))]
+                with open(journal, newline="", encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f))
+        finally:
+            box.stop()
+
+        assert [a["action"] for a in actions] == ["restart"]
+        assert actions[0]["result"].startswith("ok: ")
+        assert [r["result"] for r in rows] == ["recovered"]
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_fritz_watchdog.py
+    pytest.main([__file__, "-v"])
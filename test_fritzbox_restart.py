@@ -7,10 +7,15 @@ or: python3 -m pytest test_fritzbox_restart.py -v
 """
 
 import pytest
+import csv
+import os
 import sys
+import tempfile
+import threading
 from unittest.mock import Mock, patch, call
 from datetime import datetime
 import fritzbox_restart
+import fritz_mock_server
 
 
 class TestNowFunction:
@@ -38,7 +43,7 @@ class TestNowFunction:
 class TestRebootFritzbox:
     """Test the reboot_fritzbox() function"""
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
     def test_reboot_success(self, mock_print, mock_fc_class):
         """Verify reboot_fritzbox successfully sends reboot command"""
@@ -49,13 +54,12 @@ class TestRebootFritzbox:
             "192.168.178.1", "testuser", "testpass", timeout=10
         )
         
-        # Verify FritzConnection was created with correct params
+        # Verify CachedFritzConnection was created with correct params
         mock_fc_class.assert_called_once_with(
             address="192.168.178.1",
             user="testuser",
             password="testpass",
-            timeout=10,
-            use_cache=False
+            timeout=10
         )
         
         # Verify reboot action was called
@@ -65,7 +69,7 @@ class TestRebootFritzbox:
         assert success is True
         assert "erfolgreich" in message or "OK" in message
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
     def test_reboot_with_none_user(self, mock_print, mock_fc_class):
         """Verify reboot_fritzbox works with None user"""
@@ -81,7 +85,7 @@ class TestRebootFritzbox:
         assert call_kwargs['user'] is None
         assert success is True
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
     def test_reboot_connection_failure(self, mock_print, mock_fc_class):
         """Verify reboot_fritzbox handles connection failures"""
@@ -95,7 +99,7 @@ class TestRebootFritzbox:
         assert "Fehler" in message
         assert "Connection refused" in message
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
     def test_reboot_action_failure(self, mock_print, mock_fc_class):
         """Verify reboot_fritzbox handles reboot action failures"""
@@ -111,7 +115,7 @@ class TestRebootFritzbox:
         assert "Fehler" in message
         assert "Action not supported" in message
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
     def test_reboot_custom_timeout(self, mock_print, mock_fc_class):
         """Verify reboot_fritzbox uses custom timeout"""
@@ -125,10 +129,10 @@ class TestRebootFritzbox:
         call_kwargs = mock_fc_class.call_args[1]
         assert call_kwargs['timeout'] == 30
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     @patch('builtins.print')
-    def test_reboot_uses_no_cache(self, mock_print, mock_fc_class):
-        """Verify reboot_fritzbox disables caching for admin operations"""
+    def test_reboot_uses_description_cache(self, mock_print, mock_fc_class):
+        """Verify reboot_fritzbox uses the shared description cache instead of fritzconnection's"""
         mock_fc = Mock()
         mock_fc_class.return_value = mock_fc
         
@@ -137,7 +141,7 @@ class TestRebootFritzbox:
         )
         
         call_kwargs = mock_fc_class.call_args[1]
-        assert call_kwargs['use_cache'] is False
+        assert 'use_cache' not in call_kwargs
 
 
 class TestMain:
@@ -283,10 +287,182 @@ class TestMain:
             assert exc_info.value.code == 0
 
 
+class ThreadClock:
+    """
+    Virtual time for RecoveryMonitor: every probe thread has its own clock that only sleep()
+    advances, so each phase sees the same probe times however the threads are scheduled.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self):
+        return getattr(self.local, "now", 0.0)
+
+    def sleep(self, seconds):
+        self.local.now = self() + seconds
+
+
+class TestRecoveryMeasurement:
+    """Test --wait: recovery probing, breakdown and journal against the local mock box"""
+
+    @staticmethod
+    def start_box(**boot):
+        state = fritz_mock_server.BoxState(seed=1, reboot_seconds=0.6, **boot)
+        return fritz_mock_server.MockFritzBox("127.0.0.1", 0, state=state, password="secret", seed=1).start()
+
+    @patch('builtins.print')
+    def test_wait_measures_each_phase_in_order(self, mock_print):
+        """Verify every recovery phase is measured after the outage and written to the journal"""
+        box = self.start_box(tr064_delay=0.4, dsl_train=0.4, ppp_delay=0.3)
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                journal = os.path.join(tmpdir, "logs", "journal.csv")
+                success, message = fritzbox_restart.reboot_fritzbox(
+                    "127.0.0.1", None, "secret", port=box.port, wait=True, journal=journal,
+                    probe_interval=0.02, wait_timeout=20, http_port=box.port)
+                with open(journal, newline="", encoding="utf-8") as f:
+                    rows = list(csv.DictReader(f))
+        finally:
+            box.stop()
+
+        assert success is True
+        assert len(rows) == 1
+        row = rows[0]
+        assert row["result"] == "recovered"
+        assert (row["model"], row["firmware"]) == (fritz_mock_server.DEFAULT_MODEL, "7.57")
+        # the mock boots its layers one after the other; exact timings: test_phase_timings_follow_the_boot
+        t = {key: float(row[f"{key}_s"]) for key in ("went_down", "reachable", "tr064", "dsl_sync",
+                                                       "wan_connected", "external_ip")}
+        assert t["went_down"] < t["reachable"] < t["tr064"] < t["dsl_sync"] < t["wan_connected"]
+        assert t["external_ip"] > t["dsl_sync"]
+
+    def test_phase_timings_follow_the_boot(self):
+        """Verify each phase is timed at its first successful probe after its own outage"""
+        clock = ThreadClock()
+        down, back = 0.2, {"reachable": 0.5, "tr064": 1.0, "dsl_sync": 1.5, "wan_connected": 2.0,
+                           "external_ip": 2.0}
+
+        def http(*args):
+            return not down <= clock() < back["reachable"]
+
+        def tr064(self, client, phase):
+            return not down <= clock() < back[phase]
+
+        monitor = fritzbox_restart.RecoveryMonitor(Mock(), "127.0.0.1", interval=0.125, clock=clock,
+                                                   sleep=clock.sleep)
+        monitor.candidates = {phase: [("Service1", "Get")] for phase in back}
+        with patch('fritzbox_restart.probe_http', http), \
+                patch.object(fritzbox_restart.RecoveryMonitor, '_check_tr064', tr064), \
+                patch('fritzbox_restart.FastTR064Client'):
+            results = monitor.run(0.0, wait_timeout=10, down_timeout=5)
+
+        # probes at 0, 0.125, 0.25, ...: the first one in the outage is at 0.25
+        assert results == {"went_down": 0.25, "reachable": 0.5, "tr064": 1.0, "dsl_sync": 1.5,
+                           "wan_connected": 2.0, "external_ip": 2.0}
+
+    def test_box_that_does_not_go_down(self):
+        """Verify a box that keeps answering is reported as no outage"""
+        box = self.start_box()
+        try:
+            fc = fritzbox_restart.CachedFritzConnection(address="127.0.0.1", port=box.port, password="secret",
+                                                        timeout=5, use_cache=False)
+            clock = ThreadClock()
+            monitor = fritzbox_restart.RecoveryMonitor(fc, "127.0.0.1", http_port=box.port, interval=0.1,
+                                                       clock=clock, sleep=clock.sleep)
+            monitor.prepare()
+            results = monitor.run(0.0, wait_timeout=60, down_timeout=0.3)
+        finally:
+            box.stop()
+
+        assert results["went_down"] is None
+        assert not fritzbox_restart.recovered(results)
+        assert fritzbox_restart.format_breakdown(results) == ["Box ist nach dem Reboot-Befehl nicht ausgefallen."]
+        assert fritzbox_restart.journal_row("h", fc, results, "t")["result"] == "no_outage"
+
+    def test_phase_recovers_only_after_its_own_outage(self):
+        """Verify a phase that still answered when another went down is timed from its own failure"""
+        clock = ThreadClock()
+
+        def http(*args):
+            return not 0.25 <= clock() < 0.5
+
+        def tr064(self, client, phase):
+            if clock() < 0.375:
+                raise OSError("TR-064 down")
+            return True
+
+        monitor = fritzbox_restart.RecoveryMonitor(Mock(), "127.0.0.1", interval=0.125, clock=clock,
+                                                   sleep=clock.sleep)
+        monitor.candidates = {"tr064": [("DeviceInfo1", "GetInfo")]}
+        with patch('fritzbox_restart.probe_http', http), \
+                patch.object(fritzbox_restart.RecoveryMonitor, '_check_tr064', tr064), \
+                patch('fritzbox_restart.FastTR064Client'):
+            results = monitor.run(0.0, wait_timeout=5, down_timeout=2)
+
+        # TR-064 fails from the start; HTTP still answers then and is timed from its own outage at 0.25
+        assert results == {"went_down": 0.0, "tr064": 0.375, "reachable": 0.5, "dsl_sync": None,
+                           "wan_connected": None, "external_ip": None}
+
+    def test_breakdown_marks_missing_and_unavailable_phases(self):
+        """Verify phases that timed out or have no service on the box are labelled"""
+        results = {"went_down": 1.0, "reachable": 40.0, "tr064": 45.5, "dsl_sync": None}
+
+        lines = fritzbox_restart.format_breakdown(results)
+
+        assert "(+39.0 s)" in lines[1] and "(+5.5 s)" in lines[2]
+        assert "nicht verfügbar" in lines[3]
+        assert "nicht erreicht" in lines[4] and "nicht erreicht" in lines[5]
+        assert not fritzbox_restart.recovered(results)
+
+    def test_journal_header_written_once(self):
+        """Verify the journal gets one header and one row per restart"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "journal.csv")
+            for _ in range(2):
+                fritzbox_restart.append_journal(path, {"timestamp": "t", "host": "h", "result": "timeout"})
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows[0] == fritzbox_restart.JOURNAL_HEADER
+        assert len(rows) == 3
+
+    def test_journal_header_written_once_from_threads(self):
+        """Verify parallel restarts create a new journal with a single header"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "journal.csv")
+            threads = [threading.Thread(target=fritzbox_restart.append_journal,
+                                        args=(path, {"timestamp": "t", "host": f"h{i}", "result": "recovered"}))
+                       for i in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows.count(fritzbox_restart.JOURNAL_HEADER) == 1
+        assert len(rows) == 17
+
+    @patch('fritzbox_restart.reboot_fritzbox')
+    def test_main_wait_passes_options(self, mock_reboot):
+        """Verify --wait forwards journal and probe settings"""
+        mock_reboot.return_value = (True, "Success")
+
+        with patch('sys.argv', ['fritzbox_restart.py', '--password', 'test', '--yes', '--wait',
+                                '--journal', 'j.csv', '--probe-interval', '0.2', '--http-port', '8080']):
+            with pytest.raises(SystemExit):
+                fritzbox_restart.main()
+
+        kwargs = mock_reboot.call_args[1]
+        assert kwargs["wait"] is True
+        assert (kwargs["journal"], kwargs["probe_interval"], kwargs["http_port"]) == ("j.csv", 0.2, 8080)
+
+
 class TestIntegration:
     """Integration tests for complete workflow"""
     
-    @patch('fritzbox_restart.FritzConnection')
+    @patch('fritzbox_restart.CachedFritzConnection')
     def test_full_workflow_success(self, mock_fc_class):
         """Test the complete successful reboot workflow"""
         mock_fc = Mock()
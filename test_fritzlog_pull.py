@@ -10,9 +10,13 @@ import pytest
 import os
 import tempfile
 import csv
+import subprocess
+import sys
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
+import binary_log
 import fritzlog_pull
+import online_monitor
 
 
 class TestNowFunction:
@@ -240,11 +244,340 @@ class TestCollectOnce:
         # Should have gotten the status from the fallback service
         assert result["wan_connection_status"] == "Connected"
 
+    def test_collect_once_reports_failed_groups(self):
+        """Verify collect_once lists the action groups that failed"""
+        mock_fc = Mock()
+
+        def mock_call_action(service, action):
+            if action == "GetStatusInfo":
+                return {"NewConnectionStatus": "Connected"}
+            raise Exception("Service unavailable")
+
+        mock_fc.call_action.side_effect = mock_call_action
+
+        result = fritzlog_pull.collect_once(mock_fc)
+
+        assert "wan" not in result["__failed__"]
+        assert "dsl_stats" in result["__failed__"]
+        assert len(result["__failed__"]) == len(fritzlog_pull.ACTION_GROUPS) - 1
+
+    @patch('fritzlog_pull.time.perf_counter')
+    def test_collect_once_records_latency_per_group(self, mock_perf):
+        """Verify each action group gets a lat_<group>_ms column with its call time"""
+        mock_fc = Mock()
+        mock_fc.call_action.return_value = {}
+        # Start/Ende je Gruppe; dsl_stats braucht 1,5 s
+        ticks = []
+        for i, group in enumerate(fritzlog_pull.ACTION_GROUPS):
+            ticks += [i * 10.0, i * 10.0 + (1.5 if group == "dsl_stats" else 0.02)]
+        mock_perf.side_effect = ticks
+
+        result = fritzlog_pull.collect_once(mock_fc)
+
+        assert result["lat_wan_ms"] == 20.0
+        assert result["lat_dsl_stats_ms"] == 1500.0
+        assert set(fritzlog_pull.LATENCY_COLS) <= set(result)
+
+    def test_collect_once_adds_epoch_ms_matching_timestamp(self):
+        """Verify ts_ms is integer epoch milliseconds and formats to the timestamp string"""
+        mock_fc = Mock()
+        mock_fc.call_action.return_value = {}
+
+        result = fritzlog_pull.collect_once(mock_fc)
+
+        assert isinstance(result["ts_ms"], int)
+        assert fritzlog_pull.format_ms(result["ts_ms"]) == result["timestamp"]
+        assert abs(result["ts_ms"] / 1000 - datetime.now().timestamp()) < 5
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_keeps_header_of_existing_log(self, mock_sleep, mock_collect, mock_open_fc):
+        """Verify rows appended to an older log follow that file's header"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.return_value = {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected",
+                                     "ts_ms": 1761040800000, "lat_wan_ms": 12.5}
+        mock_sleep.side_effect = KeyboardInterrupt()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "old.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write("timestamp,wan_connection_status\n")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path]):
+                fritzlog_pull.main()
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows == [["timestamp", "wan_connection_status"], ["2025-10-21 12:00:00", "Connected"]]
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_compact_keeps_header_of_existing_compact_log(self, mock_sleep, mock_collect, mock_open_fc):
+        """Verify --compact rows appended to an older compact log follow that file's header"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.return_value = {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected",
+                                     "ts_ms": 1761040800000}
+        mock_sleep.side_effect = KeyboardInterrupt()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "old.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write("rec,timestamp,wan_connection_status\n")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path, '--compact']):
+                fritzlog_pull.main()
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows[1] == ["K", "2025-10-21 12:00:00", "Connected"]
+
+    @pytest.mark.parametrize("existing,option", [("timestamp,wan_connection_status\n", ["--compact"]),
+                                                 ("rec,timestamp,wan_connection_status\n", [])])
+    @patch('fritzlog_pull.open_fc')
+    def test_main_refuses_log_in_other_format(self, mock_open_fc, existing, option):
+        """Verify plain rows are not appended to a compact log and K/D rows not to a plain log"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "fritz.csv")
+            with open(csv_path, "w", encoding="utf-8") as f:
+                f.write(existing)
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path, *option]):
+                with pytest.raises(SystemExit, match="FEHLER"):
+                    fritzlog_pull.main()
+            with open(csv_path, encoding="utf-8") as f:
+                assert f.read() == existing
+
+        mock_open_fc.assert_not_called()
+
+    @pytest.mark.parametrize("option", [[], ["--compact"]])
+    @patch('fritzlog_pull.open_fc')
+    def test_main_refuses_csv_rows_in_binary_log(self, mock_open_fc, option):
+        """Verify CSV text is never appended to a binary log"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_path = os.path.join(tmpdir, "fritz.bin")
+            binary_log.BinaryLogWriter(bin_path, [("timestamp", "time")], "fritz").close()
+            size = os.path.getsize(bin_path)
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', bin_path, *option]):
+                with pytest.raises(SystemExit, match="Binär-Log"):
+                    fritzlog_pull.main()
+
+            assert os.path.getsize(bin_path) == size
+        mock_open_fc.assert_not_called()
+
+
+class TestFritzSession:
+    """Test the FritzSession reconnect manager"""
+
+    @patch('fritzlog_pull.collect_once')
+    def test_poll_returns_row_on_success(self, mock_collect):
+        """Verify a successful poll returns just the measurement row"""
+        mock_collect.return_value = {"timestamp": "t", "wan_connection_status": "Connected", "__failed__": []}
+        session = fritzlog_pull.FritzSession("host", None, "pw", fc=Mock())
+
+        rows = session.poll()
+
+        assert [r["wan_connection_status"] for r in rows] == ["Connected"]
+        assert session.next_delay(30) == 30
+
+    @patch('fritzlog_pull.collect_once')
+    def test_partial_failure_keeps_sampling(self, mock_collect):
+        """Verify failing DSL groups alone do not count as an outage"""
+        mock_collect.return_value = {"timestamp": "t", "wan_connection_status": "Connected",
+                                     "__failed__": ["dsl_link", "dsl_info", "dsl_stats"]}
+        fc = Mock()
+        session = fritzlog_pull.FritzSession("host", None, "pw", fc=fc)
+
+        rows = session.poll()
+
+        assert rows[0]["wan_connection_status"] == "Connected"
+        assert session.fc is fc
+        assert session.failures == 0
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    def test_outage_writes_poll_error_then_reconnected(self, mock_collect, mock_open_fc):
+        """Verify total failure yields POLL_ERROR rows and recovery a RECONNECTED row"""
+        all_failed = {"timestamp": "t", "__failed__": list(fritzlog_pull.ACTION_GROUPS)}
+        ok = {"timestamp": "t", "wan_connection_status": "Connected", "__failed__": []}
+        mock_collect.side_effect = [all_failed, ok]
+        mock_open_fc.side_effect = [Exception("Connection refused"), Mock()]
+        session = fritzlog_pull.FritzSession("host", None, "pw", fc=Mock())
+
+        first = session.poll()    # alle Aktionen fehlgeschlagen
+        second = session.poll()   # Reconnect scheitert
+        third = session.poll()    # Reconnect klappt
+
+        assert first[0]["wan_connection_status"] == fritzlog_pull.POLL_ERROR
+        assert second[0]["wan_connection_status"] == fritzlog_pull.POLL_ERROR
+        assert "Connection refused" in second[0]["wan_last_error"]
+        assert [r["wan_connection_status"] for r in third] == [fritzlog_pull.RECONNECTED, "Connected"]
+        assert "2 Fehlversuchen" in third[0]["wan_last_error"]
+        assert session.failures == 0
+
+    def test_next_delay_backs_off_with_jitter(self):
+        """Verify the delay grows exponentially, stays within jitter bounds and is capped"""
+        session = fritzlog_pull.FritzSession("host", None, "pw", retry_min=2, retry_max=10)
+        for failures, step in [(1, 2), (2, 4), (3, 8), (4, 10), (9, 10)]:
+            session.failures = failures
+            delay = session.next_delay(30)
+            assert step * 0.5 <= delay <= step
+
+
+class TestAdaptiveSampler:
+    """Test the AdaptiveSampler burst/decay logic"""
+
+    def make_sampler(self, clock):
+        return fritzlog_pull.AdaptiveSampler(30, burst_interval=1, burst_duration=10,
+                                             error_jump=10, clock=lambda: clock[0])
+
+    def row(self, status="Connected", uptime="1000", crc="0"):
+        return {"wan_connection_status": status, "wan_uptime_s": uptime, "dsl_crc_errors": crc}
+
+    def test_stays_normal_when_stable(self):
+        """Verify stable samples keep the normal interval"""
+        clock = [0.0]
+        sampler = self.make_sampler(clock)
+        sampler.observe(self.row(uptime="1000"))
+        sampler.observe(self.row(uptime="1030", crc="3"))
+
+        assert sampler.mode == "normal"
+        assert sampler.next_interval() == 30
+
+    @pytest.mark.parametrize("changed", [
+        {"status": "Disconnected"},
+        {"uptime": "5"},
+        {"crc": "25"},
+    ])
+    def test_anomaly_triggers_burst(self, changed):
+        """Verify status change, uptime reset and error jump switch to burst mode"""
+        clock = [0.0]
+        sampler = self.make_sampler(clock)
+        sampler.observe(self.row())
+        sampler.observe(self.row(**changed))
+
+        assert sampler.mode == "burst"
+        assert sampler.reason
+        assert sampler.next_interval() == 1
+
+    def test_burst_decays_back_to_normal(self):
+        """Verify the interval doubles back to normal after the burst period"""
+        clock = [0.0]
+        sampler = self.make_sampler(clock)
+        sampler.observe(self.row())
+        sampler.observe(self.row(status="Disconnected"))
+        clock[0] = 11.0
+
+        intervals = []
+        modes = []
+        for _ in range(6):
+            intervals.append(sampler.next_interval())
+            modes.append(sampler.mode)
+
+        assert intervals == [2, 4, 8, 16, 30, 30]
+        assert modes == ["decay", "decay", "decay", "decay", "normal", "normal"]
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_adaptive_records_sample_mode(self, mock_sleep, mock_collect, mock_open_fc):
+        """Verify --adaptive adds a sample_mode column with the mode each row was taken in"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.side_effect = [
+            {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected", "__failed__": []},
+            {"timestamp": "2025-10-21 12:00:30", "wan_connection_status": "Disconnected", "__failed__": []},
+            {"timestamp": "2025-10-21 12:00:31", "wan_connection_status": "Disconnected", "__failed__": []},
+        ]
+        mock_sleep.side_effect = [None, None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "test.csv")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path, '--adaptive']):
+                fritzlog_pull.main()
+
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+
+        assert [r["sample_mode"] for r in rows] == ["normal", "normal", "burst"]
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [30, 1, 1]
+
+
+class TestSampleRing:
+    """Test the fixed-size SampleRing buffer"""
+
+    def test_ring_keeps_last_items_in_order(self):
+        """Verify the ring overwrites the oldest entries and returns oldest first"""
+        ring = fritzlog_pull.SampleRing(3)
+        for i in range(5):
+            ring.append(i)
+
+        assert len(ring) == 3
+        assert ring.latest() == [2, 3, 4]
+        assert ring.latest(2) == [3, 4]
+        assert ring.latest(10) == [2, 3, 4]
+
+    def test_empty_ring(self):
+        """Verify an empty ring returns no entries"""
+        ring = fritzlog_pull.SampleRing(4)
+        assert ring.latest() == []
+
+
+class TestLiveStats:
+    """Test LiveStats and the OpenMetrics/JSON endpoints"""
+
+    def make_stats(self):
+        stats = fritzlog_pull.LiveStats(capacity=2)
+        for i in range(3):
+            stats.record([{"timestamp": f"2025-10-21 12:00:0{i}", "wan_connection_status": "Connected",
+                           "wan_uptime_s": 100 + i, "common_bytes_sent": 5000, "dsl_crc_errors": 4,
+                           "dsl_fec_errors": "", "lat_wan_ms": 250.0, "__failed__": []}], 0.04)
+        stats.record([fritzlog_pull.marker_row(fritzlog_pull.POLL_ERROR, "timeout")], 3.0)
+        return stats
+
+    def test_openmetrics_output(self):
+        """Verify the OpenMetrics text contains gauges, counters, histogram and EOF"""
+        text = self.make_stats().openmetrics()
+        lines = text.splitlines()
+
+        assert lines[-1] == "# EOF"
+        assert "fritz_wan_uptime_seconds 102" in lines
+        assert "fritz_wan_connected 1" in lines
+        assert "fritz_wan_sent_bytes_total 5000" in lines
+        assert 'fritz_dsl_errors_total{kind="crc"} 4' in lines
+        assert not any('kind="fec"' in line for line in lines)
+        assert 'fritz_poll_duration_seconds_bucket{le="0.05"} 3' in lines
+        assert 'fritz_poll_duration_seconds_bucket{le="+Inf"} 4' in lines
+        assert "fritz_samples_total 3" in lines
+        assert "fritz_poll_errors_total 1" in lines
+        assert 'fritz_action_latency_seconds{group="wan"} 0.25' in lines
+
+    def test_recent_uses_ring_without_internal_keys(self):
+        """Verify recent() returns the ring contents without __failed__"""
+        recent = self.make_stats().recent()
+
+        assert [r["wan_connection_status"] for r in recent] == ["Connected", "POLL_ERROR"]
+        assert "__failed__" not in recent[0]
+
+    def test_metrics_server_endpoints(self):
+        """Verify /metrics and /recent are served over HTTP"""
+        import json
+        import urllib.request
+        stats = self.make_stats()
+        server = fritzlog_pull.start_metrics_server(stats, "127.0.0.1", 0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/metrics") as resp:
+                assert resp.headers["Content-Type"].startswith("application/openmetrics-text")
+                assert resp.read().decode().endswith("# EOF\n")
+            with urllib.request.urlopen(base + "/recent?n=1") as resp:
+                assert json.loads(resp.read())[0]["wan_connection_status"] == "POLL_ERROR"
+        finally:
+            server.shutdown()
+            server.server_close()
+
 
 class TestOpenFc:
     """Test the open_fc() FritzConnection wrapper"""
     
-    @patch('fritzlog_pull.FritzConnection')
+    @patch('fritzlog_pull.CachedFritzConnection')
     def test_open_fc_creates_connection_with_params(self, mock_fc_class):
         """Verify open_fc creates FritzConnection with correct parameters"""
         mock_instance = Mock()
@@ -256,12 +589,11 @@ class TestOpenFc:
             address="192.168.178.1",
             user="testuser",
             password="testpass",
-            timeout=10,
-            use_cache=True
+            timeout=10
         )
         assert result == mock_instance
     
-    @patch('fritzlog_pull.FritzConnection')
+    @patch('fritzlog_pull.CachedFritzConnection')
     def test_open_fc_with_none_user(self, mock_fc_class):
         """Verify open_fc works with None user (common for older setups)"""
         mock_instance = Mock()
@@ -273,14 +605,23 @@ class TestOpenFc:
             address="192.168.178.1",
             user=None,
             password="testpass",
-            timeout=5,
-            use_cache=True
+            timeout=5
         )
 
 
 class TestMain:
     """Test the main() function and CLI argument parsing"""
     
+    def test_optional_output_modules_are_not_imported(self):
+        """Verify the modules of --incidents-out, --hosts-out, --monitor-out and --fast-soap load on demand"""
+        probe = ("import sys, fritzlog_pull\n"
+                 "print(','.join(m for m in ('analyze_netlogs', 'fritz_hosts', 'online_monitor', 'tr064_fast') "
+                 "if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == ""
+    
     @patch('fritzlog_pull.open_fc')
     @patch('fritzlog_pull.collect_once')
     @patch('builtins.open', create=True)
@@ -314,27 +655,178 @@ class TestMain:
         call_args = mock_ensure.call_args[0]
         header = call_args[1]
         
-        # Verify header has all 27 expected columns
-        assert len(header) == 27
+        # Verify header has the 27 status columns plus ts_ms and one latency column per action group
+        assert len(header) == 27 + 1 + 7
         assert header[0] == "timestamp"
         assert "wan_connection_status" in header
         assert "dsl_fec_errors" in header
         assert "dsl_atuc_hec_errors" in header
+        assert header[27:] == ["ts_ms", "lat_wan_ms", "lat_ext_ip_ms", "lat_common_ms", "lat_link_props_ms",
+                               "lat_dsl_link_ms", "lat_dsl_info_ms", "lat_dsl_stats_ms"]
     
     @patch('fritzlog_pull.open_fc')
-    def test_main_exits_on_connection_failure(self, mock_open_fc):
-        """Verify main() exits with error message on connection failure"""
-        mock_open_fc.side_effect = Exception("Connection refused")
-        
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_compact_mode_writes_keyframes_and_deltas(self, mock_sleep, mock_collect, mock_open_fc):
+        """Verify --compact writes a rec column with K/D rows"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.side_effect = [
+            {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected", "wan_uptime_s": "10"},
+            {"timestamp": "2025-10-21 12:00:01", "wan_connection_status": "Connected", "wan_uptime_s": "11"},
+        ]
+        mock_sleep.side_effect = [None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "test.csv")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path, '--compact']):
+                fritzlog_pull.main()
+
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows[0][:2] == ["rec", "timestamp"]
+        assert rows[1][0] == "K"
+        assert rows[2][:4] == ["D", "+1", "", "+1"]
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_binary_mode_writes_typed_records(self, mock_sleep, mock_collect, mock_open_fc, capsys):
+        """Verify --binary appends typed records and skips a row whose value does not fit its column"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.side_effect = [
+            {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected", "wan_uptime_s": 10,
+             "ts_ms": 1761048000000, "lat_wan_ms": 12.5},
+            {"timestamp": "2025-10-21 12:00:30", "wan_connection_status": "Connected", "wan_uptime_s": "kaputt"},
+            {"timestamp": "2025-10-21 12:01:00", "wan_connection_status": "Connecting", "wan_uptime_s": ""},
+        ]
+        mock_sleep.side_effect = [None, None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_path = os.path.join(tmpdir, "fritz.bin")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', bin_path, '--binary']):
+                fritzlog_pull.main()
+
+            header, _ = binary_log.read_header(bin_path)
+            _, rows = binary_log.iter_rows(bin_path)
+            rows = list(rows)
+
+        assert header["kind"] == "fritz"
+        assert dict(header["columns"])["wan_uptime_s"] == "int"
+        assert dict(header["columns"])["lat_wan_ms"] == "float"
+        assert [(r["timestamp"], r["wan_connection_status"], r["wan_uptime_s"]) for r in rows] == [
+            ("2025-10-21 12:00:00", "Connected", "10"), ("2025-10-21 12:01:00", "Connecting", "")]
+        assert rows[0]["lat_wan_ms"] == "12.5"
+        assert "wan_uptime_s" in capsys.readouterr().out
+
+    def test_main_binary_and_compact_are_exclusive(self):
+        """Verify --binary cannot be combined with --compact"""
+        with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--binary', '--compact']):
+            with pytest.raises(SystemExit) as exc_info:
+                fritzlog_pull.main()
+
+        assert exc_info.value.code == 2
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_writes_live_incidents(self, mock_sleep, mock_collect, mock_open_fc):
+        """Verify --incidents-out appends incidents in the analyzer schema while polling"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.side_effect = [
+            {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected", "wan_uptime_s": 100},
+            {"timestamp": "2025-10-21 12:00:30", "wan_connection_status": "Connected", "wan_uptime_s": 3},
+        ]
+        mock_sleep.side_effect = [None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "test.csv")
+            inc_path = os.path.join(tmpdir, "live_incidents.csv")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path,
+                                    '--incidents-out', inc_path]):
+                fritzlog_pull.main()
+
+            with open(inc_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        assert rows[0] == ["source", "type", "start", "end", "duration", "details"]
+        assert rows[1][:3] == ["FRITZ", "WAN_RECONNECT", "2025-10-21 12:00:30"]
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('fritz_hosts.fetch_hosts')
+    @patch('time.sleep')
+    def test_main_writes_host_changes(self, mock_sleep, mock_fetch, mock_collect, mock_open_fc):
+        """Verify --hosts-out logs the first host snapshot and later only changes"""
+        mock_open_fc.return_value = Mock()
+        mock_collect.return_value = {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected"}
+        host = {"mac": "AA:BB:CC:00:00:01", "ip": "192.168.178.20", "active": "1"}
+        mock_fetch.side_effect = [{"AA:BB:CC:00:00:01": host},
+                                  {"AA:BB:CC:00:00:01": dict(host, active="0")}]
+        mock_sleep.side_effect = [None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "test.csv")
+            hosts_path = os.path.join(tmpdir, "hosts.csv")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path,
+                                    '--hosts-out', hosts_path, '--hosts-interval', '0']):
+                fritzlog_pull.main()
+
+            with open(hosts_path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+
+        assert [r["event"] for r in rows] == ["PRESENT", "OFFLINE"]
+        assert rows[1]["mac"] == "AA:BB:CC:00:00:01"
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('fritzlog_pull.time.time')
+    @patch('time.sleep')
+    def test_main_writes_online_monitor(self, mock_sleep, mock_time, mock_collect, mock_open_fc):
+        """Verify --monitor-out stores overlapping online-monitor windows without duplicates"""
+        fc = Mock()
+        fc.call_action.side_effect = [
+            {"Newds_current_bps": "40,30,20,10", "Newus_current_bps": "4,3,2,1", "Newmc_current_bps": "0,0,0,0"},
+            {"Newds_current_bps": "60,50,40,30", "Newus_current_bps": "6,5,4,3", "Newmc_current_bps": "0,0,0,0"},
+        ]
+        mock_open_fc.return_value = fc
+        mock_collect.return_value = {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected"}
+        mock_time.side_effect = [1000.0, 1010.0]
+        mock_sleep.side_effect = [None, KeyboardInterrupt()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "test.csv")
+            mon_path = os.path.join(tmpdir, "monitor.bin")
+            with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path,
+                                    '--monitor-out', mon_path]):
+                fritzlog_pull.main()
+
+            records = list(online_monitor.iter_records(mon_path))
+
+        assert [r[1] for r in records] == [10, 20, 30, 40, 50, 60]
+        assert [r[0] for r in records] == [985, 990, 995, 1000, 1005, 1010]
+        assert fc.call_action.call_args.kwargs == {"NewSyncGroupIndex": 0}
+
+    @patch('fritzlog_pull.open_fc')
+    @patch('fritzlog_pull.collect_once')
+    @patch('time.sleep')
+    def test_main_retries_when_first_connect_fails(self, mock_sleep, mock_collect, mock_open_fc, capsys):
+        """Verify a failed first connect is retried with backoff instead of ending main()"""
+        mock_open_fc.side_effect = [Exception("Connection refused"), Exception("Connection refused"), Mock()]
+        mock_collect.return_value = {"timestamp": "2025-10-21 12:00:00", "wan_connection_status": "Connected"}
+        mock_sleep.side_effect = [None, KeyboardInterrupt()]
+
         with tempfile.TemporaryDirectory() as tmpdir:
             csv_path = os.path.join(tmpdir, "test.csv")
-            
             with patch('sys.argv', ['fritzlog_pull.py', '--password', 'test', '--out', csv_path]):
-                with pytest.raises(SystemExit) as exc_info:
-                    fritzlog_pull.main()
-                
-                assert "Verbindung zur FRITZ!Box fehlgeschlagen" in str(exc_info.value)
-    
+                fritzlog_pull.main()
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                statuses = [row[1] for row in csv.reader(f)][1:]
+
+        assert "Verbindung zur FRITZ!Box fehlgeschlagen" in capsys.readouterr().out
+        assert statuses == [fritzlog_pull.POLL_ERROR, fritzlog_pull.RECONNECTED, "Connected"]
+        assert mock_open_fc.call_count == 3
+
     def test_main_requires_password_argument(self):
         """Verify main() requires --password argument"""
         with patch('sys.argv', ['fritzlog_pull.py']):
@@ -399,22 +891,8 @@ class TestIntegration:
             "dsl_link_retrain", "dsl_init_errors", "dsl_init_timeouts",
             "dsl_atuc_fec_errors", "dsl_atuc_crc_errors", "dsl_atuc_hec_errors",
         ]
-        
-        # This is the header defined in main()
-        with patch('sys.argv', ['fritzlog_pull.py', '--help']):
-            # Just verify we can parse arguments (will exit with help)
-            try:
-                fritzlog_pull.main()
-            except SystemExit:
-                pass
-        
-        # Verify the header in the actual code matches expected
-        import inspect
-        source = inspect.getsource(fritzlog_pull.main)
-        
-        # All expected columns should be in the source
-        for col in expected_columns:
-            assert col in source, f"Column '{col}' not found in header definition"
+
+        assert list(fritzlog_pull.LOG_HEADER[:len(expected_columns)]) == expected_columns
 
 
 class TestExtendedFunctionalityPresence:
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Unit tests for netwatch.py and the lazy imports behind it
+
+Run with: pytest test_netwatch.py -v
+or: python3 -m pytest test_netwatch.py -v
+"""
+
+import pytest
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+import analyze_netlogs
+import netwatch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def imported_after(code):
+    """Run code in a fresh interpreter and return which heavy modules it imported."""
+    probe = (f"import sys\n{code}\n"
+             "print('loaded:' + ','.join(m for m in ('pandas', 'matplotlib', 'fritzconnection') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", probe], cwd=HERE, capture_output=True, text=True, check=True)
+    return set(filter(None, result.stdout.splitlines()[-1][len("loaded:"):].split(",")))
+
+
+class TestDispatch:
+    """Test routing of subcommands"""
+
+    @pytest.mark.parametrize("command,module", [("analyze", "analyze_netlogs"), ("visualize", "visualize_incidents"),
+                                                ("pull", "fritzlog_pull"), ("restart", "fritzbox_restart")])
+    def test_subcommand_calls_module_main(self, command, module):
+        """Verify each subcommand passes the remaining arguments to its module"""
+        with patch(f"{module}.main") as mock_main:
+            netwatch.main([command, "--foo", "bar"])
+
+        mock_main.assert_called_once_with(["--foo", "bar"])
+
+    def test_unknown_command(self):
+        """Verify an unknown command is an argparse error"""
+        with pytest.raises(SystemExit) as exc_info:
+            netwatch.main(["frobnicate"])
+
+        assert exc_info.value.code == 2
+
+    def test_subcommand_help_uses_command_name(self, capsys):
+        """Verify the help of a subcommand is shown under the netwatch name"""
+        with patch('sys.argv', ['netwatch.py']):
+            with pytest.raises(SystemExit):
+                netwatch.main(["analyze", "--help"])
+
+        assert capsys.readouterr().out.startswith("usage: netwatch analyze")
+
+
+class TestLazyImports:
+    """Test that heavy dependencies are only imported when needed"""
+
+    def test_top_level_help_imports_nothing_heavy(self):
+        """Verify netwatch --help loads neither pandas, matplotlib nor fritzconnection"""
+        loaded = imported_after("import netwatch\ntry:\n    netwatch.main(['--help'])\nexcept SystemExit:\n    pass")
+
+        assert loaded == set()
+
+    def test_modules_import_without_pandas_and_matplotlib(self):
+        """Verify importing the analyzer and visualizer does not load pandas or matplotlib"""
+        assert imported_after("import analyze_netlogs, visualize_incidents") == set()
+
+    def test_small_logs_are_analyzed_without_pandas(self):
+        """Verify analyze on small logs uses the csv fallback and never imports pandas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = netwatch.write_sample_logs(tmpdir)
+            out = os.path.join(tmpdir, "out.csv")
+            loaded = imported_after(
+                f"import netwatch\nnetwatch.main(['analyze', '--netwatch', {files['netwatch']!r}, "
+                f"'--fritz', {files['fritz']!r}, '--out', {out!r}])")
+            with open(out, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+        assert "pandas" not in loaded
+        assert any("WAN_RECONNECT" in line for line in lines)
+
+    def test_pd_attribute_is_still_available(self):
+        """Verify analyze_netlogs.pd still resolves to pandas for callers and tests"""
+        pandas = pytest.importorskip("pandas")
+
+        assert analyze_netlogs.pd is pandas
+
+
+class TestEngine:
+    """Test the choice between pandas and the csv fallback"""
+
+    def test_small_files_use_python(self):
+        """Verify auto picks the csv fallback below SMALL_LOG_BYTES"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = netwatch.write_sample_logs(tmpdir)
+
+            assert analyze_netlogs.choose_engine("auto", (files["netwatch"], files["fritz"])) is False
+            assert analyze_netlogs.choose_engine("python", (files["netwatch"],)) is False
+            assert analyze_netlogs.choose_engine("pandas", (files["netwatch"],)) is True
+
+    def test_both_engines_find_the_same_incidents(self):
+        """Verify the csv fallback and pandas detect the same incidents on the sample logs"""
+        pytest.importorskip("pandas")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = netwatch.write_sample_logs(tmpdir)
+            outputs = []
+            for engine in ("python", "pandas"):
+                out = os.path.join(tmpdir, f"{engine}.csv")
+                with patch('builtins.print'):
+                    analyze_netlogs.main(["--netwatch", files["netwatch"], "--fritz", files["fritz"],
+                                          "--out", out, "--engine", engine])
+                with open(out, encoding="utf-8") as f:
+                    outputs.append(f.read())
+
+        assert outputs[0] == outputs[1]
+
+
+class TestBenchmark:
+    """Test the start-up benchmark"""
+
+    def test_benchmark_reports_every_case(self):
+        """Verify every start-up case is measured"""
+        results = netwatch.benchmark_startup(runs=1)
+
+        assert [r["case"] for r in results][:2] == ["--help", "analyze --help"]
+        assert len(results) == 7
+        assert all(0 < r["min_ms"] <= r["median_ms"] for r in results)
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_netwatch.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Unit tests for netwatch_probe.py
+
+Run with: pytest test_netwatch_probe.py -v
+or: python3 -m pytest test_netwatch_probe.py -v
+"""
+
+import pytest
+import asyncio
+import csv
+import os
+import struct
+import tempfile
+import time
+from unittest.mock import patch
+
+import netwatch
+import netwatch_probe
+
+LOOPBACK = "127.0.0.1"
+# TEST-NET-2 (RFC 5737): never answered
+UNREACHABLE = "198.51.100.1"
+
+
+def fake_info():
+    return {"adapter": "eth0", "media_status": "Connected", "ipv4": "192.168.178.20", "ipv6_enabled": 1,
+            "gateway": "192.168.178.1"}
+
+
+@pytest.fixture
+def pinger():
+    try:
+        p = netwatch_probe.IcmpPinger()
+    except PermissionError as e:
+        pytest.skip(str(e))
+    yield p
+    p.close()
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+class TestCsvLayout:
+    """Test that rows match the NetWatch.ps1 schema"""
+
+    def test_header_matches_netwatch_ps1(self):
+        """Verify the header has the base columns and avg/loss per target in order"""
+        header = netwatch_probe.csv_header(["8.8.8.8", "www.riotgames.com"])
+
+        assert header == ["timestamp", "adapter", "media_status", "ipv4", "ipv6_enabled", "gateway", "dns_ok",
+                          "dns_ms", "ping_8.8.8.8_avg_ms", "ping_8.8.8.8_loss_pct",
+                          "ping_www.riotgames.com_avg_ms", "ping_www.riotgames.com_loss_pct"]
+
+    def test_error_row_is_padded(self):
+        """Verify an error row has ERROR, the message and empty cells up to the header width"""
+        row = netwatch_probe.error_row("2025-10-21 12:00:00", "kaputt", 12)
+
+        assert row[:3] == ["2025-10-21 12:00:00", "ERROR", "kaputt"]
+        assert row[3:] == [""] * 9
+
+    def test_numbers_are_written_like_powershell(self):
+        """Verify averages look like [math]::Round(x, 1) in NetWatch.ps1 and other cells stay as they are"""
+        assert netwatch_probe.ps_number(12.0) == "12"
+        assert netwatch_probe.ps_number(12.3) == "12.3"
+        assert netwatch_probe.ps_number(0.4) == "0.4"
+        assert [netwatch_probe.ps_number(v) for v in (100, "", "eth0")] == [100, "", "eth0"]
+
+    @pytest.mark.parametrize("use_pandas", [False, True])
+    def test_analyzer_reads_ps1_and_probe_rows_alike(self, use_pandas):
+        """Verify analyze_netlogs parses the PS1 cells (0/100 loss) and the probe cells (partial loss)"""
+        import analyze_netlogs
+        if use_pandas:
+            pytest.importorskip("pandas")
+        header = netwatch_probe.csv_header(["8.8.8.8"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            # NetWatch.ps1: Test-Connection failed -> "", 100; then a slow answer
+            netwatch_probe.append_row(path, header, ["2025-10-21 12:00:00", "eth0", "Connected", "192.168.178.20",
+                                                     1, "192.168.178.1", 1, 20, "", 100])
+            netwatch_probe.append_row(path, header, ["2025-10-21 12:00:30", "eth0", "Connected", "192.168.178.20",
+                                                     1, "192.168.178.1", 1, 20, "250", 0])
+            # probe: 2 of 5 pings lost
+            netwatch_probe.append_row(path, header, ["2025-10-21 12:01:00", "eth0", "Connected", "192.168.178.20", 1,
+                                                     "192.168.178.1", 1, 20, netwatch_probe.ps_number(12.5), 40])
+            data, _ = analyze_netlogs.load_csv(path, use_pandas=use_pandas)
+            incidents = analyze_netlogs.detect_netwatch_incidents(data, 100, 20)
+
+        assert sorted((i["type"], i["details"]) for i in incidents) == [
+            ("LATENCY_SPIKE", "8.8.8.8: 250.0ms"), ("LOSS_SPIKE", "8.8.8.8: 100.0%"), ("LOSS_SPIKE", "8.8.8.8: 40.0%")]
+
+    def test_header_written_once(self):
+        """Verify the header is only written to a new file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "Log", "netwatch_log.csv")
+            netwatch_probe.append_row(path, ["a", "b"], [1, 2])
+            netwatch_probe.append_row(path, ["a", "b"], [3, 4])
+
+            assert read_csv(path) == [["a", "b"], ["1", "2"], ["3", "4"]]
+
+
+class TestInterfaceInfo:
+    """Test adapter information read from /proc and /sys"""
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="ascii") as f:
+            f.write(text)
+
+    def test_default_route_with_lowest_metric(self):
+        """Verify the default route with the lowest metric wins and the gateway is decoded"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            route = os.path.join(tmpdir, "route")
+            self.write(route, "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\n"
+                              "wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\n"
+                              "eth0\t00000000\t01B2A8C0\t0003\t0\t0\t100\t00000000\n"
+                              "eth0\t00B2A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\n")
+
+            assert netwatch_probe.default_route(route) == ("eth0", "192.168.178.1")
+
+    def test_interface_info(self):
+        """Verify media status and IPv6 state come from sysfs and procfs"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            route = os.path.join(tmpdir, "route")
+            self.write(route, "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\n"
+                              "eth7\t00000000\t01B2A8C0\t0003\t0\t0\t100\t00000000\n")
+            self.write(os.path.join(tmpdir, "net", "eth7", "operstate"), "up\n")
+            self.write(os.path.join(tmpdir, "conf", "eth7", "disable_ipv6"), "0\n")
+
+            info = netwatch_probe.interface_info(route, os.path.join(tmpdir, "net"), os.path.join(tmpdir, "conf"))
+
+        assert info == {"adapter": "eth7", "media_status": "Connected", "ipv4": "", "ipv6_enabled": 1,
+                        "gateway": "192.168.178.1"}
+
+    def test_no_default_route(self):
+        """Verify a host without default route is reported as disconnected"""
+        info = netwatch_probe.interface_info("/nonexistent/route")
+
+        assert info["media_status"] == "Disconnected"
+        assert info["adapter"] == ""
+
+
+class TestIcmp:
+    """Test ICMP packets and the shared pinger"""
+
+    def test_echo_request_checksum(self):
+        """Verify the checksum over a built echo request is zero"""
+        packet = netwatch_probe.echo_request(0x1234, 7)
+
+        assert packet[0] == netwatch_probe.ICMP_ECHO_REQUEST
+        assert struct.unpack_from("!HH", packet, 4) == (0x1234, 7)
+        assert netwatch_probe.checksum(packet) == 0
+
+    def test_permission_error_has_hint(self):
+        """Verify a missing ICMP permission raises a PermissionError with a hint"""
+        with patch("socket.socket", side_effect=PermissionError):
+            with pytest.raises(PermissionError, match="CAP_NET_RAW"):
+                netwatch_probe.open_icmp_socket()
+
+    def test_loopback_ping(self, pinger):
+        """Verify pings to loopback are all answered"""
+        rtts = asyncio.run(pinger.ping(LOOPBACK, count=3, interval=0.05, timeout=1.0))
+
+        assert len(rtts) == 3
+        assert all(r is not None and 0 <= r < 1000 for r in rtts)
+
+    def test_unanswered_ping_times_out(self, pinger):
+        """Verify an unanswered ping is reported as lost after the timeout"""
+        started = time.perf_counter()
+        rtts = asyncio.run(pinger.ping(UNREACHABLE, count=2, interval=0.05, timeout=0.3))
+
+        assert rtts == [None, None]
+        assert time.perf_counter() - started < 1.0
+
+
+class TestProbe:
+    """Test one probe cycle"""
+
+    def test_probe_target_loopback(self, pinger):
+        """Verify a reachable target has an average and no loss"""
+        avg, loss = asyncio.run(netwatch_probe.probe_target(pinger, LOOPBACK, count=3, interval=0.05))
+
+        assert isinstance(avg, float)
+        assert loss == 0
+
+    def test_unresolvable_target_is_full_loss(self, pinger):
+        """Verify a name that does not resolve counts as 100 percent loss"""
+        with patch("netwatch_probe.resolve", return_value=None):
+            result = asyncio.run(netwatch_probe.probe_target(pinger, "nonexistent.invalid"))
+
+        assert result == ("", 100)
+
+    def test_targets_are_probed_concurrently(self, pinger):
+        """Verify a cycle takes about as long as the slowest target, not the sum"""
+        targets = [LOOPBACK, UNREACHABLE, "198.51.100.2", "198.51.100.3"]
+
+        async def dns(name, timeout):
+            return 1, 5
+
+        started = time.perf_counter()
+        with patch("netwatch_probe.check_dns", dns):
+            row = asyncio.run(netwatch_probe.probe_once(pinger, targets, count=3, interval=0.1, timeout=0.5,
+                                                        info=fake_info))
+        elapsed = time.perf_counter() - started
+
+        # one unreachable target: (3 - 1) * 0.1 + 0.5 = 0.7s; one after another it would be 2.1s
+        assert elapsed < 1.4
+        assert row["ping_127.0.0.1_loss_pct"] == 0
+        assert row["ping_198.51.100.1_avg_ms"] == ""
+        assert row["ping_198.51.100.1_loss_pct"] == 100
+        assert row["dns_ok"] == 1
+        assert row["adapter"] == "eth0"
+
+    def test_run_writes_rows(self, pinger):
+        """Verify the loop writes one row per cycle in the NetWatch.ps1 layout"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            written = asyncio.run(netwatch_probe.run(path, [LOOPBACK], 0.2, iterations=2, pinger=pinger,
+                                                     count=2, interval=0.05, info=fake_info))
+            rows = read_csv(path)
+
+        assert written == 2
+        assert rows[0] == netwatch_probe.csv_header([LOOPBACK])
+        assert len(rows) == 3
+        assert rows[1][1] == "eth0"
+        assert rows[1][-1] == "0"
+        assert not rows[1][-2].endswith(".0")  # PowerShell-Format: "12" statt "12.0"
+
+    def test_run_writes_error_row(self, pinger):
+        """Verify a failing cycle becomes an ERROR row and the loop continues"""
+        def broken_info():
+            raise OSError("kein Netz")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            asyncio.run(netwatch_probe.run(path, [LOOPBACK], 0, iterations=2, pinger=pinger, info=broken_info,
+                                           log=lambda msg: None))
+            rows = read_csv(path)
+
+        assert [r[1:3] for r in rows[1:]] == [["ERROR", "kein Netz"]] * 2
+        assert all(len(r) == len(rows[0]) for r in rows)
+
+    def test_run_writes_rtt_side_log(self, pinger):
+        """Verify every single ping lands in the binary side log with its status"""
+        import rtt_log
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            rtt_path = os.path.join(tmpdir, "netwatch_rtt.bin")
+            with patch("netwatch_probe.resolve", side_effect=lambda t, timeout: None if t == "x.invalid" else t):
+                asyncio.run(netwatch_probe.run(path, [LOOPBACK, UNREACHABLE, "x.invalid"], 0, iterations=2,
+                                               pinger=pinger, count=3, interval=0.02, timeout=0.2, info=fake_info,
+                                               log=lambda msg: None, rtt_path=rtt_path))
+            header, _ = rtt_log.read_header(rtt_path)
+            records = list(rtt_log.iter_records(rtt_path))
+
+        assert header["targets"] == [LOOPBACK, UNREACHABLE, "x.invalid"]
+        assert len(records) == 2 * 3 * 3
+        by_target = {tid: [r[4] for r in records if r[1] == tid] for tid in range(3)}
+        assert by_target[0] == [rtt_log.OK] * 6
+        # unreachable: timeout, or a send error once the kernel knows the route is dead
+        assert set(by_target[1]) <= {rtt_log.TIMEOUT, rtt_log.SEND_ERROR} and len(by_target[1]) == 6
+        assert by_target[2] == [rtt_log.UNRESOLVED] * 6
+        assert all(r[3] > 0 for r in records if r[1] == 0)
+        assert len({r[2] for r in records if r[1] == 0}) == 6
+
+    def test_run_writes_binary_log(self, pinger):
+        """Verify --binary rows read back as the same cells the CSV would hold"""
+        import binary_log
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.bin")
+            asyncio.run(netwatch_probe.run(path, [LOOPBACK], 0, iterations=2, pinger=pinger, count=2,
+                                           interval=0.02, info=fake_info, log=lambda msg: None, binary=True))
+            header, _ = binary_log.read_header(path)
+            columns, rows = binary_log.iter_rows(path)
+            rows = list(rows)
+
+        assert columns == netwatch_probe.csv_header([LOOPBACK])
+        assert header["kind"] == "netwatch"
+        assert header["targets"] == [LOOPBACK]
+        assert len(rows) == 2
+        assert (rows[0]["adapter"], rows[0]["ipv6_enabled"], rows[0]["ping_127.0.0.1_loss_pct"]) == ("eth0", "1", "0")
+        assert float(rows[0]["ping_127.0.0.1_avg_ms"]) >= 0
+
+    def test_analyzer_reads_probe_log(self, pinger):
+        """Verify analyze_netlogs finds the packet loss in a log written by the probe"""
+        import analyze_netlogs
+
+        async def dns(name, timeout):
+            return 1, 5
+
+        with tempfile.TemporaryDirectory() as tmpdir, patch("netwatch_probe.check_dns", dns):
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            asyncio.run(netwatch_probe.run(path, [LOOPBACK, UNREACHABLE], 0, iterations=1, pinger=pinger, count=1,
+                                           timeout=0.2, info=fake_info, log=lambda msg: None))
+            data, _ = analyze_netlogs.load_csv(path, use_pandas=False)
+            incidents = analyze_netlogs.detect_netwatch_incidents(data, 100, 20)
+
+        assert len(data) == 1
+        assert [(i["type"], i["details"].split(":")[0]) for i in incidents] == [("LOSS_SPIKE", UNREACHABLE)]
+
+
+class TestCli:
+    """Test the command line"""
+
+    def test_dispatcher_knows_probe(self):
+        """Verify netwatch probe routes to netwatch_probe.main"""
+        with patch("netwatch_probe.main") as mock_main:
+            netwatch.main(["probe", "--iterations", "1"])
+
+        mock_main.assert_called_once_with(["--iterations", "1"])
+
+    def test_main_runs_iterations(self, pinger, capsys):
+        """Verify main stops after --iterations cycles"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.csv")
+            async def dns(name, timeout):
+                return 1, 3
+
+            with patch("netwatch_probe.interface_info", fake_info), patch("netwatch_probe.check_dns", dns):
+                netwatch_probe.main(["--out", path, "--targets", LOOPBACK, "--iterations", "1", "--count", "1"])
+            rows = read_csv(path)
+
+        assert len(rows) == 2
+        assert rows[1][6:8] == ["1", "3"]
+
+    def test_main_refuses_csv_rows_in_binary_log(self):
+        """Verify a run without --binary does not append CSV text to an existing binary log"""
+        import binary_log
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "netwatch_log.bin")
+            binary_log.BinaryLogWriter(path, netwatch_probe.binary_columns([LOOPBACK]), "netwatch").close()
+            size = os.path.getsize(path)
+
+            with pytest.raises(SystemExit, match="Binär-Log"):
+                netwatch_probe.main(["--out", path, "--targets", LOOPBACK, "--iterations", "1"])
+
+            assert os.path.getsize(path) == size
+
+    def test_count_must_be_positive(self):
+        """Verify --count 0 is rejected"""
+        with pytest.raises(SystemExit) as exc_info:
+            netwatch_probe.main(["--count", "0"])
+
+        assert exc_info.value.code == 2
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_netwatch_probe.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Unit tests for online_monitor.py
+
+Run with: pytest test_online_monitor.py -v
+or: python3 -m pytest test_online_monitor.py -v
+"""
+
+import pytest
+import io
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from fritzconnection import FritzConnection
+
+import fritz_mock_server
+import online_monitor
+
+
+def window(*ds):
+    return [(v, v // 10, 0) for v in ds]
+
+
+class TestParseValues:
+    """Test parsing of the comma separated monitor arrays"""
+
+    def test_reverses_to_oldest_first(self):
+        """Verify the newest-first box order is turned into oldest-first"""
+        assert online_monitor.parse_values("30,20,10") == [10, 20, 30]
+
+    def test_empty_and_invalid_values(self):
+        """Verify empty strings give no samples and junk becomes 0"""
+        assert online_monitor.parse_values("") == []
+        assert online_monitor.parse_values(None) == []
+        assert online_monitor.parse_values("5,x") == [0, 5]
+
+    def test_collect_monitor_pads_missing_channel(self):
+        """Verify an empty channel is padded with zeros to the window length"""
+        fc = Mock()
+        fc.call_action.return_value = {"Newds_current_bps": "2,1", "Newus_current_bps": "20,10",
+                                       "Newmc_current_bps": ""}
+
+        assert online_monitor.collect_monitor(fc) == [(1, 10, 0), (2, 20, 0)]
+
+
+class TestOnlineMonitorSeries:
+    """Test deduplication of overlapping windows"""
+
+    def test_first_window_uses_local_clock(self):
+        """Verify the first window is anchored at the call time"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+
+        new = series.merge(1000.0, window(10, 20, 30))
+
+        assert [ts for ts, _ in new] == [990, 995, 1000]
+
+    def test_overlap_is_dropped(self):
+        """Verify only samples not seen in the previous window are returned"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        series.merge(1000.0, window(10, 20, 30, 40))
+
+        new = series.merge(1010.4, window(30, 40, 50, 60))
+
+        assert new == [(1005, (50, 5, 0)), (1010, (60, 6, 0))]
+
+    def test_same_window_twice_yields_nothing(self):
+        """Verify polling faster than the box step adds no duplicates"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        series.merge(1000.0, window(10, 20, 30))
+
+        assert series.merge(1002.0, window(10, 20, 30)) == []
+
+    def test_idle_link_uses_clock_to_pick_overlap(self):
+        """Verify ambiguous all-zero windows are aligned by elapsed time"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        series.merge(1000.0, window(0, 0, 0, 0))
+
+        new = series.merge(1005.0, window(0, 0, 0, 0))
+
+        assert [ts for ts, _ in new] == [1005]
+
+    def test_gap_falls_back_to_clock(self):
+        """Verify a missed window is placed by the local clock without overlapping old samples"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        series.merge(1000.0, window(10, 20))
+
+        new = series.merge(1100.0, window(70, 80))
+
+        assert [ts for ts, _ in new] == [1095, 1100]
+
+    def test_repeated_values_after_gap_use_clock(self):
+        """Verify an identical window after a long gap is not taken as overlap and the lag does not carry over"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        idle = window(*[0] * 20)
+        series.merge(1100.0, idle)
+
+        after_gap = series.merge(1600.0, idle)
+        next_poll = series.merge(1630.0, idle)
+
+        assert [ts for ts, _ in after_gap] == list(range(1505, 1601, 5))
+        assert [ts for ts, _ in next_poll] == list(range(1605, 1631, 5))
+
+    def test_overlap_far_from_elapsed_time_is_rejected(self):
+        """Verify a content match that does not fit the elapsed time falls back to the clock"""
+        series = online_monitor.OnlineMonitorSeries(step=5)
+        series.merge(1000.0, window(1, 2, 3, 4, 5, 6, 7, 8))
+
+        new = series.merge(1010.0, window(8, 9, 10, 11, 12, 13, 14, 15))
+
+        assert new == [(1005, (14, 1, 0)), (1010, (15, 1, 0))]
+
+
+class TestMonitorWriter:
+    """Test the binary storage format"""
+
+    def test_roundtrip_and_csv(self):
+        """Verify records are written, read back and exported as CSV"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "monitor.bin")
+            writer = online_monitor.MonitorWriter(path)
+            writer.write([(1000, (10, 1, 0)), (1005, (2**40, -3, 0))])
+            writer.close()
+
+            records = list(online_monitor.iter_records(path))
+            out = io.StringIO()
+            online_monitor.to_csv(path, out)
+            size = os.path.getsize(path)
+            _, _, offset = online_monitor.read_header(path)
+
+        assert records == [(1000, 10, 1, 0), (1005, 2**32 - 1, 0, 0)]
+        assert size - offset == 2 * 16
+        assert out.getvalue().splitlines()[0] == "epoch_s,ds_bps,us_bps,mc_bps"
+
+    def test_append_resumes_after_last_timestamp(self):
+        """Verify reopening a file continues after the stored samples"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "monitor.bin")
+            writer = online_monitor.MonitorWriter(path)
+            writer.write([(1000, (1, 1, 0))])
+            writer.close()
+
+            logger = online_monitor.OnlineMonitorLogger(path)
+            assert logger.series.last_ts == 1000
+            with pytest.raises(ValueError):
+                online_monitor.MonitorWriter(path, step=1)
+            logger.close()
+
+    def test_resume_reads_only_the_last_record(self):
+        """Verify reopening takes last_ts from the last complete record without reading the whole file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "monitor.bin")
+            writer = online_monitor.MonitorWriter(path)
+            writer.write([(1000 + 5 * i, (i, i, 0)) for i in range(1000)])
+            writer.close()
+            with open(path, "ab") as f:
+                f.write(b"\x01\x02\x03")
+
+            with patch("online_monitor.iter_records", side_effect=AssertionError("full read")):
+                writer = online_monitor.MonitorWriter(path)
+            writer.close()
+
+        assert writer.last_ts == 1000 + 5 * 999
+
+    def test_partial_record_is_cut_before_appending(self):
+        """Verify a half-written last record does not shift the records appended after it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "monitor.bin")
+            writer = online_monitor.MonitorWriter(path)
+            writer.write([(1000, (1, 1, 0))])
+            writer.close()
+            with open(path, "ab") as f:
+                f.write(b"\x01\x02\x03")
+
+            writer = online_monitor.MonitorWriter(path)
+            writer.write([(1005, (2, 2, 0))])
+            writer.close()
+
+            assert list(online_monitor.iter_records(path)) == [(1000, 1, 1, 0), (1005, 2, 2, 0)]
+
+    def test_rejects_foreign_file(self):
+        """Verify files without the magic line are refused"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "other.bin")
+            with open(path, "wb") as f:
+                f.write(b"timestamp,x\n")
+            with pytest.raises(ValueError):
+                list(online_monitor.iter_records(path))
+
+
+class TestAgainstMockBox:
+    """Test the logger against the local mock box"""
+
+    def test_consecutive_polls_form_gapless_series(self):
+        """Verify overlapping windows give a continuous series with one call per poll"""
+        clock = Mock(return_value=10_000.0)
+        state = fritz_mock_server.BoxState(clock=clock, seed=1)
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, state=state, seed=1).start()
+        try:
+            fc = FritzConnection(address="127.0.0.1", port=box.port, password=box.password,
+                                 timeout=5, use_cache=False)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "monitor.bin")
+                logger = online_monitor.OnlineMonitorLogger(path)
+                before = box.requests
+                for t in (10_000.0, 10_030.0, 10_060.0):
+                    clock.return_value = t
+                    logger.poll(fc, t)
+                requests = box.requests - before
+                logger.close()
+                records = list(online_monitor.iter_records(path))
+        finally:
+            box.stop()
+
+        stamps = [r[0] for r in records]
+        assert requests == 3
+        assert stamps == list(range(stamps[0], 10_065, 5))
+        assert len(stamps) == len(set(stamps)) == 20 + 12
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_online_monitor.py
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Unit tests for record_log.py
+
+Run with: pytest test_record_log.py -v
+or: python3 -m pytest test_record_log.py -v
+"""
+
+import pytest
+import os
+import struct
+import tempfile
+
+import record_log
+
+MAGIC = b"TEST1\n"
+RECORD = struct.Struct("<qI4x")
+
+
+def read_header(path):
+    return record_log.read_header(path, MAGIC, "Test-Log")
+
+
+def open_writer(path, name="a"):
+    return record_log.RecordWriter(path, MAGIC, {"name": name}, RECORD.size, read_header,
+                                   lambda h: None if h["name"] == name else f"name={h['name']}", align=8)
+
+
+class TestHeader:
+    """Test the magic line and the JSON header"""
+
+    def test_header_is_padded_to_alignment(self):
+        """Verify the records start at a multiple of the requested alignment"""
+        for align in (1, 8, 16):
+            data = record_log.header_bytes(MAGIC, {"x": "y" * 5}, align)
+            assert len(data) % align == 0
+            assert data.startswith(MAGIC) and data.endswith(b"\n")
+
+    def test_read_header_rejects_other_files(self):
+        """Verify a file with another magic line is refused with the log name"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "other.bin")
+            with open(path, "wb") as f:
+                f.write(b"OTHER1\n{}\n")
+
+            assert not record_log.has_magic(path, MAGIC)
+            with pytest.raises(ValueError, match="kein Test-Log"):
+                read_header(path)
+
+
+class TestRecordWriter:
+    """Test appending fixed-size records"""
+
+    def test_round_trip_and_continue(self):
+        """Verify records of two sessions are read back in order behind the original header"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "sub", "log.bin")
+            writer = open_writer(path)
+            writer.write(RECORD.pack(1, 10))
+            writer.close()
+            writer = open_writer(path)
+            writer.write(RECORD.pack(2, 20))
+            writer.close()
+
+            header, offset = read_header(path)
+            assert header == {"name": "a"}
+            assert offset % 8 == 0
+            assert list(record_log.iter_records(path, offset, RECORD)) == [(1, 10), (2, 20)]
+            assert record_log.record_count(path, offset, RECORD.size) == 2
+
+    def test_header_mismatch_is_refused(self):
+        """Verify continuing a log whose header does not match raises ValueError"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            open_writer(path).close()
+
+            with pytest.raises(ValueError, match="Kopf passt nicht .name=a"):
+                open_writer(path, name="b")
+
+    def test_partial_last_record_is_cut(self):
+        """Verify readers skip a torn last record and the writer cuts it before appending"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = open_writer(path)
+            writer.write(RECORD.pack(1, 10) + RECORD.pack(2, 20)[:5])
+            writer.close()
+            _, offset = read_header(path)
+            assert list(record_log.iter_records(path, offset, RECORD)) == [(1, 10)]
+
+            writer = open_writer(path)
+            writer.write(RECORD.pack(3, 30))
+            writer.close()
+
+            assert list(record_log.iter_records(path, offset, RECORD)) == [(1, 10), (3, 30)]
+
+    def test_last_record(self):
+        """Verify the writer returns only the last complete record, or None for an empty log"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = open_writer(path)
+            assert writer.last_record() is None
+            writer.write(RECORD.pack(1, 10) + RECORD.pack(2, 20) + b"\x07")
+            writer.close()
+
+            writer = open_writer(path)
+            assert RECORD.unpack(writer.last_record()) == (2, 20)
+            writer.write(RECORD.pack(3, 30))
+            writer.close()
+
+            _, offset = read_header(path)
+            assert list(record_log.iter_records(path, offset, RECORD)) == [(1, 10), (2, 20), (3, 30)]
+
+    def test_iter_records_spans_chunks(self):
+        """Verify reading in chunks returns every record exactly once"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = open_writer(path)
+            n = record_log.CHUNK_RECORDS * 2 + 3
+            writer.write(b"".join(RECORD.pack(i, i % 7) for i in range(n)))
+            writer.close()
+
+            _, offset = read_header(path)
+            assert [r[0] for r in record_log.iter_records(path, offset, RECORD)] == list(range(n))
+
+    def test_load_memmap(self):
+        """Verify the records map onto a numpy structured array without reading them"""
+        np = pytest.importorskip("numpy")
+        dtype = np.dtype({"names": ["t", "v"], "formats": ["<i8", "<u4"], "offsets": [0, 8], "itemsize": RECORD.size})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "log.bin")
+            writer = open_writer(path)
+            writer.close()
+            _, offset = read_header(path)
+            assert len(record_log.load_memmap(path, offset, dtype)) == 0
+
+            writer = open_writer(path)
+            writer.write(RECORD.pack(5, 50) + RECORD.pack(6, 60))
+            writer.close()
+
+            records = record_log.load_memmap(path, offset, dtype)
+            assert isinstance(records, np.memmap)
+            assert records["t"].tolist() == [5, 6] and records["v"].tolist() == [50, 60]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Unit tests for rtt_log.py
+
+Run with: pytest test_rtt_log.py -v
+or: python3 -m pytest test_rtt_log.py -v
+"""
+
+import pytest
+import csv
+import io
+import os
+import tempfile
+
+import rtt_log
+from rtt_log import RttSample
+
+np = pytest.importorskip("numpy")
+
+TARGETS = ["8.8.8.8", "www.riotgames.com"]
+
+
+def write_log(path, samples_by_target, targets=TARGETS):
+    writer = rtt_log.RttLogWriter(path, targets)
+    for target, samples in samples_by_target:
+        writer.write(target, samples)
+    writer.close()
+
+
+def ok(epoch_ms, seq, rtt_ms):
+    return RttSample(epoch_ms, seq, rtt_ms, rtt_log.OK)
+
+
+class TestFormat:
+    """Test the binary layout"""
+
+    def test_record_size_and_dtype_match(self):
+        """Verify the struct and the numpy dtype describe the same 20 byte record"""
+        assert rtt_log.RECORD.size == 20
+        assert rtt_log.record_dtype().itemsize == rtt_log.RECORD.size
+
+    def test_header_describes_records(self):
+        """Verify the header names the record layout, fields, status values and targets"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [])
+
+            header, offset = rtt_log.read_header(path)
+
+            assert header["targets"] == TARGETS
+            assert header["record"] == "<qHHIB3x"
+            assert header["status"] == ["OK", "TIMEOUT", "SEND_ERROR", "UNRESOLVED"]
+            assert offset == os.path.getsize(path)
+
+    def test_round_trip(self):
+        """Verify written samples are read back with rtt in microseconds"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("www.riotgames.com", [ok(1000, 7, 12.3456),
+                                                    RttSample(1500, 8, None, rtt_log.TIMEOUT)])])
+
+            assert list(rtt_log.iter_records(path)) == [(1000, 1, 7, 12346, rtt_log.OK),
+                                                        (1500, 1, 8, 0, rtt_log.TIMEOUT)]
+
+    def test_not_an_rtt_log(self):
+        """Verify other files are rejected"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "other.bin")
+            with open(path, "wb") as f:
+                f.write(b"FMON1\n{}\n")
+
+            with pytest.raises(ValueError):
+                rtt_log.read_header(path)
+
+
+class TestWriter:
+    """Test appending to an existing log"""
+
+    def test_append_keeps_records(self):
+        """Verify a second writer appends behind the existing records"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "Log", "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10)])])
+            write_log(path, [("8.8.8.8", [ok(2000, 2, 20)])])
+
+            assert [r[0] for r in rtt_log.iter_records(path)] == [1000, 2000]
+
+    def test_partial_record_is_cut_before_appending(self):
+        """Verify a half-written last record does not shift the records appended after it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10)])])
+            with open(path, "ab") as f:
+                f.write(b"\x01\x02\x03")
+            write_log(path, [("8.8.8.8", [ok(2000, 2, 20)])])
+
+            assert list(rtt_log.iter_records(path)) == [(1000, 0, 1, 10000, 0), (2000, 0, 2, 20000, 0)]
+
+    def test_other_targets_are_rejected(self):
+        """Verify a log created for other targets is not continued"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [])
+
+            with pytest.raises(ValueError, match="Kopf passt nicht"):
+                rtt_log.RttLogWriter(path, ["1.1.1.1"])
+
+
+class TestStats:
+    """Test statistics over the memory-mapped records"""
+
+    def test_load_records_is_memmap(self):
+        """Verify records are memory-mapped into a structured array"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10), ok(2000, 2, 20)])])
+
+            header, records = rtt_log.load_records(path)
+
+            assert isinstance(records, np.memmap)
+            assert records["rtt_us"].tolist() == [10000, 20000]
+            assert header["targets"] == TARGETS
+            del records
+
+    def test_empty_log(self):
+        """Verify a log without records gives no statistics"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [])
+            header, records = rtt_log.load_records(path)
+
+            assert len(records) == 0
+            assert rtt_log.target_stats(records, header["targets"]) == []
+
+    def test_percentiles_jitter_and_partial_loss(self):
+        """Verify loss counts single lost pings and jitter is the mean RTT difference"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10), ok(1500, 2, 20),
+                                          RttSample(2000, 3, None, rtt_log.TIMEOUT), ok(2500, 4, 10)]),
+                             ("www.riotgames.com", [RttSample(1000, 0, None, rtt_log.UNRESOLVED)] * 2)])
+            header, records = rtt_log.load_records(path)
+            stats = rtt_log.target_stats(records, header["targets"])
+            del records
+
+        google, riot = stats
+        assert (google["sent"], google["received"], google["loss_pct"]) == (4, 3, 25.0)
+        assert google["p50_ms"] == 10.0
+        assert google["max_ms"] == 20.0
+        assert google["jitter_ms"] == 10.0
+        assert (riot["sent"], riot["loss_pct"], riot["p50_ms"]) == (2, 100.0, "")
+
+    def test_print_stats(self, capsys):
+        """Verify the table has one line per target"""
+        rtt_log.print_stats([{"target": "8.8.8.8", "sent": 4, "loss_pct": 25.0, "p50_ms": 10.0, "p95_ms": 19.0,
+                              "p99_ms": 19.8, "jitter_ms": 10.0}])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 2
+        assert lines[1].split() == ["8.8.8.8", "4", "25.0%", "10.0ms", "19.0ms", "19.8ms", "10.0ms"]
+
+
+class TestCsvExport:
+    """Test the CSV export"""
+
+    def test_to_csv(self):
+        """Verify every record becomes a row with target name and status text"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10.5), RttSample(1500, 2, None, rtt_log.TIMEOUT)])])
+            out = io.StringIO()
+
+            assert rtt_log.to_csv(path, out) == 2
+
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        assert rows == [["epoch_ms", "target", "seq", "rtt_ms", "status"],
+                        ["1000", "8.8.8.8", "1", "10.5", "OK"], ["1500", "8.8.8.8", "2", "", "TIMEOUT"]]
+
+    def test_main_prints_stats(self, capsys):
+        """Verify the CLI prints the statistics table by default"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rtt.bin")
+            write_log(path, [("8.8.8.8", [ok(1000, 1, 10)])])
+
+            rtt_log.main([path])
+
+        assert "8.8.8.8" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_rtt_log.py
+    pytest.main([__file__, "-v"])
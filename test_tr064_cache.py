@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tr064_cache.py
+
+Run with: pytest test_tr064_cache.py -v
+or: python3 -m pytest test_tr064_cache.py -v
+"""
+
+import pytest
+import os
+import json
+from unittest.mock import patch
+
+from fritzconnection.core.exceptions import FritzServiceError
+
+import fritz_mock_server
+import fritzlog_pull
+import tr064_cache
+
+
+@pytest.fixture
+def box():
+    box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, seed=1).start()
+    yield box
+    box.stop()
+
+
+def connect(box, cache_dir, verify_cache=True):
+    return tr064_cache.CachedFritzConnection(address="127.0.0.1", port=box.port, password="secret",
+                                             timeout=5, cache_directory=cache_dir, verify_cache=verify_cache)
+
+
+class TestCacheFile:
+    """Test cache path and file helpers"""
+
+    def test_cache_path_is_per_host_and_port(self):
+        """Verify the scheme is dropped and host/port end up in the file name"""
+        path = tr064_cache.cache_path("/tmp/c", "http://192.168.178.1", 49000)
+        assert path == os.path.join("/tmp/c", "tr064_192.168.178.1_49000.json")
+
+    def test_load_cache_rejects_other_versions(self, tmp_path):
+        """Verify files with another cache or fritzconnection version are ignored"""
+        path = tmp_path / "c.json"
+        path.write_text(json.dumps({"version": tr064_cache.CACHE_VERSION + 1}))
+        assert tr064_cache.load_cache(str(path)) is None
+
+        path.write_text("{kaputt")
+        assert tr064_cache.load_cache(str(path)) is None
+
+    def test_save_cache_ignores_unwritable_directory(self, tmp_path):
+        """Verify a failing write does not raise"""
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+        assert tr064_cache.save_cache(str(blocker / "sub" / "c.json"), {}) is False
+
+
+class TestCachedFritzConnection:
+    """Test CachedFritzConnection against the local mock box"""
+
+    def test_cold_start_caches_only_used_services(self, box, tmp_path):
+        """Verify the first start writes descriptions plus SCPDs of the services actually called"""
+        fc = connect(box, str(tmp_path))
+        fc.call_action("DeviceConfig:1", "Reboot")
+
+        data = tr064_cache.load_cache(fc.cache_path)
+        assert data["model"] == fritz_mock_server.DEFAULT_MODEL
+        assert "DeviceConfig1" in data["scpd"]
+        assert "WANDSLInterfaceConfig1" not in data["scpd"]
+
+    def test_warm_start_matches_uncached_results(self, box, tmp_path):
+        """Verify a warm start answers like a cold one"""
+        cold = fritzlog_pull.collect_once(connect(box, str(tmp_path)))
+        warm = fritzlog_pull.collect_once(connect(box, str(tmp_path)))
+
+        assert warm["__failed__"] == []
+        assert warm["wan_connection_status"] == cold["wan_connection_status"]
+        assert warm["dsl_link_status"] == cold["dsl_link_status"]
+
+    def test_warm_start_skips_scpd_download(self, box, tmp_path):
+        """Verify cached SCPDs are not fetched again"""
+        connect(box, str(tmp_path)).call_action("WANIPConnection1", "GetStatusInfo")
+
+        with patch("fritzconnection.core.processor.Service.load_scpd") as mock_load:
+            fc = connect(box, str(tmp_path), verify_cache=False)
+            result = fc.call_action("WANIPConnection1", "GetStatusInfo")
+
+        mock_load.assert_not_called()
+        assert result["NewConnectionStatus"] == "Connected"
+
+    def test_firmware_change_invalidates_cache(self, box, tmp_path):
+        """Verify another firmware on the same host rebuilds the cache"""
+        fc = connect(box, str(tmp_path))
+        fc.call_action("WANIPConnection1", "GetStatusInfo")
+        data = tr064_cache.load_cache(fc.cache_path)
+        data["firmware"] = "0.00.00"
+        tr064_cache.save_cache(fc.cache_path, data)
+
+        fc = connect(box, str(tmp_path))
+
+        data = tr064_cache.load_cache(fc.cache_path)
+        assert data["firmware"] != "0.00.00"
+        assert "WANIPConnection1" not in data["scpd"]
+
+    def test_unknown_service_raises(self, box, tmp_path):
+        """Verify unknown services still raise like plain fritzconnection"""
+        fc = connect(box, str(tmp_path))
+        with pytest.raises(FritzServiceError):
+            fc.call_action("NoSuchService1", "GetInfo")
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_tr064_cache.py
+    pytest.main([__file__, "-v"])
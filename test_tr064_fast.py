@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Unit tests for tr064_fast.py
+
+Run with: pytest test_tr064_fast.py -v
+or: python3 -m pytest test_tr064_fast.py -v
+"""
+
+import pytest
+import hashlib
+import socket
+
+from fritzconnection.core.exceptions import FritzActionFailedError, FritzServiceError, FritzConnectionException
+
+import fritz_mock_server
+import fritzlog_pull
+import tr064_cache
+import tr064_fast
+
+
+@pytest.fixture
+def box():
+    box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, password="secret", seed=1).start()
+    yield box
+    box.stop()
+
+
+def connect(box, tmp_path):
+    fc = tr064_cache.CachedFritzConnection(address="127.0.0.1", port=box.port, password="secret",
+                                           timeout=5, cache_directory=str(tmp_path))
+    return fc, tr064_fast.FastTR064Client(fc)
+
+
+class TestDigest:
+    """Test challenge parsing and the cached digest state"""
+
+    def test_parse_challenge(self):
+        """Verify quoted and unquoted fields are parsed"""
+        c = tr064_fast.parse_challenge('Digest realm="F!Box SOAP-Auth", nonce="ABC", algorithm=MD5, qop="auth"')
+        assert c == {"realm": "F!Box SOAP-Auth", "nonce": "ABC", "algorithm": "MD5", "qop": "auth"}
+        assert tr064_fast.parse_challenge("Basic realm=x") is None
+
+    def test_header_matches_rfc2617(self):
+        """Verify the response hash follows RFC 2617 and the nonce count increments"""
+        state = tr064_fast.DigestState("user", "pw")
+        assert state.header("POST", "/upnp/control/x") is None
+        state.update({"realm": "r", "nonce": "n", "qop": "auth"})
+
+        first = tr064_fast.parse_challenge(state.header("POST", "/x"))
+        second = tr064_fast.parse_challenge(state.header("POST", "/x"))
+
+        def md5(text):
+            return hashlib.md5(text.encode()).hexdigest()
+
+        expected = md5(f"{md5('user:r:pw')}:n:00000001:{first['cnonce']}:auth:{md5('POST:/x')}")
+        assert first["response"] == expected
+        assert second["nc"] == "00000002"
+
+
+class TestFastTR064Client:
+    """Test FastTR064Client against the local mock box"""
+
+    def test_results_match_fritzconnection(self, box, tmp_path):
+        """Verify collect_once gives the same values through both clients"""
+        fc, fast = connect(box, tmp_path)
+        frozen = box.state.clock()
+        box.state.clock = lambda: frozen  # Zähler einfrieren
+
+        slow_row = fritzlog_pull.collect_once(fc)
+        fast_row = fritzlog_pull.collect_once(fast)
+
+        for row in (slow_row, fast_row):
+            for key in ("timestamp", "ts_ms", *fritzlog_pull.LATENCY_COLS):
+                row.pop(key)
+        assert fast_row == slow_row
+        assert isinstance(fast_row["wan_uptime_s"], int)
+        assert fast.fallback_calls == 0
+
+    def test_keep_alive_and_cached_auth(self, box, tmp_path):
+        """Verify later calls need one request each (no new 401 challenge, same connection)"""
+        fc, fast = connect(box, tmp_path)
+        fast.call_action("WANIPConnection1", "GetStatusInfo")
+        conn = fast._conn
+        before = box.requests
+
+        for _ in range(5):
+            fast.call_action("WANIPConnection1", "GetStatusInfo")
+
+        assert box.requests - before == 5
+        assert fast._conn is conn
+
+    def test_reconnects_after_dropped_connection(self, box, tmp_path):
+        """Verify a stale keep-alive connection is replaced transparently"""
+        fc, fast = connect(box, tmp_path)
+        fast.call_action("WANIPConnection1", "GetStatusInfo")
+        fast._conn.sock.shutdown(socket.SHUT_RDWR)
+
+        result = fast.call_action("WANIPConnection1", "GetStatusInfo")
+
+        assert result["NewConnectionStatus"] == "Connected"
+
+    def test_reboot_action(self, box, tmp_path):
+        """Verify DeviceConfig:1 Reboot goes through the fast path"""
+        fc, fast = connect(box, tmp_path)
+
+        assert fast.call_action("DeviceConfig:1", "Reboot") == {}
+        assert box.state.is_down()
+        assert fast.fast_calls == 1
+
+    def test_soap_fault_raises_fritzconnection_error(self, tmp_path):
+        """Verify SOAP faults raise the same exception types as fritzconnection"""
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, password="secret", seed=1).start()
+        try:
+            fc, fast = connect(box, tmp_path)
+            box.error_rate, box.error_codes = 1.0, (500,)
+            with pytest.raises(FritzActionFailedError):
+                fast.call_action("WANIPConnection1", "GetStatusInfo")
+        finally:
+            box.stop()
+
+    def test_wrong_password_raises(self, box, tmp_path):
+        """Verify a rejected digest raises instead of looping"""
+        fc, fast = connect(box, tmp_path)
+        fast.auth.password = "wrong"
+
+        with pytest.raises(FritzConnectionException):
+            fast.call_action("WANIPConnection1", "GetStatusInfo")
+
+    def test_fallback_for_unknown_service(self, box, tmp_path):
+        """Verify unsupported calls go through fritzconnection"""
+        fc, fast = connect(box, tmp_path)
+
+        with pytest.raises(FritzServiceError):
+            fast.call_action("NoSuchService1", "GetInfo")
+        assert fast.fallback_calls == 1
+
+    def test_benchmark_reports_both_clients(self, box, tmp_path):
+        """Verify benchmark() times both paths"""
+        fc, fast = connect(box, tmp_path)
+
+        timings = tr064_fast.benchmark(fc, fast, rounds=2)
+
+        assert set(timings) == {"fritzconnection", "fast"}
+        assert all(t > 0 for t in timings.values())
+
+
+if __name__ == "__main__":
+    # Allow running directly with: python3 test_tr064_fast.py
+    pytest.main([__file__, "-v"])
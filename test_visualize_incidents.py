@@ -7,13 +7,22 @@ or: python3 -m pytest test_visualize_incidents.py -v
 """
 
 import pytest
+import base64
+import calendar
+import gzip
+import json
 import os
 import csv
 import tempfile
-from datetime import datetime
+import time
+from collections import Counter
+from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 import visualize_incidents
 
+# matplotlib is loaded lazily; bind plt etc. up front so patch('visualize_incidents.plt...') can reach them
+visualize_incidents.load_matplotlib()
+
 
 class TestParseTime:
     """Test the parse_time() function"""
@@ -32,6 +41,12 @@ class TestParseTime:
         """Verify parse_time handles empty string"""
         result = visualize_incidents.parse_time("")
         assert result is None
+    
+    def test_parse_time_rejects_other_iso_forms(self):
+        """Verify the fast path accepts only the exact log format"""
+        assert visualize_incidents.parse_time("2025-10-21 12:00+01") is None
+        assert visualize_incidents.parse_time("2025-10-21T12:00:00") is None
+        assert visualize_incidents.parse_time("2025-13-21 12:00:00") is None
 
 
 class TestLoadIncidents:
@@ -154,6 +169,57 @@ class TestCreateTimelinePlot:
         mock_savefig.assert_called_once()
 
 
+class TestTimelineSegments:
+    """Test the vectorized timeline geometry"""
+
+    def test_widths_are_in_days(self):
+        """Verify a one-hour incident is 1/24 day wide"""
+        left, width = visualize_incidents.merge_segments([100.0], [100.0 + 1 / 24], resolution=1e-6)
+
+        assert list(left) == [100.0]
+        assert width[0] == pytest.approx(1 / 24)
+
+    def test_short_incidents_are_merged_and_widened(self):
+        """Verify bars closer than one pixel merge and zero-length bars get one pixel"""
+        left, width = visualize_incidents.merge_segments([5.0, 1.0, 1.05, 3.0], [5.0, 1.0, 1.1, 3.0],
+                                                         resolution=0.1)
+
+        assert list(left) == [1.0, 3.0, 5.0]
+        assert width == pytest.approx([0.15, 0.1, 0.1])
+
+    def test_overlapping_incidents_keep_longest_end(self):
+        """Verify a long incident is not cut short by a later short one inside it"""
+        left, width = visualize_incidents.merge_segments([0.0, 1.0], [10.0, 2.0], resolution=0.01)
+
+        assert list(left) == [0.0]
+        assert list(width) == [10.0]
+
+    def test_many_incidents_render_quickly(self):
+        """Verify 100k incidents render as one artist per type in a few seconds"""
+        base = datetime(2025, 10, 1)
+        types = ['LATENCY_SPIKE', 'LOSS_SPIKE', 'DNS_FAIL', 'WAN_RECONNECT']
+        incidents = []
+        for i in range(100_000):
+            start = base + timedelta(seconds=i * 26)
+            incidents.append({'source': 'PC', 'type': types[i % 4], 'start': start,
+                              'end': start + timedelta(seconds=(i % 3) * 30)})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'timeline.png')
+            plt = visualize_incidents.plt
+            with patch('visualize_incidents.plt.close'):  # keep the figure open for inspection
+                started = time.perf_counter()
+                visualize_incidents.create_timeline_plot(incidents, output_path)
+                elapsed = time.perf_counter() - started
+            ax = plt.gcf().axes[0]
+            collections, bars = len(ax.collections), len(ax.patches)
+            plt.close('all')
+            assert os.path.getsize(output_path) > 0
+
+        assert collections == 4
+        assert bars == 0
+        assert elapsed < 15
+
+
 class TestCreateSummaryCharts:
     """Test the create_summary_charts() function"""
     
@@ -281,6 +347,665 @@ class TestCreateHtmlReport:
             # This is expected behavior, so we just verify no exception is raised
 
 
+def read_payload(path):
+    """Extract and decode the embedded incident JSON of an HTML report."""
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    start = content.index('<script id="incident-data"')
+    body_start = content.index('>', start) + 1
+    body = content[body_start:content.index('</script>', body_start)]
+    if 'data-encoding="gzip-base64"' in content[start:body_start]:
+        return json.loads(gzip.decompress(base64.b64decode(body))), content
+    return json.loads(body.replace('<\\/', '</')), content
+
+
+def read_chunk(path):
+    """Decode a row chunk script of the --watch report."""
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    if content.startswith('INCIDENT_CHUNKS.push(["gzip-base64","'):
+        body = content[len('INCIDENT_CHUNKS.push(["gzip-base64","'):-len('"]);\n')]
+        return json.loads(gzip.decompress(base64.b64decode(body)))
+    return json.loads(content[len('INCIDENT_CHUNKS.push(["json",'):-len(']);\n')].replace('<\\/', '</'))
+
+
+class TestHtmlPayload:
+    """Test the streamed JSON payload and the virtual-scrolling table"""
+
+    INCIDENTS = [
+        {'source': 'FRITZ', 'type': 'WAN_RECONNECT', 'start': datetime(2025, 10, 21, 12, 5, 0),
+         'end': datetime(2025, 10, 21, 12, 5, 30), 'details': 'uptime 10s -> 0s'},
+        {'source': 'PC', 'type': 'LATENCY_SPIKE', 'start': datetime(2025, 10, 21, 12, 0, 0),
+         'end': datetime(2025, 10, 21, 13, 1, 0), 'details': '<b>8.8.8.8</b>: 50ms </script>'},
+    ]
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_payload_roundtrip(self, compress):
+        """Verify incidents are embedded sorted by start, with durations in seconds"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'report.html')
+            visualize_incidents.create_html_report(self.INCIDENTS, output_path, compress=compress)
+            payload, content = read_payload(output_path)
+
+        assert payload['sources'] == ['PC', 'FRITZ']
+        assert payload['types'] == ['LATENCY_SPIKE', 'WAN_RECONNECT']
+        assert payload['rows'] == [[0, 0, 0, 3660, '<b>8.8.8.8</b>: 50ms </script>'],
+                                   [1, 1, 300, 30, 'uptime 10s -> 0s']]
+        assert payload['base'] == calendar.timegm((2025, 10, 21, 12, 0, 0))
+        assert 'id="incident-view"' in content
+        assert '<tr>\n                <td><span' not in content  # keine Tabellenzeile je Incident
+
+    def test_script_end_tag_in_details_is_escaped(self):
+        """Verify details cannot close the data script element early"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'report.html')
+            visualize_incidents.create_html_report(self.INCIDENTS, output_path)
+            with open(output_path, encoding='utf-8') as f:
+                content = f.read()
+
+        assert content.count('</script>') == 2
+
+    def test_large_report_is_fast_and_compact(self):
+        """Verify 500k incidents are written in a few seconds with a compressed payload"""
+        base = datetime(2025, 10, 1)
+        types = ['LATENCY_SPIKE', 'LOSS_SPIKE', 'DNS_FAIL', 'WAN_RECONNECT']
+        incidents = [{'source': 'PC', 'type': types[i % 4], 'start': base + timedelta(seconds=i * 5),
+                      'end': base + timedelta(seconds=i * 5 + i % 7), 'details': f'8.8.8.8: {i % 90}ms'}
+                     for i in range(500_000)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'report.html')
+            started = time.perf_counter()
+            visualize_incidents.create_html_report(incidents, output_path, compress=True)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(output_path)
+
+        assert elapsed < 20
+        assert size < 5 * 1024 * 1024
+
+
+def epoch(dt):
+    return calendar.timegm(dt.timetuple())
+
+
+class TestHeatmaps:
+    """Test the day x hour and hour-of-week heatmaps"""
+
+    def test_count_matrices(self):
+        """Verify incidents land in their day/hour and weekday/hour cells"""
+        starts = [epoch(datetime(2025, 10, 20, 22, 15)),  # Monday
+                  epoch(datetime(2025, 10, 20, 22, 59)),
+                  epoch(datetime(2025, 10, 22, 3, 0)),    # Wednesday
+                  epoch(datetime(2025, 10, 27, 22, 0))]   # next Monday
+        cal, first_day, week = visualize_incidents.heatmap_matrices(starts, starts)
+
+        assert first_day == datetime(2025, 10, 20)
+        assert cal.shape == (8, 24)
+        assert cal[0, 22] == 2 and cal[2, 3] == 1 and cal[7, 22] == 1
+        assert cal.sum() == 4
+        assert week[0, 22] == 3 and week[2, 3] == 1
+        assert week.sum() == 4
+
+    def test_duration_weight_sums_minutes(self):
+        """Verify duration weighting adds the minutes of each incident at its start hour"""
+        start = epoch(datetime(2025, 10, 25, 2, 30))  # Saturday
+        cal, _, week = visualize_incidents.heatmap_matrices([start, start + 60], [start + 600, start + 60 + 90],
+                                                            weight='duration')
+
+        assert cal[0, 2] == pytest.approx(11.5)
+        assert week[5, 2] == pytest.approx(11.5)
+
+    def test_duration_is_spread_over_covered_hours(self):
+        """Verify a 6-hour overnight outage adds 60 minutes to each hour it covers"""
+        start = epoch(datetime(2025, 10, 25, 22, 0))  # Saturday
+        cal, first_day, week = visualize_incidents.heatmap_matrices([start], [start + 6 * 3600], weight='duration')
+
+        assert first_day == datetime(2025, 10, 25)
+        assert cal.shape == (2, 24)
+        assert cal[0, 22:].tolist() == [60, 60]
+        assert cal[1, :4].tolist() == [60, 60, 60, 60]
+        assert cal.sum() == pytest.approx(360)
+        assert week[5, 22:].tolist() == [60, 60] and week[6, :4].tolist() == [60, 60, 60, 60]
+
+    def test_covered_seconds_adds_overlapping_intervals(self):
+        """Verify overlapping incidents each count their own minutes"""
+        import numpy as np
+        covered = visualize_incidents.covered_seconds(np.array([0.0, 1800.0]), np.array([3600.0, 5400.0]),
+                                                      [0, 3600, 7200])
+
+        assert covered.tolist() == [5400, 1800]
+
+    def test_matches_a_python_loop(self):
+        """Verify the bincount result equals counting the incidents one by one"""
+        import numpy as np
+        rng = np.random.default_rng(1)
+        starts = epoch(datetime(2025, 10, 1)) + rng.integers(0, 40 * 86400, 5000)
+        cal, first_day, week = visualize_incidents.heatmap_matrices(starts, starts + 30)
+
+        expected_cal = Counter()
+        expected_week = Counter()
+        for s in starts.tolist():
+            dt = datetime(1970, 1, 1) + timedelta(seconds=s)
+            expected_cal[((dt.date() - first_day.date()).days, dt.hour)] += 1
+            expected_week[(dt.weekday(), dt.hour)] += 1
+
+        assert {k: v for k, v in np.ndenumerate(cal) if v} == expected_cal
+        assert {k: v for k, v in np.ndenumerate(week) if v} == expected_week
+
+    @patch('builtins.print')
+    def test_heatmap_is_in_the_report(self, mock_print):
+        """Verify the heatmap is rendered and linked from the HTML report unless disabled"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            html_path = os.path.join(tmpdir, 'incidents_report.html')
+            visualize_incidents.main(['--input', input_path, '--output-dir', tmpdir, '--html', '--jobs', '1',
+                                      '--no-timeline', '--no-summary', '--heatmap-weight', 'duration'])
+            with open(html_path, encoding='utf-8') as f:
+                with_heatmap = f.read()
+            visualize_incidents.main(['--input', input_path, '--output-dir', tmpdir, '--html', '--jobs', '1',
+                                      '--no-timeline', '--no-summary', '--no-heatmap'])
+            with open(html_path, encoding='utf-8') as f:
+                without_heatmap = f.read()
+            exists = os.path.exists(os.path.join(tmpdir, 'incidents_heatmap.png'))
+
+        assert exists
+        assert 'src="incidents_heatmap.png"' in with_heatmap
+        assert 'incidents_heatmap.png' not in without_heatmap
+
+
+class TestZoomableTimeline:
+    """Test the multi-resolution tiles of the zoomable timeline"""
+
+    def test_covered_seconds_split_across_buckets(self):
+        """Verify an interval longer than a bucket is split over the buckets it covers"""
+        import numpy as np
+        covered = visualize_incidents.covered_seconds(np.array([0.0, 7000.0]), np.array([5400.0, 7200.0]),
+                                                      [0, 3600, 7200, 10800])
+
+        assert covered.tolist() == [3600, 2000, 0]
+
+    def test_month_tile_edges(self):
+        """Verify month buckets follow the calendar"""
+        first = epoch(datetime(2025, 1, 31, 12, 0))
+        last = epoch(datetime(2025, 3, 1, 0, 0))
+        [(key, edges)] = visualize_incidents.level_tiles('month', first, last)
+
+        assert key == 'all'
+        assert [datetime(1970, 1, 1) + timedelta(seconds=int(e)) for e in edges] == [
+            datetime(2025, 1, 1), datetime(2025, 2, 1), datetime(2025, 3, 1), datetime(2025, 4, 1)]
+
+    def test_tiles_count_and_cover_per_level(self):
+        """Verify every level holds all incidents and overlaps of a type are covered once"""
+        start = datetime(2025, 10, 21, 23, 30)
+        incidents = [
+            {'source': 'PC', 'type': 'LOSS_SPIKE', 'start': start, 'end': start + timedelta(hours=1)},
+            {'source': 'PC', 'type': 'LOSS_SPIKE', 'start': start + timedelta(minutes=10),
+             'end': start + timedelta(minutes=40)},
+            {'source': 'FRITZ', 'type': 'WAN_RECONNECT', 'start': datetime(2025, 11, 2, 4, 0),
+             'end': datetime(2025, 11, 2, 4, 0)},
+        ]
+        types, first, last, tiles = visualize_incidents.timeline_tiles(visualize_incidents.TimelineData(incidents))
+
+        assert types == ['LOSS_SPIKE', 'WAN_RECONNECT']
+        for level in visualize_incidents.TILE_LEVELS:
+            rows = [row for tile in tiles[level].values() for row in tile['rows']]
+            assert sum(row[2] for row in rows) == 3
+            assert sum(row[3] for row in rows) == 3600
+        assert sorted(tiles['day']) == ['2025-10', '2025-11']
+        assert sorted(tiles['hour']) == ['2025-10-21', '2025-10-22', '2025-11-02']
+        # 23:30-00:30 is split at midnight: 1800 s in hour 23, 1800 s in hour 0 of the next day
+        assert tiles['hour']['2025-10-21']['rows'] == [[23, 0, 2, 1800]]
+        assert tiles['hour']['2025-10-22']['rows'] == [[0, 0, 0, 1800]]
+
+    @patch('builtins.print')
+    def test_page_and_tiles_are_written_and_linked(self, mock_print):
+        """Verify --zoom-timeline writes the page and its tiles and the report links to it"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            visualize_incidents.main(['--input', input_path, '--output-dir', tmpdir, '--html', '--jobs', '1',
+                                      '--no-timeline', '--no-summary', '--no-heatmap', '--zoom-timeline'])
+            with open(os.path.join(tmpdir, 'incidents_report.html'), encoding='utf-8') as f:
+                report = f.read()
+            with open(os.path.join(tmpdir, 'incidents_timeline.html'), encoding='utf-8') as f:
+                page = f.read()
+            tiles = os.path.join(tmpdir, 'incidents_tiles')
+            with open(os.path.join(tiles, 'index.js'), encoding='utf-8') as f:
+                index = f.read()
+            hour_tiles = os.listdir(os.path.join(tiles, 'hour'))
+            leftovers = [n for n in os.listdir(tmpdir) if '.tmp' in n or '.old' in n]
+
+        assert 'href="incidents_timeline.html"' in report
+        assert 'src="incidents_tiles/index.js"' in page
+        assert index.startswith('netwatchTimeline.index(')
+        assert json.loads(index[len('netwatchTimeline.index('):-3])['types'] == ['LATENCY_SPIKE', 'WAN_RECONNECT']
+        assert hour_tiles == ['2025-10-21.js']
+        assert leftovers == []
+
+
+def write_incidents_csv(path, rows=20):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'type', 'start', 'end', 'duration', 'details'])
+        for i in range(rows):
+            start = datetime(2025, 10, 21, 12, 0, 0) + timedelta(minutes=i)
+            writer.writerow(['PC' if i % 2 else 'FRITZ', 'LATENCY_SPIKE' if i % 3 else 'WAN_RECONNECT',
+                             start.strftime('%Y-%m-%d %H:%M:%S'), start.strftime('%Y-%m-%d %H:%M:%S'), '0s', 'x'])
+
+
+def failing_render(output_path):
+    with open(output_path, 'w') as f:
+        f.write('partial')
+    raise RuntimeError('boom')
+
+
+class TestParallelRendering:
+    """Test the process-pool chart pipeline and atomic writes"""
+
+    def test_figures_render_in_worker_processes(self):
+        """Verify each chart is rendered by a worker and moved into place without temp files"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            jobs = [(visualize_incidents._render_timeline, (input_path,), os.path.join(tmpdir, 'a.png')),
+                    (visualize_incidents._render_summary, (input_path,), os.path.join(tmpdir, 'b.png'))]
+
+            futures, executor = visualize_incidents.render_figures(jobs, workers=2)
+            results = [f.result() for f in futures.values()]
+            executor.shutdown()
+            files = sorted(os.listdir(tmpdir))
+
+        assert executor is not None
+        assert results == [os.path.join(tmpdir, 'a.png'), os.path.join(tmpdir, 'b.png')]
+        assert files == ['a.png', 'b.png', 'incidents.csv']
+
+    def test_failed_render_keeps_previous_file(self):
+        """Verify a failing chart leaves the old file in place and no temp file behind"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'chart.png')
+            with open(path, 'w') as f:
+                f.write('old')
+
+            futures, executor = visualize_incidents.render_figures([(failing_render, (), path)], workers=1)
+            with pytest.raises(RuntimeError):
+                futures[path].result()
+            with open(path) as f:
+                content = f.read()
+            files = os.listdir(tmpdir)
+
+        assert executor is None
+        assert content == 'old'
+        assert files == ['chart.png']
+
+    @patch('builtins.print')
+    def test_report_references_only_charts_of_this_run(self, mock_print):
+        """Verify a stale chart from an earlier run is not linked from the report"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            with open(os.path.join(tmpdir, 'incidents_summary.png'), 'w') as f:
+                f.write('stale')
+
+            visualize_incidents.main(['--input', input_path, '--output-dir', tmpdir, '--html',
+                                      '--no-summary', '--jobs', '2'])
+            with open(os.path.join(tmpdir, 'incidents_report.html'), encoding='utf-8') as f:
+                content = f.read()
+            leftovers = [n for n in os.listdir(tmpdir) if '.tmp' in n]
+
+        assert 'src="incidents_timeline.png"' in content
+        assert 'incidents_summary.png' not in content
+        assert leftovers == []
+
+
+def append_incident(path, minute, details='x', newline=True):
+    start = (datetime(2025, 10, 21, 12, 0, 0) + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        f.write(f"PC,LOSS_SPIKE,{start},{start},0s,{details}" + ('\r\n' if newline else ''))
+
+
+def write_durations_csv(path, durations):
+    """One incident per duration (seconds), a minute apart, alternating types."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'type', 'start', 'end', 'duration', 'details'])
+        for i, seconds in enumerate(durations):
+            start = datetime(2025, 10, 21, 12, 0, 0) + timedelta(minutes=i)
+            writer.writerow(['PC' if i % 2 else 'FRITZ', 'LOSS_SPIKE' if i % 2 else 'WAN_RECONNECT',
+                             start.strftime('%Y-%m-%d %H:%M:%S'),
+                             (start + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S'), '', f'#{i}'])
+
+
+class TestIncidentSummary:
+    """Test the one-pass streaming summary"""
+
+    def test_matches_statistics_of_loaded_rows(self):
+        """Verify counts and time range equal those computed from the full list"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_durations_csv(path, [5, 30, 120, 4000, 0, 600])
+            summary = visualize_incidents.summarize_csv(path)
+            incidents = visualize_incidents.load_incidents(path)
+
+        assert summary.total == len(incidents) == 6
+        assert summary.type_counts == Counter(inc['type'] for inc in incidents)
+        assert list(summary.source_counts) == ['FRITZ', 'PC']
+        assert summary.earliest == datetime(2025, 10, 21, 12, 0, 0)
+        assert summary.latest == max(inc['end'] for inc in incidents) == datetime(2025, 10, 21, 13, 9, 40)
+
+    def test_duration_histogram_per_type(self):
+        """Verify durations fall into the bin of their lower bound"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_durations_csv(path, [0, 10, 59, 60, 3600, 86400])
+            summary = visualize_incidents.summarize_csv(path)
+
+        # WAN_RECONNECT: 0, 59, 3600 / LOSS_SPIKE: 10, 60, 86400
+        assert summary.histograms['WAN_RECONNECT'] == [1, 1, 0, 0, 0, 1, 0]
+        assert summary.histograms['LOSS_SPIKE'] == [0, 1, 1, 0, 0, 0, 1]
+
+    def test_longest_incidents_use_a_fixed_size_heap(self):
+        """Verify only the top N are kept, longest first, and ties keep the earlier incident"""
+        summary = visualize_incidents.IncidentSummary(top=3)
+        start = datetime(2025, 10, 21, 12, 0, 0)
+        for i, seconds in enumerate([50, 10, 70, 50, 20, 90, 5]):
+            summary.add({'source': 'PC', 'type': 'LOSS_SPIKE', 'start': start,
+                         'end': start + timedelta(seconds=seconds), 'details': f'#{i}'})
+
+        assert len(summary._longest) == 3
+        assert [(s, inc['details']) for s, inc in summary.longest()] == [(90, '#5'), (70, '#2'), (50, '#0')]
+
+    def test_streamed_timeline_matches_rows(self):
+        """Verify the timeline collected while streaming equals the one built from the rows"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_durations_csv(path, [5, 30, 120, 4000])
+            streamed = visualize_incidents.summarize_csv(path, timeline=True).timeline
+            built = visualize_incidents.TimelineData(visualize_incidents.load_incidents(path))
+
+        assert sorted(streamed.spans) == sorted(built.spans)
+        for t in built.spans:
+            assert streamed.spans[t][0] == pytest.approx(built.spans[t][0], abs=1e-9)
+            assert streamed.spans[t][1] == pytest.approx(built.spans[t][1], abs=1e-9)
+
+    def test_main_without_report_does_not_keep_rows(self, capsys):
+        """Verify charts and console summary come from the stream when no HTML table is needed"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_durations_csv(path, [5, 30, 4000])
+            with patch('visualize_incidents.load_incidents', side_effect=AssertionError('rows loaded')), \
+                    patch('visualize_incidents.create_timeline_plot') as mock_timeline, \
+                    patch('visualize_incidents.create_summary_charts') as mock_summary:
+                visualize_incidents.main(['--input', path, '--output-dir', tmpdir, '--jobs', '1', '--top', '2'])
+        out = capsys.readouterr().out
+
+        assert isinstance(mock_timeline.call_args[0][0], visualize_incidents.TimelineData)
+        assert isinstance(mock_summary.call_args[0][0], visualize_incidents.IncidentSummary)
+        assert 'Longest incidents (top 2):' in out
+        assert '1:06:40' in out
+
+
+class TestRenderCache:
+    """Test skipping outputs whose inputs did not change"""
+
+    def run_main(self, tmpdir, input_path, *extra):
+        with patch('builtins.print'):
+            visualize_incidents.main(['--input', input_path, '--output-dir', tmpdir, '--html', '--jobs', '1', *extra])
+
+    def test_unchanged_input_is_not_rendered_again(self):
+        """Verify a second run with the same rows and options renders nothing"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            self.run_main(tmpdir, input_path)
+            with patch('visualize_incidents.create_timeline_plot') as mock_timeline, \
+                    patch('visualize_incidents.create_summary_charts') as mock_summary, \
+                    patch('visualize_incidents.create_html_report') as mock_html:
+                self.run_main(tmpdir, input_path)
+
+        assert not mock_timeline.called
+        assert not mock_summary.called
+        assert not mock_html.called
+
+    def test_changed_rows_render_only_affected_outputs(self):
+        """Verify changed details re-render timeline and report but not the summary (same counts)"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            self.run_main(tmpdir, input_path)
+            with open(input_path, encoding='utf-8') as f:
+                content = f.read()
+            with open(input_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content.replace(',x', ',y'))
+            with patch('visualize_incidents.create_timeline_plot') as mock_timeline, \
+                    patch('visualize_incidents.create_summary_charts') as mock_summary, \
+                    patch('visualize_incidents.create_html_report') as mock_html:
+                self.run_main(tmpdir, input_path)
+
+        assert mock_timeline.called
+        assert not mock_summary.called
+        assert mock_html.called
+
+    def test_options_and_no_cache_force_rendering(self):
+        """Verify other render options and --no-cache bypass the stored keys"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            self.run_main(tmpdir, input_path)
+            with patch('visualize_incidents.create_html_report') as mock_html:
+                self.run_main(tmpdir, input_path, '--compress-html')
+            with patch('visualize_incidents.create_timeline_plot') as mock_timeline:
+                self.run_main(tmpdir, input_path, '--no-cache')
+
+        assert mock_html.called
+        assert mock_timeline.called
+
+    def test_deleted_output_is_rendered_again(self):
+        """Verify a missing file is re-rendered even if its key is stored"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(input_path)
+            self.run_main(tmpdir, input_path)
+            os.unlink(os.path.join(tmpdir, 'incidents_summary.png'))
+            self.run_main(tmpdir, input_path)
+
+            assert os.path.exists(os.path.join(tmpdir, 'incidents_summary.png'))
+
+
+class TestWatch:
+    """Test following a growing incidents.csv"""
+
+    def test_tail_returns_only_complete_appended_lines(self):
+        """Verify poll() yields new rows once, waits for an incomplete line and tracks the file hash"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=3)
+            tail = visualize_incidents.IncidentTail(path)
+
+            first, _ = tail.poll()
+            append_incident(path, 10, newline=False)
+            partial, _ = tail.poll()
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                f.write('\r\n')
+            rest, reset = tail.poll()
+            digest = visualize_incidents.file_digest(path)
+
+        assert len(first) == 3
+        assert partial == []
+        assert [inc['type'] for inc in rest] == ['LOSS_SPIKE']
+        assert rest[0]['start'] == datetime(2025, 10, 21, 12, 10, 0)
+        assert reset is False
+        assert tail.digest() == digest
+
+    def test_tail_restarts_after_truncation(self):
+        """Verify a rewritten, shorter file is read again from the start"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=5)
+            tail = visualize_incidents.IncidentTail(path)
+            tail.poll()
+            write_incidents_csv(path, rows=2)
+
+            incidents, reset = tail.poll()
+
+        assert reset is True
+        assert len(incidents) == 2
+
+    @staticmethod
+    def live(path, tmpdir, **options):
+        """(LiveReport, update()) following path; update() returns the names written."""
+        tail = visualize_incidents.IncidentTail(path)
+        report = visualize_incidents.LiveReport()
+        cache = visualize_incidents.RenderCache(tmpdir)
+
+        def update():
+            incidents, reset = tail.poll()
+            if reset:
+                report.clear()
+            report.extend(incidents)
+            return visualize_incidents.update_outputs(report, tail.digest(), cache, **options)
+
+        return report, update
+
+    @patch('builtins.print')
+    def test_appended_rows_update_counts_and_table(self, mock_print):
+        """Verify an append updates counts, timeline data and report, and no change renders nothing"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            report, update = self.live(path, tmpdir, html=True, refresh=2)
+
+            first = update()
+            unchanged = update()
+            append_incident(path, 30, details='appended')
+            appended = update()
+            payload = read_chunk(os.path.join(tmpdir, 'incidents_report_rows', '0.js'))
+            with open(os.path.join(tmpdir, 'incidents_report.html'), encoding='utf-8') as f:
+                content = f.read()
+
+        assert first == ['incidents_timeline.png', 'incidents_summary.png', 'incidents_heatmap.png',
+                         'incidents_report_rows/0.js', 'incidents_report.html']
+        assert unchanged == []
+        assert appended == first
+        assert report.summary.type_counts['LOSS_SPIKE'] == 1
+        assert len(report.timeline) == 7
+        assert len(payload['rows']) == 7
+        assert payload['rows'][-1][4] == 'appended'
+        assert '<meta http-equiv="refresh" content="2">' in content
+        assert 'id="incident-data"' not in content
+        assert '<script src="incidents_report_rows/0.js?v=' in content
+
+    @pytest.mark.parametrize("compress", [False, True])
+    @patch('builtins.print')
+    def test_append_rewrites_only_the_last_row_chunk(self, mock_print, compress):
+        """Verify appended rows rewrite only the chunk they fall into and the small page"""
+        with tempfile.TemporaryDirectory() as tmpdir, patch('visualize_incidents.HTML_CHUNK_ROWS', 4):
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            _, update = self.live(path, tmpdir, timeline=False, summary=False, heatmap=False, html=True,
+                                  compress=compress)
+
+            first = update()
+            append_incident(path, 30, details='appended')
+            appended = update()
+            chunks = [read_chunk(os.path.join(tmpdir, 'incidents_report_rows', f'{i}.js')) for i in range(2)]
+
+        assert first == ['incidents_report_rows/0.js', 'incidents_report_rows/1.js', 'incidents_report.html']
+        assert appended == ['incidents_report_rows/1.js', 'incidents_report.html']
+        assert [len(chunk['rows']) for chunk in chunks] == [4, 3]
+        assert chunks[1]['rows'][-1][4] == 'appended'
+        # Every chunk has its own base: the first row of chunk 1 starts 4 minutes after chunk 0
+        assert chunks[1]['base'] - chunks[0]['base'] == 240
+        assert chunks[1]['rows'][0][2] == 0
+
+    @patch('builtins.print')
+    def test_truncated_input_drops_stale_row_chunks(self, mock_print):
+        """Verify chunks of rows that are gone after a rewrite are removed"""
+        with tempfile.TemporaryDirectory() as tmpdir, patch('visualize_incidents.HTML_CHUNK_ROWS', 4):
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            _, update = self.live(path, tmpdir, timeline=False, summary=False, heatmap=False, html=True)
+            update()
+            write_incidents_csv(path, rows=2)
+            update()
+            chunks = os.listdir(os.path.join(tmpdir, 'incidents_report_rows'))
+
+        assert chunks == ['0.js']
+
+    @patch('builtins.print')
+    def test_charts_are_keyed_by_what_they_draw(self, mock_print):
+        """Verify a row that does not change the timeline picture re-renders only the heatmap"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            append_incident(path, 30)
+            _, update = self.live(path, tmpdir, summary=False)
+            update()
+            append_incident(path, 30)  # same type and time: same bars in the timeline
+            appended = update()
+
+        assert appended == ['incidents_heatmap.png']
+
+    @patch('builtins.print')
+    def test_append_rewrites_only_the_touched_tiles(self, mock_print):
+        """Verify an append on a later day writes its hour tile and the index, not the other tiles"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            append_incident(path, 0)
+            _, update = self.live(path, tmpdir, timeline=False, summary=False, heatmap=False, zoom=True)
+            first = update()
+            tiles = os.path.join(tmpdir, 'incidents_tiles')
+            old_hour = os.path.join(tiles, 'hour', '2025-10-21.js')
+            os.utime(old_hour, (0, 0))
+            append_incident(path, 2 * 24 * 60 + 5)  # 2025-10-23 12:05
+            appended = update()
+            untouched = os.path.getmtime(old_hour) == 0
+            with open(os.path.join(tiles, 'index.js'), encoding='utf-8') as f:
+                index = json.loads(f.read()[len('netwatchTimeline.index('):-3])
+            with open(os.path.join(tiles, 'hour', '2025-10-23.js'), encoding='utf-8') as f:
+                tile = json.loads('[' + f.read()[len('netwatchTimeline.tile('):-3] + ']')[2]
+
+        assert first == ['incidents_timeline.html']
+        assert appended == ['incidents_tiles/day/2025-10.js', 'incidents_tiles/hour/2025-10-23.js',
+                            'incidents_tiles/index.js']
+        assert untouched
+        assert index['tiles']['hour'] == ['2025-10-21', '2025-10-23']
+        assert sum(row[2] for row in index['month']['rows']) == 8
+        assert tile['rows'] == [[12, 1, 1, 0]]
+
+    @patch('builtins.print')
+    def test_new_incident_type_rewrites_all_tiles(self, mock_print):
+        """Verify tiles are written from scratch when the type indexes change"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'incidents.csv')
+            write_incidents_csv(path, rows=6)
+            _, update = self.live(path, tmpdir, timeline=False, summary=False, heatmap=False, zoom=True)
+            update()
+            append_incident(path, 30)  # first LOSS_SPIKE
+            appended = update()
+
+        assert appended == ['incidents_timeline.html']
+
+    def test_describe_written_counts_folder_files(self):
+        """Verify the watch log lists files and counts the ones in folders"""
+        described = visualize_incidents.describe_written(['incidents_report_rows/3.js', 'incidents_report.html',
+                                                          'incidents_tiles/index.js', 'incidents_tiles/day/2025-10.js'])
+
+        assert described == 'incidents_report.html, 1 file(s) in incidents_report_rows/, 2 file(s) in incidents_tiles/'
+        assert visualize_incidents.describe_written([]) == 'nothing'
+
+    def test_main_watch_option(self):
+        """Verify --watch hands the options to the watch loop"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with patch('visualize_incidents.watch') as mock_watch:
+                visualize_incidents.main(['--input', 'incidents.csv', '--output-dir', tmpdir, '--watch',
+                                          '--interval', '0.5', '--html', '--no-summary'])
+
+        mock_watch.assert_called_once_with('incidents.csv', tmpdir, interval=0.5, timeline=True, summary=False,
+                                           heatmap=True, zoom=False, html=True, compress=False, weight='count',
+                                           use_cache=True)
+
+
 class TestMainFunction:
     """Test the main() function and CLI"""
     
@@ -302,7 +1027,8 @@ class TestMainFunction:
                 'visualize_incidents.py',
                 '--input', input_path,
                 '--output-dir', tmpdir,
-                '--html'
+                '--html',
+                '--jobs', '1'  # mocks only apply in this process
             ]):
                 visualize_incidents.main()
             
@@ -328,7 +1054,8 @@ class TestMainFunction:
                 'visualize_incidents.py',
                 '--input', input_path,
                 '--output-dir', tmpdir,
-                '--no-timeline'
+                '--no-timeline',
+                '--jobs', '1'  # mocks only apply in this process
             ]):
                 visualize_incidents.main()
             
@@ -354,7 +1081,8 @@ class TestMainFunction:
                 'visualize_incidents.py',
                 '--input', input_path,
                 '--output-dir', tmpdir,
-                '--no-summary'
+                '--no-summary',
+                '--jobs', '1'  # mocks only apply in this process
             ]):
                 visualize_incidents.main()
             
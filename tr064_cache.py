@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# tr064_cache.py
+# Persistenter, versionierter Cache der TR-064-Beschreibungen für fritzlog_pull und fritzbox_restart.
+#
+# Eine JSON-Datei pro Box (Host + Port). Sie gilt nur für das gespeicherte Modell, die Firmware
+# und die fritzconnection-Version. Gespeichert werden:
+#   - tr64desc.xml / igddesc.xml im Rohtext (klein, schnell geparst)
+#   - die SCPD-Beschreibungen nur der Dienste, die tatsächlich aufgerufen wurden
+# SCPDs werden erst beim ersten Aufruf eines Dienstes geladen (aus dem Cache, sonst von der Box).
+
+import json
+import os
+import threading
+
+import fritzconnection
+# Import-Pfad je nach fritzconnection-Version
+try:
+    from fritzconnection import FritzConnection
+except ImportError:
+    from fritzconnection.core.fritzconnection import FritzConnection  # fallback
+from fritzconnection.core.exceptions import FritzResourceError
+from fritzconnection.core.processor import Description, Scpd
+from fritzconnection.core.utils import get_content_from, get_xml_root
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "netwatch")
+IGD_DESC = "igddesc.xml"
+TR64_DESC = "tr64desc.xml"
+DESCRIPTIONS = (IGD_DESC, TR64_DESC)  # gleiche Reihenfolge wie fritzconnection
+
+
+def cache_path(cache_dir: str, address: str, port: int) -> str:
+    host = address.split("//")[-1]
+    for ch in ":/[]":
+        host = host.replace(ch, "_")
+    return os.path.join(cache_dir, f"tr064_{host}_{port}.json")
+
+
+def load_cache(path: str) -> dict | None:
+    """Liest eine Cache-Datei; None bei fehlender, kaputter oder veralteter Datei."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(data, dict) or data.get("version") != CACHE_VERSION
+            or data.get("fritzconnection") != fritzconnection.__version__):
+        return None
+    return data
+
+
+def save_cache(path: str, data: dict) -> bool:
+    """Schreibt atomar (tmp + replace). Fehler sind nicht fatal, der Cache ist nur eine Abkürzung."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        return False
+
+
+def box_identity(description: Description) -> tuple[str, str]:
+    """(Modell, Firmware) aus der tr64desc-Beschreibung."""
+    return description.device_model_name or "", description.system_display or ""
+
+
+class LazyServices(dict):
+    """Dienst-Tabelle, die die SCPD eines Dienstes erst beim ersten Zugriff lädt."""
+
+    def __init__(self, loader):
+        super().__init__()
+        self._loader = loader
+
+    def __getitem__(self, name):
+        service = super().__getitem__(name)
+        if service._scpd is None:
+            self._loader(service)
+        return service
+
+
+class CachedFritzConnection(FritzConnection):
+    """
+    FritzConnection mit eigenem Beschreibungs-Cache (Parameter wie FritzConnection).
+    verify_cache=True: eine Anfrage (tr64desc.xml) prüft Modell + Firmware vor der Nutzung;
+    verify_cache=False: keine Anfrage vor dem ersten SOAP-Aufruf.
+    Passt der interne Aufbau von fritzconnection nicht, wird die Beschreibung normal geladen.
+    """
+
+    def _load_router_api(self, use_cache=False, cache_directory=None, cache_format=None, verify_cache=True):
+        self.cache_path = cache_path(cache_directory or DEFAULT_CACHE_DIR, self.address, self.port)
+        self._cache_lock = threading.Lock()
+        try:
+            self._load_cached_api(verify_cache)
+        except (AttributeError, TypeError, KeyError, ValueError):
+            self.device_manager.descriptions = []
+            self.device_manager.services = {}
+            super()._load_router_api(use_cache=False)
+
+    def _fetch(self, name: str) -> str:
+        return get_content_from(f"{self.address}:{self.port}/{name}",
+                                timeout=self.timeout, session=self.session)
+
+    def _load_cached_api(self, verify_cache: bool) -> None:
+        data = load_cache(self.cache_path)
+        dirty = False
+        if data is None or verify_cache:
+            tr64 = self._fetch(TR64_DESC)
+            identity = box_identity(Description(get_xml_root(tr64)))
+            if data is None or (data["model"], data["firmware"]) != identity:
+                igd = None
+                try:
+                    igd = self._fetch(IGD_DESC)
+                except FritzResourceError:
+                    pass  # nicht jede Box liefert igddesc.xml
+                data = {
+                    "version": CACHE_VERSION,
+                    "fritzconnection": fritzconnection.__version__,
+                    "model": identity[0],
+                    "firmware": identity[1],
+                    "descriptions": {IGD_DESC: igd, TR64_DESC: tr64},
+                    "scpd": {},
+                }
+                dirty = True
+
+        self._cache = data
+        for name in DESCRIPTIONS:
+            xml = data["descriptions"].get(name)
+            if xml:
+                self.device_manager.descriptions.append(Description(get_xml_root(xml)))
+        self.device_manager.services = LazyServices(self._load_scpd)
+        self.device_manager.scan()
+        if dirty:
+            save_cache(self.cache_path, data)
+
+    def _load_scpd(self, service) -> None:
+        with self._cache_lock:
+            if service._scpd is not None:
+                return
+            cached = self._cache["scpd"].get(service.name)
+            if cached is not None:
+                service._scpd = Scpd.from_data(cached)
+                return
+            service.load_scpd(self.address, self.port,
+                              timeout=self.device_manager.timeout, session=self.device_manager.session)
+            self._cache["scpd"][service.name] = service._scpd.serialize()
+            save_cache(self.cache_path, self._cache)
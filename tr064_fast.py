@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# tr064_fast.py
+# Schlanker TR-064-Client für die Aktionen ohne Argumente aus collect_once und DeviceConfig:1 Reboot.
+#
+# - Envelope-Bytes werden pro (Dienst, Aktion) einmal vorgerendert (identisch zu fritzconnection's Soaper)
+# - eine persistente HTTP/1.1-Verbindung (http.client) statt requests
+# - Digest-Auth: Challenge wird gemerkt, folgende Anfragen senden Authorization sofort (kein 401-Roundtrip)
+# - Antworten werden mit XMLPullParser beim Lesen geparst
+# Dienst-/Aktionsbeschreibungen (controlURL, Typen der Rückgabewerte) kommen aus der FritzConnection,
+# alles andere (Aktionen mit Argumenten, unbekannte Dienste) wird an fc.call_action durchgereicht.
+
+import argparse
+import hashlib
+import http.client
+import os
+import ssl
+import statistics
+import time
+from types import SimpleNamespace
+from xml.etree.ElementTree import XMLPullParser
+
+from fritzconnection.core.soaper import Soaper, get_converted_value, raise_fritzconnection_error
+from fritzconnection.core.utils import localname
+
+READ_CHUNK = 8192
+_HASHES = {"MD5": hashlib.md5, "SHA-256": hashlib.sha256}
+
+
+def parse_challenge(header: str) -> dict | None:
+    """Digest-Challenge aus WWW-Authenticate (realm, nonce, qop, opaque, algorithm) oder None."""
+    if not header or not header.lower().startswith("digest "):
+        return None
+    fields = {}
+    rest = header[7:]
+    while rest:
+        key, _, rest = rest.strip().partition("=")
+        if rest.startswith('"'):
+            value, _, rest = rest[1:].partition('"')
+        else:
+            value, _, rest = rest.partition(",")
+        fields[key.strip().lower()] = value.strip()
+        rest = rest.lstrip(", ")
+    return fields
+
+
+class DigestState:
+    """Gemerkte Digest-Challenge; erzeugt Authorization-Header mit fortlaufendem Nonce-Zähler."""
+
+    def __init__(self, user: str, password: str):
+        self.user = user
+        self.password = password
+        self.challenge = None
+        self.nc = 0
+        self._hash = hashlib.md5
+        self._ha1 = None
+
+    def update(self, challenge: dict) -> None:
+        self.challenge = challenge
+        self.nc = 0
+        algorithm = challenge.get("algorithm", "MD5").upper()
+        self._hash = _HASHES.get(algorithm, hashlib.md5)
+        self._ha1 = self._h(f"{self.user}:{challenge.get('realm', '')}:{self.password}")
+
+    def _h(self, text: str) -> str:
+        return self._hash(text.encode("utf-8")).hexdigest()
+
+    def header(self, method: str, uri: str) -> str | None:
+        if self.challenge is None:
+            return None
+        c = self.challenge
+        ha2 = self._h(f"{method}:{uri}")
+        parts = [f'username="{self.user}"', f'realm="{c.get("realm", "")}"',
+                 f'nonce="{c.get("nonce", "")}"', f'uri="{uri}"']
+        qop = c.get("qop", "")
+        if "auth" in [q.strip() for q in qop.split(",")]:
+            self.nc += 1
+            nc = f"{self.nc:08x}"
+            cnonce = os.urandom(8).hex()
+            response = self._h(f"{self._ha1}:{c.get('nonce', '')}:{nc}:{cnonce}:auth:{ha2}")
+            parts += [f'response="{response}"', "qop=auth", f"nc={nc}", f'cnonce="{cnonce}"']
+        else:
+            response = self._h(f"{self._ha1}:{c.get('nonce', '')}:{ha2}")
+            parts.append(f'response="{response}"')
+        if "algorithm" in c:
+            parts.append(f"algorithm={c['algorithm']}")
+        if "opaque" in c:
+            parts.append(f'opaque="{c["opaque"]}"')
+        return "Digest " + ", ".join(parts)
+
+
+class FastTR064Client:
+    """
+    Drop-in für fc.call_action(service, action) in collect_once / reboot_fritzbox.
+    `fc` ist eine geladene FritzConnection (z. B. tr064_cache.CachedFritzConnection).
+    """
+
+    def __init__(self, fc, timeout: float | None = None):
+        self.fc = fc
+        self.address = fc.address
+        self.timeout = timeout if timeout is not None else (fc.timeout or 10)
+        scheme, _, hostport = fc.address.partition("://")
+        self.host = hostport or scheme
+        self.use_tls = scheme == "https"
+        self.port = fc.port
+        self.auth = DigestState(fc.soaper.user, fc.soaper.password) if fc.soaper.password else None
+        self._conn = None
+        self._prepared = {}
+        self.fast_calls = 0
+        self.fallback_calls = 0
+
+    # --- Verbindung ---
+
+    def _connect(self):
+        if self.use_tls:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout,
+                                               context=ssl._create_unverified_context())
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Vorbereitung ---
+
+    def _prepare(self, service_name: str, action_name: str):
+        """(controlURL, soapaction, Envelope-Bytes, {Rückgabewert: dataType}) einmal pro Aktion."""
+        key = (service_name, action_name)
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            service = self.fc.device_manager.services[service_name]
+            action = service.actions[action_name]
+            types = {}
+            for name, arg in action.arguments.items():
+                if arg.direction == "out":
+                    variable = service.state_variables[arg.relatedStateVariable]
+                    types[name] = (variable.dataType or "").lower()
+            body = Soaper.body_template.format(service_type=service.serviceType,
+                                               action_name=action_name, arguments="")
+            envelope = Soaper.envelope.format(body=body).encode("utf-8")
+            prepared = (service.controlURL, f"{service.serviceType}#{action_name}", envelope, types)
+            self._prepared[key] = prepared
+        return prepared
+
+    # --- Aufruf ---
+
+    def call_action(self, service_name: str, action_name: str, *, arguments: dict | None = None, **kwargs) -> dict:
+        if arguments or kwargs:
+            self.fallback_calls += 1
+            return self.fc.call_action(service_name, action_name, arguments=arguments, **kwargs)
+        service_name = self.fc.normalize_name(service_name)
+        try:
+            prepared = self._prepare(service_name, action_name)
+        except KeyError:
+            # unbekannter Dienst / unbekannte Aktion: Fehlermeldung wie fritzconnection
+            self.fallback_calls += 1
+            return self.fc.call_action(service_name, action_name)
+        self.fast_calls += 1
+        return self._execute(*prepared)
+
+    def _execute(self, url: str, soapaction: str, envelope: bytes, types: dict) -> dict:
+        authorized = False
+        for attempt in range(3):
+            reused = self._conn is not None
+            if self._conn is None:
+                self._conn = self._connect()
+            headers = {"soapaction": soapaction, "content-type": "text/xml", "charset": "utf-8"}
+            if self.auth:
+                auth = self.auth.header("POST", url)
+                if auth:
+                    headers["Authorization"] = auth
+            try:
+                self._conn.request("POST", url, body=envelope, headers=headers)
+                response = self._conn.getresponse()
+                if response.status == 200:
+                    result = self._parse(response, types)
+                else:
+                    content = response.read()
+            except OSError as e:
+                self.close()
+                if reused and attempt == 0 and not isinstance(e, TimeoutError):
+                    continue  # Keep-Alive-Verbindung war abgelaufen: einmal neu verbinden
+                raise
+            except Exception:
+                self.close()
+                raise
+            if response.will_close:
+                self.close()
+            if response.status == 200:
+                return result
+            challenge = parse_challenge(response.getheader("WWW-Authenticate", ""))
+            if response.status == 401 and self.auth and challenge and not authorized:
+                self.auth.update(challenge)
+                authorized = True
+                continue
+            raise_fritzconnection_error(SimpleNamespace(
+                status_code=response.status, content=content, text=content.decode("utf-8", "replace")))
+        raise http.client.HTTPException("keine Antwort nach Wiederholung")
+
+    @staticmethod
+    def _parse(response, types: dict) -> dict:
+        """Liest die Antwort blockweise und sammelt die bekannten Rückgabewerte."""
+        parser = XMLPullParser(events=("end",))
+        result = {}
+        while True:
+            chunk = response.read(READ_CHUNK)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                name = localname(element)
+                if name in types:
+                    value = element.text or ""
+                    try:
+                        value = get_converted_value(types[name], value)
+                    except ValueError:
+                        pass  # wie fritzconnection: unpassenden Wert unverändert liefern
+                    result[name] = value
+                    element.clear()
+        parser.close()
+        return result
+
+
+def benchmark(fc, fast: FastTR064Client, rounds: int = 20) -> dict:
+    """collect_once über FritzConnection.call_action vs. FastTR064Client; Sekunden pro Runde (Median)."""
+    import fritzlog_pull
+
+    timings = {}
+    for name, client in (("fritzconnection", fc), ("fast", fast)):
+        fritzlog_pull.collect_once(client)  # Aufwärmen (Digest-Challenge, SCPDs)
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            fritzlog_pull.collect_once(client)
+            samples.append(time.perf_counter() - started)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark: collect_once über fritzconnection vs. schnellen SOAP-Pfad")
+    ap.add_argument("--host", default="192.168.178.1", help="FRITZ!Box IP/Host (default: 192.168.178.1)")
+    ap.add_argument("--port", type=int, default=49000, help="TR-064-Port (default: 49000)")
+    ap.add_argument("--user", default=None, help="FRITZ!Box Benutzername")
+    ap.add_argument("--password", default=None, help="FRITZ!Box Passwort")
+    ap.add_argument("--rounds", type=int, default=20, help="Messrunden je Client (default: 20)")
+    ap.add_argument("--mock", action="store_true", help="Gegen eine lokale fritz_mock_server-Box messen")
+    args = ap.parse_args()
+
+    from tr064_cache import CachedFritzConnection
+
+    box = None
+    host, port, password = args.host, args.port, args.password
+    if args.mock:
+        import fritz_mock_server
+        box = fritz_mock_server.MockFritzBox("127.0.0.1", 0, seed=1).start()
+        host, port, password = "127.0.0.1", box.port, box.password
+    try:
+        fc = CachedFritzConnection(address=host, port=port, user=args.user, password=password, timeout=10)
+        fast = FastTR064Client(fc)
+        timings = benchmark(fc, fast, args.rounds)
+        fast.close()
+    finally:
+        if box:
+            box.stop()
+    for name, seconds in timings.items():
+        print(f"{name:16s} {seconds * 1000:8.2f} ms pro collect_once")
+    print(f"Faktor: {timings['fritzconnection'] / timings['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,80 +6,320 @@ Generates timeline plots, summary charts, and optionally an HTML report.
 """
 
 import argparse
+import base64
+import bisect
 import csv
+import hashlib
+import heapq
+import html
+import io
+import json
 import sys
 import os
-from datetime import datetime
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
 from collections import Counter
 
-try:
-    import matplotlib
-    matplotlib.use('Agg')  # Non-interactive backend
-    import matplotlib.pyplot as plt
-    import matplotlib.dates as mdates
-    from matplotlib.patches import Rectangle
-except ImportError:
-    print("ERROR: matplotlib is required. Install with: pip install matplotlib")
-    sys.exit(1)
-
 TIME_FMT = "%Y-%m-%d %H:%M:%S"
 
+TIMELINE_FILE = 'incidents_timeline.png'
+SUMMARY_FILE = 'incidents_summary.png'
+HEATMAP_FILE = 'incidents_heatmap.png'
+ZOOM_FILE = 'incidents_timeline.html'
+REPORT_FILE = 'incidents_report.html'
+# (title, file) in the HTML report
+FIGURES = (('Timeline', TIMELINE_FILE), ('Summary', SUMMARY_FILE), ('When Incidents Happen', HEATMAP_FILE),
+           ('Zoomable Timeline', ZOOM_FILE))
+
+# matplotlib is imported on first use, so --help and HTML-only runs start fast
+matplotlib = plt = mdates = Rectangle = None
+
+def load_matplotlib():
+    """Import matplotlib (Agg backend) once; exit with a hint if it is not installed."""
+    global matplotlib, plt, mdates, Rectangle
+    if plt is not None:
+        return
+    try:
+        import matplotlib
+        matplotlib.use('Agg')  # Non-interactive backend
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from matplotlib.patches import Rectangle
+    except ImportError:
+        print("ERROR: matplotlib is required. Install with: pip install matplotlib")
+        sys.exit(1)
+
 def parse_time(s):
     """Parse timestamp string to datetime object."""
     try:
+        # fromisoformat is much faster than strptime; only used for the exact TIME_FMT layout
+        if len(s) == 19 and s[4] == s[7] == '-' and s[10] == ' ' and s[13] == s[16] == ':':
+            return datetime.fromisoformat(s)
         return datetime.strptime(s, TIME_FMT)
     except Exception:
         return None
 
-def load_incidents(csv_path):
-    """Load incidents from CSV file."""
-    incidents = []
+def parse_incident(row):
+    """Parse start/end of a CSV row in place; None if either timestamp is missing or invalid."""
+    row['start'] = parse_time(row.get('start') or '')
+    row['end'] = parse_time(row.get('end') or '')
+    return row if row['start'] and row['end'] else None
+
+def iter_incidents(csv_path):
+    """Yield the valid incidents of a CSV file one at a time."""
     try:
         with open(csv_path, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
-                if row.get('start'):
-                    row['start'] = parse_time(row['start'])
-                if row.get('end'):
-                    row['end'] = parse_time(row['end'])
-                if row['start'] and row['end']:
-                    incidents.append(row)
+                if parse_incident(row):
+                    yield row
     except FileNotFoundError:
         print(f"ERROR: File not found: {csv_path}")
         sys.exit(1)
     except Exception as e:
         print(f"ERROR: Failed to load incidents: {e}")
         sys.exit(1)
+
+def load_incidents(csv_path):
+    """Load incidents from CSV file."""
+    return list(iter_incidents(csv_path))
+
+# ---------- Streaming summary ----------
+# Lower bounds (seconds) and labels of the duration histogram
+DURATION_BINS = (0, 10, 60, 300, 1800, 3600, 6 * 3600)
+DURATION_LABELS = ('<10s', '10s-1m', '1-5m', '5-30m', '30m-1h', '1-6h', '>=6h')
+TOP_INCIDENTS = 10
+
+class IncidentSummary:
+    """
+    Statistics of an incident stream, built in one pass: counts per type and source, time
+    range, a duration histogram per type and the `top` longest incidents (kept in a
+    fixed-size heap). Memory depends on the number of types and sources, not of incidents.
+    """
+    def __init__(self, top=TOP_INCIDENTS):
+        self.top = top
+        self.total = 0
+        self.type_counts = Counter()
+        self.source_counts = Counter()
+        self.histograms = {}  # type -> counts per DURATION_BINS
+        self.earliest = self.latest = None
+        self.timeline = None  # TimelineData, see summarize_csv()
+        self._longest = []  # min-heap of (seconds, -sequence, incident)
+    
+    def __len__(self):
+        return self.total
     
-    return incidents
+    def add(self, inc):
+        start, end = inc['start'], inc['end']
+        self.total += 1
+        self.type_counts[inc['type']] += 1
+        self.source_counts[inc['source']] += 1
+        if self.earliest is None or start < self.earliest:
+            self.earliest = start
+        if self.latest is None or end > self.latest:
+            self.latest = end
+        seconds = (end - start).total_seconds()
+        histogram = self.histograms.get(inc['type'])
+        if histogram is None:
+            histogram = self.histograms[inc['type']] = [0] * len(DURATION_BINS)
+        histogram[max(0, bisect.bisect_right(DURATION_BINS, seconds) - 1)] += 1
+        if self.top:
+            # Ties keep the earlier incident
+            item = (seconds, -self.total, inc)
+            if len(self._longest) < self.top:
+                heapq.heappush(self._longest, item)
+            elif item[:2] > self._longest[0][:2]:
+                heapq.heapreplace(self._longest, item)
+    
+    def extend(self, incidents):
+        for inc in incidents:
+            self.add(inc)
+    
+    def time_range(self):
+        return f"{self.earliest.strftime(TIME_FMT)} to {self.latest.strftime(TIME_FMT)}"
+    
+    def longest(self):
+        """The longest incidents, longest first: [(seconds, incident)]."""
+        return [(seconds, inc) for seconds, _, inc in sorted(self._longest, key=lambda x: x[:2], reverse=True)]
+
+def summarize_csv(csv_path, top=TOP_INCIDENTS, timeline=False):
+    """
+    Summarize a CSV file in one pass without keeping its rows. With timeline=True the start
+    and end of every incident are collected as well (16 bytes each instead of a row dict)
+    and returned as summary.timeline (TimelineData).
+    """
+    summary = IncidentSummary(top)
+    spans = {} if timeline else None
+    for inc in iter_incidents(csv_path):
+        summary.add(inc)
+        if spans is not None:
+            starts, ends = spans.setdefault(inc['type'], (array('d'), array('d')))
+            starts.append(_naive_epoch(inc['start']))
+            ends.append(_naive_epoch(inc['end']))
+    summary.timeline = TimelineData.from_epoch_seconds(spans) if spans is not None else None
+    return summary
+
+def print_summary(summary):
+    """Print counts, duration histogram and longest incidents to the console."""
+    print("\n=== Summary ===")
+    print(f"Total incidents: {summary.total}")
+    print("\nIncidents by type:")
+    for inc_type, count in summary.type_counts.most_common():
+        print(f"  {inc_type}: {count}")
+    
+    print("\nIncidents by source:")
+    for source, count in summary.source_counts.most_common():
+        print(f"  {source}: {count}")
+    
+    width = max(len(t) for t in summary.histograms)
+    print("\nDuration distribution:")
+    print(f"  {'':{width}s}" + ''.join(f"{label:>8s}" for label in DURATION_LABELS))
+    for inc_type, _ in summary.type_counts.most_common():
+        print(f"  {inc_type:{width}s}" + ''.join(f"{n:8d}" for n in summary.histograms[inc_type]))
+    
+    longest = summary.longest()
+    if longest:
+        print(f"\nLongest incidents (top {len(longest)}):")
+        for seconds, inc in longest:
+            print(f"  {inc['start'].strftime(TIME_FMT)}  {timedelta(seconds=int(seconds))!s:>9s}  "
+                  f"{inc['type']} ({inc['source']}) {inc.get('details') or ''}".rstrip())
+
+TIMELINE_WIDTH_IN = 14
+TIMELINE_DPI = 150
+
+def merge_segments(starts, ends, resolution):
+    """
+    Merge incidents of one type at render resolution.
+
+    starts/ends are matplotlib date numbers (days). Every bar is widened to at least
+    `resolution` (one pixel) and bars that start within one pixel of the previous bar's end
+    are merged. Returns (left, width) arrays in days, sorted by left.
+    """
+    import numpy as np
+    starts = np.asarray(starts, dtype=float)
+    ends = np.maximum(np.asarray(ends, dtype=float), starts + resolution)
+    if starts.size == 0:
+        return starts, starts
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    first = np.concatenate(([True], starts[1:] > reach[:-1] + resolution))
+    idx = np.flatnonzero(first)
+    left = starts[idx]
+    right = np.maximum.reduceat(ends, idx)
+    return left, right - left
+
+class TimelineData:
+    """
+    Start/end date numbers (days) of the incidents, grouped by type. extend() converts only
+    the rows it is given, so --watch adds appended incidents without touching the others.
+    """
+    def __init__(self, incidents=()):
+        self.spans = {}
+        self.extend(incidents)
+    
+    def __len__(self):
+        return sum(starts.size for starts, _ in self.spans.values())
+    
+    def epoch_seconds(self, types=None):
+        """
+        Starts and ends as seconds since 1970 (int64 arrays, see _naive_epoch) of all
+        incidents or only of the given types.
+        """
+        import numpy as np
+        offset = mdates.date2num(_EPOCH)
+        spans = [self.spans[t] for t in (self.spans if types is None else types)]
+        starts = np.concatenate([starts for starts, _ in spans])
+        ends = np.concatenate([ends for _, ends in spans])
+        return (np.rint((starts - offset) * 86400).astype(np.int64),
+                np.rint((ends - offset) * 86400).astype(np.int64))
+    
+    @classmethod
+    def from_epoch_seconds(cls, spans):
+        """Build from {type: (starts, ends)} in seconds since 1970 (naive, see _naive_epoch)."""
+        data = cls()
+        if spans:
+            load_matplotlib()
+            import numpy as np
+            offset = mdates.date2num(_EPOCH)
+            for t, (starts, ends) in spans.items():
+                data.spans[t] = (np.frombuffer(starts) / 86400 + offset, np.frombuffer(ends) / 86400 + offset)
+        return data
+    
+    def extend(self, incidents):
+        groups = {}
+        for inc in incidents:
+            groups.setdefault(inc['type'], []).append(inc)
+        if not groups:
+            return
+        load_matplotlib()
+        import numpy as np
+        for t, rows in groups.items():
+            starts = mdates.date2num([inc['start'] for inc in rows])
+            ends = mdates.date2num([inc['end'] for inc in rows])
+            if t in self.spans:
+                old_starts, old_ends = self.spans[t]
+                starts, ends = np.concatenate((old_starts, starts)), np.concatenate((old_ends, ends))
+            self.spans[t] = (starts, ends)
 
 def create_timeline_plot(incidents, output_path):
-    """Create a timeline visualization of incidents."""
+    """
+    Create a timeline visualization of incidents (one PolyCollection per incident type).
+    incidents: list of incidents or a TimelineData.
+    """
     if not incidents:
         print("No incidents to plot.")
         return
+    draw_timeline(incidents if isinstance(incidents, TimelineData) else TimelineData(incidents), output_path)
+
+def timeline_segments(data):
+    """
+    What draw_timeline draws from a TimelineData: (x0, x1, {type: (left, width)}) in date
+    numbers, the incidents of each type merged at one-pixel resolution (merge_segments).
+    """
+    x0 = min(float(starts.min()) for starts, _ in data.spans.values())
+    x1 = max(float(ends.max()) for _, ends in data.spans.values())
+    span = max(x1 - x0, 1 / 1440)  # at least one minute
+    resolution = span / (TIMELINE_WIDTH_IN * TIMELINE_DPI)  # one pixel in days
+    return x0, x1, {t: merge_segments(*data.spans[t], resolution) for t in sorted(data.spans)}
+
+def draw_timeline(data, output_path):
+    """Render a TimelineData to output_path."""
+    draw_timeline_segments(timeline_segments(data), output_path)
+
+def draw_timeline_segments(segments, output_path):
+    """Render the timeline_segments() of a TimelineData to output_path."""
+    load_matplotlib()
+    import numpy as np
+    from matplotlib.collections import PolyCollection
+    
+    x0, x1, merged = segments
+    span = max(x1 - x0, 1 / 1440)
     
     # Group incidents by type
-    incident_types = sorted(set(inc['type'] for inc in incidents))
+    incident_types = list(merged)
     type_to_y = {t: i for i, t in enumerate(incident_types)}
     
     # Color map for different incident types
     colors = plt.cm.tab20(range(len(incident_types)))
     type_colors = {t: colors[i] for i, t in enumerate(incident_types)}
     
-    fig, ax = plt.subplots(figsize=(14, max(8, len(incident_types) * 0.5)))
+    fig, ax = plt.subplots(figsize=(TIMELINE_WIDTH_IN, max(8, len(incident_types) * 0.5)))
     
-    # Plot each incident as a horizontal bar
-    for inc in incidents:
-        y = type_to_y[inc['type']]
-        start = inc['start']
-        end = inc['end']
-        duration = (end - start).total_seconds() / 60  # minutes
-        
-        # Draw the incident bar
-        ax.barh(y, duration / 60, left=mdates.date2num(start), 
-                height=0.6, color=type_colors[inc['type']], 
-                alpha=0.7, edgecolor='black', linewidth=0.5)
+    # One artist per incident type instead of one per incident
+    for t, y in type_to_y.items():
+        left, width = merged[t]
+        verts = np.empty((left.size, 4, 2))
+        verts[:, :, 0] = np.column_stack((left, left, left + width, left + width))
+        verts[:, :, 1] = np.array([y - 0.3, y + 0.3, y + 0.3, y - 0.3])
+        ax.add_collection(PolyCollection(verts, facecolors=[type_colors[t]], alpha=0.7,
+                                         edgecolors='black', linewidths=0.5))
+    
+    # Collections do not autoscale the axes
+    ax.set_xlim(x0 - span * 0.02, x1 + span * 0.02)
+    ax.set_ylim(-0.5, len(incident_types) - 0.5)
     
     # Format the plot
     ax.set_yticks(range(len(incident_types)))
@@ -97,26 +337,33 @@ def create_timeline_plot(incidents, output_path):
     ax.grid(True, axis='x', alpha=0.3, linestyle='--')
     
     # Add source legend
-    sources = sorted(set(inc['source'] for inc in incidents))
     legend_elements = [Rectangle((0, 0), 1, 1, fc=type_colors[t], alpha=0.7, edgecolor='black', linewidth=0.5, label=t) 
                       for t in incident_types]
     ax.legend(handles=legend_elements[:10], loc='upper left', bbox_to_anchor=(1.01, 1), 
               fontsize=9, title='Incident Types')
     
     plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.savefig(output_path, dpi=TIMELINE_DPI, bbox_inches='tight')
     plt.close()
     print(f"Timeline plot saved to: {output_path}")
 
-def create_summary_charts(incidents, output_dir):
-    """Create summary charts: pie chart and bar chart."""
+def create_summary_charts(incidents, output_dir, filename=SUMMARY_FILE):
+    """Create summary charts: pie chart and bar chart. incidents: list or IncidentSummary."""
     if not incidents:
         print("No incidents to summarize.")
         return
     
     # Count incidents by type
-    type_counts = Counter(inc['type'] for inc in incidents)
-    source_counts = Counter(inc['source'] for inc in incidents)
+    if isinstance(incidents, IncidentSummary):
+        type_counts, source_counts = incidents.type_counts, incidents.source_counts
+    else:
+        type_counts = Counter(inc['type'] for inc in incidents)
+        source_counts = Counter(inc['source'] for inc in incidents)
+    draw_summary(type_counts, source_counts, os.path.join(output_dir, filename))
+
+def draw_summary(type_counts, source_counts, output_path):
+    """Render the summary charts from the type and source counts to output_path."""
+    load_matplotlib()
     
     # Create a figure with two subplots
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
@@ -150,151 +397,482 @@ def create_summary_charts(incidents, output_dir):
                     f'{int(height)}', ha='center', va='bottom', fontsize=10)
     
     plt.tight_layout()
-    output_path = os.path.join(output_dir, 'incidents_summary.png')
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
     print(f"Summary charts saved to: {output_path}")
 
-def create_html_report(incidents, output_path):
-    """Create an interactive HTML report."""
+# ---------- Heatmaps ----------
+HEATMAP_WEIGHTS = ('count', 'duration')
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+def heatmap_matrices(starts, ends, weight='count'):
+    """
+    Day x hour and hour-of-week matrices from start/end epoch seconds.
+
+    weight='count' counts incidents in the hour they started (vectorized bincount); 'duration'
+    sums incident minutes per hour, spread over every hour an incident covers (covered_seconds),
+    so a 6-hour outage adds 60 minutes to each of its hours instead of 360 to the first.
+    Returns (calendar[days, 24], first day as datetime, week[7, 24]).
+    """
+    import numpy as np
+    starts = np.asarray(starts, dtype=np.int64)
+    days = starts // 86400
+    first = int(days.min())
+    if weight == 'count':
+        hours = (starts % 86400) // 3600
+        ndays = int(days.max()) - first + 1
+        calendar = np.bincount((days - first) * 24 + hours, minlength=ndays * 24).reshape(ndays, 24)
+        weekday = (days + 3) % 7  # 1970-01-01 was a Thursday
+        week = np.bincount(weekday * 24 + hours, minlength=7 * 24).reshape(7, 24)
+        return calendar, _EPOCH + timedelta(days=first), week
+    ends = np.maximum(np.asarray(ends, dtype=np.int64), starts)
+    ndays = int(max(days.max(), ((ends - 1) // 86400).max())) - first + 1
+    edges = first * 86400 + 3600 * np.arange(ndays * 24 + 1)
+    calendar = (covered_seconds(starts, ends, edges) / 60).reshape(ndays, 24)
+    week = np.zeros((7, 24))
+    np.add.at(week, (first + np.arange(ndays) + 3) % 7, calendar)
+    return calendar, _EPOCH + timedelta(days=first), week
+
+def create_heatmaps(incidents, output_path, weight='count'):
+    """
+    Create a calendar (day x hour) and an hour-of-week heatmap.
+    incidents: list of incidents or a TimelineData.
+    """
     if not incidents:
-        print("No incidents to report.")
+        print("No incidents for heatmaps.")
         return
+    data = incidents if isinstance(incidents, TimelineData) else TimelineData(incidents)
+    draw_heatmaps(heatmap_matrices(*data.epoch_seconds(), weight), weight, output_path)
+
+def draw_heatmaps(matrices, weight, output_path):
+    """Render the heatmap_matrices() to output_path."""
+    calendar, first_day, week = matrices
+    load_matplotlib()
+    label = 'Incidents' if weight == 'count' else 'Incident minutes'
     
-    # Count statistics
-    total = len(incidents)
-    type_counts = Counter(inc['type'] for inc in incidents)
-    source_counts = Counter(inc['source'] for inc in incidents)
-    
-    # Get time range
-    start_times = [inc['start'] for inc in incidents if inc['start']]
-    end_times = [inc['end'] for inc in incidents if inc['end']]
-    time_range = ""
-    if start_times and end_times:
-        earliest = min(start_times)
-        latest = max(end_times)
-        time_range = f"{earliest.strftime(TIME_FMT)} to {latest.strftime(TIME_FMT)}"
-    
-    # Generate HTML
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Network Incidents Report</title>
-    <style>
-        body {{
+    ndays = calendar.shape[0]
+    calendar_height = min(max(ndays * 0.2, 2), 12)
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, calendar_height + 3.5),
+                                   gridspec_kw={'height_ratios': [calendar_height, 3]})
+    
+    # Calendar: one row per day, at most ~31 date labels
+    image = ax1.imshow(calendar, aspect='auto', cmap='YlOrRd', interpolation='nearest')
+    rows = range(0, ndays, max(1, ndays // 31))
+    ax1.set_yticks(list(rows))
+    ax1.set_yticklabels([(first_day + timedelta(days=d)).strftime('%a %Y-%m-%d') for d in rows], fontsize=8)
+    ax1.set_xticks(range(24))
+    ax1.set_xlabel('Hour of day', fontsize=11)
+    ax1.set_title(f'{label} per day and hour', fontsize=12, fontweight='bold')
+    fig.colorbar(image, ax=ax1, label=label)
+    
+    # Hour of week: all weeks added up
+    image = ax2.imshow(week, aspect='auto', cmap='YlOrRd', interpolation='nearest')
+    ax2.set_yticks(range(7))
+    ax2.set_yticklabels(WEEKDAYS)
+    ax2.set_xticks(range(24))
+    ax2.set_xlabel('Hour of day', fontsize=11)
+    ax2.set_title(f'{label} per hour of the week', fontsize=12, fontweight='bold')
+    fig.colorbar(image, ax=ax2, label=label)
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f"Heatmaps saved to: {output_path}")
+
+HTML_STYLE = """    <style>
+        body {
             font-family: Arial, sans-serif;
             margin: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background-color: white;
             padding: 30px;
             border-radius: 8px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #333;
             border-bottom: 3px solid #4CAF50;
             padding-bottom: 10px;
-        }}
-        h2 {{
+        }
+        h2 {
             color: #555;
             margin-top: 30px;
-        }}
-        .summary {{
+        }
+        .summary {
             background-color: #e8f5e9;
             padding: 15px;
             border-radius: 5px;
             margin: 20px 0;
-        }}
-        .summary-grid {{
+        }
+        .summary-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             margin-top: 15px;
-        }}
-        .summary-item {{
+        }
+        .summary-item {
             background-color: white;
             padding: 15px;
             border-radius: 5px;
             text-align: center;
             box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        .summary-item .number {{
+        }
+        .summary-item .number {
             font-size: 32px;
             font-weight: bold;
             color: #4CAF50;
-        }}
-        .summary-item .label {{
+        }
+        .summary-item .label {
             color: #666;
             font-size: 14px;
             margin-top: 5px;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 20px;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 12px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
-        th {{
+        }
+        th {
             background-color: #4CAF50;
             color: white;
             font-weight: bold;
-        }}
-        tr:hover {{
+        }
+        tr:hover {
             background-color: #f5f5f5;
-        }}
-        .incident-type {{
+        }
+        .incident-type {
             display: inline-block;
             padding: 4px 8px;
             border-radius: 3px;
             font-size: 12px;
             font-weight: bold;
-        }}
-        .type-PC {{ background-color: #FF6B6B; color: white; }}
-        .type-FRITZ {{ background-color: #4ECDC4; color: white; }}
-        .charts {{
+        }
+        .type-PC { background-color: #FF6B6B; color: white; }
+        .type-FRITZ { background-color: #4ECDC4; color: white; }
+        .charts {
             margin: 30px 0;
             text-align: center;
-        }}
-        .charts img {{
+        }
+        .charts img {
             max-width: 100%;
             height: auto;
             margin: 10px 0;
             border: 1px solid #ddd;
             border-radius: 5px;
-        }}
+        }
+        .incident-filter {
+            display: flex;
+            gap: 10px;
+            margin: 15px 0 10px 0;
+            align-items: center;
+        }
+        .incident-filter input {
+            flex: 1;
+            padding: 6px;
+        }
+        .incident-grid {
+            display: grid;
+            grid-template-columns: 90px 190px 160px 160px 90px 1fr;
+            align-items: center;
+        }
+        .incident-grid > div {
+            padding: 0 8px;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+        .incident-head {
+            background-color: #4CAF50;
+            color: white;
+            font-weight: bold;
+            height: 40px;
+        }
+        .incident-head > div {
+            cursor: pointer;
+            user-select: none;
+        }
+        .incident-view {
+            height: 600px;
+            overflow-y: auto;
+            position: relative;
+            border: 1px solid #ddd;
+        }
+        .incident-row {
+            position: absolute;
+            left: 0;
+            right: 0;
+            height: 28px;
+            border-bottom: 1px solid #eee;
+        }
+        .incident-row:hover {
+            background-color: #f5f5f5;
+        }
     </style>
-</head>
+"""
+
+HTML_CHUNK_ROWS = 5000
+
+# Client side of the incident table: decodes the embedded payload (or, in --watch mode, the
+# row chunk scripts) and renders only the visible rows (virtual scrolling), with sort by
+# column header and text/type filter.
+INCIDENT_TABLE_JS = r"""
+(async function () {
+    async function decode(encoding, text) {
+        if (encoding !== 'gzip-base64') return JSON.parse(text);
+        const bytes = Uint8Array.from(atob(text.trim()), c => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return await new Response(stream).json();
+    }
+    let data;
+    if (window.INCIDENT_CHUNKS) {
+        // Every chunk has its own base and source/type lists: merge into one payload with base 0
+        data = {base: 0, rows: [], sources: [], types: []};
+        const seen = {sources: new Map(), types: new Map()};
+        const id = (list, name) => {
+            if (!seen[list].has(name)) seen[list].set(name, data[list].push(name) - 1);
+            return seen[list].get(name);
+        };
+        for (const [encoding, chunk] of window.INCIDENT_CHUNKS) {
+            const part = encoding === 'json' ? chunk : await decode(encoding, chunk);
+            const src = part.sources.map(s => id('sources', s)), typ = part.types.map(t => id('types', t));
+            for (const r of part.rows) data.rows.push([src[r[0]], typ[r[1]], part.base + r[2], r[3], r[4]]);
+        }
+    } else {
+        const el = document.getElementById('incident-data');
+        data = await decode(el.dataset.encoding, el.textContent);
+    }
+    const rows = data.rows, SRC = data.sources, TYP = data.types, base = data.base;
+    const ROW_H = 28, MAX_H = 10000000;  // browsers cap element heights (~17M px in Firefox)
+    const view = document.getElementById('incident-view');
+    const spacer = document.getElementById('incident-spacer');
+    const count = document.getElementById('incident-count');
+    const text = document.getElementById('incident-text');
+    const type = document.getElementById('incident-type');
+    const esc = s => String(s).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+    const fmtTime = s => new Date((base + s) * 1000).toISOString().slice(0, 19).replace('T', ' ');
+    const fmtDur = s => {
+        if (s < 60) return s + 's';
+        const m = Math.floor(s / 60);
+        return m < 60 ? m + 'm ' + (s % 60) + 's' : Math.floor(m / 60) + 'h ' + (m % 60) + 'm';
+    };
+    // row: [source index, type index, start offset s, duration s, details]
+    const KEYS = [r => SRC[r[0]], r => TYP[r[1]], r => r[2], r => r[2] + r[3], r => r[3], r => r[4]];
+    let order = new Uint32Array(0), sortCol = 2, sortDir = 1;
+
+    TYP.map((t, i) => [t, i]).sort().forEach(([t, i]) => type.add(new Option(t, i)));
+
+    function apply() {
+        const needle = text.value.trim().toLowerCase();
+        const wanted = type.value === '' ? -1 : Number(type.value);
+        const keep = [];
+        for (let i = 0; i < rows.length; i++) {
+            const r = rows[i];
+            if (wanted >= 0 && r[1] !== wanted) continue;
+            if (needle && !(SRC[r[0]] + ' ' + TYP[r[1]] + ' ' + r[4]).toLowerCase().includes(needle)) continue;
+            keep.push(i);
+        }
+        const key = KEYS[sortCol];
+        order = Uint32Array.from(keep).sort((a, b) => {
+            const x = key(rows[a]), y = key(rows[b]);
+            return (x < y ? -1 : x > y ? 1 : a - b) * sortDir;
+        });
+        spacer.style.height = Math.min(order.length * ROW_H, MAX_H) + 'px';
+        count.textContent = order.length + ' of ' + rows.length + ' incidents';
+        render();
+    }
+
+    function render() {
+        // fractional index of the top row; equals scrollTop / ROW_H unless the height is capped
+        const visible = view.clientHeight / ROW_H;
+        const maxScroll = Math.max(1, Math.min(order.length * ROW_H, MAX_H) - view.clientHeight);
+        const pos = Math.min(1, view.scrollTop / maxScroll) * Math.max(0, order.length - visible);
+        const first = Math.max(0, Math.floor(pos) - 5);
+        const last = Math.min(order.length, Math.ceil(pos + visible) + 5);
+        const html = [];
+        for (let k = first; k < last; k++) {
+            const r = rows[order[k]], src = SRC[r[0]];
+            const top = view.scrollTop + (k - pos) * ROW_H;
+            html.push('<div class="incident-row incident-grid" style="top:' + top + 'px">' +
+                '<div><span class="incident-type type-' + esc(src) + '">' + esc(src) + '</span></div>' +
+                '<div>' + esc(TYP[r[1]]) + '</div><div>' + fmtTime(r[2]) + '</div>' +
+                '<div>' + fmtTime(r[2] + r[3]) + '</div><div>' + fmtDur(r[3]) + '</div>' +
+                '<div title="' + esc(r[4]) + '">' + esc(r[4]) + '</div></div>');
+        }
+        spacer.innerHTML = html.join('');
+    }
+
+    let timer = null;
+    text.addEventListener('input', () => { clearTimeout(timer); timer = setTimeout(apply, 150); });
+    type.addEventListener('change', apply);
+    view.addEventListener('scroll', () => requestAnimationFrame(render));
+    document.querySelectorAll('#incident-head > div').forEach((head, col) => head.addEventListener('click', () => {
+        sortDir = sortCol === col ? -sortDir : 1;
+        sortCol = col;
+        apply();
+    }));
+    apply();
+})();
+"""
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+def _naive_epoch(dt):
+    """Seconds of a naive datetime as if it were UTC (the page formats it back the same way)."""
+    return (dt - _EPOCH) // _SECOND
+
+class _TextSink:
+    """Writes JSON text into a <script> element (only '</' needs escaping there)."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, text):
+        self.f.write(text.replace("</", "<\\/"))
+
+    def close(self):
+        pass
+
+class _GzipBase64Sink:
+    """Gzip-compresses JSON text on the fly and writes it base64-encoded."""
+
+    def __init__(self, f):
+        self.f = f
+        self.z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        self.rest = b""
+
+    def _emit(self, data):
+        data = self.rest + data
+        cut = len(data) - len(data) % 3  # base64 needs multiples of 3 bytes per chunk
+        self.f.write(base64.b64encode(data[:cut]).decode("ascii"))
+        self.rest = data[cut:]
+
+    def write(self, text):
+        self._emit(self.z.compress(text.encode("utf-8")))
+
+    def close(self):
+        self._emit(self.z.flush())
+        self.f.write(base64.b64encode(self.rest).decode("ascii"))
+        self.rest = b""
+
+def write_incident_payload(sink, incidents, base):
+    """
+    Stream incidents (sorted by start) as compact JSON:
+    {"base": epoch, "rows": [[source, type, start offset s, duration s, details], ...],
+     "sources": [...], "types": [...]} - source and type are indexes into the lists.
+    """
+    sources, types = {}, {}
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    sink.write('{"base":%d,"rows":[' % base)
+    for i in range(0, len(incidents), HTML_CHUNK_ROWS):
+        chunk = []
+        for inc in incidents[i:i + HTML_CHUNK_ROWS]:
+            start = _naive_epoch(inc['start'])
+            duration = max(0, _naive_epoch(inc['end']) - start)
+            source = sources.setdefault(inc['source'], len(sources))
+            kind = types.setdefault(inc['type'], len(types))
+            chunk.append(f"[{source},{kind},{start - base},{duration},{dumps(inc.get('details') or '')}]")
+        sink.write((',' if i else '') + ','.join(chunk))
+    sink.write('],"sources":%s,"types":%s}' % (json.dumps(list(sources), ensure_ascii=False),
+                                               json.dumps(list(types), ensure_ascii=False)))
+    sink.close()
+
+def write_row_chunk(incidents, compress, output_path):
+    """
+    Rows of the --watch report as a script the page loads: INCIDENT_CHUNKS.push([encoding,
+    payload]) with the payload of write_incident_payload (base = earliest start of the rows).
+    """
+    base = min(_naive_epoch(inc['start']) for inc in incidents)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        if compress:
+            f.write('INCIDENT_CHUNKS.push(["gzip-base64","')
+            write_incident_payload(_GzipBase64Sink(f), incidents, base)
+            f.write('"]);\n')
+        else:
+            f.write('INCIDENT_CHUNKS.push(["json",')
+            write_incident_payload(_TextSink(f), incidents, base)
+            f.write(']);\n')
+
+def create_html_report(incidents, output_path, compress=False, figures=None, summary=None):
+    """
+    Create an interactive HTML report.
+
+    The page is written in one streaming pass. Incidents are embedded as compact JSON
+    (gzip + base64 with compress=True) and shown by a virtual-scrolling table, so the DOM
+    only holds the visible rows. figures: [(title, file name)] to reference; None = the
+    timeline and summary PNGs that exist next to the report. summary: IncidentSummary of
+    the incidents if the caller already has one. The file is replaced atomically.
+    """
+    if not incidents:
+        print("No incidents to report.")
+        return
+    
+    # Count statistics and time range in one pass
+    if summary is None:
+        summary = IncidentSummary(top=0)
+        summary.extend(incidents)
+    
+    if figures is None:
+        folder = os.path.dirname(output_path)
+        figures = [(title, name) for title, name in FIGURES
+                   if os.path.exists(os.path.join(folder, name))]
+    
+    tmp = temp_path(output_path)
+    try:
+        _write_html_report(tmp, incidents, summary, figures, compress)
+        os.replace(tmp, output_path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    
+    print(f"HTML report saved to: {output_path}")
+
+def _write_html_report(path, incidents, summary, figures, compress, refresh=None, rows=None):
+    # rows: script paths of the row chunks (--watch) instead of the embedded payload
+    total, type_counts, source_counts = summary.total, summary.type_counts, summary.source_counts
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Network Incidents Report</title>
+""")
+        if refresh:
+            # --watch: the browser reloads the report while it is being updated
+            f.write(f'    <meta http-equiv="refresh" content="{int(refresh)}">\n')
+        f.write(HTML_STYLE)
+        f.write(f"""</head>
 <body>
     <div class="container">
         <h1>Network Incidents Report</h1>
         <div class="summary">
-            <strong>Analysis Period:</strong> {time_range}
+            <strong>Analysis Period:</strong> {summary.time_range()}
             <div class="summary-grid">
                 <div class="summary-item">
                     <div class="number">{total}</div>
                     <div class="label">Total Incidents</div>
                 </div>
-"""
-    
-    # Add summary items for each source
-    for source, count in source_counts.items():
-        html += f"""                <div class="summary-item">
+""")
+        
+        # Add summary items for each source
+        for source, count in source_counts.items():
+            f.write(f"""                <div class="summary-item">
                     <div class="number">{count}</div>
-                    <div class="label">{source} Incidents</div>
+                    <div class="label">{html.escape(source)} Incidents</div>
                 </div>
-"""
-    
-    html += """            </div>
+""")
+        
+        f.write("""            </div>
         </div>
         
         <h2>Incident Type Distribution</h2>
@@ -304,77 +882,859 @@ def create_html_report(incidents, output_path):
                 <th>Count</th>
                 <th>Percentage</th>
             </tr>
-"""
-    
-    # Add type distribution rows
-    for inc_type, count in type_counts.most_common():
-        percentage = (count / total) * 100
-        html += f"""            <tr>
-                <td>{inc_type}</td>
+""")
+        
+        # Add type distribution rows
+        for inc_type, count in type_counts.most_common():
+            percentage = (count / total) * 100
+            f.write(f"""            <tr>
+                <td>{html.escape(inc_type)}</td>
                 <td>{count}</td>
                 <td>{percentage:.1f}%</td>
             </tr>
-"""
-    
-    html += """        </table>
+""")
+        
+        f.write("""        </table>
         
         <h2>Visualizations</h2>
         <div class="charts">
+""")
+        
+        for title, name in figures:
+            if name.endswith('.html'):
+                # A page of its own (the zoomable timeline), linked instead of embedded
+                f.write(f"""            <h3>{html.escape(title)}</h3>
+            <p><a href="{html.escape(name)}">Open {html.escape(title.lower())}</a></p>
+""")
+                continue
+            f.write(f"""            <h3>{html.escape(title)}</h3>
+            <img src="{html.escape(name)}" alt="Incidents {html.escape(title)}">
+""")
+        
+        f.write("""        </div>
+        
+        <h2>Detailed Incidents</h2>
+        <div class="incident-filter">
+            <input id="incident-text" type="search" placeholder="Filter source, type, details...">
+            <select id="incident-type"><option value="">All types</option></select>
+            <span id="incident-count"></span>
+        </div>
+        <div id="incident-head" class="incident-grid incident-head">
+            <div>Source</div><div>Type</div><div>Start</div><div>End</div><div>Duration</div><div>Details</div>
+        </div>
+        <div id="incident-view" class="incident-view"><div id="incident-spacer"></div></div>
+    </div>
+""")
+        if rows is not None:
+            f.write('    <script>window.INCIDENT_CHUNKS = [];</script>\n')
+            for src in rows:
+                f.write(f'    <script src="{html.escape(src)}"></script>\n')
+            f.write('    <script>')
+        else:
+            encoding = 'gzip-base64' if compress else 'json'
+            f.write(f'    <script id="incident-data" type="application/json" data-encoding="{encoding}">')
+            sink = _GzipBase64Sink(f) if compress else _TextSink(f)
+            write_incident_payload(sink, sorted(incidents, key=lambda x: x['start']),
+                                   _naive_epoch(summary.earliest))
+            f.write('</script>\n    <script>')
+        f.write(INCIDENT_TABLE_JS)
+        f.write("""</script>
+</body>
+</html>
+""")
+
+# ---------- Zoomable timeline ----------
+TILES_DIR = 'incidents_tiles'
+TILE_LEVELS = ('month', 'day', 'hour')
+
+def covered_seconds(left, right, edges):
+    """
+    Seconds of the intervals [left, right) that fall into each bucket between edges; long
+    intervals are split over the buckets they cover, overlapping intervals add up. Uses the
+    cumulative coverage at every edge (from the sorted starts and ends), so it stays vectorized.
+    """
+    import numpy as np
+    edges = np.asarray(edges, dtype=float)
+    if left.size == 0:
+        return np.zeros(edges.size - 1)
+    origin = edges[0]  # relative to the first edge: keeps the cumulative sums small and exact
+    edges = edges - origin
+
+    def ramp(points):
+        # sum of max(edge - point, 0) over all points, at every edge
+        points = np.sort(np.asarray(points, dtype=float) - origin)
+        cumulative = np.concatenate(([0.0], np.cumsum(points)))
+        n = np.searchsorted(points, edges, side='right')
+        return n * edges - cumulative[n]
+
+    return np.diff(ramp(left) - ramp(right))
+
+def level_tiles(level, first, last):
+    """
+    Tiles of a level covering the epoch seconds first..last: [(key, bucket edges)].
+    month: one tile 'all' of month buckets; day: a tile per month ('YYYY-MM') of day
+    buckets; hour: a tile per day ('YYYY-MM-DD') of hour buckets.
+    """
+    import numpy as np
+    months = []
+    month = (_EPOCH + timedelta(seconds=int(first))).replace(day=1, hour=0, minute=0, second=0)
+    while not months or months[-1][1] <= last:
+        following = (month + timedelta(days=32)).replace(day=1)
+        months.append((month, _naive_epoch(following)))
+        month = following
+    if level == 'month':
+        return [('all', np.array([_naive_epoch(m) for m, _ in months] + [months[-1][1]]))]
+    if level == 'day':
+        return [(m.strftime('%Y-%m'), np.arange(_naive_epoch(m), end + 1, 86400)) for m, end in months]
+    day = int(first) - int(first) % 86400
+    return [((_EPOCH + timedelta(seconds=d)).strftime('%Y-%m-%d'), d + 3600 * np.arange(25))
+            for d in range(day, int(last) + 1, 86400)]
+
+def _bucket_counts(starts, edges):
+    """Starts per bucket between edges; starts outside the edges are not counted."""
+    import numpy as np
+    bucket = np.searchsorted(edges, starts, side='right') - 1
+    return np.bincount(bucket[(bucket >= 0) & (bucket < edges.size - 1)], minlength=edges.size - 1)
+
+def timeline_tiles(data, span=None):
+    """
+    Aggregate a TimelineData into {level: {key: tile}} for the zoomable timeline, with
+    tile = {"edges": [epoch s], "rows": [[bucket, type index, count, covered s]]}.
+    count is the number of incidents starting in the bucket, covered the seconds in it during
+    which an incident of that type was open. Only tiles with incidents are kept.
+    span=(first, last) epoch seconds: only the day and hour tiles overlapping it.
+    """
+    import numpy as np
+    types = sorted(data.spans)
+    seconds = [data.epoch_seconds([t]) for t in types]
+    # Overlapping incidents of a type are covered once
+    unions = []
+    for starts, ends in seconds:
+        left, width = merge_segments(starts, ends, 0)
+        unions.append((left, left + width))
+    first = min(int(starts.min()) for starts, _ in seconds)
+    last = max(int(ends.max()) for _, ends in seconds)
+    
+    tiles = {}
+    for level in TILE_LEVELS:
+        parts = level_tiles(level, first, last)
+        if span is not None and level != 'month':
+            parts = [(key, part_edges) for key, part_edges in parts
+                     if part_edges[0] <= span[1] and part_edges[-1] > span[0]]
+        tiles[level] = {}
+        if not parts:
+            continue
+        # All buckets of the level in one edge array; tile i owns buckets offsets[i]:offsets[i + 1]
+        edges = np.concatenate([part_edges[:-1] for _, part_edges in parts] + [parts[-1][1][-1:]])
+        offsets = np.cumsum([0] + [len(part_edges) - 1 for _, part_edges in parts])
+        counts = np.array([_bucket_counts(starts, edges) for starts, _ in seconds])
+        covered = np.rint([covered_seconds(left, right, edges) for left, right in unions]).astype(np.int64)
+        for (key, part_edges), a, b in zip(parts, offsets[:-1], offsets[1:]):
+            type_idx, bucket = np.nonzero((counts[:, a:b] > 0) | (covered[:, a:b] > 0))
+            if type_idx.size == 0:
+                continue
+            order = np.lexsort((type_idx, bucket))
+            rows = np.column_stack((bucket, type_idx, counts[type_idx, bucket + a], covered[type_idx, bucket + a]))
+            tiles[level][key] = {"edges": part_edges.tolist(), "rows": rows[order].tolist()}
+    return types, first, last, tiles
+
+_compact = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+def _tile_script(level, key, tile):
+    return f"netwatchTimeline.tile({_compact(level)},{_compact(key)},{_compact(tile)});\n"
+
+def _index_script(types, first, last, month, keys):
+    index = {"types": types, "first": first, "last": last, "month": month,
+             "tiles": {level: sorted(keys[level]) for level in TILE_LEVELS[1:]}}
+    return f"netwatchTimeline.index({_compact(index)});\n"
+
+def write_timeline_tiles(data, folder):
+    """
+    Write the tiles as small scripts the page loads on demand (works from file:// too):
+    index.js (types, range, tile keys and the month tile) plus day/<YYYY-MM>.js and
+    hour/<YYYY-MM-DD>.js. The folder is replaced as a whole.
+    """
+    import shutil
+    types, first, last, tiles = timeline_tiles(data)
+    tmp = f"{folder}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        for level in TILE_LEVELS[1:]:
+            os.makedirs(os.path.join(tmp, level))
+            for key, tile in tiles[level].items():
+                with open(os.path.join(tmp, level, f"{key}.js"), 'w', encoding='utf-8') as f:
+                    f.write(_tile_script(level, key, tile))
+        with open(os.path.join(tmp, 'index.js'), 'w', encoding='utf-8') as f:
+            f.write(_index_script(types, first, last, tiles['month']['all'], tiles))
+        old = f"{folder}.{os.getpid()}.old"
+        if os.path.exists(folder):
+            os.rename(folder, old)
+        os.rename(tmp, folder)
+        shutil.rmtree(old, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def update_timeline_tiles(data, folder, span):
+    """
+    Rewrite only the day and hour tiles overlapping span = (first, last) epoch seconds and
+    index.js; the other tiles of an earlier write_timeline_tiles() stay as they are, so the
+    incident types must be the same. Returns the files written, relative to folder.
+    """
+    types, first, last, tiles = timeline_tiles(data, span)
+    keys = {}
+    written = []
+    for level in TILE_LEVELS[1:]:
+        keys[level] = {name[:-3] for name in os.listdir(os.path.join(folder, level)) if name.endswith('.js')}
+        for key, tile in tiles[level].items():
+            _write_text(os.path.join(folder, level, f"{key}.js"), _tile_script(level, key, tile))
+            keys[level].add(key)
+            written.append(f"{level}/{key}.js")
+    _write_text(os.path.join(folder, 'index.js'), _index_script(types, first, last, tiles['month']['all'], keys))
+    return written + ['index.js']
+
+ZOOM_STYLE = """    <style>
+        .zoom-bar { display: flex; gap: 12px; align-items: center; margin: 10px 0; color: #555; }
+        .zoom-bar button { padding: 4px 12px; }
+        #zoom-box { position: relative; border: 1px solid #ddd; background: white; }
+        #zoom-canvas { display: block; width: 100%; cursor: grab; }
+        #zoom-tip { position: absolute; pointer-events: none; display: none; background: rgba(0,0,0,0.8);
+                    color: white; padding: 6px 8px; border-radius: 4px; font-size: 12px; white-space: nowrap; }
+    </style>
+"""
+
+ZOOM_TIMELINE_JS = r"""
+(function () {
+    // Bucket level by visible span: months above 120 days, days above 4 days, else hours
+    const LEVELS = [['month', 120 * 86400], ['day', 4 * 86400], ['hour', 0]];
+    const COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f',
+                    '#bcbd22', '#17becf'];
+    const ROW_H = 26, LEFT = 180, RIGHT = 10, AXIS_H = 26;
+    const TICKS = [3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 2 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+                   91 * 86400, 365 * 86400];
+    const box = document.getElementById('zoom-box');
+    const canvas = document.getElementById('zoom-canvas');
+    const tip = document.getElementById('zoom-tip');
+    const status = document.getElementById('zoom-status');
+    const ctx = canvas.getContext('2d');
+    const tiles = {month: {}, day: {}, hour: {}}, loading = new Set();
+    let index = null, v0 = 0, v1 = 1, width = 0, hits = [], drag = null;
+
+    const fmt = (t, n) => new Date(t * 1000).toISOString().slice(0, n).replace('T', ' ');
+    const fmtDur = s => s < 60 ? s + 's' : s < 3600 ? Math.round(s / 60) + 'm' :
+        Math.floor(s / 3600) + 'h ' + Math.round(s % 3600 / 60) + 'm';
+    const x = t => LEFT + (t - v0) / (v1 - v0) * (width - LEFT - RIGHT);
+    const time = px => v0 + (px - LEFT) / (width - LEFT - RIGHT) * (v1 - v0);
+    const level = () => LEVELS.find(([, min]) => v1 - v0 > min)[0];
+
+    window.netwatchTimeline = {
+        index(data) {
+            index = data;
+            tiles.month.all = data.month;
+            data.tiles.day = new Set(data.tiles.day);
+            data.tiles.hour = new Set(data.tiles.hour);
+            showAll();
+        },
+        tile(lv, key, data) {
+            tiles[lv][key] = data;
+            loading.delete(lv + '/' + key);
+            draw();
+        },
+    };
+
+    function needed(lv) {
+        // Keys of the tiles overlapping the view that exist (months for days, days for hours)
+        if (lv === 'month') return ['all'];
+        const keys = new Set(), n = lv === 'day' ? 7 : 10;
+        for (let t = Math.floor(v0 / 86400) * 86400; t < v1; t += 86400) {
+            const key = fmt(t, n);
+            if (index.tiles[lv].has(key)) keys.add(key);
+        }
+        return [...keys];
+    }
+
+    function load(lv, key) {
+        const id = lv + '/' + key;
+        if (tiles[lv][key] || loading.has(id)) return;
+        loading.add(id);
+        const script = document.createElement('script');
+        script.src = TILES + '/' + id + '.js';
+        script.onerror = () => loading.delete(id);
+        document.head.appendChild(script);
+    }
+
+    function resize() {
+        const ratio = window.devicePixelRatio || 1;
+        width = box.clientWidth;
+        const height = AXIS_H + index.types.length * ROW_H + 6;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.height = height + 'px';
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        draw();
+    }
+
+    function draw() {
+        if (!index) return;
+        const lv = level(), keys = needed(lv);
+        keys.forEach(key => load(lv, key));
+        ctx.clearRect(0, 0, width, canvas.height);
+        ctx.font = '12px Arial';
+        ctx.textBaseline = 'middle';
+        index.types.forEach((t, i) => {
+            ctx.fillStyle = i % 2 ? '#fafafa' : '#f0f0f0';
+            ctx.fillRect(LEFT, AXIS_H + i * ROW_H, width - LEFT - RIGHT, ROW_H);
+            ctx.fillStyle = '#333';
+            ctx.fillText(t, 6, AXIS_H + i * ROW_H + ROW_H / 2);
+        });
+
+        // Axis: the smallest tick step that leaves ~90 px per label
+        const step = TICKS.find(s => (x(v0 + s) - x(v0)) >= 90) || TICKS[TICKS.length - 1];
+        ctx.fillStyle = '#666';
+        ctx.strokeStyle = '#ddd';
+        for (let t = Math.ceil(v0 / step) * step; t < v1; t += step) {
+            const px = x(t);
+            ctx.beginPath();
+            ctx.moveTo(px, AXIS_H - 4);
+            ctx.lineTo(px, canvas.height);
+            ctx.stroke();
+            ctx.fillText(step < 86400 ? fmt(t, 16).slice(5) : fmt(t, 10), px + 3, AXIS_H / 2);
+        }
+
+        hits = [];
+        let missing = 0;
+        ctx.save();
+        ctx.beginPath();
+        ctx.rect(LEFT, 0, width - LEFT - RIGHT, canvas.height);
+        ctx.clip();
+        for (const key of keys) {
+            const tile = tiles[lv][key];
+            if (!tile) { missing++; continue; }
+            for (const [b, ti, count, covered] of tile.rows) {
+                const t0 = tile.edges[b], t1 = tile.edges[b + 1];
+                if (t1 < v0 || t0 > v1) continue;
+                const x0 = x(t0), x1 = x(t1), y = AXIS_H + ti * ROW_H + 3;
+                // Opacity shows how much of the bucket was covered by incidents
+                ctx.globalAlpha = 0.3 + 0.7 * Math.min(1, covered / (t1 - t0));
+                ctx.fillStyle = COLORS[ti % COLORS.length];
+                ctx.fillRect(x0, y, Math.max(1, x1 - x0 - 1), ROW_H - 6);
+                hits.push([x0, Math.max(x0 + 1, x1), y, y + ROW_H - 6, t0, t1, ti, count, covered]);
+            }
+        }
+        ctx.restore();
+        status.textContent = fmt(v0, 16) + ' to ' + fmt(v1, 16) + ' · ' + lv + ' buckets' +
+            (missing ? ' · loading ' + missing + ' tiles' : '');
+    }
+
+    function zoom(factor, px) {
+        const full = (index.last - index.first) * 1.2 + 3600;
+        const span = Math.min(full, Math.max(3600, (v1 - v0) * factor));
+        const anchor = time(px), share = (px - LEFT) / (width - LEFT - RIGHT);
+        v0 = anchor - share * span;
+        v1 = v0 + span;
+        draw();
+    }
+
+    function showAll() {
+        const pad = (index.last - index.first) * 0.02 + 60;
+        v0 = index.first - pad;
+        v1 = index.last + pad;
+        resize();
+    }
+
+    canvas.addEventListener('wheel', e => {
+        e.preventDefault();
+        zoom(Math.exp(e.deltaY * 0.002), e.offsetX);
+    }, {passive: false});
+    canvas.addEventListener('dblclick', e => zoom(0.25, e.offsetX));
+    canvas.addEventListener('mousedown', e => { drag = [e.offsetX, v0, v1]; canvas.style.cursor = 'grabbing'; });
+    window.addEventListener('mouseup', () => { drag = null; canvas.style.cursor = 'grab'; });
+    canvas.addEventListener('mousemove', e => {
+        if (drag) {
+            const shift = (drag[0] - e.offsetX) / (width - LEFT - RIGHT) * (drag[2] - drag[1]);
+            v0 = drag[1] + shift;
+            v1 = drag[2] + shift;
+            draw();
+        }
+        const hit = hits.find(h => e.offsetX >= h[0] && e.offsetX < h[1] && e.offsetY >= h[2] && e.offsetY < h[3]);
+        if (!hit) { tip.style.display = 'none'; return; }
+        tip.innerHTML = index.types[hit[6]] + '<br>' + fmt(hit[4], 16) + ' to ' + fmt(hit[5], 16) + '<br>' +
+            hit[7] + ' incidents · ' + fmtDur(hit[8]) + ' covered';
+        tip.style.display = 'block';
+        tip.style.left = Math.min(e.offsetX + 12, width - 260) + 'px';
+        tip.style.top = (e.offsetY + 12) + 'px';
+    });
+    canvas.addEventListener('mouseleave', () => { tip.style.display = 'none'; });
+    document.getElementById('zoom-all').addEventListener('click', showAll);
+    window.addEventListener('resize', () => index && resize());
+})();
 """
+
+def create_zoomable_timeline(incidents, output_path, tiles_dir=TILES_DIR):
+    """
+    Create the zoomable timeline: a page at output_path and its tiles in tiles_dir next to it.
+    incidents: list of incidents or a TimelineData.
+    """
+    if not incidents:
+        print("No incidents for the zoomable timeline.")
+        return
+    data = incidents if isinstance(incidents, TimelineData) else TimelineData(incidents)
+    write_timeline_tiles(data, os.path.join(os.path.dirname(output_path), tiles_dir))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Network Incidents Timeline</title>
+""")
+        f.write(HTML_STYLE)
+        f.write(ZOOM_STYLE)
+        f.write("""</head>
+<body>
+    <div class="container">
+        <h1>Network Incidents Timeline</h1>
+        <div class="zoom-bar">
+            <button id="zoom-all">Show all</button>
+            <span>Scroll to zoom, drag to pan, double-click to zoom in.</span>
+            <span id="zoom-status"></span>
+        </div>
+        <div id="zoom-box"><canvas id="zoom-canvas"></canvas><div id="zoom-tip"></div></div>
+    </div>
+""")
+        f.write(f'    <script>const TILES = {json.dumps(tiles_dir)};')
+        f.write(ZOOM_TIMELINE_JS)
+        f.write(f'</script>\n    <script src="{html.escape(tiles_dir)}/index.js"></script>\n</body>\n</html>\n')
+    print(f"Zoomable timeline saved to: {output_path}")
+
+# ---------- Parallel rendering ----------
+def temp_path(path):
+    """Temporary sibling of path (same directory and extension, so os.replace is atomic)."""
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}.{os.getpid()}.tmp{ext}")
+
+def _write_text(path, text):
+    """Replace path with text atomically."""
+    tmp = temp_path(path)
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def render_atomic(func, args, path):
+    """Call func(*args, tmp) and move the result to path; a failed render leaves path untouched."""
+    tmp = temp_path(path)
+    try:
+        func(*args, tmp)
+        if not os.path.exists(tmp):
+            return None
+        os.replace(tmp, path)
+        return path
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def render_figures(jobs, workers=0):
+    """
+    Render independent figures: jobs = [(func, args, path)], func(*args, output_path).
+    workers=0: one process per figure (capped at the CPU count); 1: in this process.
+    Returns ({path: Future}, executor or None); call executor.shutdown() when done.
+    """
+    from concurrent.futures import Future, ProcessPoolExecutor
+    if workers == 0:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        futures = {}
+        for func, args, path in jobs:
+            future = Future()
+            try:
+                future.set_result(render_atomic(func, args, path))
+            except Exception as e:
+                future.set_exception(e)
+            futures[path] = future
+        return futures, None
+    executor = ProcessPoolExecutor(max_workers=workers)
+    return {path: executor.submit(render_atomic, func, args, path) for func, args, path in jobs}, executor
+
+# Worker processes get the CSV path and stream what they need (cheaper than pickling the rows)
+def _render_timeline(source, output_path):
+    if isinstance(source, str):
+        source = summarize_csv(source, top=0, timeline=True).timeline
+    create_timeline_plot(source, output_path)
+
+def _render_heatmap(source, weight, output_path):
+    if isinstance(source, str):
+        source = summarize_csv(source, top=0, timeline=True).timeline
+    create_heatmaps(source, output_path, weight)
+
+def _render_zoomable(source, output_path):
+    if isinstance(source, str):
+        source = summarize_csv(source, top=0, timeline=True).timeline
+    create_zoomable_timeline(source, output_path)
+
+def _render_summary(source, output_path):
+    if isinstance(source, str):
+        source = summarize_csv(source, top=0)
+    create_summary_charts(source, os.path.dirname(output_path), os.path.basename(output_path))
+
+def _rendered(future):
+    """Wait for a chart; True if it was written (a failure is reported, not raised)."""
+    try:
+        return future.result() is not None
+    except Exception as e:
+        print(f"ERROR: Chart rendering failed: {e}")
+        return False
+
+# ---------- Render cache and watch mode ----------
+CACHE_FILE = '.render_cache.json'
+RENDER_CACHE_VERSION = 2  # bump when the look of the charts or the report changes
+
+def file_digest(path):
+    """SHA-256 of the input file (hex); identical input rows give identical keys."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def render_key(kind, *parts):
+    """Cache key of an output: hash of its kind and of everything it is rendered from."""
+    h = hashlib.sha256(f"{kind}/{RENDER_CACHE_VERSION}".encode())
+    for part in parts:
+        h.update(b'\0' + repr(part).encode())
+    return h.hexdigest()
+
+def timeline_key(digest):
+    return render_key('timeline', digest, TIMELINE_WIDTH_IN, TIMELINE_DPI)
+
+def heatmap_key(digest, weight):
+    return render_key('heatmap', digest, weight)
+
+def zoom_key(digest):
+    return render_key('zoom', digest, TILE_LEVELS)
+
+def array_digest(arrays):
+    """SHA-256 of numpy arrays (shape and bytes); repr() would abbreviate large arrays."""
+    import numpy as np
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(repr(a.shape).encode() + a.tobytes())
+    return h.hexdigest()
+
+# --watch keys the charts by what they draw, so rows that do not change the picture render nothing
+def segments_key(segments):
+    x0, x1, merged = segments
+    return render_key('timeline', x0, x1, list(merged), array_digest(a for pair in merged.values() for a in pair),
+                      TIMELINE_WIDTH_IN, TIMELINE_DPI)
+
+def matrices_key(matrices, weight):
+    calendar, first_day, week = matrices
+    return render_key('heatmap', weight, first_day, array_digest((calendar, week)))
+
+def tiles_key(types):
+    # The tiles on disk were written for these types (rows refer to them by index)
+    return render_key('tiles', types, TILE_LEVELS)
+
+def summary_key(type_counts, source_counts):
+    # The summary only shows the counts (in first-seen order), not the rows themselves
+    return render_key('summary', list(type_counts.items()), list(source_counts.items()))
+
+def report_key(digest, compress, figures, refresh=None, rows=None):
+    return render_key('report', digest, compress, list(figures), refresh, rows)
+
+def rows_key(index, compress, digest):
+    return render_key('rows', index, compress, digest)
+
+class RenderCache:
+    """
+    Keys of the rendered outputs (file name -> render_key) in CACHE_FILE of the output
+    directory. An output is fresh while its key is unchanged and the file still exists.
+    enabled=False ignores the stored keys (everything is rendered) but still records new ones.
+    """
+    def __init__(self, output_dir, enabled=True):
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.path = os.path.join(output_dir, CACHE_FILE)
+        self.keys = {}
+        if enabled:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    keys = json.load(f)
+                if isinstance(keys, dict):
+                    self.keys = keys
+            except (OSError, ValueError):
+                pass
     
-    # Reference images if they exist
-    timeline_path = os.path.join(os.path.dirname(output_path), 'incidents_timeline.png')
-    summary_path = os.path.join(os.path.dirname(output_path), 'incidents_summary.png')
+    def fresh(self, name, key):
+        return (self.enabled and self.keys.get(name) == key
+                and os.path.exists(os.path.join(self.output_dir, name)))
     
-    if os.path.exists(timeline_path):
-        html += f"""            <h3>Timeline</h3>
-            <img src="{os.path.basename(timeline_path)}" alt="Incidents Timeline">
-"""
+    def store(self, name, key):
+        self.keys[name] = key
     
-    if os.path.exists(summary_path):
-        html += f"""            <h3>Summary</h3>
-            <img src="{os.path.basename(summary_path)}" alt="Incidents Summary">
-"""
+    def save(self):
+        tmp = temp_path(self.path)
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.keys, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+class IncidentTail:
+    """
+    Follow a growing incidents.csv. poll() returns (incidents of the lines appended since
+    the last call, reset); a truncated or replaced file is read again from the start
+    (reset=True). An incomplete last line waits for its newline. digest() matches
+    file_digest() of the lines read so far.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._restart()
     
-    html += """        </div>
+    def _restart(self):
+        self.offset = 0
+        self.inode = None
+        self.buffer = b''
+        self.header = None
+        self.sha = hashlib.sha256()
+    
+    def digest(self):
+        return self.sha.hexdigest()
+    
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+        reset = False
+        if (self.inode is not None and st.st_ino != self.inode) or st.st_size < self.offset:
+            self._restart()
+            reset = True
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return [], reset
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        data = self.buffer + data
+        cut = data.rfind(b'\n') + 1
+        data, self.buffer = data[:cut], data[cut:]
+        if not data:
+            return [], reset
+        self.sha.update(data)
         
-        <h2>Detailed Incidents</h2>
-        <table>
-            <tr>
-                <th>Source</th>
-                <th>Type</th>
-                <th>Start</th>
-                <th>End</th>
-                <th>Duration</th>
-                <th>Details</th>
-            </tr>
-"""
+        reader = csv.reader(io.StringIO(data.decode('utf-8', errors='replace'), newline=''))
+        if self.header is None:
+            self.header = next(reader, None)
+            if self.header and self.header[0].startswith('\ufeff'):
+                self.header[0] = self.header[0][1:]
+        incidents = []
+        for values in reader:
+            row = parse_incident(dict(zip(self.header, values)))
+            if row:
+                incidents.append(row)
+        return incidents, reset
+
+ROWS_DIR = 'incidents_report_rows'
+
+class LiveReport:
+    """
+    Incidents of a watched incidents.csv with their IncidentSummary and (optionally) the
+    timeline data kept up to date row by row, so an update costs only the new rows. The rows
+    are hashed in chunks of HTML_CHUNK_ROWS (the row scripts of the report) and changed holds
+    the time range of the rows added since the outputs were last updated.
+    """
+    def __init__(self, timeline=True):
+        self.with_timeline = timeline
+        self.clear()
     
-    # Add incident rows
-    for inc in sorted(incidents, key=lambda x: x['start']):
-        source_class = f"type-{inc['source']}"
-        html += f"""            <tr>
-                <td><span class="incident-type {source_class}">{inc['source']}</span></td>
-                <td>{inc['type']}</td>
-                <td>{inc['start'].strftime(TIME_FMT)}</td>
-                <td>{inc['end'].strftime(TIME_FMT)}</td>
-                <td>{inc.get('duration', '')}</td>
-                <td>{inc.get('details', '')}</td>
-            </tr>
-"""
+    def clear(self):
+        self.incidents = []
+        self.summary = IncidentSummary()
+        self.timeline = TimelineData() if self.with_timeline else None
+        self.chunks = []
+        self.changed = None
+        self.reset = True  # the outputs on disk may hold other rows
     
-    html += """        </table>
-    </div>
-</body>
-</html>
-"""
+    def extend(self, incidents):
+        self.summary.extend(incidents)
+        for n, inc in enumerate(incidents, len(self.incidents)):
+            if n % HTML_CHUNK_ROWS == 0:
+                self.chunks.append(hashlib.sha256())
+            self.chunks[-1].update(repr((inc['source'], inc['type'], inc['start'], inc['end'],
+                                         inc.get('details'))).encode())
+        self.incidents.extend(incidents)
+        if self.timeline is not None:
+            self.timeline.extend(incidents)
+        if incidents:
+            first = min(_naive_epoch(inc['start']) for inc in incidents)
+            last = max(_naive_epoch(inc['end']) for inc in incidents)
+            if self.changed is not None:
+                first, last = min(first, self.changed[0]), max(last, self.changed[1])
+            self.changed = (first, last)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+    def chunk_rows(self, index):
+        return self.incidents[index * HTML_CHUNK_ROWS:(index + 1) * HTML_CHUNK_ROWS]
     
-    print(f"HTML report saved to: {output_path}")
+    def updated(self):
+        """The outputs show the current rows."""
+        self.changed = None
+        self.reset = False
+    
+    def write_html(self, figures, compress, refresh, rows, output_path):
+        _write_html_report(output_path, self.incidents, self.summary, figures, compress, refresh, rows)
 
-def main():
+def update_outputs(report, digest, cache, timeline=True, summary=True, heatmap=True, zoom=False, html=False,
+                   compress=False, refresh=None, weight='count'):
+    """
+    Re-render the outputs of a LiveReport that the rows added since the last call change;
+    returns the names written. The charts are keyed by what they draw, the zoomable timeline
+    rewrites only the tiles of the new rows and the report only the row chunks they are in.
+    """
+    jobs = []
+    if timeline:
+        segments = timeline_segments(report.timeline)
+        jobs.append((FIGURES[0], segments_key(segments), draw_timeline_segments, (segments,)))
+    if summary:
+        jobs.append((FIGURES[1], summary_key(report.summary.type_counts, report.summary.source_counts),
+                     draw_summary, (report.summary.type_counts, report.summary.source_counts)))
+    if heatmap:
+        matrices = heatmap_matrices(*report.timeline.epoch_seconds(), weight)
+        jobs.append((FIGURES[2], matrices_key(matrices, weight), draw_heatmaps, (matrices, weight)))
+    written = []
+    figures = _update_figures(jobs, cache, written)
+    if zoom and _update_zoom(report, digest, cache, written):
+        figures.append(FIGURES[3])
+    if html:
+        _update_report(report, digest, cache, figures, compress, refresh, written)
+    report.updated()
+    if written:
+        cache.save()
+    return written
+
+def _update_figures(jobs, cache, written):
+    """Render the stale charts of jobs = [((title, name), key, func, args)]; returns the figures on disk."""
+    figures = []
+    for (title, name), key, func, args in jobs:
+        if not cache.fresh(name, key):
+            try:
+                if render_atomic(func, args, os.path.join(cache.output_dir, name)) is None:
+                    continue
+            except Exception as e:
+                print(f"ERROR: Chart rendering failed: {e}")
+                continue
+            cache.store(name, key)
+            written.append(name)
+        figures.append((title, name))
+    return figures
+
+def _update_zoom(report, digest, cache, written):
+    """
+    Zoomable timeline: the tiles of the new rows only, or page and all tiles after a reset or
+    when the incident types changed. Returns whether it is on disk.
+    """
+    key = zoom_key(digest)
+    if cache.fresh(ZOOM_FILE, key):
+        return True
+    index = f"{TILES_DIR}/index.js"
+    types_key = tiles_key(sorted(report.timeline.spans))
+    try:
+        if (report.changed is not None and not report.reset and cache.fresh(index, types_key)
+                and os.path.exists(os.path.join(cache.output_dir, ZOOM_FILE))):
+            cache.keys.pop(index)  # a failure in between leaves the tiles incomplete
+            folder = os.path.join(cache.output_dir, TILES_DIR)
+            written.extend(f"{TILES_DIR}/{name}" for name in update_timeline_tiles(report.timeline, folder,
+                                                                                  report.changed))
+        elif render_atomic(_render_zoomable, (report.timeline,), os.path.join(cache.output_dir, ZOOM_FILE)):
+            written.append(ZOOM_FILE)
+        else:
+            return False
+    except Exception as e:
+        print(f"ERROR: Chart rendering failed: {e}")
+        return False
+    cache.store(ZOOM_FILE, key)
+    cache.store(index, types_key)
+    return True
+
+def _update_report(report, digest, cache, figures, compress, refresh, written):
+    """Report page and its row chunks; a chunk is only rewritten when its rows changed."""
+    folder = os.path.join(cache.output_dir, ROWS_DIR)
+    os.makedirs(folder, exist_ok=True)
+    rows = []
+    for i, sha in enumerate(report.chunks):
+        name, key = f"{ROWS_DIR}/{i}.js", rows_key(i, compress, sha.hexdigest())
+        if not cache.fresh(name, key):
+            render_atomic(write_row_chunk, (report.chunk_rows(i), compress), os.path.join(cache.output_dir, name))
+            cache.store(name, key)
+            written.append(name)
+        rows.append(f"{name}?v={key[:12]}")  # the browser must not reuse an older chunk
+    # Chunks of rows that are gone (the input was truncated)
+    for name in os.listdir(folder):
+        stem, ext = os.path.splitext(name)
+        if ext == '.js' and stem.isdigit() and int(stem) >= len(rows):
+            os.unlink(os.path.join(folder, name))
+            cache.keys.pop(f"{ROWS_DIR}/{name}", None)
+    key = report_key(digest, compress, figures, refresh, rows)
+    if not cache.fresh(REPORT_FILE, key):
+        render_atomic(report.write_html, (figures, compress, refresh, rows), os.path.join(cache.output_dir, REPORT_FILE))
+        cache.store(REPORT_FILE, key)
+        written.append(REPORT_FILE)
+
+def describe_written(written):
+    """Names for the watch log; files in a folder are counted instead of listed."""
+    names, folders = [], {}
+    for name in written:
+        folder = name.split('/', 1)[0] if '/' in name else None
+        if folder is None:
+            names.append(name)
+        else:
+            folders[folder] = folders.get(folder, 0) + 1
+    names.extend(f"{count} file(s) in {folder}/" for folder, count in folders.items())
+    return ', '.join(names) or 'nothing'
+
+def watch(input_path, output_dir, interval=2.0, timeline=True, summary=True, heatmap=True, zoom=False, html=False,
+          compress=False, weight='count', use_cache=True, iterations=None):
+    """
+    Keep the outputs up to date while input_path grows. Appended rows only update the
+    counts, the timeline data and the report rows; outputs whose key did not change are
+    left alone. iterations=None runs until Ctrl+C. Returns the LiveReport.
+    """
+    tail = IncidentTail(input_path)
+    report = LiveReport(timeline=timeline or heatmap or zoom)
+    cache = RenderCache(output_dir, enabled=use_cache)
+    refresh = max(1, round(interval)) if html else None
+    print(f"Watching {input_path} (every {interval:g}s, Ctrl+C to stop)")
+    polls = 0
+    try:
+        while iterations is None or polls < iterations:
+            incidents, reset = tail.poll()
+            if reset:
+                print("Input was truncated or replaced, reloading")
+                report.clear()
+            if incidents:
+                started = time.perf_counter()
+                report.extend(incidents)
+                written = update_outputs(report, tail.digest(), cache, timeline=timeline, summary=summary,
+                                         heatmap=heatmap, zoom=zoom, html=html, compress=compress, refresh=refresh,
+                                         weight=weight)
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"+{len(incidents)} incidents (total {len(report.incidents)}), "
+                      f"updated {describe_written(written)} in {elapsed:.0f} ms")
+            polls += 1
+            if iterations is None or polls < iterations:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return report
+
+def build_parser():
     parser = argparse.ArgumentParser(
         description='Visualize network incidents from incidents.csv',
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -385,52 +1745,141 @@ def main():
                        help='Output directory for visualizations (default: current directory)')
     parser.add_argument('--html', action='store_true',
                        help='Generate HTML report')
+    parser.add_argument('--compress-html', action='store_true',
+                       help='Embed the incident data in the HTML report gzip-compressed (smaller file)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                       help='Processes for rendering charts; 0 = one per chart, 1 = no worker processes (default: 0)')
     parser.add_argument('--no-timeline', action='store_true',
                        help='Skip timeline plot generation')
     parser.add_argument('--no-summary', action='store_true',
                        help='Skip summary charts generation')
-    
-    args = parser.parse_args()
+    parser.add_argument('--no-heatmap', action='store_true',
+                       help='Skip the day x hour and hour-of-week heatmaps')
+    parser.add_argument('--heatmap-weight', choices=HEATMAP_WEIGHTS, default='count',
+                       help='Heatmap cells show the incidents starting in the hour or the incident minutes within it '
+                            '(default: count)')
+    parser.add_argument('--zoom-timeline', action='store_true',
+                       help=f'Also write {ZOOM_FILE}, a zoomable timeline loading month/day/hour tiles from {TILES_DIR}/')
+    parser.add_argument('--top', type=int, default=TOP_INCIDENTS,
+                       help=f'Number of longest incidents listed in the console summary (default: {TOP_INCIDENTS})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help=f'Render everything even if the inputs are unchanged (keys are kept in {CACHE_FILE})')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep running and update the outputs whenever rows are appended to the input')
+    parser.add_argument('--interval', type=float, default=2.0,
+                       help='Seconds between checks of the input in --watch mode (default: 2)')
+    return parser
+
+def _chart_options(args):
+    """{file name: (render function, extra args)} of the charts this run wants, in FIGURES order."""
+    options = ((TIMELINE_FILE, _render_timeline, (), args.no_timeline),
+               (SUMMARY_FILE, _render_summary, (), args.no_summary),
+               (HEATMAP_FILE, _render_heatmap, (args.heatmap_weight,), args.no_heatmap),
+               (ZOOM_FILE, _render_zoomable, (), not args.zoom_timeline))
+    return {name: (func, extra) for name, func, extra, skip in options if not skip}
+
+def _load_for_report(args, draw_here):
+    """(incidents or None, IncidentSummary); the rows are only kept for the HTML table."""
+    print(f"Loading incidents from: {args.input}")
+    if args.html:
+        # The detailed table of the report needs every row
+        incidents = load_incidents(args.input)
+        summary = IncidentSummary(args.top)
+        summary.extend(incidents)
+        return incidents, summary
+    # Counts, durations and the longest incidents in one pass without keeping the rows
+    return None, summarize_csv(args.input, args.top, timeline=draw_here)
+
+def _chart_jobs(args, charts, cache, keys, incidents, summary, draw_here):
+    """(render_figures jobs of the stale charts, names of the fresh ones)."""
+    if args.jobs == 1:
+        data = summary.timeline if incidents is None or not draw_here else TimelineData(incidents)
+        sources = {TIMELINE_FILE: data, SUMMARY_FILE: summary, HEATMAP_FILE: data, ZOOM_FILE: data}
+    else:
+        sources = dict.fromkeys(charts, args.input)
+    jobs = []
+    cached = set()
+    for name, (func, extra) in charts.items():
+        if cache.fresh(name, keys[name]):
+            print(f"{name} is up to date (inputs unchanged)")
+            cached.add(name)
+        else:
+            jobs.append((func, (sources[name], *extra), os.path.join(args.output_dir, name)))
+    return jobs, cached
+
+def _write_report(args, futures, cached, cache, digest, incidents, summary):
+    """
+    The HTML report references only the charts of this run and waits just for those.
+    Returns {name: rendered} of the charts it waited for.
+    """
+    rendered = {}
+    figures = []
+    for title, name in FIGURES:
+        future = futures.get(os.path.join(args.output_dir, name))
+        if future is not None:
+            rendered[name] = _rendered(future)
+        if name in cached or rendered.get(name):
+            figures.append((title, name))
+    key = report_key(digest, args.compress_html, figures)
+    if cache.fresh(REPORT_FILE, key):
+        print(f"{REPORT_FILE} is up to date (inputs unchanged)")
+    else:
+        create_html_report(incidents, os.path.join(args.output_dir, REPORT_FILE), compress=args.compress_html,
+                           figures=figures, summary=summary)
+        cache.store(REPORT_FILE, key)
+    return rendered
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
     
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Load incidents
-    print(f"Loading incidents from: {args.input}")
-    incidents = load_incidents(args.input)
+    if args.watch:
+        watch(args.input, args.output_dir, interval=args.interval, timeline=not args.no_timeline,
+              summary=not args.no_summary, heatmap=not args.no_heatmap, zoom=args.zoom_timeline, html=args.html,
+              compress=args.compress_html, weight=args.heatmap_weight, use_cache=not args.no_cache)
+        return
     
-    if not incidents:
+    # Outputs whose inputs (rows, counts, options) are unchanged since the last run are kept
+    cache = RenderCache(args.output_dir, enabled=not args.no_cache)
+    digest = file_digest(args.input) if os.path.exists(args.input) else None
+    keys = {TIMELINE_FILE: timeline_key(digest), HEATMAP_FILE: heatmap_key(digest, args.heatmap_weight),
+            ZOOM_FILE: zoom_key(digest)}
+    charts = _chart_options(args)
+    # Timeline, heatmaps and tiles are drawn from the start/end times of all incidents
+    stale = [name for name in keys if name in charts and not cache.fresh(name, keys[name])]
+    draw_here = args.jobs == 1 and bool(stale)
+    
+    incidents, summary = _load_for_report(args, draw_here)
+    if not summary:
         print("No valid incidents found in the CSV file.")
         sys.exit(1)
     
-    print(f"Loaded {len(incidents)} incidents")
-    
-    # Generate visualizations
-    if not args.no_timeline:
-        timeline_path = os.path.join(args.output_dir, 'incidents_timeline.png')
-        create_timeline_plot(incidents, timeline_path)
+    print(f"Loaded {summary.total} incidents")
+    keys[SUMMARY_FILE] = summary_key(summary.type_counts, summary.source_counts)
     
-    if not args.no_summary:
-        create_summary_charts(incidents, args.output_dir)
-    
-    if args.html:
-        html_path = os.path.join(args.output_dir, 'incidents_report.html')
-        create_html_report(incidents, html_path)
+    # Independent charts render in parallel (each in its own process) and are written atomically
+    jobs, cached = _chart_jobs(args, charts, cache, keys, incidents, summary, draw_here)
+    futures, executor = render_figures(jobs, args.jobs)
+    try:
+        rendered = _write_report(args, futures, cached, cache, digest, incidents, summary) if args.html else {}
+        for path, future in futures.items():
+            name = os.path.basename(path)
+            if name not in rendered:
+                rendered[name] = _rendered(future)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    for name, ok in rendered.items():
+        if ok:
+            cache.store(name, keys[name])
+    cache.save()
     
     print(f"\nVisualization complete! Files saved to: {os.path.abspath(args.output_dir)}")
     
     # Print summary statistics
-    print("\n=== Summary ===")
-    print(f"Total incidents: {len(incidents)}")
-    type_counts = Counter(inc['type'] for inc in incidents)
-    print("\nIncidents by type:")
-    for inc_type, count in type_counts.most_common():
-        print(f"  {inc_type}: {count}")
-    
-    source_counts = Counter(inc['source'] for inc in incidents)
-    print("\nIncidents by source:")
-    for source, count in source_counts.most_common():
-        print(f"  {source}: {count}")
+    print_summary(summary)
 
 if __name__ == '__main__':
     main()